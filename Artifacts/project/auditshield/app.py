@@ -191,7 +191,7 @@ reconciler = HCCReconciliation()
 forecaster = ComplianceForecaster()
 reg_intel = RegulatoryIntelligence()
 emr_builder = EMRRuleBuilder()
-dashboard_mgr = DashboardManager()
+dashboard_mgr = DashboardManager(validation_engine=realtime_engine)
 
 # ==================== UI DEFINITION ====================
 
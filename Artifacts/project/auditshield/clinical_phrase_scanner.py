@@ -0,0 +1,221 @@
+"""
+Clinical Phrase Scanner - Multi-pattern condition detection for HCC reconciliation
+One Aho-Corasick pass per note finds every HCC phrase; word boundaries and
+NegEx-style negation cues ("no history of CHF") filter out false mentions
+"""
+import re
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+# Common missed HCC patterns (condition phrases that should carry the HCC)
+MISSING_HCC_PATTERNS = {
+    "HCC 36": [
+        "type 2 diabetes",
+        "diabetic neuropathy",
+        "diabetic nephropathy",
+    ],
+    "HCC 226": ["systolic heart failure", "diastolic heart failure", "CHF"],
+    "HCC 280": ["chronic bronchitis", "emphysema", "COPD"],
+    "HCC 327": ["chronic kidney disease stage 4", "CKD stage 4"],
+    "HCC 155": ["major depressive disorder", "MDD", "recurrent depression"],
+}
+
+# Cues that negate a condition mentioned shortly after them in the same clause
+NEGATION_CUES = re.compile(
+    r"\b(?:no|not|denies|denied|negative for|without|free of|absence of|"
+    r"rules? out|ruled out|r/o)\b"
+)
+# Phrases that contain a cue word but do not negate ("no change in CHF")
+PSEUDO_NEGATIONS = re.compile(
+    r"\b(?:no change|no increase|no decrease|no worsening|not only|without change)\b"
+)
+# Clause boundaries stop a cue from reaching later mentions
+CLAUSE_BREAKS = frozenset({".", ";", ":", "!", "?", "\n", "but", "however", "although", "except"})
+# Words (keeping "r/o"-style abbreviations whole) and clause-breaking punctuation
+_TOKEN = re.compile(r"[a-z0-9]+(?:/[a-z0-9]+)*|[.;:!?\n]")
+
+
+def tokenize(text: str) -> list[re.Match]:
+    """Lowercased word and clause-break tokens of a note"""
+    return list(_TOKEN.finditer((text or "").lower()))
+
+
+class ClinicalPhraseScanner:
+    """
+    Word-level Aho-Corasick automaton over all HCC phrases
+
+    Scanning costs one pass over the note's tokens regardless of how many phrases
+    are registered, instead of one substring search per phrase. Matching whole
+    tokens gives word boundaries for free ("CHFX" never matches "CHF").
+    """
+
+    def __init__(self, patterns: dict[str, list[str]] | None = None, negation_window: int = 6):
+        """
+        Args:
+            patterns: HCC code -> condition phrases (defaults to MISSING_HCC_PATTERNS)
+            negation_window: Words before a mention searched for a negation cue
+        """
+        self.patterns = patterns or MISSING_HCC_PATTERNS
+        self.negation_window = negation_window
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, str, str]]] = [[]]
+        for hcc_code, phrases in self.patterns.items():
+            for phrase in phrases:
+                self._add([t.group() for t in tokenize(phrase)], hcc_code)
+        self._link()
+
+    def _add(self, words: list[str], hcc_code: str):
+        state = 0
+        for word in words:
+            nxt = self._goto[state].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(words), hcc_code, " ".join(words)))
+
+    def _link(self):
+        """Breadth-first failure links; each state inherits its suffix state's outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(word, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _is_negated(self, words: list[str], clause_start: int, first: int) -> bool:
+        window = " ".join(words[max(clause_start, first - self.negation_window):first])
+        return bool(window) and bool(NEGATION_CUES.search(PSEUDO_NEGATIONS.sub(" ", window)))
+
+    def scan(self, text: str) -> list[dict[str, Any]]:
+        """
+        Find every phrase mention in a note
+
+        Returns: [{hcc_code, phrase, start, end, negated}] in text order
+        (character offsets into the note)
+        """
+        tokens = tokenize(text)
+        words = [t.group() for t in tokens]
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = clause_start = 0
+        for i, word in enumerate(words):
+            if word in CLAUSE_BREAKS:
+                clause_start = i + 1
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length, hcc_code, phrase in out[state]:
+                first = i - length + 1
+                matches.append({
+                    "hcc_code": hcc_code,
+                    "phrase": phrase,
+                    "start": tokens[first].start(),
+                    "end": tokens[i].end(),
+                    "negated": self._is_negated(words, clause_start, first),
+                })
+        matches.sort(key=lambda m: (m["start"], -m["end"]))
+        return matches
+
+    def find_hccs(self, text: str) -> dict[str, str]:
+        """HCC code -> first affirmed (non-negated) phrase mentioned in the note"""
+        found: dict[str, str] = {}
+        for match in self.scan(text):
+            if not match["negated"]:
+                found.setdefault(match["hcc_code"], match["phrase"])
+        return found
+
+
+def collect_candidates(encounters: Iterable[dict], scanner: ClinicalPhraseScanner) -> dict[tuple, dict]:
+    """
+    Stream encounters through the scanner
+
+    Returns: (patient_id, hcc_code) -> most recent encounter affirming the condition
+    (encounter dict plus matched_phrase)
+    """
+    candidates: dict[tuple, dict] = {}
+    for encounter in encounters:
+        for hcc_code, phrase in scanner.find_hccs(encounter.get("documentation_text") or "").items():
+            key = (encounter["patient_id"], hcc_code)
+            current = candidates.get(key)
+            if current is None or str(encounter.get("encounter_date")) > str(current.get("encounter_date")):
+                candidates[key] = {**encounter, "matched_phrase": phrase}
+    return candidates
+
+
+def filter_uncoded(db, candidates: dict[tuple, dict], cutoff_date: str) -> list[dict]:
+    """
+    Keep candidates whose HCC is not already coded for the patient since cutoff_date
+
+    Candidate keys go into a temp table and are resolved with one NOT EXISTS
+    anti-join against hcc_audit_trail, instead of one COUNT(*) per candidate.
+    """
+    if not candidates:
+        return []
+    ph = '%s' if db.db_type == 'postgresql' else '?'
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS reconciliation_candidates "
+                "(patient_id VARCHAR(50), hcc_code VARCHAR(20))"
+            )
+            cursor.execute("DELETE FROM reconciliation_candidates")
+            cursor.executemany(
+                f"INSERT INTO reconciliation_candidates (patient_id, hcc_code) VALUES ({ph}, {ph})",
+                list(candidates),
+            )
+            cursor.execute(
+                f"""
+                SELECT c.patient_id, c.hcc_code
+                FROM reconciliation_candidates c
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM hcc_audit_trail h
+                    WHERE h.patient_id = c.patient_id
+                    AND h.hcc_code = c.hcc_code
+                    AND h.encounter_date >= {ph}
+                )
+                """,
+                (cutoff_date,),
+            )
+            uncoded = {(row[0], row[1]) for row in cursor.fetchall()}
+            cursor.execute("DROP TABLE reconciliation_candidates")
+        finally:
+            cursor.close()
+    return [{**encounter, "hcc_code": key[1]} for key, encounter in candidates.items() if key in uncoded]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    scanner = ClinicalPhraseScanner()
+    note = "Pt denies chest pain. No history of CHF. COPD stable on inhalers; no change in MDD symptoms."
+    print(scanner.find_hccs(note))
+
+    filler = "Patient seen for follow up, vitals reviewed, medications reconciled. "
+    phrases = [p for group in MISSING_HCC_PATTERNS.values() for p in group]
+    notes = [filler * 8 + random.choice(phrases) for _ in range(5000)]
+    large = {**MISSING_HCC_PATTERNS, **{f"HCC X{i}": [f"condition {i} variant {j}" for j in range(5)] for i in range(200)}}
+
+    for label, patterns in (("default", MISSING_HCC_PATTERNS), ("1000 phrases", large)):
+        start = time.perf_counter()
+        naive = 0
+        for n in notes:
+            doc_text = n.lower()
+            naive += sum(any(k.lower() in doc_text for k in group) for group in patterns.values())
+        naive_s = time.perf_counter() - start
+        phrase_scanner = ClinicalPhraseScanner(patterns)
+        start = time.perf_counter()
+        found = sum(len(phrase_scanner.find_hccs(n)) for n in notes)
+        scan_s = time.perf_counter() - start
+        print(f"{label}: substring checks {naive} hits in {naive_s:.3f}s | automaton {found} hits in {scan_s:.3f}s")
@@ -16,10 +16,25 @@ class DashboardManager:
     - Compliance Teams (operational details)
     - Providers (personal performance)
     - Coders (validation queue)
+
+    Args:
+        validation_engine: Long-lived RealtimeValidationEngine whose worker
+            pool metrics are reported (default: one created on first use
+            and kept for this manager's lifetime)
     """
 
-    def __init__(self):
+    def __init__(self, validation_engine=None):
         self.db = get_db_manager()
+        self._validation_engine = validation_engine
+
+    @property
+    def validation_engine(self):
+        """The shared validation engine (its worker pool holds the live metrics)"""
+        if self._validation_engine is None:
+            from realtime_validation import RealtimeValidationEngine
+
+            self._validation_engine = RealtimeValidationEngine()
+        return self._validation_engine
 
     def create_dashboard_config(
         self,
@@ -102,12 +117,10 @@ class DashboardManager:
     def get_compliance_dashboard_data(self) -> dict:
         """Get operational metrics for compliance teams"""
         from hcc_reconciliation import HCCReconciliation
-        from realtime_validation import RealtimeValidationEngine
 
-        validation_engine = RealtimeValidationEngine()
         reconciler = HCCReconciliation()
 
-        validation_metrics = validation_engine.get_validation_dashboard_metrics()
+        validation_metrics = self.validation_engine.get_validation_dashboard_metrics()
         reconciliation_metrics = reconciler.get_reconciliation_dashboard()
 
         time_filter = (
@@ -154,10 +167,7 @@ class DashboardManager:
 
     def get_provider_dashboard_data(self, provider_id: str) -> dict:
         """Get personal performance metrics for individual provider"""
-        from realtime_validation import RealtimeValidationEngine
-
-        validation_engine = RealtimeValidationEngine()
-        feedback = validation_engine.get_provider_live_feedback(provider_id)
+        feedback = self.validation_engine.get_provider_live_feedback(provider_id)
 
         param_placeholder = "%s" if self.db.db_type == "postgresql" else "?"
         score_query = f"""
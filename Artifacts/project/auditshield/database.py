@@ -4,6 +4,8 @@ Unified interface for SQLite (dev) and PostgreSQL (prod)
 """
 import os
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Any
@@ -19,21 +21,87 @@ except ImportError:
     POSTGRES_AVAILABLE = False
 
 
+class SQLiteConnectionPool:
+    """
+    Thread-local SQLite connections opened once per thread with tuned pragmas
+    WAL lets readers run while a writer commits; busy_timeout makes writers queue
+    for the write lock instead of failing with "database is locked"
+    """
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = 5000,
+                 mmap_size: int = 256 * 1024 * 1024, cached_statements: int = 256):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._generation = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+        conn = self._connect()
+        with self._lock:
+            # Connections of finished threads are never reused
+            for _, stale in [c for c in self._connections if not c[0].is_alive()]:
+                stale.close()
+            self._connections = [c for c in self._connections if c[0].is_alive()]
+            self._connections.append((threading.current_thread(), conn))
+            self._local.conn, self._local.generation = conn, self._generation
+        return conn
+
+    def close_all(self):
+        """Close every pooled connection; threads reconnect on next use"""
+        with self._lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._generation += 1
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+
 class DatabaseManager:
     """
     Unified database interface supporting SQLite (dev) and PostgreSQL (prod)
     Handles connection pooling, query execution, and data aggregation
     """
 
-    def __init__(self, db_type: str = "sqlite", connection_string: str | None = None):
+    def __init__(self, db_type: str = "sqlite", connection_string: str | None = None,
+                 pool_connections: bool = True):
         """
         Initialize database manager
 
         Args:
             db_type: "sqlite" or "postgresql"
             connection_string: Connection string for PostgreSQL, or path for SQLite
+            pool_connections: SQLite only - reuse one WAL connection per thread
+                (False opens a fresh connection per query)
         """
         self.db_type = db_type.lower()
+        self._local = threading.local()
 
         if self.db_type == "postgresql" and POSTGRES_AVAILABLE:
             if not connection_string:
@@ -51,17 +119,28 @@ class DatabaseManager:
             self.db_path = connection_string or os.path.join(
                 os.path.dirname(__file__), "auditshield.db"
             )
-            self.pool = None
+            self.pool = SQLiteConnectionPool(self.db_path) if pool_connections else None
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        if self.db_type == "postgresql":
+        """Context manager for database connections (joins an open transaction on this thread)"""
+        tx_conn = getattr(self._local, "tx_conn", None)
+        if tx_conn is not None:
+            yield tx_conn
+        elif self.db_type == "postgresql":
             conn = self.pool.getconn()
             try:
                 yield conn
             finally:
                 self.pool.putconn(conn)
+        elif self.pool is not None:
+            conn = self.pool.connection()
+            try:
+                yield conn
+            finally:
+                # Uncommitted work is discarded, as closing a connection would
+                if conn.in_transaction:
+                    conn.rollback()
         else:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row
@@ -70,6 +149,45 @@ class DatabaseManager:
             finally:
                 conn.close()
 
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """
+        Run several statements on one connection and commit them together
+
+        execute_query/execute_many calls made inside the block join the transaction
+        instead of committing on their own. Nested calls join the outer transaction.
+
+        Args:
+            immediate: SQLite only - take the write lock up front (BEGIN IMMEDIATE)
+        """
+        tx_conn = getattr(self._local, "tx_conn", None)
+        if tx_conn is not None:
+            yield tx_conn
+            return
+        with self.get_connection() as conn:
+            if self.db_type == "sqlite":
+                conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            self._local.tx_conn = conn
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.tx_conn = None
+
+    def in_transaction(self) -> bool:
+        """True while this thread is inside transaction()"""
+        return getattr(self._local, "tx_conn", None) is not None
+
+    def close(self):
+        """Close pooled connections"""
+        if self.db_type == "postgresql":
+            self.pool.closeall()
+        elif self.pool is not None:
+            self.pool.close_all()
+
     def execute_query(self, query: str, params: tuple | None = None,
                      fetch: str = "all") -> Any:
         """Execute a query and return results"""
@@ -93,11 +211,70 @@ class DatabaseManager:
                         result = dict(result)
                     return result
                 else:
-                    conn.commit()
+                    if not self.in_transaction():
+                        conn.commit()
                     return cursor.rowcount
 
             except Exception as e:
-                conn.rollback()
+                if not self.in_transaction():
+                    conn.rollback()
+                raise Exception(f"Database error: {str(e)}")
+            finally:
+                cursor.close()
+
+    def execute_many(self, query: str, params_seq: list[tuple]) -> int:
+        """Execute a write query for each parameter tuple in one transaction"""
+        if not params_seq:
+            return 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(query, params_seq)
+                if not self.in_transaction():
+                    conn.commit()
+                return cursor.rowcount
+            except Exception as e:
+                if not self.in_transaction():
+                    conn.rollback()
+                raise Exception(f"Database error: {str(e)}")
+            finally:
+                cursor.close()
+
+    def iter_query(self, query: str, params: tuple | None = None, batch_size: int = 1000):
+        """Stream query results as dicts in batches (server-side cursor on PostgreSQL)"""
+        with self.get_connection() as conn:
+            if self.db_type == "postgresql":
+                cursor = conn.cursor(name=f"stream_{threading.get_ident()}", cursor_factory=RealDictCursor)
+                cursor.itersize = batch_size
+            else:
+                cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or ())
+                while rows := cursor.fetchmany(batch_size):
+                    for row in rows:
+                        yield dict(row)
+            except Exception as e:
+                raise Exception(f"Database error: {str(e)}")
+            finally:
+                cursor.close()
+                if self.db_type == "postgresql" and not self.in_transaction():
+                    conn.rollback()
+
+    def execute_insert(self, query: str, params: tuple, id_column: str) -> int:
+        """Insert one row and return its generated id (RETURNING on PostgreSQL, lastrowid on SQLite)"""
+        if self.db_type == "postgresql":
+            result = self.execute_query(f"{query} RETURNING {id_column}", params, fetch="one")
+            return result[id_column]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                if not self.in_transaction():
+                    conn.commit()
+                return cursor.lastrowid
+            except Exception as e:
+                if not self.in_transaction():
+                    conn.rollback()
                 raise Exception(f"Database error: {str(e)}")
             finally:
                 cursor.close()
@@ -340,21 +517,15 @@ class DatabaseManager:
             audit_data.get('confidence_score', 0.0), audit_data.get('ai_model_version', 'claude-sonnet-4')
         )
 
-        if self.db_type == "postgresql":
-            query += " RETURNING audit_id"
-            result = self.execute_query(query, params, fetch="one")
-            return result['audit_id']
-        else:
-            self.execute_query(query, params, fetch="none")
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT last_insert_rowid()")
-                return cursor.fetchone()[0]
+        return self.execute_insert(query, params, "audit_id")
 
     def update_hcc_audit(self, audit_id: int, validation_result: dict[str, Any]) -> int:
         """Update an existing HCC audit record with new validation results"""
+        return self.update_hcc_audits([(audit_id, validation_result)])
+
+    def update_hcc_audits(self, updates: list[tuple[int, dict[str, Any]]]) -> int:
+        """Update many HCC audit records with validation results in one transaction"""
         ph = '%s' if self.db_type == 'postgresql' else '?'
-        meat = validation_result.get('meat_elements', {})
 
         query = f"""
         UPDATE hcc_audit_trail SET
@@ -366,105 +537,110 @@ class DatabaseManager:
             confidence_score = {ph}, updated_at = CURRENT_TIMESTAMP
         WHERE audit_id = {ph}
         """
-        params = (
-            meat.get('monitor', {}).get('present', False),
-            meat.get('monitor', {}).get('evidence'),
-            meat.get('evaluate', {}).get('present', False),
-            meat.get('evaluate', {}).get('evidence'),
-            meat.get('assess', {}).get('present', False),
-            meat.get('assess', {}).get('evidence'),
-            meat.get('treat', {}).get('present', False),
-            meat.get('treat', {}).get('evidence'),
-            validation_result.get('meat_score', 0),
-            validation_result.get('validation_status', 'PENDING'),
-            validation_result.get('failure_reason'),
-            validation_result.get('confidence_score', 0.0),
-            audit_id
-        )
-        return self.execute_query(query, params, fetch="none")
+        params = []
+        for audit_id, validation_result in updates:
+            meat = validation_result.get('meat_elements', {})
+            params.append((
+                meat.get('monitor', {}).get('present', False),
+                meat.get('monitor', {}).get('evidence'),
+                meat.get('evaluate', {}).get('present', False),
+                meat.get('evaluate', {}).get('evidence'),
+                meat.get('assess', {}).get('present', False),
+                meat.get('assess', {}).get('evidence'),
+                meat.get('treat', {}).get('present', False),
+                meat.get('treat', {}).get('evidence'),
+                validation_result.get('meat_score', 0),
+                validation_result.get('validation_status', 'PENDING'),
+                validation_result.get('failure_reason'),
+                validation_result.get('confidence_score', 0.0),
+                audit_id
+            ))
+        return self.execute_many(query, params)
 
     def update_provider_scores(self, provider_id: str, lookback_months: int = 12):
         """Recalculate and update provider scorecard metrics from audit trail"""
-        cutoff_date = datetime.now() - timedelta(days=lookback_months * 30)
-        cutoff_str = cutoff_date.strftime('%Y-%m-%d')
-        ph = '%s' if self.db_type == 'postgresql' else '?'
+        self.refresh_provider_scores([provider_id], lookback_months)
 
-        calc_query = f"""
-        SELECT COUNT(*) as total_hccs,
-               SUM(CASE WHEN validation_status = 'PASS' THEN 1 ELSE 0 END) as validated_hccs,
-               ROUND(100.0 * SUM(CASE WHEN validation_status = 'PASS' THEN 1 ELSE 0 END) / COUNT(*), 2) as validation_rate,
-               SUM(CASE WHEN validation_status = 'FAIL' THEN raf_weight ELSE 0 END) * 1142.50 as financial_risk
-        FROM hcc_audit_trail
-        WHERE provider_id = {ph} AND encounter_date >= {ph}
+    def refresh_provider_scores(self, provider_ids: list[str] | None = None,
+                                lookback_months: int = 12) -> int:
         """
-        metrics = self.execute_query(calc_query, (provider_id, cutoff_str), fetch="one")
+        Recalculate scorecards and failure patterns for many providers at once
 
-        if not metrics or metrics['total_hccs'] == 0:
-            return
+        One grouped INSERT ... SELECT ... ON CONFLICT upserts provider_meat_scores and
+        failure_patterns is rebuilt set-wise, all in one transaction. Providers without
+        HCCs in the lookback window are left untouched.
 
-        validation_rate = metrics['validation_rate'] or 0.0
-        risk_tier = 'GREEN' if validation_rate >= 90 else ('YELLOW' if validation_rate >= 80 else 'RED')
+        Args:
+            provider_ids: Providers to refresh (None = every provider in the audit trail)
+            lookback_months: Audit trail window
 
-        if self.db_type == "postgresql":
-            self.execute_query(f"""
-            INSERT INTO provider_meat_scores (provider_id, total_hccs_submitted, total_hccs_validated, validation_rate, financial_risk_estimate, risk_tier, last_calculated_date, updated_at)
-            VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_DATE, CURRENT_TIMESTAMP)
-            ON CONFLICT (provider_id) DO UPDATE SET
-                total_hccs_submitted = EXCLUDED.total_hccs_submitted,
-                total_hccs_validated = EXCLUDED.total_hccs_validated,
-                validation_rate = EXCLUDED.validation_rate,
-                financial_risk_estimate = EXCLUDED.financial_risk_estimate,
-                risk_tier = EXCLUDED.risk_tier,
-                last_calculated_date = CURRENT_DATE,
-                updated_at = CURRENT_TIMESTAMP
-            """, (provider_id, metrics['total_hccs'], metrics['validated_hccs'], validation_rate, metrics['financial_risk'], risk_tier), fetch="none")
-        else:
-            # SQLite: UPDATE first (provider must exist from seed/creation)
-            existing = self.execute_query(
-                f"SELECT provider_name, specialty, npi FROM provider_meat_scores WHERE provider_id = {ph}",
-                (provider_id,), fetch="one"
-            )
-            pname = (existing or {}).get('provider_name') or 'Unknown'
-            pspec = (existing or {}).get('specialty') or ''
-            pnpi = (existing or {}).get('npi') or ''
-            self.execute_query(f"""
-            INSERT INTO provider_meat_scores (provider_id, provider_name, specialty, npi, total_hccs_submitted, total_hccs_validated, validation_rate, financial_risk_estimate, risk_tier, last_calculated_date, updated_at)
-            VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, DATE('now'), DATETIME('now'))
-            ON CONFLICT(provider_id) DO UPDATE SET
-                total_hccs_submitted = excluded.total_hccs_submitted,
-                total_hccs_validated = excluded.total_hccs_validated,
-                validation_rate = excluded.validation_rate,
-                financial_risk_estimate = excluded.financial_risk_estimate,
-                risk_tier = excluded.risk_tier,
-                last_calculated_date = DATE('now'),
-                updated_at = DATETIME('now')
-            """, (provider_id, pname, pspec, pnpi, metrics['total_hccs'], metrics['validated_hccs'], validation_rate, metrics['financial_risk'], risk_tier), fetch="none")
-
-        self._update_failure_patterns(provider_id, lookback_months)
-
-    def _update_failure_patterns(self, provider_id: str, lookback_months: int):
-        """Aggregate failure patterns from audit trail"""
+        Returns: number of provider scorecards upserted
+        """
+        if provider_ids is not None and not provider_ids:
+            return 0
         cutoff_date = datetime.now() - timedelta(days=lookback_months * 30)
         cutoff_str = cutoff_date.strftime('%Y-%m-%d')
         ph = '%s' if self.db_type == 'postgresql' else '?'
-
-        pattern_query = f"""
-        SELECT failure_reason as failure_category, hcc_category,
-               COUNT(*) as occurrence_count, MAX(encounter_date) as last_occurrence
+        if self.db_type == "postgresql":
+            today, now, excluded = "CURRENT_DATE", "CURRENT_TIMESTAMP", "EXCLUDED"
+        else:
+            today, now, excluded = "DATE('now')", "DATETIME('now')", "excluded"
+
+        scope = f"encounter_date >= {ph}"
+        scope_params: tuple = (cutoff_str,)
+        if provider_ids is not None:
+            scope += f" AND provider_id IN ({', '.join([ph] * len(provider_ids))})"
+            scope_params += tuple(provider_ids)
+
+        passed = "SUM(CASE WHEN validation_status = 'PASS' THEN 1 ELSE 0 END)"
+        rate = f"ROUND(100.0 * {passed} / COUNT(*), 2)"
+        upsert_query = f"""
+        INSERT INTO provider_meat_scores (
+            provider_id, provider_name, total_hccs_submitted, total_hccs_validated,
+            validation_rate, financial_risk_estimate, risk_tier, last_calculated_date, updated_at
+        )
+        SELECT provider_id, 'Unknown', COUNT(*), {passed}, {rate},
+               SUM(CASE WHEN validation_status = 'FAIL' THEN raf_weight ELSE 0 END) * 1142.50,
+               CASE WHEN {rate} >= 90 THEN 'GREEN' WHEN {rate} >= 80 THEN 'YELLOW' ELSE 'RED' END,
+               {today}, {now}
         FROM hcc_audit_trail
-        WHERE provider_id = {ph} AND encounter_date >= {ph}
+        WHERE {scope}
+        GROUP BY provider_id
+        ON CONFLICT (provider_id) DO UPDATE SET
+            total_hccs_submitted = {excluded}.total_hccs_submitted,
+            total_hccs_validated = {excluded}.total_hccs_validated,
+            validation_rate = {excluded}.validation_rate,
+            financial_risk_estimate = {excluded}.financial_risk_estimate,
+            risk_tier = {excluded}.risk_tier,
+            last_calculated_date = {today},
+            updated_at = {now}
+        """
+        delete_query = f"""
+        DELETE FROM failure_patterns
+        WHERE provider_id IN (SELECT DISTINCT provider_id FROM hcc_audit_trail WHERE {scope})
+        """
+        patterns_query = f"""
+        INSERT INTO failure_patterns (provider_id, failure_category, hcc_category, occurrence_count, last_occurrence)
+        SELECT provider_id, failure_reason, hcc_category, COUNT(*), MAX(encounter_date)
+        FROM hcc_audit_trail
+        WHERE {scope}
           AND validation_status = 'FAIL' AND failure_reason IS NOT NULL
-        GROUP BY failure_reason, hcc_category
+        GROUP BY provider_id, failure_reason, hcc_category
         """
-        patterns = self.execute_query(pattern_query, (provider_id, cutoff_str), fetch="all")
 
-        self.execute_query(f"DELETE FROM failure_patterns WHERE provider_id = {ph}", (provider_id,), fetch="none")
-
-        for pattern in patterns:
-            self.execute_query(f"""
-            INSERT INTO failure_patterns (provider_id, failure_category, hcc_category, occurrence_count, last_occurrence)
-            VALUES ({ph}, {ph}, {ph}, {ph}, {ph})
-            """, (provider_id, pattern['failure_category'], pattern['hcc_category'], pattern['occurrence_count'], pattern['last_occurrence']), fetch="none")
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(upsert_query, scope_params)
+                    refreshed = cursor.rowcount
+                    cursor.execute(delete_query, scope_params)
+                    cursor.execute(patterns_query, scope_params)
+                finally:
+                    cursor.close()
+            return refreshed
+        except Exception as e:
+            raise Exception(f"Database error: {str(e)}")
 
     def get_provider_hccs(self, provider_id: str, lookback_months: int = 12) -> list[dict]:
         """Get all HCC audit records for a provider (used by MEATValidator.batch_validate_provider)"""
@@ -586,6 +762,54 @@ class DatabaseManager:
         print("All data cleared")
 
 
+def benchmark_sqlite_throughput(db_path: str, pool_connections: bool = True, writers: int = 4,
+                                writes_per_writer: int = 200, readers: int = 2,
+                                reads_per_reader: int = 200) -> dict[str, Any]:
+    """
+    Measure SQLite read/write throughput with concurrent writer and reader threads
+
+    Returns: writes_per_sec, reads_per_sec, elapsed_seconds, errors
+    """
+    db = DatabaseManager(db_type="sqlite", connection_string=db_path, pool_connections=pool_connections)
+    db.initialize_schema()
+    errors: list[str] = []
+
+    def write(worker: int):
+        for n in range(writes_per_writer):
+            try:
+                db.insert_hcc_audit({
+                    'provider_id': f"BENCH{worker:02d}", 'patient_id': f"PAT{n:05d}",
+                    'encounter_date': datetime.now().strftime('%Y-%m-%d'), 'hcc_code': "HCC 226",
+                    'raf_weight': 0.331, 'validation_status': "PASS",
+                })
+            except Exception as e:
+                errors.append(str(e))
+
+    def read(worker: int):
+        for _ in range(reads_per_reader):
+            try:
+                db.get_provider_hccs(f"BENCH{worker % writers:02d}", 12)
+            except Exception as e:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    return {
+        'writes_per_sec': round(writers * writes_per_writer / elapsed, 1),
+        'reads_per_sec': round(readers * reads_per_reader / elapsed, 1),
+        'elapsed_seconds': round(elapsed, 3),
+        'errors': len(errors),
+    }
+
+
 def get_db_manager() -> DatabaseManager:
     """Factory function to get DatabaseManager with proper configuration"""
     db_type = os.getenv("DB_TYPE", "sqlite")
@@ -617,6 +841,12 @@ if __name__ == "__main__":
             confirm = input("Delete all data? (yes/no): ")
             if confirm.lower() == "yes":
                 db.cleanup_all_data()
+        elif cmd == "bench":
+            import tempfile
+            for pooled in (False, True):
+                with tempfile.TemporaryDirectory() as tmp:
+                    result = benchmark_sqlite_throughput(os.path.join(tmp, "bench.db"), pool_connections=pooled)
+                print(f"{'pooled WAL' if pooled else 'per-query connect'}: {result}")
         elif cmd == "test":
             scores = db.get_provider_scores(lookback_months=12)
             print(f"Providers: {len(scores)}")
@@ -625,6 +855,6 @@ if __name__ == "__main__":
                 print(f"Failure patterns: {len(db.get_provider_failure_patterns(pid, 12))}")
                 print("M.E.A.T. breakdown:", db.get_meat_element_breakdown(pid, 12).to_dict())
         else:
-            print("Usage: python database.py [init|seed|clean|test]")
+            print("Usage: python database.py [init|seed|clean|test|bench]")
     else:
-        print("Usage: python database.py [init|seed|clean|test]")
+        print("Usage: python database.py [init|seed|clean|test|bench]")
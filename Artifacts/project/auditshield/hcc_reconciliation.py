@@ -4,6 +4,7 @@ Proactively identify missing HCCs and unsupported HCCs before CMS discovers them
 """
 from datetime import datetime, timedelta
 
+from clinical_phrase_scanner import ClinicalPhraseScanner, collect_candidates, filter_uncoded
 from database import get_db_manager
 from meat_validator import MEATValidator
 
@@ -19,6 +20,7 @@ class HCCReconciliation:
     def __init__(self):
         self.db = get_db_manager()
         self.validator = MEATValidator()
+        self.scanner = ClinicalPhraseScanner()
         self.cms_base_rate = 1142.50
 
     def run_comprehensive_reconciliation(
@@ -64,19 +66,6 @@ class HCCReconciliation:
         - Corresponding HCC not coded
         - Documentation supports the HCC
         """
-        # Common missed HCC patterns
-        missing_patterns = {
-            "HCC 36": [
-                "type 2 diabetes",
-                "diabetic neuropathy",
-                "diabetic nephropathy",
-            ],
-            "HCC 226": ["systolic heart failure", "diastolic heart failure", "CHF"],
-            "HCC 280": ["chronic bronchitis", "emphysema", "COPD"],
-            "HCC 327": ["chronic kidney disease stage 4", "CKD stage 4"],
-            "HCC 155": ["major depressive disorder", "MDD", "recurrent depression"],
-        }
-
         recommendations = []
 
         param_placeholder = "%s" if self.db.db_type == "postgresql" else "?"
@@ -84,7 +73,7 @@ class HCCReconciliation:
             datetime.now() - timedelta(days=lookback_months * 30)
         ).strftime("%Y-%m-%d")
 
-        # Find encounters with documentation mentioning conditions but HCC not coded
+        # Stream every encounter note through the phrase scanner (no encounter cap)
         query = f"""
         SELECT DISTINCT
             patient_id,
@@ -95,74 +84,54 @@ class HCCReconciliation:
         FROM hcc_audit_trail
         WHERE encounter_date >= {param_placeholder}
         AND documentation_text IS NOT NULL
-        LIMIT 100
         """
 
-        encounters = self.db.execute_query(query, (cutoff_date,), fetch="all")
-
-        for encounter in encounters:
-            doc_text = (encounter.get("documentation_text") or "").lower()
-
-            # Check for missing HCCs
-            for hcc_code, keywords in missing_patterns.items():
-                if any(keyword.lower() in doc_text for keyword in keywords):
-                    check_query = f"""
-                    SELECT COUNT(*) as count
-                    FROM hcc_audit_trail
-                    WHERE patient_id = {param_placeholder}
-                    AND hcc_code = {param_placeholder}
-                    AND encounter_date >= {param_placeholder}
-                    """
-
-                    exists = self.db.execute_query(
-                        check_query,
-                        (
-                            encounter["patient_id"],
-                            hcc_code,
-                            cutoff_date,
-                        ),
-                        fetch="one",
-                    )
-
-                    if exists and (exists.get("count") or 0) == 0:
-                        validation = self.validator.validate_hcc_documentation(
-                            hcc_code=hcc_code,
-                            diagnosis=f"Suspected {hcc_code}",
-                            documentation=encounter["documentation_text"],
-                            encounter_date=str(encounter["encounter_date"]),
-                        )
-
-                        if (
-                            validation.get("confidence_score", 0) >= min_confidence
-                            and validation.get("validation_status") == "PASS"
-                        ):
-                            raf_weight = self._get_raf_weight(hcc_code)
-                            financial_impact = raf_weight * self.cms_base_rate
-
-                            hcc_desc = self.validator._categorize_hcc(
-                                hcc_code, ""
-                            )
-
-                            recommendation = {
-                                "patient_id": encounter["patient_id"],
-                                "encounter_id": encounter.get("encounter_id"),
-                                "hcc_code": hcc_code,
-                                "hcc_description": hcc_desc,
-                                "supporting_evidence": (
-                                    (encounter.get("documentation_text") or "")[:200]
-                                    + "..."
-                                ),
-                                "confidence_score": validation["confidence_score"],
-                                "financial_impact": round(financial_impact, 2),
-                                "provider_id": encounter.get("provider_id"),
-                            }
-
-                            recommendations.append(recommendation)
-
-                            self._save_reconciliation_record(
-                                reconciliation_type="ADD",
-                                **recommendation,
-                            )
+        candidates = collect_candidates(
+            self.db.iter_query(query, (cutoff_date,)), self.scanner
+        )
+
+        # Keep conditions whose HCC is not already coded for the patient
+        uncoded = [
+            {**encounter, "diagnosis": f"Suspected {encounter['hcc_code']}"}
+            for encounter in filter_uncoded(self.db, candidates, cutoff_date)
+        ]
+
+        # One cached M.E.A.T. prompt per encounter (all its candidate HCCs),
+        # encounters in parallel, instead of one call per candidate
+        for validation in self.validator.batch.validate_hccs(uncoded):
+            hcc_code = validation["hcc_code"]
+
+            if (
+                validation.get("confidence_score", 0) >= min_confidence
+                and validation.get("validation_status") == "PASS"
+            ):
+                raf_weight = self._get_raf_weight(hcc_code)
+                financial_impact = raf_weight * self.cms_base_rate
+
+                hcc_desc = self.validator._categorize_hcc(
+                    hcc_code, ""
+                )
+
+                recommendation = {
+                    "patient_id": validation["patient_id"],
+                    "encounter_id": validation.get("encounter_id"),
+                    "hcc_code": hcc_code,
+                    "hcc_description": hcc_desc,
+                    "supporting_evidence": (
+                        (validation.get("documentation_text") or "")[:200]
+                        + "..."
+                    ),
+                    "confidence_score": validation["confidence_score"],
+                    "financial_impact": round(financial_impact, 2),
+                    "provider_id": validation.get("provider_id"),
+                }
+
+                recommendations.append(recommendation)
+
+                self._save_reconciliation_record(
+                    reconciliation_type="ADD",
+                    **recommendation,
+                )
 
         return recommendations
 
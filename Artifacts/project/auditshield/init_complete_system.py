@@ -381,12 +381,12 @@ def seed_comprehensive_demo_data(db):
                     fetch="none",
                 )
 
-        # Update provider scores
-        db.update_provider_scores(provider_id, lookback_months=12)
-
         if (i + 1) % 5 == 0 or (i + 1) == num_providers:
             print(f"   Progress: {i + 1}/{num_providers} providers created")
 
+    # Update provider scores for every seeded provider in one pass
+    db.refresh_provider_scores(lookback_months=12)
+
     total_encounters = num_providers * months_history * 12  # ~12 avg encounters/month
     print("   [OK] Demo data seeding complete!")
     print(f"      - {num_providers} providers")
@@ -0,0 +1,515 @@
+"""
+Batched M.E.A.T. validation
+Validates all HCCs of one encounter's documentation in a single structured prompt,
+runs encounters concurrently under a rate-limit semaphore and caches verdicts
+by hash(documentation, hcc_code, prompt version)
+
+Backends:
+- ClaudeEncounterBackend: one Claude call per encounter (per HCC group)
+- RuleBasedEncounterBackend: deterministic keyword rules for offline tests and benchmarks
+"""
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PROMPT_VERSION = "meat-encounter-v1"
+SECOND_OPINION_THRESHOLD = 75  # confidence below this gets a second pass
+
+MEAT_SYSTEM_PROMPT = """You are a certified risk adjustment coder (CRC) performing CMS RADV audit validation.
+
+Your task is to determine if this HCC code would survive a CMS audit based on M.E.A.T. criteria:
+- Monitor: Signs/symptoms, lab tracking, disease progression
+- Evaluate: Test result interpretation, clinical data review
+- Assess: Clinical judgment, counseling, decision-making
+- Treat: Medications, referrals, procedures, treatment plan
+
+CRITICAL RULES:
+1. Problem lists or past medical history alone = FAIL
+2. "History of" cancer = FAIL (unless active treatment/surveillance)
+3. Unspecified diagnoses without complications = FAIL for complication HCCs
+4. At least ONE M.E.A.T. element with specific evidence = PASS
+5. Generic statements like "chronic conditions stable" without specifics = FAIL
+
+Return ONLY valid JSON, no markdown formatting."""
+
+_RESULT_SCHEMA = """{
+        "meat_elements": {
+            "monitor": {"present": true/false, "evidence": "exact quote from documentation or null"},
+            "evaluate": {"present": true/false, "evidence": "exact quote or null"},
+            "assess": {"present": true/false, "evidence": "exact quote or null"},
+            "treat": {"present": true/false, "evidence": "exact quote or null"}
+        },
+        "validation_status": "PASS/FAIL",
+        "confidence_score": 85,
+        "failure_reason": "specific reason or null",
+        "recommendations": "specific documentation improvements needed"
+    }"""
+
+MEAT_ELEMENTS = ("monitor", "evaluate", "assess", "treat")
+
+
+# ==================== HCC HELPERS ====================
+
+def categorize_hcc(hcc_code: str) -> str:
+    """Map HCC code to category from Top 10 list"""
+    match = re.search(r'\d+', hcc_code)
+    numeric_code = int(match.group()) if match else 0
+
+    if 36 <= numeric_code <= 38:
+        return 'Diabetes with Complications'
+    elif numeric_code == 226:
+        return 'Congestive Heart Failure'
+    elif numeric_code == 280:
+        return 'COPD'
+    elif 326 <= numeric_code <= 329:
+        return 'Chronic Kidney Disease'
+    elif numeric_code == 155:
+        return 'Major Depressive Disorder'
+    elif numeric_code == 264:
+        return 'Vascular Disease/PVD'
+    elif numeric_code == 22:
+        return 'Morbid Obesity'
+    elif numeric_code == 238:
+        return 'Specified Heart Arrhythmias'
+    elif numeric_code == 92:
+        return 'Rheumatoid Arthritis'
+    elif 17 <= numeric_code <= 21:
+        return 'Active Cancers'
+    else:
+        return 'Other HCC'
+
+
+def is_high_impact_hcc(hcc_code: str) -> bool:
+    """Check if HCC is in Top 10 high-impact list"""
+    match = re.search(r'\d+', hcc_code)
+    numeric_code = int(match.group()) if match else 0
+
+    high_impact_ranges = [(36, 38), (17, 21), (326, 329)]
+    high_impact_singles = [226, 280, 155, 264, 22, 238, 92]
+
+    return (numeric_code in high_impact_singles or
+            any(start <= numeric_code <= end for start, end in high_impact_ranges))
+
+
+def verdict_cache_key(documentation: str, hcc_code: str, prompt_version: str = PROMPT_VERSION) -> str:
+    """SHA-256 of documentation, HCC code and prompt version"""
+    payload = "\x1f".join((prompt_version, hcc_code.strip().upper(), documentation or ""))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def fallback_result(reason: str, recommendations: str = "Manual review required") -> dict:
+    """HUMAN_REVIEW result for calls that could not be validated (never cached)"""
+    return {
+        "meat_elements": {e: {"present": False, "evidence": None} for e in MEAT_ELEMENTS},
+        "validation_status": "HUMAN_REVIEW",
+        "confidence_score": 0,
+        "failure_reason": reason,
+        "recommendations": recommendations,
+        "meat_score": 0,
+        "_transient": True,
+    }
+
+
+def _with_meat_score(result: dict) -> dict:
+    elements = result.get("meat_elements") or {}
+    result["meat_elements"] = {
+        e: {
+            "present": bool((elements.get(e) or {}).get("present")),
+            "evidence": (elements.get(e) or {}).get("evidence"),
+        }
+        for e in MEAT_ELEMENTS
+    }
+    result["meat_score"] = sum(1 for e in result["meat_elements"].values() if e["present"])
+    result.setdefault("validation_status", "HUMAN_REVIEW")
+    result.setdefault("confidence_score", 0)
+    return result
+
+
+# ==================== VERDICT CACHE ====================
+
+class VerdictCache:
+    """Thread-safe LRU cache of per-HCC verdicts"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            result = self._items.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: dict):
+        with self._lock:
+            self._items[key] = copy.deepcopy(result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+# ==================== BACKENDS ====================
+
+class ClaudeEncounterBackend:
+    """Validates all HCCs of an encounter in one Claude call"""
+
+    def __init__(self, client, model: str = "claude-sonnet-4-20250514"):
+        self.client = client
+        self.model = model
+
+    def validate_encounter(self, documentation: str, hccs: list[tuple[str, str]],
+                           encounter_date: str, first_results: dict | None = None) -> dict:
+        """
+        Args:
+            hccs: (hcc_code, diagnosis) pairs
+            first_results: hcc_code -> first-pass result (requests a second opinion)
+
+        Returns: hcc_code -> result dict
+        """
+        codes = [code for code, _ in hccs]
+        if not self.client:
+            return {
+                code: fallback_result(
+                    "ANTHROPIC_API_KEY not configured (add Space secret or .env)",
+                    "Configure ANTHROPIC_API_KEY to enable M.E.A.T. validation",
+                ) | {"validation_status": "FAIL"}
+                for code in codes
+            }
+
+        hcc_lines = "\n".join(f"- {code}: {dx or code}" for code, dx in hccs)
+        if first_results:
+            prior = "\n".join(
+                f"- {code}: {first_results[code]['validation_status']} "
+                f"with {first_results[code]['confidence_score']}% confidence"
+                for code in codes
+            )
+            header = f"""SECOND OPINION REVIEW:
+
+The first reviewer assessed these HCCs as:
+{prior}
+Please independently re-evaluate each one.
+
+"""
+        else:
+            header = ""
+        user_prompt = f"""{header}Encounter Date: {encounter_date}
+
+Clinical Documentation:
+{documentation}
+
+HCC Codes to validate against this documentation:
+{hcc_lines}
+
+Provide one assessment per HCC code as a JSON object keyed by the exact HCC code, in this format:
+{{
+    "{codes[0]}": {_RESULT_SCHEMA}
+}}"""
+
+        try:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=min(8000, 1000 + 700 * len(codes)),
+                system=MEAT_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": user_prompt}],
+            )
+            return parse_encounter_response(response.content[0].text, codes)
+        except Exception as e:
+            return {code: fallback_result(f"AI validation error: {str(e)}") for code in codes}
+
+
+def parse_encounter_response(response_text: str, hcc_codes: list[str]) -> dict:
+    """Parse a per-HCC JSON object; missing or malformed entries fall back to HUMAN_REVIEW"""
+    response_text = re.sub(r'```json\n?', '', response_text)
+    response_text = re.sub(r'```\n?', '', response_text)
+    try:
+        parsed = json.loads(response_text)
+    except json.JSONDecodeError as e:
+        return {code: fallback_result(f"AI parsing error: {str(e)}") for code in hcc_codes}
+    if not isinstance(parsed, dict):
+        return {code: fallback_result("AI parsing error: expected a JSON object") for code in hcc_codes}
+
+    normalized = {str(k).strip().upper(): v for k, v in parsed.items()}
+    results = {}
+    for code in hcc_codes:
+        entry = normalized.get(code.strip().upper())
+        if isinstance(entry, dict) and isinstance(entry.get("meat_elements"), dict):
+            results[code] = _with_meat_score(dict(entry))
+        else:
+            results[code] = fallback_result(f"AI response missing assessment for {code}")
+    return results
+
+
+class RuleBasedEncounterBackend:
+    """
+    Deterministic keyword-based M.E.A.T. rules (no API calls)
+
+    Stands in for Claude in offline tests and throughput benchmarks; an HCC passes
+    when a sentence mentioning its condition carries at least one M.E.A.T. element.
+    """
+
+    ELEMENT_TERMS = {
+        "monitor": ("stable", "symptom", "monitor", "follow", "weight", "blood pressure", "edema",
+                    "a1c", "trend", "progress", "vitals"),
+        "evaluate": ("lab", "result", "reviewed", "echo", "egfr", "creatinine", "x-ray", "imaging",
+                     "spirometry", "ejection fraction", "scan", "biopsy"),
+        "assess": ("assess", "controlled", "worsening", "improv", "counsel", "discussed",
+                   "impression", "severity", "stage"),
+        "treat": ("mg", "continue", "start", "prescri", "medication", "insulin", "metformin",
+                  "inhaler", "diuretic", "furosemide", "lisinopril", "refer", "dialysis",
+                  "chemo", "therapy", "managed with"),
+    }
+    CONDITION_TERMS = {
+        'Diabetes with Complications': ("diabet", "dm2", "t2dm", "a1c", "neuropathy", "nephropathy"),
+        'Congestive Heart Failure': ("chf", "heart failure", "hfref", "hfpef"),
+        'COPD': ("copd", "emphysema", "chronic bronchitis"),
+        'Chronic Kidney Disease': ("ckd", "kidney", "renal", "egfr"),
+        'Major Depressive Disorder': ("depress", "mdd", "phq"),
+        'Vascular Disease/PVD': ("pvd", "pad", "vascular", "claudication"),
+        'Morbid Obesity': ("obes", "bmi"),
+        'Specified Heart Arrhythmias': ("atrial", "afib", "a-fib", "arrhythm", "flutter"),
+        'Rheumatoid Arthritis': ("rheumatoid", "ra flare"),
+        'Active Cancers': ("cancer", "carcinoma", "tumor", "malignan", "lymphoma", "leukemia"),
+    }
+    HISTORY_ONLY = re.compile(r"\b(history of|h/o|hx of|problem list|pmh)\b", re.IGNORECASE)
+    SENTENCE = re.compile(r"[^.;\n]+")
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency  # simulated per-call latency (benchmarks)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def validate_encounter(self, documentation: str, hccs: list[tuple[str, str]],
+                           encounter_date: str, first_results: dict | None = None) -> dict:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        sentences = [s.strip() for s in self.SENTENCE.findall(documentation or "") if s.strip()]
+        return {code: self._validate_hcc(code, dx, sentences) for code, dx in hccs}
+
+    def _validate_hcc(self, hcc_code: str, diagnosis: str, sentences: list[str]) -> dict:
+        terms = self.CONDITION_TERMS.get(categorize_hcc(hcc_code))
+        if terms:
+            relevant = [s for s in sentences if any(t in s.lower() for t in terms)]
+        else:
+            relevant = sentences
+        current = [s for s in relevant if not self.HISTORY_ONLY.search(s)]
+
+        elements = {}
+        for element, keywords in self.ELEMENT_TERMS.items():
+            evidence = next((s for s in current if any(k in s.lower() for k in keywords)), None)
+            elements[element] = {"present": evidence is not None, "evidence": evidence}
+        present = [e for e, data in elements.items() if data["present"]]
+
+        if present:
+            missing = [e.upper() for e in MEAT_ELEMENTS if e not in present]
+            result = {
+                "meat_elements": elements,
+                "validation_status": "PASS",
+                "confidence_score": min(95, 70 + 6 * len(present)),
+                "failure_reason": None,
+                "recommendations": (
+                    f"Strengthen {', '.join(missing)} documentation" if missing else "No changes needed"
+                ),
+            }
+        else:
+            if not relevant:
+                reason = "Condition not documented in encounter"
+            elif not current:
+                reason = "History-only mention without current management"
+            else:
+                reason = "No M.E.A.T. element documented"
+            result = {
+                "meat_elements": elements,
+                "validation_status": "FAIL",
+                "confidence_score": 80,
+                "failure_reason": reason,
+                "recommendations": "Document current monitoring, evaluation, assessment or treatment",
+            }
+        return _with_meat_score(result)
+
+
+# ==================== BATCH VALIDATOR ====================
+
+class BatchMEATValidator:
+    """
+    Concurrent, cached encounter-level M.E.A.T. validation
+
+    Args:
+        backend: ClaudeEncounterBackend or RuleBasedEncounterBackend
+        max_concurrency: Encounters validated in parallel
+        max_in_flight: Concurrent backend calls (rate-limit semaphore)
+        cache: VerdictCache shared across calls (default: new cache)
+        prompt_version: Part of the cache key; bump when prompts change
+    """
+
+    def __init__(self, backend, max_concurrency: int = 4, max_in_flight: int = 4,
+                 cache: VerdictCache | None = None, prompt_version: str = PROMPT_VERSION):
+        self.backend = backend
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache if cache is not None else VerdictCache()
+        self.prompt_version = prompt_version
+        self._rate_limit = threading.BoundedSemaphore(max(1, max_in_flight))
+        self.last_stats: dict = {}
+
+    def validate_encounter(self, documentation: str, hccs: list[tuple[str, str]],
+                           encounter_date: str) -> dict:
+        """Validate (hcc_code, diagnosis) pairs against one encounter; returns hcc_code -> result"""
+        results = {}
+        todo = []
+        for code, diagnosis in hccs:
+            cached = self.cache.get(verdict_cache_key(documentation, code, self.prompt_version))
+            if cached is not None:
+                results[code] = cached
+            elif code not in results and all(code != c for c, _ in todo):
+                todo.append((code, diagnosis))
+
+        if todo:
+            first = self._call(documentation, todo, encounter_date)
+
+            # Self-correction: one second-opinion call for all low-confidence HCCs
+            low = [(c, d) for c, d in todo if first[c].get("confidence_score", 0) < SECOND_OPINION_THRESHOLD]
+            if low:
+                second = self._call(documentation, low, encounter_date, first_results=first)
+                for code, _ in low:
+                    a, b = first[code], second[code]
+                    if a.get("_transient") or b.get("_transient"):
+                        first[code] = a if not a.get("_transient") else b
+                    elif b["validation_status"] != a["validation_status"]:
+                        a["validation_status"] = "HUMAN_REVIEW"
+                        a["review_reason"] = "AI model disagreement on validation"
+                    elif b["confidence_score"] > a["confidence_score"]:
+                        first[code] = b
+
+            for code, _ in todo:
+                result = first[code]
+                result["hcc_category"] = categorize_hcc(code)
+                result["is_high_impact"] = is_high_impact_hcc(code)
+                if not result.pop("_transient", False):
+                    self.cache.put(verdict_cache_key(documentation, code, self.prompt_version), result)
+                results[code] = result
+        return results
+
+    def _call(self, documentation: str, hccs: list[tuple[str, str]], encounter_date: str,
+              first_results: dict | None = None) -> dict:
+        with self._rate_limit:
+            return self.backend.validate_encounter(
+                documentation, hccs, encounter_date, first_results=first_results
+            )
+
+    def validate_hccs(self, hccs: list[dict]) -> list[dict]:
+        """
+        Validate HCC audit rows (get_provider_hccs shape), one backend call per encounter
+
+        Rows are grouped by encounter and documentation text; groups run
+        concurrently. Returns {**row, **validation} per row, in input order.
+        """
+        t0 = time.perf_counter()
+        groups: dict[tuple, list[int]] = {}
+        for i, hcc in enumerate(hccs):
+            documentation = hcc.get('documentation_text') or hcc.get('documentation', '') or ''
+            encounter = hcc.get('encounter_id') or f"{hcc.get('patient_id', '')}|{hcc.get('encounter_date', '')}"
+            groups.setdefault((encounter, documentation), []).append(i)
+
+        def run_group(key: tuple, members: list[int]) -> dict:
+            documentation = key[1]
+            first = hccs[members[0]]
+            encounter_date = first.get('encounter_date')
+            if hasattr(encounter_date, 'isoformat'):
+                encounter_date = encounter_date.isoformat()
+            else:
+                encounter_date = str(encounter_date) if encounter_date else ''
+            pairs = [
+                (hccs[i]['hcc_code'], hccs[i].get('hcc_description') or hccs[i].get('diagnosis', ''))
+                for i in members
+            ]
+            return self.validate_encounter(documentation, pairs, encounter_date)
+
+        hits_before = self.cache.hits
+        workers = min(self.max_concurrency, len(groups)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meat") as pool:
+            futures = {key: pool.submit(run_group, key, members) for key, members in groups.items()}
+            by_group = {key: future.result() for key, future in futures.items()}
+
+        output: list[dict | None] = [None] * len(hccs)
+        for key, members in groups.items():
+            for i in members:
+                # Copy so rows sharing a verdict stay independent
+                output[i] = {**hccs[i], **copy.deepcopy(by_group[key][hccs[i]['hcc_code']])}
+
+        elapsed = time.perf_counter() - t0
+        self.last_stats = {
+            "hccs": len(hccs),
+            "encounters": len(groups),
+            "cache_hits": self.cache.hits - hits_before,
+            "elapsed_seconds": round(elapsed, 3),
+            "hccs_per_second": round(len(hccs) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        return [r for r in output if r is not None]
+
+
+# ==================== DEMO/BENCHMARK ====================
+
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(7)
+    notes = [
+        "CHF stable on furosemide 40 mg daily. Echo reviewed, ejection fraction 35%.",
+        "COPD managed with inhalers. Spirometry results reviewed.",
+        "History of colon cancer. No active treatment.",
+        "Type 2 diabetes with neuropathy, A1c 8.1 reviewed. Continue metformin 1000 mg.",
+        "CKD stage 3, eGFR 42 stable. Refer to nephrology.",
+    ]
+    codes = ["HCC 226", "HCC 280", "HCC 18", "HCC 37", "HCC 328"]
+    encounter_notes = [" ".join(rng.sample(notes, 3)) + f" Visit {e}." for e in range(200)]
+    rows = [
+        {
+            "audit_id": i,
+            "encounter_id": f"ENC{i // 3:05d}",
+            "patient_id": f"PAT{i // 3:05d}",
+            "encounter_date": "2026-02-26",
+            "hcc_code": codes[i % 5],
+            "documentation_text": encounter_notes[i // 3],
+        }
+        for i in range(600)
+    ]
+
+    backend = RuleBasedEncounterBackend(latency=0.01)
+    sequential = BatchMEATValidator(backend, max_concurrency=1, max_in_flight=1)
+    t0 = time.perf_counter()
+    sequential.validate_hccs(rows)
+    print(f"sequential: {time.perf_counter() - t0:.2f}s, {backend.calls} calls")
+
+    backend = RuleBasedEncounterBackend(latency=0.01)
+    concurrent = BatchMEATValidator(backend, max_concurrency=8, max_in_flight=8)
+    concurrent.validate_hccs(rows)
+    print(f"concurrent: {concurrent.last_stats}, {backend.calls} calls")
+    concurrent.validate_hccs(rows)
+    print(f"cached:     {concurrent.last_stats}, cache {concurrent.cache.stats()}")
@@ -5,17 +5,33 @@ from datetime import datetime
 
 from app_config import get_anthropic_client
 from database import get_db_manager
+from meat_batch_validator import (
+    MEAT_SYSTEM_PROMPT,
+    BatchMEATValidator,
+    ClaudeEncounterBackend,
+    categorize_hcc,
+    is_high_impact_hcc,
+)
 
 
 class MEATValidator:
     """
     Validates HCC documentation against M.E.A.T. criteria using Claude
     with self-correcting validation loops
+
+    Batch paths (validate_encounter, batch_validate_provider) send all HCCs of an
+    encounter in one prompt via BatchMEATValidator; pass `backend` (e.g.
+    RuleBasedEncounterBackend) to validate without API calls.
     """
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, backend=None, max_concurrency: int = 4):
         self.client = get_anthropic_client(api_key=api_key, required=False)
         self.model = "claude-sonnet-4-20250514"
+        self.batch = BatchMEATValidator(
+            backend or ClaudeEncounterBackend(self.client, self.model),
+            max_concurrency=max_concurrency,
+            max_in_flight=max_concurrency,
+        )
 
         # Top 10 High-Impact HCC categories from your document
         self.high_impact_hccs = {
@@ -89,22 +105,7 @@ class MEATValidator:
                               first_result: dict | None = None) -> dict:
         """Execute Claude validation with structured output"""
 
-        system_prompt = """You are a certified risk adjustment coder (CRC) performing CMS RADV audit validation.
-
-Your task is to determine if this HCC code would survive a CMS audit based on M.E.A.T. criteria:
-- Monitor: Signs/symptoms, lab tracking, disease progression
-- Evaluate: Test result interpretation, clinical data review
-- Assess: Clinical judgment, counseling, decision-making
-- Treat: Medications, referrals, procedures, treatment plan
-
-CRITICAL RULES:
-1. Problem lists or past medical history alone = FAIL
-2. "History of" cancer = FAIL (unless active treatment/surveillance)
-3. Unspecified diagnoses without complications = FAIL for complication HCCs
-4. At least ONE M.E.A.T. element with specific evidence = PASS
-5. Generic statements like "chronic conditions stable" without specifics = FAIL
-
-Return ONLY valid JSON, no markdown formatting."""
+        system_prompt = MEAT_SYSTEM_PROMPT
 
         if is_second_pass:
             user_prompt = f"""SECOND OPINION REVIEW:
@@ -212,47 +213,25 @@ Analyze this documentation and provide your assessment in this exact JSON format
 
     def _categorize_hcc(self, hcc_code: str, diagnosis: str) -> str:
         """Map HCC code to category from Top 10 list"""
-
-        # Extract numeric code
-        match = re.search(r'\d+', hcc_code)
-        numeric_code = int(match.group()) if match else 0
-
-        # Mapping logic based on your document
-        if 36 <= numeric_code <= 38:
-            return 'Diabetes with Complications'
-        elif numeric_code == 226:
-            return 'Congestive Heart Failure'
-        elif numeric_code == 280:
-            return 'COPD'
-        elif 326 <= numeric_code <= 329:
-            return 'Chronic Kidney Disease'
-        elif numeric_code == 155:
-            return 'Major Depressive Disorder'
-        elif numeric_code == 264:
-            return 'Vascular Disease/PVD'
-        elif numeric_code == 22:
-            return 'Morbid Obesity'
-        elif numeric_code == 238:
-            return 'Specified Heart Arrhythmias'
-        elif numeric_code == 92:
-            return 'Rheumatoid Arthritis'
-        elif 17 <= numeric_code <= 21:
-            return 'Active Cancers'
-        else:
-            return 'Other HCC'
+        return categorize_hcc(hcc_code)
 
     def _is_high_impact_hcc(self, hcc_code: str) -> bool:
         """Check if HCC is in Top 10 high-impact list"""
-        match = re.search(r'\d+', hcc_code)
-        numeric_code = int(match.group()) if match else 0
+        return is_high_impact_hcc(hcc_code)
 
-        high_impact_ranges = [
-            (36, 38), (17, 21), (326, 329)
-        ]
-        high_impact_singles = [226, 280, 155, 264, 22, 238, 92]
+    def validate_encounter(self,
+                           hcc_codes: list[str],
+                           documentation: str,
+                           encounter_date: str,
+                           diagnoses: dict[str, str] | None = None) -> dict:
+        """
+        Validate all HCCs of one encounter in a single (cached) prompt
 
-        return (numeric_code in high_impact_singles or
-                any(start <= numeric_code <= end for start, end in high_impact_ranges))
+        Returns: hcc_code -> result in the validate_hcc_documentation format
+        """
+        diagnoses = diagnoses or {}
+        pairs = [(code, diagnoses.get(code, code)) for code in hcc_codes]
+        return self.batch.validate_encounter(documentation, pairs, encounter_date)
 
     def batch_validate_provider(self,
                                 provider_id: str,
@@ -267,31 +246,14 @@ Analyze this documentation and provide your assessment in this exact JSON format
         db = get_db_manager()
         hccs = db.get_provider_hccs(provider_id, lookback_months)
 
-        results = []
-        for hcc in hccs:
-            # Map DB fields to validator args (hcc_description -> diagnosis, documentation_text -> documentation)
-            diagnosis = hcc.get('hcc_description') or hcc.get('diagnosis', '')
-            documentation = hcc.get('documentation_text') or hcc.get('documentation', '')
-            encounter_date = hcc.get('encounter_date')
-            if hasattr(encounter_date, 'isoformat'):
-                encounter_date = encounter_date.isoformat()
-            else:
-                encounter_date = str(encounter_date) if encounter_date else ''
+        # One prompt per encounter, encounters in parallel, cached verdicts reused
+        results = self.batch.validate_hccs(hccs)
 
-            validation = self.validate_hcc_documentation(
-                hcc['hcc_code'],
-                diagnosis,
-                documentation,
-                encounter_date
-            )
-            results.append({
-                **hcc,
-                **validation
-            })
-
-            # Persist validation results to audit trail (for re-validation)
-            if hcc.get('audit_id') and validation.get('validation_status'):
-                db.update_hcc_audit(hcc['audit_id'], validation)
+        # Persist validation results to audit trail (for re-validation) in one bulk update
+        db.update_hcc_audits([
+            (r['audit_id'], r) for r in results
+            if r.get('audit_id') and r.get('validation_status')
+        ])
 
         # Calculate metrics
         total_hccs = len(results)
@@ -1,14 +1,16 @@
 """
 Real-time validation engine for Phase 3 proactive intelligence
 Processes encounters as they're documented with live M.E.A.T. validation
+Queued encounters are validated by a bounded worker pool (validation_workers)
 """
 import json
-import threading
-import time
+import math
+import os
 
 from app_config import get_anthropic_client
 from database import get_db_manager
 from meat_validator import MEATValidator
+from validation_workers import ValidationBackpressureError, ValidationWorkerPool  # noqa: F401
 
 
 class RealtimeValidationEngine:
@@ -20,9 +22,13 @@ class RealtimeValidationEngine:
     2. Smart prompts for missing elements
     3. Auto-alerts for high-risk patterns
     4. Provider feedback loops
+
+    Args:
+        workers: Validation worker threads (default: VALIDATION_WORKERS env or 4)
+        max_backlog: Pending encounters before queueing blocks (default: 5000)
     """
 
-    def __init__(self):
+    def __init__(self, workers: int | None = None, max_backlog: int = 5000):
         self.db = get_db_manager()
         self.validator = MEATValidator()
         self.client = get_anthropic_client(required=False)
@@ -43,6 +49,14 @@ class RealtimeValidationEngine:
             "HCC 19",  # Active cancers
         ]
 
+        # Worker threads start on the first queued encounter
+        self.pool = ValidationWorkerPool(
+            self.db,
+            self._validate_item,
+            workers=workers or int(os.getenv("VALIDATION_WORKERS", "4")),
+            max_backlog=max_backlog,
+        )
+
     def queue_encounter_for_validation(
         self,
         encounter_id: str,
@@ -51,12 +65,18 @@ class RealtimeValidationEngine:
         encounter_date: str,
         hcc_codes: list[str],
         documentation_text: str,
+        timeout: float | None = 30.0,
     ) -> int:
         """
         Add encounter to validation queue
 
+        Blocks up to `timeout` seconds while the validation backlog is full and
+        raises ValidationBackpressureError if it does not drain in time.
+
         Returns: queue_id
         """
+        self.pool.wait_for_capacity(timeout)
+
         # Determine priority
         is_high_priority = any(hcc in self.high_priority_hccs for hcc in hcc_codes)
         priority = "HIGH" if is_high_priority else "NORMAL"
@@ -78,67 +98,35 @@ class RealtimeValidationEngine:
         )
         """
 
-        if self.db.db_type == "postgresql":
-            query += " RETURNING queue_id"
-            result = self.db.execute_query(
-                query,
-                (
-                    encounter_id,
-                    patient_id,
-                    provider_id,
-                    encounter_date,
-                    hcc_codes_param,
-                    documentation_text,
-                    priority,
-                ),
-                fetch="one",
-            )
-            queue_id = result["queue_id"]
-        else:
-            self.db.execute_query(
-                query,
-                (
-                    encounter_id,
-                    patient_id,
-                    provider_id,
-                    encounter_date,
-                    hcc_codes_param,
-                    documentation_text,
-                    priority,
-                ),
-                fetch="none",
-            )
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT last_insert_rowid()")
-                queue_id = cursor.fetchone()[0]
-
-        # Trigger background validation (thread-safe, works without event loop)
-        thread = threading.Thread(
-            target=self._process_validation,
-            args=(queue_id,),
-            daemon=True,
+        queue_id = self.db.execute_insert(
+            query,
+            (
+                encounter_id,
+                patient_id,
+                provider_id,
+                encounter_date,
+                hcc_codes_param,
+                documentation_text,
+                priority,
+            ),
+            "queue_id",
         )
-        thread.start()
+
+        # Wake the worker pool (claims rows in priority order)
+        self.pool.notify()
 
         return queue_id
 
-    def _process_validation(self, queue_id: int):
-        """Background validation processing (runs in thread)"""
-        param_placeholder = "%s" if self.db.db_type == "postgresql" else "?"
+    def drain(self, timeout: float | None = None) -> bool:
+        """Validate everything queued, then stop the worker pool"""
+        return self.pool.shutdown(drain=True, timeout=timeout)
 
-        # Get queue item
-        query = f"""
-        SELECT *
-        FROM realtime_validation_queue
-        WHERE queue_id = {param_placeholder}
+    def _validate_item(self, item: dict) -> tuple[list, list, list]:
         """
+        Validate a claimed queue row (runs on a pool worker)
 
-        item = self.db.execute_query(query, (queue_id,), fetch="one")
-
-        if not item:
-            return
-
+        Returns: (validation_results, auto_alerts, alert rows for automated_alerts)
+        """
         # Parse HCC codes
         hcc_codes = item["hcc_codes"]
         if self.db.db_type == "sqlite" and isinstance(hcc_codes, str):
@@ -146,18 +134,17 @@ class RealtimeValidationEngine:
         elif not hcc_codes:
             hcc_codes = []
 
-        # Validate each HCC
+        # Validate all HCCs of the encounter in one prompt
+        encounter_results = self.validator.validate_encounter(
+            hcc_codes,
+            documentation=item["documentation_text"] or "",
+            encounter_date=str(item["encounter_date"]),
+        )
         validation_results = []
         auto_alerts = []
 
         for hcc_code in hcc_codes:
-            result = self.validator.validate_hcc_documentation(
-                hcc_code=hcc_code,
-                diagnosis=hcc_code,
-                documentation=item["documentation_text"],
-                encounter_date=str(item["encounter_date"]),
-            )
-
+            result = encounter_results[hcc_code]
             validation_results.append(result)
 
             # Generate alerts if needed
@@ -169,45 +156,21 @@ class RealtimeValidationEngine:
                 )
                 auto_alerts.append(alert)
 
-        # Update queue with results
-        results_param = validation_results
-        alerts_param = auto_alerts
-
-        if self.db.db_type == "sqlite":
-            results_param = json.dumps(validation_results)
-            alerts_param = json.dumps(auto_alerts)
-
-        ts_expr = (
-            "CURRENT_TIMESTAMP"
-            if self.db.db_type == "postgresql"
-            else "DATETIME('now')"
-        )
-        update_query = f"""
-        UPDATE realtime_validation_queue
-        SET queue_status = 'PROCESSED',
-            processed_at = {ts_expr},
-            validation_results = {param_placeholder},
-            auto_alerts = {param_placeholder}
-        WHERE queue_id = {param_placeholder}
-        """
-
-        self.db.execute_query(
-            update_query, (results_param, alerts_param, queue_id), fetch="none"
-        )
+        # Automated alerts (written with the queue update in one batch)
+        alert_rows = [
+            {
+                "alert_type": "VALIDATION_FAILURE",
+                "severity": "HIGH" if item["validation_priority"] == "HIGH" else "MEDIUM",
+                "title": alert["title"],
+                "message": alert["message"],
+                "triggered_by": item["provider_id"],
+                "related_entity_type": "ENCOUNTER",
+                "related_entity_id": item["encounter_id"],
+            }
+            for alert in auto_alerts
+        ]
 
-        # Create automated alerts
-        for alert in auto_alerts:
-            self._create_alert(
-                alert_type="VALIDATION_FAILURE",
-                severity="HIGH"
-                if item["validation_priority"] == "HIGH"
-                else "MEDIUM",
-                title=alert["title"],
-                message=alert["message"],
-                triggered_by=item["provider_id"],
-                related_entity_type="ENCOUNTER",
-                related_entity_id=item["encounter_id"],
-            )
+        return validation_results, auto_alerts, alert_rows
 
     def _generate_validation_alert(
         self, hcc_code: str, result: dict, provider_id: str
@@ -228,43 +191,6 @@ class RealtimeValidationEngine:
             "severity": "HIGH" if hcc_code in self.high_priority_hccs else "MEDIUM",
         }
 
-    def _create_alert(
-        self,
-        alert_type: str,
-        severity: str,
-        title: str,
-        message: str,
-        triggered_by: str,
-        related_entity_type: str,
-        related_entity_id: str,
-    ):
-        """Create automated alert in database"""
-        param_placeholder = "%s" if self.db.db_type == "postgresql" else "?"
-
-        query = f"""
-        INSERT INTO automated_alerts (
-            alert_type, severity, title, message, triggered_by,
-            related_entity_type, related_entity_id, action_required
-        ) VALUES (
-            {param_placeholder}, {param_placeholder}, {param_placeholder}, {param_placeholder},
-            {param_placeholder}, {param_placeholder}, {param_placeholder}, TRUE
-        )
-        """
-
-        self.db.execute_query(
-            query,
-            (
-                alert_type,
-                severity,
-                title,
-                message,
-                triggered_by,
-                related_entity_type,
-                related_entity_id,
-            ),
-            fetch="none",
-        )
-
     def get_provider_live_feedback(self, provider_id: str) -> dict:
         """
         Get real-time feedback for provider during documentation session
@@ -397,7 +323,51 @@ class RealtimeValidationEngine:
         alerts = self.db.execute_query(alert_query, fetch="all")
         alert_breakdown = {row["severity"]: row["count"] for row in alerts} if alerts else {}
 
+        # Queue depth (all instances) and last-hour throughput / queue-to-result latency
+        depth_query = """
+        SELECT queue_status, COUNT(*) as count
+        FROM realtime_validation_queue
+        WHERE queue_status IN ('PENDING', 'PROCESSING')
+        GROUP BY queue_status
+        """
+        depth = {
+            row["queue_status"]: row["count"]
+            for row in self.db.execute_query(depth_query, fetch="all") or []
+        }
+
+        if self.db.db_type == "postgresql":
+            latency_expr = "EXTRACT(EPOCH FROM (processed_at - queued_at))"
+            hour_filter = "processed_at >= CURRENT_TIMESTAMP - INTERVAL '1 hour'"
+        else:
+            latency_expr = "(JULIANDAY(processed_at) - JULIANDAY(queued_at)) * 86400.0"
+            hour_filter = "processed_at >= DATETIME('now', '-1 hour')"
+        latency_query = f"""
+        SELECT {latency_expr} as latency_seconds
+        FROM realtime_validation_queue
+        WHERE queue_status = 'PROCESSED'
+        AND {hour_filter}
+        ORDER BY processed_at DESC
+        LIMIT 5000
+        """
+        latencies = sorted(
+            float(row["latency_seconds"] or 0)
+            for row in self.db.execute_query(latency_query, fetch="all") or []
+        )
+        processed_query = f"""
+        SELECT COUNT(*) as processed
+        FROM realtime_validation_queue
+        WHERE queue_status = 'PROCESSED'
+        AND {hour_filter}
+        """
+        processed = self.db.execute_query(processed_query, fetch="one")
+        p95_latency = latencies[math.ceil(0.95 * len(latencies)) - 1] if latencies else 0.0
+
         return {
+            "queue_depth": depth.get("PENDING", 0),
+            "in_progress": depth.get("PROCESSING", 0),
+            "throughput_per_min": round((processed["processed"] if processed else 0) / 60.0, 2),
+            "p95_latency_seconds": round(p95_latency, 2),
+            "worker_pool": self.pool.metrics(),
             "total_validated_24h": metrics["total_validated"] if metrics else 0,
             "processing_rate": round(
                 (metrics["processing_rate"] or 0) * 100, 1
@@ -426,9 +396,9 @@ if __name__ == "__main__":
 
     print(f"Queued for validation: {queue_id}")
 
-    # Wait for background validation to complete (API call takes ~5-15 sec)
-    print("Processing validation (waiting 20s for API)...")
-    time.sleep(20)
+    # Wait for the worker pool to finish (API call takes ~5-15 sec)
+    print("Processing validation...")
+    engine.drain(timeout=60)
 
     # Get provider feedback
     feedback = engine.get_provider_live_feedback("PRV0001")
@@ -0,0 +1,79 @@
+"""
+Clinical phrase scanner tests — automaton matching, word boundaries, negation, anti-join.
+Uses a temp SQLite database.
+"""
+import pytest
+
+from clinical_phrase_scanner import ClinicalPhraseScanner, collect_candidates, filter_uncoded
+from database import DatabaseManager
+
+
+@pytest.fixture
+def scanner():
+    return ClinicalPhraseScanner()
+
+
+def test_finds_all_phrases_in_one_pass(scanner):
+    note = "Type 2  Diabetes with diabetic neuropathy. Emphysema on home O2. CKD stage 4."
+    matches = scanner.scan(note)
+    assert [m["phrase"] for m in matches] == [
+        "type 2 diabetes", "diabetic neuropathy", "emphysema", "ckd stage 4"
+    ]
+    assert scanner.find_hccs(note) == {"HCC 36": "type 2 diabetes", "HCC 280": "emphysema", "HCC 327": "ckd stage 4"}
+
+
+def test_overlapping_phrases_share_suffix_states():
+    scanner = ClinicalPhraseScanner({"A": ["heart failure"], "B": ["systolic heart failure"]})
+    assert {m["hcc_code"] for m in scanner.scan("acute systolic heart failure")} == {"A", "B"}
+
+
+def test_requires_word_boundaries(scanner):
+    assert scanner.find_hccs("CHFX protocol, MDDS score, CKD stage 40") == {}
+    assert scanner.find_hccs("(CHF)") == {"HCC 226": "chf"}
+
+
+def test_negated_mentions_are_ignored_within_their_clause(scanner):
+    assert scanner.find_hccs("No history of CHF or COPD.") == {}
+    assert scanner.find_hccs("Patient denies MDD symptoms today") == {}
+    assert scanner.find_hccs("No chest pain. CHF stable on furosemide.") == {"HCC 226": "chf"}
+    assert scanner.find_hccs("Denies cough\nCOPD on inhalers") == {"HCC 280": "copd"}
+    assert scanner.find_hccs("No change in CHF symptoms") == {"HCC 226": "chf"}
+    assert scanner.find_hccs("No fever but emphysema worsening") == {"HCC 280": "emphysema"}
+    assert [m["negated"] for m in scanner.scan("no CHF; CHF")] == [True, False]
+
+
+def test_candidates_keep_latest_encounter_and_anti_join_drops_coded(tmp_path, scanner):
+    db = DatabaseManager(db_type="sqlite", connection_string=str(tmp_path / "recon.db"))
+    db.initialize_schema()
+    db.insert_hcc_audit({
+        "provider_id": "PRV1", "patient_id": "PAT1", "encounter_date": "2026-01-10",
+        "hcc_code": "HCC 280", "validation_status": "PASS",
+    })
+    encounters = [
+        {"patient_id": "PAT1", "encounter_id": "E1", "encounter_date": "2026-01-10",
+         "documentation_text": "CHF and COPD stable."},
+        {"patient_id": "PAT1", "encounter_id": "E2", "encounter_date": "2026-02-10",
+         "documentation_text": "CHF follow up."},
+        {"patient_id": "PAT2", "encounter_id": "E3", "encounter_date": "2026-02-11",
+         "documentation_text": "Negative for CHF."},
+    ]
+    candidates = collect_candidates(iter(encounters), scanner)
+    assert set(candidates) == {("PAT1", "HCC 226"), ("PAT1", "HCC 280")}
+    assert candidates[("PAT1", "HCC 226")]["encounter_id"] == "E2"
+
+    uncoded = filter_uncoded(db, candidates, "2025-06-01")
+    assert [(r["patient_id"], r["hcc_code"], r["encounter_id"]) for r in uncoded] == [("PAT1", "HCC 226", "E2")]
+    assert filter_uncoded(db, {}, "2025-06-01") == []
+    assert not db.in_transaction()
+
+
+def test_iter_query_streams_in_batches(tmp_path):
+    db = DatabaseManager(db_type="sqlite", connection_string=str(tmp_path / "stream.db"))
+    db.initialize_schema()
+    for i in range(7):
+        db.insert_hcc_audit({
+            "provider_id": "PRV1", "patient_id": f"PAT{i}", "encounter_date": "2026-02-10",
+            "hcc_code": "HCC 226", "validation_status": "PASS",
+        })
+    rows = db.iter_query("SELECT patient_id FROM hcc_audit_trail ORDER BY audit_id", batch_size=3)
+    assert [r["patient_id"] for r in rows] == [f"PAT{i}" for i in range(7)]
@@ -0,0 +1,86 @@
+"""
+Pooled SQLite connection tests — pragmas, thread-local reuse, transactions, concurrent writers.
+Uses a temp SQLite database.
+"""
+import threading
+
+import pytest
+
+from database import DatabaseManager, benchmark_sqlite_throughput
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(db_type="sqlite", connection_string=str(tmp_path / "pool.db"))
+    manager.initialize_schema()
+    yield manager
+    manager.close()
+
+
+def _audit(provider_id: str = "PRV0001") -> dict:
+    return {
+        "provider_id": provider_id, "patient_id": "PAT001", "encounter_date": "2026-02-26",
+        "hcc_code": "HCC 226", "validation_status": "PASS",
+    }
+
+
+def _count(db) -> int:
+    return db.execute_query("SELECT COUNT(*) AS n FROM hcc_audit_trail", fetch="one")["n"]
+
+
+def test_connections_use_wal_and_tuned_pragmas(db):
+    with db.get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+
+
+def test_connections_are_reused_per_thread(db):
+    with db.get_connection() as first, db.get_connection() as second:
+        assert first is second
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.pool.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+    db.close()
+    assert db.pool.size() == 0
+    assert _count(db) == 0
+
+
+def test_insert_returns_generated_id_on_same_connection(db):
+    assert [db.insert_hcc_audit(_audit()) for _ in range(3)] == [1, 2, 3]
+
+
+def test_transaction_commits_together_and_rolls_back_on_error(db):
+    with db.transaction():
+        db.insert_hcc_audit(_audit())
+        db.execute_query("UPDATE hcc_audit_trail SET raf_weight = 0.5", fetch="none")
+        with db.transaction():
+            db.insert_hcc_audit(_audit())
+        assert db.in_transaction()
+    assert _count(db) == 2 and not db.in_transaction()
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.insert_hcc_audit(_audit())
+            db.execute_many("UPDATE hcc_audit_trail SET raf_weight = ?", [(1.0,)])
+            raise RuntimeError("abort")
+    assert _count(db) == 2
+    assert db.execute_query("SELECT MAX(raf_weight) AS w FROM hcc_audit_trail", fetch="one")["w"] == 0.5
+
+
+def test_uncommitted_writes_are_discarded_when_connection_returns(db):
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM hcc_audit_trail")
+    with db.get_connection() as conn:
+        assert not conn.in_transaction
+
+
+def test_concurrent_writers_do_not_hit_lock_errors(tmp_path):
+    result = benchmark_sqlite_throughput(str(tmp_path / "bench.db"), writers=4, writes_per_writer=50,
+                                         readers=2, reads_per_reader=50)
+    assert result["errors"] == 0
+    assert result["writes_per_sec"] > 0 and result["reads_per_sec"] > 0
@@ -0,0 +1,161 @@
+"""
+Batched M.E.A.T. validation tests — encounter grouping, verdict cache, second opinions.
+Uses RuleBasedEncounterBackend and a fake Claude client (no API calls).
+"""
+import json
+import threading
+import time
+
+from database import DatabaseManager
+from meat_batch_validator import (
+    BatchMEATValidator,
+    ClaudeEncounterBackend,
+    RuleBasedEncounterBackend,
+    parse_encounter_response,
+    verdict_cache_key,
+)
+
+CHF_COPD_NOTE = "CHF stable on furosemide 40 mg daily. Echo reviewed. COPD managed with inhalers."
+
+
+def _rows() -> list[dict]:
+    return [
+        {"audit_id": 1, "encounter_id": "ENC1", "encounter_date": "2026-02-26", "hcc_code": "HCC 226",
+         "documentation_text": CHF_COPD_NOTE},
+        {"audit_id": 2, "encounter_id": "ENC1", "encounter_date": "2026-02-26", "hcc_code": "HCC 280",
+         "documentation_text": CHF_COPD_NOTE},
+        {"audit_id": 3, "encounter_id": "ENC2", "encounter_date": "2026-02-27", "hcc_code": "HCC 18",
+         "documentation_text": "History of colon cancer. No active treatment."},
+    ]
+
+
+class FakeClaude:
+    """Minimal messages.create stand-in returning canned JSON"""
+
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+        self.prompts = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][0]["content"])
+        text = json.dumps(self.payloads.pop(0))
+        return type("R", (), {"content": [type("C", (), {"text": text})()]})()
+
+
+def _verdict(status: str, confidence: int, treat: bool = True) -> dict:
+    return {
+        "meat_elements": {
+            "monitor": {"present": False, "evidence": None},
+            "evaluate": {"present": False, "evidence": None},
+            "assess": {"present": False, "evidence": None},
+            "treat": {"present": treat, "evidence": "furosemide 40 mg" if treat else None},
+        },
+        "validation_status": status,
+        "confidence_score": confidence,
+        "failure_reason": None,
+        "recommendations": "",
+    }
+
+
+def test_one_backend_call_per_encounter_in_input_order():
+    backend = RuleBasedEncounterBackend()
+    results = BatchMEATValidator(backend).validate_hccs(_rows())
+
+    assert backend.calls == 2
+    assert [r["audit_id"] for r in results] == [1, 2, 3]
+    assert [r["validation_status"] for r in results] == ["PASS", "PASS", "FAIL"]
+    assert results[0]["meat_elements"]["treat"]["present"]
+    assert results[0]["hcc_category"] == "Congestive Heart Failure"
+    assert results[2]["failure_reason"] == "History-only mention without current management"
+
+
+def test_verdicts_are_cached_by_documentation_hcc_and_prompt_version():
+    backend = RuleBasedEncounterBackend()
+    validator = BatchMEATValidator(backend)
+    first = validator.validate_hccs(_rows())
+    second = validator.validate_hccs(_rows())
+
+    assert backend.calls == 2
+    assert validator.last_stats["cache_hits"] == 3
+    assert second == first
+    second[0]["meat_elements"]["treat"]["present"] = False
+    assert validator.validate_hccs(_rows())[0]["meat_elements"]["treat"]["present"]
+
+    assert verdict_cache_key("doc", "HCC 226") != verdict_cache_key("doc", "HCC 226", "v2")
+    assert verdict_cache_key("doc", "HCC 226") != verdict_cache_key("doc2", "HCC 226")
+
+
+def test_encounters_run_concurrently_under_rate_limit():
+    rows = [
+        {"audit_id": i, "encounter_id": f"ENC{i}", "encounter_date": "2026-02-26", "hcc_code": "HCC 226",
+         "documentation_text": f"{CHF_COPD_NOTE} Visit {i}."}
+        for i in range(12)
+    ]
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    class SlowBackend(RuleBasedEncounterBackend):
+        def validate_encounter(self, *args, **kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            return super().validate_encounter(*args, **kwargs)
+
+    BatchMEATValidator(SlowBackend(), max_concurrency=8, max_in_flight=3).validate_hccs(rows)
+    assert 1 < peak <= 3
+
+
+def test_claude_backend_batches_hccs_and_requests_one_second_opinion():
+    client = FakeClaude([
+        {"HCC 226": _verdict("PASS", 90), "HCC 280": _verdict("PASS", 60)},
+        {"HCC 280": _verdict("FAIL", 70, treat=False)},
+    ])
+    validator = BatchMEATValidator(ClaudeEncounterBackend(client))
+    results = validator.validate_encounter(
+        CHF_COPD_NOTE, [("HCC 226", "CHF"), ("HCC 280", "COPD")], "2026-02-26"
+    )
+
+    assert len(client.prompts) == 2
+    assert "- HCC 226: CHF" in client.prompts[0] and "- HCC 280: COPD" in client.prompts[0]
+    assert "SECOND OPINION" in client.prompts[1] and "HCC 226" not in client.prompts[1]
+    assert results["HCC 226"]["validation_status"] == "PASS"
+    assert results["HCC 226"]["meat_score"] == 1
+    assert results["HCC 280"]["validation_status"] == "HUMAN_REVIEW"
+    assert results["HCC 280"]["review_reason"] == "AI model disagreement on validation"
+
+
+def test_unparseable_responses_fall_back_and_are_not_cached():
+    results = parse_encounter_response("not json", ["HCC 226"])
+    assert results["HCC 226"]["validation_status"] == "HUMAN_REVIEW"
+
+    client = FakeClaude([{"HCC 999": _verdict("PASS", 90)}, {}, {"HCC 226": _verdict("PASS", 90)}])
+    validator = BatchMEATValidator(ClaudeEncounterBackend(client))
+    first = validator.validate_encounter(CHF_COPD_NOTE, [("HCC 226", "CHF")], "2026-02-26")
+    assert first["HCC 226"]["validation_status"] == "HUMAN_REVIEW"
+    assert "_transient" not in first["HCC 226"]
+    assert validator.cache.stats()["size"] == 0
+    again = validator.validate_encounter(CHF_COPD_NOTE, [("HCC 226", "CHF")], "2026-02-26")
+    assert again["HCC 226"]["validation_status"] == "PASS"
+
+
+def test_update_hcc_audits_persists_all_rows_in_one_call(tmp_path):
+    db = DatabaseManager(db_type="sqlite", connection_string=str(tmp_path / "audit.db"))
+    db.initialize_schema()
+    for row in _rows():
+        db.insert_hcc_audit({
+            "provider_id": "PRV0001", "patient_id": "PAT001", "encounter_date": row["encounter_date"],
+            "encounter_id": row["encounter_id"], "hcc_code": row["hcc_code"],
+            "documentation_text": row["documentation_text"], "validation_status": "PENDING",
+        })
+    results = BatchMEATValidator(RuleBasedEncounterBackend()).validate_hccs(_rows())
+
+    assert db.update_hcc_audits([(r["audit_id"], r) for r in results]) == 3
+    stored = db.execute_query("SELECT audit_id, validation_status, meat_treat FROM hcc_audit_trail ORDER BY audit_id")
+    assert [(r["validation_status"], bool(r["meat_treat"])) for r in stored] == [
+        ("PASS", True), ("PASS", True), ("FAIL", False)
+    ]
@@ -0,0 +1,96 @@
+"""
+Set-based provider scorecard refresh tests — metrics, subset scoping, failure pattern rebuild.
+Uses a temp SQLite database.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import DatabaseManager
+
+RECENT = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+STALE = (datetime.now() - timedelta(days=800)).strftime('%Y-%m-%d')
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(db_type="sqlite", connection_string=str(tmp_path / "scores.db"))
+    manager.initialize_schema()
+    return manager
+
+
+def _audit(db, provider_id: str, status: str, raf: float = 0.5, reason: str | None = None,
+           category: str = "CHF", date: str = RECENT) -> None:
+    db.insert_hcc_audit({
+        "provider_id": provider_id, "patient_id": "PAT001", "encounter_date": date,
+        "encounter_id": f"ENC-{provider_id}", "hcc_code": "HCC 226", "hcc_category": category,
+        "raf_weight": raf, "validation_status": status, "failure_reason": reason,
+    })
+
+
+def _scores(db) -> dict:
+    rows = db.execute_query("SELECT * FROM provider_meat_scores", fetch="all")
+    return {r["provider_id"]: r for r in rows}
+
+
+def _patterns(db) -> list[tuple]:
+    rows = db.execute_query(
+        "SELECT provider_id, failure_category, hcc_category, occurrence_count FROM failure_patterns "
+        "ORDER BY provider_id, failure_category, hcc_category", fetch="all"
+    )
+    return [tuple(r.values()) for r in rows]
+
+
+def test_refresh_all_providers_in_one_pass(db):
+    db.execute_query(
+        "INSERT INTO provider_meat_scores (provider_id, provider_name) VALUES ('PRV1', 'Dr. Known')", fetch="none"
+    )
+    for _ in range(9):
+        _audit(db, "PRV1", "PASS")
+    _audit(db, "PRV1", "FAIL", raf=0.4, reason="Missing TREAT")
+    for _ in range(4):
+        _audit(db, "PRV2", "PASS")
+    _audit(db, "PRV2", "FAIL", raf=1.0, reason="Missing TREAT")
+    _audit(db, "PRV2", "FAIL", raf=1.0, reason="History only", category="Cancer")
+    _audit(db, "PRV2", "FAIL", raf=9.0, reason="Stale", date=STALE)
+
+    assert db.refresh_provider_scores() == 2
+    scores = _scores(db)
+    assert scores["PRV1"]["provider_name"] == "Dr. Known"
+    assert (scores["PRV1"]["total_hccs_submitted"], scores["PRV1"]["total_hccs_validated"]) == (10, 9)
+    assert scores["PRV1"]["validation_rate"] == 90.0 and scores["PRV1"]["risk_tier"] == "GREEN"
+    assert scores["PRV1"]["financial_risk_estimate"] == pytest.approx(0.4 * 1142.50)
+    assert scores["PRV2"]["provider_name"] == "Unknown"
+    assert scores["PRV2"]["validation_rate"] == pytest.approx(66.67) and scores["PRV2"]["risk_tier"] == "RED"
+    assert scores["PRV2"]["financial_risk_estimate"] == pytest.approx(2.0 * 1142.50)
+    assert _patterns(db) == [
+        ("PRV1", "Missing TREAT", "CHF", 1),
+        ("PRV2", "History only", "Cancer", 1),
+        ("PRV2", "Missing TREAT", "CHF", 1),
+    ]
+
+
+def test_subset_refresh_leaves_other_providers_untouched(db):
+    _audit(db, "PRV1", "FAIL", reason="Missing TREAT")
+    _audit(db, "PRV2", "FAIL", reason="Missing TREAT")
+    db.refresh_provider_scores()
+    _audit(db, "PRV1", "PASS")
+    _audit(db, "PRV2", "FAIL", reason="Missing TREAT")
+
+    db.update_provider_scores("PRV2")
+    scores = _scores(db)
+    assert scores["PRV1"]["total_hccs_submitted"] == 1
+    assert scores["PRV2"]["total_hccs_submitted"] == 2
+    assert _patterns(db) == [("PRV1", "Missing TREAT", "CHF", 1), ("PRV2", "Missing TREAT", "CHF", 2)]
+    assert db.refresh_provider_scores([]) == 0
+
+
+def test_failed_refresh_rolls_back(db):
+    _audit(db, "PRV1", "FAIL", reason="Missing TREAT")
+    db.refresh_provider_scores()
+    _audit(db, "PRV1", "PASS")
+    db.execute_query("DROP TABLE failure_patterns", fetch="none")
+
+    with pytest.raises(Exception, match="Database error"):
+        db.refresh_provider_scores()
+    assert _scores(db)["PRV1"]["total_hccs_submitted"] == 1
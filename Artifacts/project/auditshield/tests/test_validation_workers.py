@@ -0,0 +1,166 @@
+"""
+Validation worker pool tests — priority claims, batching, retries, backpressure, drain.
+Uses a temp SQLite database and a stub validator (no API calls).
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from database import DatabaseManager
+from database_phase3_schema import add_phase3_schema
+from validation_workers import ValidationBackpressureError, ValidationWorkerPool
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(db_type="sqlite", connection_string=str(tmp_path / "validation.db"))
+    add_phase3_schema(manager)
+    return manager
+
+
+def _queue(db, encounter_id: str, priority: str = "NORMAL") -> None:
+    db.execute_query(
+        """
+        INSERT INTO realtime_validation_queue (
+            encounter_id, patient_id, provider_id, encounter_date,
+            hcc_codes, documentation_text, validation_priority
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (encounter_id, "PAT001", "PRV0001", "2026-02-26", json.dumps(["HCC 226"]), "CHF stable.", priority),
+        fetch="none",
+    )
+
+
+def _ok(item):
+    alert = {
+        "alert_type": "VALIDATION_FAILURE", "severity": "MEDIUM", "title": "Gap",
+        "message": "Missing TREAT", "triggered_by": item["provider_id"],
+        "related_entity_type": "ENCOUNTER", "related_entity_id": item["encounter_id"],
+    }
+    return [{"validation_status": "PASS", "confidence_score": 90}], [{"title": "Gap"}], [alert]
+
+
+def _statuses(db) -> dict:
+    rows = db.execute_query("SELECT encounter_id, queue_status FROM realtime_validation_queue", fetch="all")
+    return {r["encounter_id"]: r["queue_status"] for r in rows}
+
+
+def test_claim_batch_is_priority_ordered_and_exclusive(db):
+    for i in range(3):
+        _queue(db, f"N{i}")
+    _queue(db, "H0", "HIGH")
+    pool = ValidationWorkerPool(db, _ok)
+
+    first = pool.claim_batch(2)
+    second = pool.claim_batch(10)
+    assert [r["encounter_id"] for r in first] == ["H0", "N0"]
+    assert [r["encounter_id"] for r in second] == ["N1", "N2"]
+    assert pool.claim_batch(10) == []
+    assert set(_statuses(db).values()) == {"PROCESSING"}
+
+
+def test_concurrent_claims_never_overlap(db):
+    for i in range(40):
+        _queue(db, f"E{i}")
+    pool = ValidationWorkerPool(db, _ok)
+    claimed: list[int] = []
+    lock = threading.Lock()
+
+    def claimer():
+        while rows := pool.claim_batch(3):
+            with lock:
+                claimed.extend(r["queue_id"] for r in rows)
+
+    threads = [threading.Thread(target=claimer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(set(claimed)) and len(claimed) == 40
+
+
+def test_pool_processes_backlog_with_bounded_workers_and_drains(db):
+    for i in range(30):
+        _queue(db, f"E{i}")
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def validate(item):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.005)
+        with lock:
+            active -= 1
+        return _ok(item)
+
+    pool = ValidationWorkerPool(db, validate, workers=3, write_batch_size=8, flush_interval=0.05)
+    pool.start()
+    assert pool.shutdown(drain=True, timeout=10)
+
+    assert set(_statuses(db).values()) == {"PROCESSED"}
+    assert peak <= 3
+    row = db.execute_query("SELECT validation_results, auto_alerts FROM realtime_validation_queue LIMIT 1", fetch="one")
+    assert json.loads(row["validation_results"])[0]["validation_status"] == "PASS"
+    assert json.loads(row["auto_alerts"]) == [{"title": "Gap"}]
+    alerts = db.execute_query("SELECT COUNT(*) AS n FROM automated_alerts", fetch="one")
+    assert alerts["n"] == 30
+    metrics = pool.metrics()
+    assert metrics["processed"] == 30 and metrics["in_flight"] == 0 and metrics["queue_depth"] == 0
+    assert metrics["p95_latency_ms"] > 0
+
+
+def test_transient_failures_are_retried_then_marked_failed(db):
+    _queue(db, "FLAKY")
+    _queue(db, "BROKEN")
+    attempts: dict[str, int] = {}
+
+    def validate(item):
+        attempts[item["encounter_id"]] = attempts.get(item["encounter_id"], 0) + 1
+        if item["encounter_id"] == "BROKEN" or attempts["FLAKY"] < 2:
+            raise ConnectionError("overloaded")
+        return _ok(item)
+
+    pool = ValidationWorkerPool(db, validate, workers=1, retries=2, base_delay=0.001, flush_interval=0.05)
+    pool.start()
+    assert pool.shutdown(drain=True, timeout=10)
+
+    assert _statuses(db) == {"FLAKY": "PROCESSED", "BROKEN": "FAILED"}
+    assert attempts == {"FLAKY": 2, "BROKEN": 3}
+    row = db.execute_query(
+        "SELECT validation_results FROM realtime_validation_queue WHERE encounter_id = 'BROKEN'", fetch="one"
+    )
+    assert json.loads(row["validation_results"])[0]["error"] == "ConnectionError: overloaded"
+    assert pool.metrics()["retries"] == 3
+
+
+def test_backpressure_raises_when_backlog_is_full(db):
+    pool = ValidationWorkerPool(db, _ok, max_backlog=2)
+    pool._backlog = 2  # pool not started: nothing drains the backlog
+    with pytest.raises(ValidationBackpressureError):
+        pool.wait_for_capacity(timeout=0.01)
+
+
+def test_shutdown_without_drain_releases_unstarted_rows(db):
+    for i in range(6):
+        _queue(db, f"E{i}")
+    started = threading.Event()
+    release = threading.Event()
+
+    def validate(item):
+        started.set()
+        release.wait(5)
+        return _ok(item)
+
+    pool = ValidationWorkerPool(db, validate, workers=1, flush_interval=0.05)
+    pool.start()
+    assert started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    assert pool.shutdown(drain=False, timeout=5)
+
+    statuses = list(_statuses(db).values())
+    assert statuses.count("PROCESSED") == 1
+    assert statuses.count("PENDING") == 5
@@ -0,0 +1,424 @@
+"""
+Bounded worker pool for the real-time validation queue
+Claims PENDING rows from realtime_validation_queue (HIGH priority first),
+validates them on a fixed set of worker threads and writes results in batches
+
+- Claims are atomic: FOR UPDATE SKIP LOCKED on PostgreSQL, BEGIN IMMEDIATE on SQLite,
+  so concurrent dispatchers never process the same row twice
+- Rows are only claimed while a worker slot is free; enqueuers block (then raise
+  ValidationBackpressureError) once the backlog reaches max_backlog
+- Failed validations are retried with exponential backoff and jitter, then marked FAILED
+- shutdown(drain=True) finishes the backlog; drain=False releases unstarted rows to PENDING
+"""
+import atexit
+import json
+import math
+import queue
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+_STOP = object()
+_PRIORITY_ORDER = "CASE validation_priority WHEN 'HIGH' THEN 0 ELSE 1 END, queued_at, queue_id"
+
+
+class ValidationBackpressureError(RuntimeError):
+    """Raised when the validation backlog stays full past the enqueue timeout"""
+
+
+class ValidationWorkerPool:
+    """
+    Fixed-size validation worker pool over realtime_validation_queue
+
+    Args:
+        db: DatabaseManager
+        validate: Callable taking a claimed queue row and returning
+            (validation_results, auto_alerts, alert_rows): results and alerts
+            stored on the queue row, plus automated_alerts rows (dicts with
+            alert_type, severity, title, message, triggered_by,
+            related_entity_type, related_entity_id)
+        workers: Number of worker threads
+        max_backlog: Pending rows tolerated before enqueuers are throttled
+        write_batch_size: Results written per batched UPDATE
+        flush_interval: Seconds before a partial batch is written
+        retries: Retries per row after the first failed attempt
+        base_delay: First retry delay in seconds (doubles per attempt)
+        max_delay: Retry delay cap in seconds
+        poll_interval: Seconds between queue polls when idle
+    """
+
+    def __init__(
+        self,
+        db,
+        validate: Callable[[dict], tuple[list, list, list]],
+        workers: int = 4,
+        max_backlog: int = 5000,
+        write_batch_size: int = 25,
+        flush_interval: float = 0.5,
+        retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        poll_interval: float = 2.0,
+    ):
+        self.db = db
+        self.validate = validate
+        self.workers = max(1, workers)
+        self.max_backlog = max_backlog
+        self.write_batch_size = max(1, write_batch_size)
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+
+        self._cv = threading.Condition()
+        self._halt = threading.Event()
+        self._work: queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        self._dispatcher: threading.Thread | None = None
+        self._writer: threading.Thread | None = None
+        self._worker_threads: list[threading.Thread] = []
+        self._started = False
+        self._accepting = True
+        self._backlog = 0  # estimated PENDING rows
+        self._in_flight = 0  # claimed rows not yet written
+        self._stats = {"processed": 0, "failed": 0, "retries": 0, "released": 0}
+        self._latencies: deque = deque(maxlen=1000)  # seconds, claim -> written
+        self._completed_at: deque = deque(maxlen=10000)  # monotonic write times
+
+    @property
+    def ph(self) -> str:
+        return "%s" if self.db.db_type == "postgresql" else "?"
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Start dispatcher, workers and writer (idempotent)"""
+        with self._cv:
+            if self._started:
+                return
+            self._started = True
+        if self.db.db_type == "sqlite":
+            # Single-process store: rows left PROCESSING by a previous run are orphaned
+            self._release_processing()
+        self._backlog = self._pending_count()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="validation-dispatch", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="validation-writer", daemon=True)
+        self._worker_threads = [
+            threading.Thread(target=self._work_loop, name=f"validation-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in [self._dispatcher, self._writer, *self._worker_threads]:
+            thread.start()
+        atexit.register(self.shutdown, drain=False, timeout=5.0)
+
+    def notify(self, count: int = 1):
+        """Signal that rows were queued; starts the pool on first use"""
+        self.start()
+        with self._cv:
+            self._backlog += count
+            self._cv.notify_all()
+
+    def wait_for_capacity(self, timeout: float | None = 30.0):
+        """Block while the backlog is full; raise ValidationBackpressureError on timeout"""
+        with self._cv:
+            if not self._accepting:
+                raise ValidationBackpressureError("Validation pool is shutting down")
+            if not self._cv.wait_for(lambda: self._backlog < self.max_backlog, timeout=timeout):
+                raise ValidationBackpressureError(
+                    f"Validation backlog full ({self._backlog} pending, limit {self.max_backlog})"
+                )
+
+    def shutdown(self, drain: bool = True, timeout: float | None = None) -> bool:
+        """
+        Stop the pool
+
+        drain=True processes the remaining backlog first; drain=False finishes
+        rows already being validated and releases the rest back to PENDING.
+        Returns True if the pool stopped within the timeout.
+        """
+        with self._cv:
+            if not self._started or self._halt.is_set():
+                return True
+            self._accepting = False
+            self._cv.notify_all()
+            drained = True
+            if drain:
+                drained = self._cv.wait_for(
+                    lambda: self._backlog == 0 and self._in_flight == 0, timeout=timeout
+                )
+            self._halt.set()
+            self._cv.notify_all()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        # No more claims; hand back rows that no worker has started
+        self._dispatcher.join(remaining())
+        released = []
+        while True:
+            try:
+                released.append(self._work.get_nowait()["queue_id"])
+            except queue.Empty:
+                break
+        self._release(released)
+
+        for _ in self._worker_threads:
+            self._work.put(_STOP)
+        for thread in self._worker_threads:
+            thread.join(remaining())
+        self._results.put(_STOP)
+        self._writer.join(remaining())
+        threads = [self._dispatcher, self._writer, *self._worker_threads]
+        return drained and not any(t.is_alive() for t in threads)
+
+    # ==================== CLAIM / RELEASE ====================
+
+    def claim_batch(self, limit: int) -> list[dict]:
+        """Atomically mark up to `limit` PENDING rows PROCESSING, HIGH priority first"""
+        if limit <= 0:
+            return []
+        if self.db.db_type == "postgresql":
+            from psycopg2.extras import RealDictCursor
+
+            query = f"""
+            UPDATE realtime_validation_queue
+            SET queue_status = 'PROCESSING'
+            WHERE queue_id IN (
+                SELECT queue_id FROM realtime_validation_queue
+                WHERE queue_status = 'PENDING'
+                ORDER BY {_PRIORITY_ORDER}
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+            """
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                try:
+                    cursor.execute(query, (limit,))
+                    rows = [dict(row) for row in cursor.fetchall()]
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            rows.sort(key=lambda r: (r["validation_priority"] != "HIGH", str(r["queued_at"]), r["queue_id"]))
+            return rows
+
+        with self.db.get_connection() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = [
+                    dict(row)
+                    for row in conn.execute(
+                        f"""
+                        SELECT * FROM realtime_validation_queue
+                        WHERE queue_status = 'PENDING'
+                        ORDER BY {_PRIORITY_ORDER}
+                        LIMIT ?
+                        """,
+                        (limit,),
+                    ).fetchall()
+                ]
+                if rows:
+                    ids = [r["queue_id"] for r in rows]
+                    conn.execute(
+                        f"UPDATE realtime_validation_queue SET queue_status = 'PROCESSING' "
+                        f"WHERE queue_id IN ({', '.join('?' * len(ids))})",
+                        ids,
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return rows
+
+    def _release(self, queue_ids: list[int]):
+        """Return claimed rows to PENDING"""
+        if not queue_ids:
+            return
+        self.db.execute_many(
+            f"UPDATE realtime_validation_queue SET queue_status = 'PENDING' WHERE queue_id = {self.ph}",
+            [(qid,) for qid in queue_ids],
+        )
+        with self._cv:
+            self._in_flight -= len(queue_ids)
+            self._backlog += len(queue_ids)
+            self._stats["released"] += len(queue_ids)
+            self._cv.notify_all()
+
+    def _release_processing(self):
+        self.db.execute_query(
+            "UPDATE realtime_validation_queue SET queue_status = 'PENDING' WHERE queue_status = 'PROCESSING'",
+            fetch="none",
+        )
+
+    def _pending_count(self) -> int:
+        row = self.db.execute_query(
+            "SELECT COUNT(*) AS n FROM realtime_validation_queue WHERE queue_status = 'PENDING'",
+            fetch="one",
+        )
+        return int(row["n"] or 0) if row else 0
+
+    # ==================== THREADS ====================
+
+    def _dispatch(self):
+        """Claim rows while worker slots are free"""
+        capacity = self.workers * 2  # one running + one ready per worker
+        while not self._halt.is_set():
+            with self._cv:
+                self._cv.wait_for(
+                    lambda: self._halt.is_set() or (self._in_flight < capacity and self._backlog > 0),
+                    timeout=self.poll_interval,
+                )
+                if self._halt.is_set():
+                    return
+                free = capacity - self._in_flight
+            if free <= 0:
+                continue
+            try:
+                rows = self.claim_batch(free)
+            except Exception:
+                self._halt.wait(self.poll_interval)
+                continue
+            with self._cv:
+                self._in_flight += len(rows)
+                # Fewer rows than asked for: the queue is empty (other claimers included)
+                self._backlog = max(0, self._backlog - len(rows)) if len(rows) == free else 0
+                self._cv.notify_all()
+            claimed_at = time.monotonic()
+            for row in rows:
+                row["_claimed_at"] = claimed_at
+                self._work.put(row)
+
+    def _work_loop(self):
+        while True:
+            item = self._work.get()
+            if item is _STOP:
+                return
+            self._results.put(self._run_with_retry(item))
+
+    def _run_with_retry(self, item: dict) -> tuple:
+        """(item, status, results, auto_alerts, alert_rows); status None releases the row"""
+        for attempt in range(self.retries + 1):
+            try:
+                results, auto_alerts, alert_rows = self.validate(item)
+                return item, "PROCESSED", results, auto_alerts, alert_rows
+            except Exception as e:
+                if attempt == self.retries:
+                    error = {"error": f"{type(e).__name__}: {e!s}", "attempts": attempt + 1}
+                    return item, "FAILED", [error], [], []
+                with self._cv:
+                    self._stats["retries"] += 1
+                delay = min(self.max_delay, self.base_delay * 2**attempt) * random.uniform(0.5, 1.0)
+                if self._halt.wait(delay):
+                    break
+        return item, None, [], [], []
+
+    def _write_loop(self):
+        """Collect results and write them in batches"""
+        pending: list[tuple] = []
+        while True:
+            try:
+                outcome = self._results.get(timeout=self.flush_interval)
+            except queue.Empty:
+                outcome = None
+            if outcome is _STOP:
+                self._flush(pending)
+                return
+            if outcome is not None:
+                pending.append(outcome)
+            if pending and (outcome is None or len(pending) >= self.write_batch_size):
+                self._flush(pending)
+                pending = []
+
+    def _flush(self, outcomes: list[tuple]):
+        if not outcomes:
+            return
+        ph = self.ph
+        sqlite = self.db.db_type == "sqlite"
+        ts_expr = "CURRENT_TIMESTAMP" if not sqlite else "DATETIME('now')"
+        updates, alerts = [], []
+        released = [item["queue_id"] for item, status, *_ in outcomes if status is None]
+        written = [o for o in outcomes if o[1] is not None]
+        for item, status, results, auto_alerts, alert_rows in written:
+            updates.append((
+                status,
+                json.dumps(results),
+                json.dumps(auto_alerts) if sqlite else [json.dumps(a) for a in auto_alerts],
+                item["queue_id"],
+            ))
+            alerts.extend(
+                (
+                    a["alert_type"], a["severity"], a["title"], a["message"],
+                    a["triggered_by"], a["related_entity_type"], a["related_entity_id"],
+                )
+                for a in alert_rows
+            )
+        try:
+            self.db.execute_many(
+                f"""
+                UPDATE realtime_validation_queue
+                SET queue_status = {ph},
+                    processed_at = {ts_expr},
+                    validation_results = {ph},
+                    auto_alerts = {ph}
+                WHERE queue_id = {ph}
+                """,
+                updates,
+            )
+            self.db.execute_many(
+                f"""
+                INSERT INTO automated_alerts (
+                    alert_type, severity, title, message, triggered_by,
+                    related_entity_type, related_entity_id, action_required
+                ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, TRUE)
+                """,
+                alerts,
+            )
+        except Exception:
+            # Write failed: hand the rows back to the queue for another attempt
+            released.extend(item["queue_id"] for item, *_ in written)
+            written = []
+        try:
+            self._release(released)
+        except Exception:
+            with self._cv:
+                self._in_flight -= len(released)
+                self._cv.notify_all()
+
+        now = time.monotonic()
+        with self._cv:
+            for item, status, *_ in written:
+                self._in_flight -= 1
+                self._stats["processed" if status == "PROCESSED" else "failed"] += 1
+                self._latencies.append(now - item.get("_claimed_at", now))
+                self._completed_at.append(now)
+            self._cv.notify_all()
+
+    # ==================== METRICS ====================
+
+    def metrics(self, window_seconds: float = 60.0) -> dict:
+        """Queue depth, throughput and latency of this pool"""
+        now = time.monotonic()
+        with self._cv:
+            latencies = sorted(self._latencies)
+            recent = sum(1 for t in self._completed_at if now - t <= window_seconds)
+            stats = dict(self._stats)
+            backlog, in_flight = self._backlog, self._in_flight
+        p95 = latencies[math.ceil(0.95 * len(latencies)) - 1] if latencies else 0.0
+        return {
+            "running": self._started and not self._halt.is_set(),
+            "workers": self.workers,
+            "queue_depth": backlog,
+            "in_flight": in_flight,
+            "throughput_per_min": round(recent * 60.0 / window_seconds, 1),
+            "p95_latency_ms": round(p95 * 1000, 1),
+            **stats,
+        }
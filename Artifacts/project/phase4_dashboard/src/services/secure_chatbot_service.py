@@ -20,6 +20,41 @@ except ImportError:
     HAS_CONTEXT_ENGINE = False
     logger.warning("context_engine not available. Context compression disabled.")
 
+try:
+    from services.query_cache import QueryResultCache, hashed_embedding, is_degraded_result
+    HAS_QUERY_CACHE = True
+except ImportError:
+    HAS_QUERY_CACHE = False
+    logger.warning("query_cache not available. Query result caching disabled.")
+
+try:
+    from services.embedding_service import EmbeddingService
+    HAS_EMBEDDING_SERVICE = True
+except ImportError:
+    HAS_EMBEDDING_SERVICE = False
+    logger.warning("embedding_service not available. Embeddings are not cached.")
+
+try:
+    from services.vector_index import load_or_create_index
+    HAS_VECTOR_INDEX = True
+except ImportError:
+    HAS_VECTOR_INDEX = False
+    logger.warning("vector_index not available. Local vector search disabled.")
+
+try:
+    from services.hybrid_retriever import DEFAULT_RRF_K, BM25Index, reciprocal_rank_fusion
+    HAS_HYBRID_RETRIEVER = True
+except ImportError:
+    HAS_HYBRID_RETRIEVER = False
+    logger.warning("hybrid_retriever not available. Using substring keyword search.")
+
+try:
+    from services.security.deidentifier import get_deidentifier
+    HAS_DEIDENTIFIER = True
+except ImportError:
+    HAS_DEIDENTIFIER = False
+    logger.warning("deidentifier not available. Portfolio data is displayed as loaded.")
+
 try:
     from services.agentic_rag import HEDISAgenticRAG
     HAS_AGENTIC_RAG = True
@@ -64,7 +99,17 @@ class SecureChatbotService:
     Uses local embeddings, vector search, and SQL generation.
     """
     
-    def __init__(self, data_dir: str = "./data/chatbot", use_agentic_rag: bool = False, use_joint_rag: bool = True):
+    def __init__(
+        self,
+        data_dir: str = "./data/chatbot",
+        use_agentic_rag: bool = False,
+        use_joint_rag: bool = True,
+        use_query_cache: bool = True,
+        cache_similarity_threshold: float = 0.9,
+        cache_ttl: float = 900.0,
+        embedding_batch_size: int = 64,
+        vector_backend: str = "auto"
+    ):
         """
         Initialize the secure chatbot service
         
@@ -72,18 +117,30 @@ class SecureChatbotService:
             data_dir: Directory for chatbot data
             use_agentic_rag: If True, use basic agentic RAG for complex queries (deprecated, use use_joint_rag)
             use_joint_rag: If True, use context-aware agentic RAG for complex queries (default: True)
+            use_query_cache: If True, reuse answers to repeated/similar queries
+            cache_similarity_threshold: Min cosine similarity for a semantic cache hit
+            cache_ttl: Seconds a cached answer stays valid
+            embedding_batch_size: Texts per encode call when embedding the knowledge base
+            vector_backend: "chroma", "local" (in-process vector index) or "auto"
+                (ChromaDB when installed, else the local index)
         """
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
         
         # Initialize components
         self.embedding_model = None
+        self.embedding_service = None
+        self.embedding_batch_size = embedding_batch_size
         self.vector_store = None
+        self.vector_backend = vector_backend
+        self.local_index = None
+        self._local_index_populated = False
         self._initialize_embeddings()
         self._initialize_vector_store()
         
         # Sample HEDIS measure knowledge base
         self.measure_knowledge = self._create_measure_knowledge_base()
+        self.keyword_index = self._build_keyword_index()
         
         # Create simple RAG retriever wrapper
         class SimpleRAGRetriever:
@@ -114,10 +171,21 @@ class SecureChatbotService:
         self.use_agentic_rag = use_agentic_rag and HAS_AGENTIC_RAG and not self.use_joint_rag
         self.agentic_rag = None
         if self.use_agentic_rag:
-            self.agentic_rag = HEDISAgenticRAG(rag_retriever=rag_retriever, use_llm=False)
+            # Answers are cached at this level (covers both routes)
+            self.agentic_rag = HEDISAgenticRAG(rag_retriever=rag_retriever, use_llm=False, use_query_cache=False)
             logger.info("Basic agentic RAG initialized")
             logger.info("Agentic RAG initialized")
         
+        # Query result cache (exact + semantic tiers, local embeddings only)
+        self.query_cache = None
+        if use_query_cache and HAS_QUERY_CACHE:
+            self.query_cache = QueryResultCache(
+                embedder=self._cache_embedding,
+                similarity_threshold=cache_similarity_threshold,
+                ttl=cache_ttl,
+                name="secure_chatbot"
+            )
+        
     def _initialize_embeddings(self):
         """Initialize local embedding model"""
         if HAS_SENTENCE_TRANSFORMERS:
@@ -135,10 +203,22 @@ class SecureChatbotService:
         else:
             logger.warning("No embedding model available. Using fallback.")
             self.embedding_model = None
+        
+        # Batched encoding with on-disk document cache and query LRU;
+        # falls back to a hashing vectorizer without SentenceTransformers
+        if HAS_EMBEDDING_SERVICE and not isinstance(self.embedding_model, str):
+            self.embedding_service = EmbeddingService(
+                model=self.embedding_model,
+                model_name="all-MiniLM-L6-v2" if self.embedding_model is not None else None,
+                cache_dir=os.path.join(self.data_dir, "embedding_cache"),
+                batch_size=self.embedding_batch_size
+            )
     
     def _initialize_vector_store(self):
-        """Initialize ChromaDB vector store"""
-        if HAS_CHROMADB:
+        """Initialize ChromaDB vector store (or the local vector index)"""
+        if self.vector_backend == "local":
+            self._initialize_local_index()
+        elif HAS_CHROMADB:
             try:
                 # Create persistent ChromaDB instance
                 self.vector_store = chromadb.PersistentClient(
@@ -154,10 +234,23 @@ class SecureChatbotService:
             except Exception as e:
                 logger.error(f"Could not initialize ChromaDB: {e}")
                 self.vector_store = None
+                if self.vector_backend == "auto":
+                    self._initialize_local_index()
+        elif self.vector_backend == "auto":
+            logger.warning("ChromaDB not available. Using local vector index.")
+            self._initialize_local_index()
         else:
             logger.warning("ChromaDB not available. Using in-memory fallback.")
             self.vector_store = None
     
+    def _initialize_local_index(self):
+        """Initialize the in-process vector index (persisted under data_dir)"""
+        if not HAS_VECTOR_INDEX or self.embedding_service is None:
+            logger.warning("Local vector index unavailable. Using keyword search.")
+            return
+        self.local_index = load_or_create_index(os.path.join(self.data_dir, "vector_index.npz"))
+        logger.info(f"Local vector index initialized ({len(self.local_index)} vectors)")
+    
     def _create_measure_knowledge_base(self) -> List[Dict]:
         """Create knowledge base of HEDIS measures"""
         return [
@@ -207,6 +300,8 @@ class SecureChatbotService:
     
     def _generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """Generate embedding for text using local model"""
+        if self.embedding_service is not None:
+            return self.embedding_service.embed_query(text)
         if self.embedding_model is None:
             return None
         
@@ -250,8 +345,8 @@ class SecureChatbotService:
         
         # Generate embeddings and add to collection
         try:
-            if self.embedding_model and not isinstance(self.embedding_model, str):
-                embeddings = self.embedding_model.encode(documents).tolist()
+            if self.embedding_service is not None:
+                embeddings = self.embedding_service.embed_documents(documents).tolist()
                 self.collection.add(
                     documents=documents,
                     metadatas=metadatas,
@@ -262,11 +357,97 @@ class SecureChatbotService:
         except Exception as e:
             logger.error(f"Error populating vector store: {e}")
     
+    def _populate_local_index(self):
+        """Upsert the measure knowledge into the local index (once per process)"""
+        if self._local_index_populated:
+            return
+        documents = []
+        metadatas = []
+        ids = []
+        for i, measure in enumerate(self.measure_knowledge):
+            documents.append(f"{measure['measure']}. {measure['description']}. Keywords: {', '.join(measure['keywords'])}")
+            metadatas.append({
+                "measure": measure['measure'],
+                "typical_roi": measure['typical_roi'],
+                "compliance_target": measure['compliance_target']
+            })
+            ids.append(f"measure_{i}")
+        
+        # Unchanged documents come from the embedding cache, so this is cheap on restart
+        self.local_index.add(ids, self.embedding_service.embed_documents(documents), metadatas=metadatas, documents=documents)
+        try:
+            self.local_index.save(os.path.join(self.data_dir, "vector_index.npz"))
+        except Exception as e:
+            logger.warning(f"Could not persist local vector index: {e}")
+        self._local_index_populated = True
+    
+    def _local_semantic_search(self, query: str, top_k: int = 3) -> Optional[List[Dict]]:
+        """Semantic search against the local vector index (None on failure)"""
+        try:
+            self._populate_local_index()
+            hits = self.local_index.search(self._generate_embedding(query), k=top_k)
+            return [
+                {"measure": hit.metadata.get('measure', ''), "score": hit.score, "metadata": hit.metadata}
+                for hit in hits
+            ]
+        except Exception as e:
+            logger.error(f"Error in local vector search: {e}")
+            return None
+    
+    def _build_keyword_index(self):
+        """BM25 index over the measure knowledge (exact codes like "CBP" or "3044F" match)"""
+        if not HAS_HYBRID_RETRIEVER:
+            return None
+        index = BM25Index()
+        index.add_many(
+            (
+                measure['measure'],
+                f"{measure['measure']}. {measure['description']}. Keywords: {', '.join(measure['keywords'])}",
+                None
+            )
+            for measure in self.measure_knowledge
+        )
+        return index
+    
+    def _measure_match(self, measure_name: str, score: float) -> Dict:
+        """Search result dict for a knowledge-base measure"""
+        measure = next(m for m in self.measure_knowledge if m['measure'] == measure_name)
+        return {
+            "measure": measure_name,
+            "score": score,
+            "metadata": {
+                "measure": measure_name,
+                "typical_roi": measure['typical_roi'],
+                "compliance_target": measure['compliance_target']
+            }
+        }
+    
     def _semantic_search(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Perform semantic search using vector store"""
+        """Hybrid search: vector ranking fused with BM25 ranking (reciprocal rank fusion)"""
+        vector_matches = self._vector_search(query, top_k)
+        if vector_matches is None or self.keyword_index is None:
+            # Without vector results there is nothing to fuse
+            return vector_matches if vector_matches is not None else self._keyword_search(query, top_k)
+        
+        keyword_matches = self._keyword_search(query, top_k)
+        fused = reciprocal_rank_fusion([
+            [m['measure'] for m in vector_matches],
+            [m['measure'] for m in keyword_matches]
+        ])
+        # Scale so a measure ranked first by both retrievers scores 1.0
+        best_possible = 2.0 / (DEFAULT_RRF_K + 1)
+        known = {m['measure'] for m in self.measure_knowledge}
+        return [
+            self._measure_match(measure, score / best_possible)
+            for measure, score in fused if measure in known
+        ][:top_k]
+    
+    def _vector_search(self, query: str, top_k: int = 3) -> Optional[List[Dict]]:
+        """Perform semantic search using vector store (None when unavailable or failed)"""
+        if self.local_index is not None:
+            return self._local_semantic_search(query, top_k)
         if not self.vector_store or not self.collection:
-            # Fallback to keyword matching
-            return self._keyword_search(query, top_k)
+            return None
         
         try:
             # Populate if empty
@@ -275,7 +456,7 @@ class SecureChatbotService:
             # Generate query embedding
             query_embedding = self._generate_embedding(query)
             if query_embedding is None:
-                return self._keyword_search(query, top_k)
+                return None
             
             # Search vector store
             results = self.collection.query(
@@ -296,10 +477,15 @@ class SecureChatbotService:
             return matches
         except Exception as e:
             logger.error(f"Error in semantic search: {e}")
-            return self._keyword_search(query, top_k)
+            return None
     
     def _keyword_search(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Fallback keyword-based search"""
+        """Fallback keyword-based search (BM25 when available)"""
+        if self.keyword_index is not None:
+            hits = self.keyword_index.search(query, k=top_k)
+            # Relative to the best hit, so scores stay in 0-1
+            return [self._measure_match(measure, score / hits[0][1]) for measure, score in hits]
+        
         query_lower = query.lower()
         matches = []
         
@@ -365,11 +551,58 @@ class SecureChatbotService:
             agentic_keywords = ['calculate', 'prioritize', 'find gaps', 'roi', 'validate', 'and', 'then']
             use_agentic = self.use_agentic_rag and any(keyword in query.lower() for keyword in agentic_keywords)
         
-        # Use agentic RAG for complex queries
-        if use_agentic and self.agentic_rag:
+        route = "agentic" if use_agentic and self.agentic_rag else "basic"
+        
+        fingerprint = self._portfolio_fingerprint(portfolio_data)
+        if self.query_cache is None or fingerprint is None:
+            return self._process_query_route(route, query, portfolio_data)
+        
+        # Answers depend on the route and on the portfolio data passed in
+        scope = f"{route}:{fingerprint}"
+        hit = self.query_cache.get(query, scope=scope)
+        if hit is not None:
+            result, info = hit
+            result.setdefault("processing_steps", []).insert(0, {
+                "step": "0. Query Cache",
+                "status": "✅ Complete",
+                "details": f"Answered from {info['tier']} cache tier (similarity {info['similarity']})"
+            })
+            result["cache"] = info
+            return result
+        
+        result = self._process_query_route(route, query, portfolio_data)
+        # Degraded answers (errors, failed steps, fallbacks) are not worth repeating
+        if not is_degraded_result(result):
+            self.query_cache.put(query, result, scope=scope)
+        return result
+    
+    def _process_query_route(self, route: str, query: str, portfolio_data: Optional[pd.DataFrame]) -> Dict:
+        """Dispatch to the agentic or basic pipeline."""
+        if route == "agentic":
             return self._process_query_agentic(query, portfolio_data)
-        else:
-            return self._process_query_basic(query, portfolio_data)
+        return self._process_query_basic(query, portfolio_data)
+    
+    def _cache_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Embedding for the query cache (shares the query LRU with semantic search)."""
+        if self.embedding_service is not None:
+            return self.embedding_service.embed_query(text)
+        return hashed_embedding(text)
+    
+    @staticmethod
+    def _portfolio_fingerprint(portfolio_data: Optional[pd.DataFrame]) -> Optional[str]:
+        """Cheap content hash of the portfolio frame (part of the cache key); None if unhashable."""
+        if portfolio_data is None:
+            return "none"
+        try:
+            values = pd.util.hash_pandas_object(portfolio_data, index=True).values
+            return f"{len(portfolio_data)}:{int(values.sum()) & 0xFFFFFFFFFFFF:x}"
+        except TypeError:
+            # Unhashable cell values (lists, dicts): do not cache
+            return None
+    
+    def get_cache_stats(self) -> Optional[Dict]:
+        """Query cache hit/miss counters (None when caching is disabled)."""
+        return self.query_cache.get_stats() if self.query_cache else None
     
     def _process_query_joint_rag(self, query: str, portfolio_data: Optional[pd.DataFrame] = None) -> Dict:
         """Process query using context-aware agentic RAG (preferred method)."""
@@ -469,12 +702,16 @@ class SecureChatbotService:
                 "context_used": result.get("context_used", {}),
                 "metadata": {
                     "retry_count": result.get("retry_count", 0),
-                    "validation_warning": result.get("validation_warning")
+                    "validation_warning": result.get("validation_warning"),
+                    "step_failures": result.get("step_failures"),
+                    "error": result.get("error")
                 }
             }
         except Exception as e:
             logger.error(f"Agentic RAG processing failed: {e}. Falling back to basic RAG.")
-            return self._process_query_basic(query, portfolio_data)
+            fallback = self._process_query_basic(query, portfolio_data)
+            fallback["fallback_from"] = "agentic_rag"
+            return fallback
     
     def _process_query_basic(self, query: str, portfolio_data: Optional[pd.DataFrame] = None) -> Dict:
         """Process query using basic RAG (original method)."""
@@ -550,6 +787,10 @@ class SecureChatbotService:
         })
         
         # Step 5: Format response
+        if HAS_DEIDENTIFIER and portfolio_data is not None:
+            portfolio_data, report = get_deidentifier().deidentify(portfolio_data)
+            if report.changed:
+                logger.info(f"Portfolio data de-identified for display: {report.to_dict()}")
         response = self._format_response(query, context, portfolio_data)
         processing_steps.append({
             "step": "5. Response Formatting (Local)",
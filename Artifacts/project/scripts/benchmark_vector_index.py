@@ -0,0 +1,131 @@
+"""
+Vector Index Benchmark
+
+Compares the local IVF-flat index against exact brute-force search (and
+ChromaDB when installed) on synthetic clustered embeddings: build time,
+recall@k against brute force, and queries per second.
+
+Usage:
+    python scripts/benchmark_vector_index.py --sizes 10000,100000,1000000 --dim 384
+    python scripts/benchmark_vector_index.py --sizes 10000 --nprobe 4,8,16 --chroma
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.vector_index import FlatIndex, IVFFlatIndex
+
+
+def generate_vectors(n: int, dim: int, n_queries: int, seed: int = 42):
+    """
+    Clustered synthetic embeddings (real sentence embeddings are clustered,
+    uniform random vectors would make every ANN index look bad).
+
+    Returns:
+        Tuple of (vectors, queries) as float32 matrices
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = max(10, n // 1000)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, n_clusters, n)]
+    vectors += 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    queries = vectors[rng.integers(0, n, n_queries)] + 0.2 * rng.normal(size=(n_queries, dim)).astype(np.float32)
+    return vectors, queries
+
+
+def recall_at_k(truth, results, k: int) -> float:
+    """Mean fraction of the exact top-k found by the approximate search."""
+    overlaps = [
+        len({hit.id for hit in exact[:k]} & {hit.id for hit in approx[:k]}) / k
+        for exact, approx in zip(truth, results)
+    ]
+    return float(np.mean(overlaps))
+
+
+def time_queries(search, queries) -> tuple:
+    """Run search() per query; returns (results, queries per second)."""
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    elapsed = time.perf_counter() - start
+    return results, len(queries) / elapsed
+
+
+def benchmark_chroma(ids, vectors, queries, k: int):
+    """Build a throwaway Chroma collection; returns (build_s, qps, result ids) or None."""
+    try:
+        import chromadb
+    except ImportError:
+        print("  chroma: not installed, skipped")
+        return None
+
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="chroma_bench_"))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    start = time.perf_counter()
+    for offset in range(0, len(ids), 5000):
+        collection.add(ids=ids[offset:offset + 5000], embeddings=vectors[offset:offset + 5000].tolist())
+    build = time.perf_counter() - start
+
+    def search(query):
+        return collection.query(query_embeddings=[query.tolist()], n_results=k)["ids"][0]
+
+    results, qps = time_queries(search, queries)
+    return build, qps, results
+
+
+def run(n: int, dim: int, k: int, n_queries: int, nprobes, with_chroma: bool):
+    print(f"\n=== {n:,} vectors x {dim} dims, k={k}, {n_queries} queries ===")
+    vectors, queries = generate_vectors(n, dim, n_queries)
+    ids = [str(i) for i in range(n)]
+
+    flat = FlatIndex()
+    start = time.perf_counter()
+    flat.add(ids, vectors)
+    print(f"  brute force: build {time.perf_counter() - start:6.2f}s", end="")
+    truth, flat_qps = time_queries(lambda q: flat.search(q, k=k), queries)
+    print(f"  {flat_qps:9.1f} QPS  recall@{k} 1.000")
+
+    ivf = IVFFlatIndex(train_size=min(n, 4096))
+    start = time.perf_counter()
+    ivf.add(ids, vectors)
+    build = time.perf_counter() - start
+    for nprobe in nprobes:
+        ivf.nprobe = nprobe
+        results, qps = time_queries(lambda q: ivf.search(q, k=k), queries)
+        print(
+            f"  ivf_flat (nlist={ivf.nlist}, nprobe={nprobe}): build {build:6.2f}s"
+            f"  {qps:9.1f} QPS  recall@{k} {recall_at_k(truth, results, k):.3f}"
+            f"  ({qps / flat_qps:.1f}x brute force)"
+        )
+
+    if with_chroma:
+        chroma = benchmark_chroma(ids, vectors, queries, k)
+        if chroma:
+            build, qps, results = chroma
+            overlaps = [len(set(r) & {hit.id for hit in t}) / k for r, t in zip(results, truth)]
+            print(f"  chroma (hnsw): build {build:6.2f}s  {qps:9.1f} QPS  recall@{k} {np.mean(overlaps):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark local vector index vs brute force and ChromaDB')
+    parser.add_argument('--sizes', type=str, default='10000,100000',
+                        help='Comma-separated index sizes (e.g. 10000,100000,1000000)')
+    parser.add_argument('--dim', type=int, default=384, help='Embedding dimension (MiniLM = 384)')
+    parser.add_argument('--k', type=int, default=10, help='Neighbors per query')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per run')
+    parser.add_argument('--nprobe', type=str, default='4,8,16', help='Comma-separated nprobe values')
+    parser.add_argument('--chroma', action='store_true', help='Also benchmark ChromaDB (if installed)')
+    args = parser.parse_args()
+
+    nprobes = [int(v) for v in args.nprobe.split(',')]
+    for n in (int(v) for v in args.sizes.split(',')):
+        run(n, args.dim, args.k, args.queries, nprobes, args.chroma)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,6 @@ Agentic RAG Planning Agent and Tool Executor for Healthcare AI
 Implements multi-step query decomposition and tool execution using Templates 2 & 3 from AGENTIC_RAG_RULES.md
 """
 import json
-import re
 import logging
 from typing import Dict, List, Optional, Any, Union, Tuple
 from datetime import datetime
@@ -16,7 +15,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 try:
     from database.connection import get_db_context, engine
-    from data.phase1_database import query_to_dataframe
+    from data.phase1_database import get_connection, query_to_dataframe
     from utils.hedis_specs import get_measure_spec, MEASURE_REGISTRY
     HAS_DB = True
 except ImportError:
@@ -25,6 +24,22 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.plan_executor import PlanExecutor, PlanStepTimeout
+from services.query_cache import QueryResultCache, is_degraded_result, register_change_probe
+from services.hybrid_retriever import HybridRetriever, get_hedis_spec_retriever
+from services.security.phi_scanner import PHIScanner, QUERY_PATTERNS, RESULT_PATTERNS, get_phi_scanner
+from services.security.deidentifier import DeidentificationReport, Deidentifier, get_deidentifier
+from services.aggregate_queries import POSTGRES, AggregateQueryError, get_aggregate_query_executor
+
+# ContextAccumulator key for each executable step type
+STEP_CONTEXT_KEYS = {
+    "retrieve": "retrieved_docs",
+    "query_db": "query_results",
+    "calculate": "calculations",
+    "validate": "validations",
+}
+
 
 class PlanningError(Exception):
     """Exception raised for planning errors."""
@@ -390,14 +405,18 @@ class ToolExecutor:
     4. retrieve_docs: RAG retrieval for documentation
     """
     
-    def __init__(self, rag_retriever=None):
+    def __init__(self, rag_retriever=None, deidentifier: Optional[Deidentifier] = None):
         """
         Initialize ToolExecutor.
         
         Args:
             rag_retriever: Optional RAG retriever for retrieve_docs tool
+                (default: hybrid BM25 + vector search over HEDIS spec chunks)
+            deidentifier: Column policies / small-cell suppression applied to
+                tool results (default: shared Deidentifier with default policies)
         """
         self.rag_retriever = rag_retriever
+        self.deidentifier = deidentifier or get_deidentifier()
         self.tools = {
             "query_database": self._query_database,
             "calculate_roi": self._calculate_roi,
@@ -455,6 +474,7 @@ class ToolExecutor:
             # Execute tool
             logger.info(f"Executing tool: {tool_name} with params: {self._sanitize_for_logging(params)}")
             result = self.tools[tool_name](params)
+            report = None
             
             # Validate result before de-identification (Rule 1.1)
             if HAS_PHI_VALIDATOR:
@@ -466,7 +486,7 @@ class ToolExecutor:
                 if not validation_result.is_valid:
                     logger.error(f"PHI detected in tool result. Violation types: {validation_result.violation_types}")
                     # De-identify and re-validate
-                    result = self._de_identify_result(result)
+                    result, report = self._de_identify_result(result)
                     validation_result = phi_validator.validate_before_result_return(
                         result,
                         log_violations=True
@@ -475,7 +495,8 @@ class ToolExecutor:
                         raise ValueError(f"PHI detected in tool result after de-identification. Violation types: {validation_result.violation_types}")
             
             # De-identify result
-            result = self._de_identify_result(result)
+            if report is None:
+                result, report = self._de_identify_result(result)
             
             # Final validation before return (Rule 1.1)
             if HAS_PHI_VALIDATOR:
@@ -491,7 +512,8 @@ class ToolExecutor:
             audit_entry.update({
                 "status": "completed",
                 "result_type": type(result).__name__,
-                "result_size": self._get_result_size(result)
+                "result_size": self._get_result_size(result),
+                "deidentification": report.to_dict()
             })
             
             self.audit_log.append(audit_entry)
@@ -514,7 +536,8 @@ class ToolExecutor:
         """
         Query database (aggregated data only, no PHI).
         
-        Query types:
+        Query types (registered in services.aggregate_queries; results are
+        cached per measure/plan until the source table changes):
         - gaps: Member gaps aggregated by measure
         - performance: Measure performance metrics
         - intervention_costs: Intervention cost data
@@ -542,88 +565,14 @@ class ToolExecutor:
             logger.warning("query_database requires aggregated_only=True. Setting automatically.")
             params["aggregated_only"] = True
         
-        # Build query based on type
-        if query_type == "gaps":
-            query = """
-                SELECT 
-                    measure_id,
-                    COUNT(*) as gap_count,
-                    AVG(predicted_success_rate) as avg_success_rate,
-                    SUM(CASE WHEN risk_score > 0.7 THEN 1 ELSE 0 END) as high_risk_count
-                FROM member_gaps
-                WHERE measure_id = %(measure_id)s
-            """
-            query_params = {"measure_id": measure_id}
-            
-            if plan_id:
-                query += " AND plan_id = %(plan_id)s"
-                query_params["plan_id"] = plan_id
-            
-            query += " GROUP BY measure_id"
-            
-        elif query_type == "performance":
-            query = """
-                SELECT 
-                    measure_id,
-                    COUNT(DISTINCT member_id) as eligible_members,
-                    COUNT(DISTINCT CASE WHEN is_compliant THEN member_id END) as compliant_members,
-                    AVG(CASE WHEN is_compliant THEN 1.0 ELSE 0.0 END) * 100 as compliance_rate_pct
-                FROM member_gaps
-                WHERE measure_id = %(measure_id)s
-            """
-            query_params = {"measure_id": measure_id}
-            
-            if plan_id:
-                query += " AND plan_id = %(plan_id)s"
-                query_params["plan_id"] = plan_id
-            
-            query += " GROUP BY measure_id"
-            
-        elif query_type == "intervention_costs":
-            query = """
-                SELECT 
-                    measure_id,
-                    activity_type,
-                    AVG(unit_cost) as avg_cost,
-                    COUNT(*) as activity_count,
-                    SUM(unit_cost) as total_cost
-                FROM intervention_activities
-                WHERE measure_id = %(measure_id)s
-            """
-            query_params = {"measure_id": measure_id}
-            
-            if plan_id:
-                query += " AND plan_id = %(plan_id)s"
-                query_params["plan_id"] = plan_id
-            
-            query += " GROUP BY measure_id, activity_type"
-            
-        elif query_type == "revenue_impact":
-            query = """
-                SELECT 
-                    measure_id,
-                    star_weight,
-                    revenue_per_star_point,
-                    COUNT(DISTINCT member_id) as members_impacted,
-                    revenue_per_star_point * star_weight as potential_revenue_impact
-                FROM measure_revenue_impact
-                WHERE measure_id = %(measure_id)s
-            """
-            query_params = {"measure_id": measure_id}
-            
-            if plan_id:
-                query += " AND plan_id = %(plan_id)s"
-                query_params["plan_id"] = plan_id
-            
-            query += " GROUP BY measure_id, star_weight, revenue_per_star_point"
-            
-        else:
-            raise ToolExecutionError(f"Unknown query_type: {query_type}")
-        
+        # Named, pre-validated aggregate (prepared statement + result cache)
         try:
-            result = query_to_dataframe(query, query_params)
+            executor = get_aggregate_query_executor(connect=get_connection, dialect=POSTGRES)
+            result = executor.run(query_type, {"measure_id": measure_id, "plan_id": plan_id})
             logger.info(f"Database query returned {len(result)} rows")
             return result
+        except AggregateQueryError as e:
+            raise ToolExecutionError(str(e))
         except Exception as e:
             logger.error(f"Database query failed: {e}")
             raise ToolExecutionError(f"Database query failed: {e}")
@@ -775,13 +724,13 @@ class ToolExecutor:
         top_k = params.get("top_k", 5)
         content_type = params.get("content_type")
         
-        if not self.rag_retriever:
-            # Fallback: return empty results
-            logger.warning("RAG retriever not available. Returning empty results.")
-            return []
-        
         try:
-            results = self.rag_retriever.retrieve(query, top_k=top_k)
+            retriever = self.rag_retriever or get_hedis_spec_retriever()
+            if isinstance(retriever, HybridRetriever) and content_type:
+                # Hybrid retrievers filter on chunk metadata
+                results = retriever.retrieve(query, top_k=top_k, where={"content_type": content_type})
+            else:
+                results = retriever.retrieve(query, top_k=top_k)
             
             # Format results
             formatted_results = []
@@ -809,62 +758,42 @@ class ToolExecutor:
         Returns:
             Tuple of (is_valid, list_of_errors)
         """
-        errors = []
-        params_str = str(params)
-        
-        # PHI patterns
-        phi_patterns = [
-            (r'\b\d{3}-\d{2}-\d{4}\b', 'SSN pattern detected'),
-            (r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b', 'Potential name pattern detected'),
-            (r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'Potential date of birth pattern detected'),
-            (r'\b\d{10,}\b', 'Potential member ID pattern detected'),
+        scanner = get_phi_scanner(QUERY_PATTERNS)
+        matched = sorted({finding.pattern for finding in scanner.scan(params)})
+        errors = [
+            f"{scanner.patterns[i].description}: {scanner.patterns[i].regex}"
+            for i in matched
         ]
-        
-        for pattern, error_msg in phi_patterns:
-            if re.search(pattern, params_str):
-                errors.append(f"{error_msg}: {pattern}")
-        
         return len(errors) == 0, errors
     
-    def _de_identify_result(self, result: Any) -> Any:
+    def _de_identify_result(self, result: Any) -> Tuple[Any, DeidentificationReport]:
         """
-        De-identify result by removing any PHI.
+        De-identify result by applying column policies (drop / hash /
+        generalize) and small-cell suppression.
+        
+        DataFrames are processed column-wise, nested dicts and lists key-wise.
+        The report is returned rather than stored, since plan steps run
+        concurrently on one executor.
         
         Args:
             result: Tool execution result
         
         Returns:
-            De-identified result
+            Tuple of (de-identified result, report)
         """
-        if isinstance(result, pd.DataFrame):
-            # Remove any columns that might contain PHI
-            phi_columns = ['member_id', 'member_name', 'ssn', 'date_of_birth', 'phone', 'email']
-            columns_to_drop = [col for col in phi_columns if col in result.columns]
-            if columns_to_drop:
-                logger.warning(f"Dropping potential PHI columns: {columns_to_drop}")
-                result = result.drop(columns=columns_to_drop)
-        
-        elif isinstance(result, dict):
-            # Remove PHI keys
-            phi_keys = ['member_id', 'member_name', 'ssn', 'date_of_birth', 'phone', 'email']
-            result = {k: v for k, v in result.items() if k not in phi_keys}
-        
-        return result
+        result, report = self.deidentifier.deidentify(result)
+        if report.dropped:
+            logger.warning(f"Dropping potential PHI columns: {report.dropped}")
+        if report.suppressed:
+            logger.info(
+                f"Suppressed {report.suppressed_cells} small cells "
+                f"(< {self.deidentifier.min_cell_size}) in {list(report.suppressed)}"
+            )
+        return result, report
     
     def _sanitize_for_logging(self, data: Any) -> Any:
         """Sanitize data for audit logging (remove sensitive info)."""
-        if isinstance(data, dict):
-            sanitized = {}
-            for key, value in data.items():
-                if key.lower() in ['password', 'secret', 'token', 'api_key']:
-                    sanitized[key] = "***REDACTED***"
-                else:
-                    sanitized[key] = self._sanitize_for_logging(value)
-            return sanitized
-        elif isinstance(data, list):
-            return [self._sanitize_for_logging(item) for item in data]
-        else:
-            return data
+        return self.deidentifier.sanitize_for_logging(data)
     
     def _get_result_size(self, result: Any) -> str:
         """Get size description of result for logging."""
@@ -1077,6 +1006,19 @@ class ResultValidator:
     Based on Template 5 and Rule 2.3 from AGENTIC_RAG_RULES.md
     """
     
+    # Common false positives to ignore in _check_no_phi
+    RESULT_FALSE_POSITIVES = (
+        'retrieved docs', 'query results', 'calculations', 'validations',
+        'net benefit', 'total cost', 'total revenue', 'star impact'
+    )
+    
+    _result_scanner = PHIScanner(
+        RESULT_PATTERNS,
+        false_positive=lambda pattern, match: any(
+            fp in match.lower() for fp in ResultValidator.RESULT_FALSE_POSITIVES
+        )
+    )
+    
     def __init__(self):
         """Initialize validator with metrics tracking."""
         self.validation_metrics = {
@@ -1200,27 +1142,14 @@ class ResultValidator:
     
     def _check_no_phi(self, result: Dict) -> bool:
         """Check no PHI in result."""
-        result_str = str(result)
-        phi_patterns = [
-            (r'\b\d{3}-\d{2}-\d{4}\b', 'SSN pattern'),  # SSN
-            (r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\b', 'Full name pattern'),  # Full names (3+ words)
-            (r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'DOB pattern'),  # Date of birth
-        ]
-        
-        # Common false positives to ignore
-        false_positives = [
-            'Retrieved Docs', 'Query Results', 'Calculations', 'Validations',
-            'Net Benefit', 'Total Cost', 'Total Revenue', 'Star Impact'
-        ]
-        
-        for pattern, description in phi_patterns:
-            matches = re.findall(pattern, result_str)
-            # Filter out false positives
-            real_matches = [m for m in matches if not any(fp.lower() in str(m).lower() for fp in false_positives)]
-            if real_matches:
-                logger.warning(f"PHI pattern detected in result: {description} - {real_matches[:3]}")
-                return False
-        
+        findings = self._result_scanner.scan(result)
+        if findings:
+            # Types and locations only, never the matched text
+            logger.warning(
+                f"PHI pattern detected in result: {findings[0].description} - "
+                f"{len(findings)} match(es) at {[f.path for f in findings[:3]]}"
+            )
+            return False
         return True
     
     def _check_completeness(self, result: Dict) -> bool:
@@ -1271,7 +1200,16 @@ class HEDISAgenticRAG:
     5. Validation and retry with self-correction
     """
     
-    def __init__(self, rag_retriever=None, use_llm: bool = False, llm_client=None):
+    def __init__(
+        self,
+        rag_retriever=None,
+        use_llm: bool = False,
+        llm_client=None,
+        max_parallel_steps: int = 4,
+        step_timeout: float = 30.0,
+        use_query_cache: bool = True,
+        query_cache: Optional[QueryResultCache] = None
+    ):
         """
         Initialize HEDISAgenticRAG.
         
@@ -1279,6 +1217,10 @@ class HEDISAgenticRAG:
             rag_retriever: Optional RAG retriever for document retrieval
             use_llm: If True, use LLM for planning/synthesis
             llm_client: Optional LLM client
+            max_parallel_steps: Max plan steps executing concurrently
+            step_timeout: Per-step timeout in seconds
+            use_query_cache: If True, reuse answers to repeated/similar queries
+            query_cache: Optional cache instance (e.g. shared across agents)
         """
         self.rag_retriever = rag_retriever
         self.tool_executor = ToolExecutor(rag_retriever=rag_retriever)
@@ -1286,11 +1228,23 @@ class HEDISAgenticRAG:
         self.synthesizer = ResponseSynthesizer(use_llm=use_llm, llm_client=llm_client)
         self.validator = ResultValidator()
         self.context_accumulator = ContextAccumulator()
+        self.plan_executor = PlanExecutor(
+            max_workers=max_parallel_steps,
+            step_timeout=step_timeout,
+            max_step_retries=1,
+            retry_on=(ToolExecutionError,)
+        )
+        self.query_cache = (query_cache or QueryResultCache(name="agentic_rag")) if use_query_cache else None
+        if self.query_cache is not None and HAS_DB:
+            # member_gaps / measure_performance are written by ETL and SQL
+            # scripts in other processes; their write counters drive invalidation
+            register_change_probe(query_to_dataframe, self.query_cache.tables, self.query_cache.versions)
         self.max_steps = 10
         self.max_retries = 3
         
         # Metrics tracking
         self.metrics = {
+            "cache_hits": 0,
             "total_queries": 0,
             "total_steps": 0,
             "successful_steps": 0,
@@ -1301,6 +1255,38 @@ class HEDISAgenticRAG:
         }
     
     def process_query(self, query: str, max_retries: Optional[int] = None) -> Dict:
+        """
+        Process query using agentic RAG, answering from the query cache when
+        the same (or a near-identical) question was already answered against
+        the current data.
+        
+        Args:
+            query: User query string
+            max_retries: Maximum retry attempts (default: 3)
+        
+        Returns:
+            Dictionary as returned by _process_query_uncached; cached answers
+            carry a "cache" entry with the tier and similarity
+        """
+        if self.query_cache is None:
+            return self._process_query_uncached(query, max_retries)
+        
+        hit = self.query_cache.get(query)
+        if hit is not None:
+            result, info = hit
+            self.metrics["cache_hits"] += 1
+            logger.info(f"Query cache {info['tier']} hit (similarity {info['similarity']})")
+            result["cache"] = info
+            result["metrics"] = self._get_metrics()
+            return result
+        
+        result = self._process_query_uncached(query, max_retries)
+        # Degraded answers (fallbacks, failed steps) are not worth repeating
+        if not is_degraded_result(result):
+            self.query_cache.put(query, result)
+        return result
+    
+    def _process_query_uncached(self, query: str, max_retries: Optional[int] = None) -> Dict:
         """
         Process query using agentic RAG.
         
@@ -1330,6 +1316,10 @@ class HEDISAgenticRAG:
         
         retry_count = 0
         
+        # Results of steps that succeeded in an earlier attempt; a refined
+        # plan re-uses them instead of re-running the same tool call
+        completed_steps: Dict[str, Any] = {}
+        
         while retry_count <= max_retries:
             # Increment query counter only on first attempt
             if is_first_attempt:
@@ -1351,45 +1341,26 @@ class HEDISAgenticRAG:
                     )
                     plan["steps"] = plan["steps"][:self.max_steps]
                 
-                # Step 2: Execute steps with validation
+                # Step 2: Execute steps (independent steps run concurrently)
                 executed_steps = []
                 step_failures = []
                 
-                for step in plan["steps"]:
-                    # Skip synthesize step (handled separately)
-                    if step["type"] == "synthesize":
-                        continue
-                    
+                execution = self.plan_executor.execute(
+                    plan["steps"],
+                    self._run_step,
+                    completed=completed_steps
+                )
+                
+                # Accumulate and validate in plan order (deterministic context)
+                for outcome in execution.outcomes:
+                    step = outcome.step
                     self.metrics["total_steps"] += 1
-                    logger.info(f"Executing step: {step['id']} ({step['type']})")
                     
-                    try:
-                        result = None
-                        
-                        if step["type"] == "retrieve":
-                            result = self.tool_executor.execute("retrieve_docs", {
-                                "query": step.get("query", ""),
-                                "top_k": step.get("params", {}).get("top_k", 5),
-                                "content_type": step.get("params", {}).get("content_type")
-                            })
-                            self.context_accumulator.add_step_result("retrieved_docs", result)
-                        
-                        elif step["type"] == "query_db":
-                            result = self.tool_executor.execute("query_database", step.get("params", {}))
-                            self.context_accumulator.add_step_result("query_results", result)
-                        
-                        elif step["type"] == "calculate":
-                            operation = step.get("params", {}).get("operation", "roi")
-                            if operation == "roi":
-                                result = self.tool_executor.execute("calculate_roi", step.get("params", {}))
-                            else:
-                                # Generic calculation
-                                result = self.tool_executor.execute("calculate_roi", step.get("params", {}))
-                            self.context_accumulator.add_step_result("calculations", result)
-                        
-                        elif step["type"] == "validate":
-                            result = self.tool_executor.execute("validate_hedis_spec", step.get("params", {}))
-                            self.context_accumulator.add_step_result("validations", result)
+                    if outcome.succeeded:
+                        result = outcome.result
+                        accumulator_key = STEP_CONTEXT_KEYS.get(step["type"])
+                        if accumulator_key:
+                            self.context_accumulator.add_step_result(accumulator_key, result)
                         
                         # Validate step result
                         is_valid, errors = self.validator.validate_step_result(
@@ -1414,24 +1385,34 @@ class HEDISAgenticRAG:
                             )
                             # Still add result to context (may be useful)
                             executed_steps.append(step["id"])
-                        
-                    except (ToolExecutionError, ToolNotFoundError) as e:
-                        self.metrics["failed_steps"] += 1
-                        step_failures.append({
-                            "step_id": step["id"],
-                            "step_type": step["type"],
-                            "errors": [str(e)]
-                        })
-                        logger.error(f"Step {step['id']} execution failed: {e}")
-                        # Try fallback operation
-                        fallback_result = self._fallback_operation(step)
-                        if fallback_result:
-                            self.metrics["fallback_operations"] += 1
-                            logger.info(f"Fallback operation succeeded for step {step['id']}")
-                            executed_steps.append(step["id"])
-                        else:
-                            logger.warning(f"No fallback available for step {step['id']}. Skipping.")
-                            continue
+                        continue
+                    
+                    # Unexpected errors abort this attempt (outer retry), as before
+                    if not isinstance(outcome.error, (ToolExecutionError, ToolNotFoundError, PlanStepTimeout)):
+                        raise outcome.error
+                    
+                    self.metrics["failed_steps"] += 1
+                    step_failures.append({
+                        "step_id": step["id"],
+                        "step_type": step["type"],
+                        "errors": [str(outcome.error)]
+                    })
+                    logger.error(f"Step {step['id']} execution failed: {outcome.error}")
+                    # Try fallback operation
+                    fallback_result = self._fallback_operation(step)
+                    if fallback_result:
+                        self.metrics["fallback_operations"] += 1
+                        logger.info(f"Fallback operation succeeded for step {step['id']}")
+                        executed_steps.append(step["id"])
+                    else:
+                        logger.warning(f"No fallback available for step {step['id']}. Skipping.")
+                
+                logger.info(
+                    f"Executed {len(execution.outcomes)} steps | "
+                    f"wall {execution.wall_time * 1000:.1f}ms | "
+                    f"critical path {execution.critical_path_time * 1000:.1f}ms "
+                    f"({' -> '.join(execution.critical_path)})"
+                )
                 
                 # Step 3: Synthesize
                 full_context = self.context_accumulator.get_full_context()
@@ -1453,6 +1434,7 @@ class HEDISAgenticRAG:
                         "context_used": full_context,
                         "retry_count": retry_count,
                         "step_failures": step_failures,
+                        "execution": execution.summary(),
                         "metrics": self._get_metrics()
                     }
                 else:
@@ -1475,6 +1457,7 @@ class HEDISAgenticRAG:
                             "context_used": full_context,
                             "retry_count": retry_count,
                             "step_failures": step_failures,
+                            "execution": execution.summary(),
                             "validation_warning": "Response did not pass validation, using fallback",
                             "metrics": self._get_metrics()
                         }
@@ -1506,6 +1489,34 @@ class HEDISAgenticRAG:
                         "metrics": self._get_metrics()
                     }
     
+    def _run_step(self, step: Dict) -> Any:
+        """
+        Execute one plan step with its tool (runs on a plan-executor worker).
+        
+        Args:
+            step: Plan step
+        
+        Returns:
+            Tool result (None for unknown step types)
+        """
+        logger.info(f"Executing step: {step['id']} ({step['type']})")
+        params = step.get("params", {})
+        
+        if step["type"] == "retrieve":
+            return self.tool_executor.execute("retrieve_docs", {
+                "query": step.get("query", ""),
+                "top_k": params.get("top_k", 5),
+                "content_type": params.get("content_type")
+            })
+        elif step["type"] == "query_db":
+            return self.tool_executor.execute("query_database", params)
+        elif step["type"] == "calculate":
+            # ROI and generic calculations share the ROI tool
+            return self.tool_executor.execute("calculate_roi", params)
+        elif step["type"] == "validate":
+            return self.tool_executor.execute("validate_hedis_spec", params)
+        return None
+    
     def _refine_query(self, query: str, response: Dict, step_failures: List[Dict]) -> str:
         """
         Refine query based on validation errors and step failures.
@@ -1628,12 +1639,15 @@ class HEDISAgenticRAG:
             "total_retries": self.metrics["total_retries"],
             "queries_with_retries": self.metrics["queries_with_retries"],
             "fallback_operations": self.metrics["fallback_operations"],
+            "cache_hits": self.metrics["cache_hits"],
+            "query_cache": self.query_cache.get_stats() if self.query_cache else None,
             "validator_metrics": self.validator.get_metrics()
         }
     
     def reset_metrics(self):
         """Reset metrics (useful for testing)."""
         self.metrics = {
+            "cache_hits": 0,
             "total_queries": 0,
             "total_steps": 0,
             "successful_steps": 0,
@@ -0,0 +1,444 @@
+"""
+Prepared Aggregate Queries for the Agent Database Tool
+Named, pre-validated aggregate queries with prepared statements on one
+pooled connection and a result cache.
+
+- AGGREGATE_QUERIES is the registry the ``query_database`` tool can run;
+  each query is validated once at registration (single SELECT, GROUP BY,
+  no member-level columns in the output, declared parameters only)
+- SQL for every filter combination and dialect is rendered once; on
+  PostgreSQL each variant is PREPAREd on the pooled connection, on SQLite
+  the identical SQL text hits the connection's statement cache
+- Results are cached by (query name, params, table version); the version
+  comes from the shared DataVersionRegistry in query_cache, so writers
+  that call ``invalidate_tables`` also invalidate these results. On
+  PostgreSQL the executor also registers a change probe for the tables its
+  queries read, so writes from other processes (ETL, SQL scripts) are seen
+"""
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from services.query_cache import DataVersionRegistry, data_versions, register_change_probe
+
+logger = logging.getLogger(__name__)
+
+POSTGRES = "postgres"
+SQLITE = "sqlite"
+
+# Output columns that would make a result member-level
+MEMBER_LEVEL_COLUMNS = frozenset(["member_id", "member_name", "ssn", "date_of_birth", "phone", "email"])
+
+_PARAM_RE = re.compile(r":([a-z_][a-z0-9_]*)")
+
+
+class AggregateQueryError(ValueError):
+    """Invalid query definition or parameters."""
+
+
+@dataclass(frozen=True)
+class AggregateQuery:
+    """
+    One named aggregate query.
+
+    Attributes:
+        name: Registry name (the tool's ``query_type``)
+        select: SELECT ... FROM ... WHERE clause with ``:param`` placeholders
+        group_by: GROUP BY column list
+        tables: Tables read (for cache invalidation)
+        required: Parameters that must be provided
+        filters: Optional parameter -> condition appended with AND when the
+            parameter is provided
+    """
+    name: str
+    select: str
+    group_by: str
+    tables: Tuple[str, ...]
+    required: Tuple[str, ...] = ()
+    filters: Tuple[Tuple[str, str], ...] = ()
+
+    def render(self, active_filters: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
+        """SQL (``:param`` style) for a filter combination and its parameter order."""
+        conditions = dict(self.filters)
+        sql = " ".join(self.select.split())
+        for name in active_filters:
+            sql += f" AND {conditions[name]}"
+        sql += f" GROUP BY {self.group_by}"
+        return sql, tuple(_PARAM_RE.findall(sql))
+
+
+def validate_query(query: AggregateQuery):
+    """
+    Check a query definition once, at registration.
+
+    Raises:
+        AggregateQueryError: If the query is not a single parameterized
+            aggregate over non-member-level output columns
+    """
+    sql, params = query.render(tuple(name for name, _ in query.filters))
+    lowered = sql.lower()
+    if not lowered.startswith("select ") or ";" in sql:
+        raise AggregateQueryError(f"{query.name}: must be a single SELECT statement")
+    if "group by" not in lowered:
+        raise AggregateQueryError(f"{query.name}: aggregate queries require GROUP BY")
+
+    # Output columns: the alias (or bare column) of each select item
+    select_list = lowered[len("select "):lowered.index(" from ")]
+    depth, start, items = 0, 0, []
+    for i, char in enumerate(select_list):
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and depth == 0:
+            items.append(select_list[start:i])
+            start = i + 1
+    items.append(select_list[start:])
+    outputs = {item.split()[-1].strip() for item in items if item.strip()}
+    leaked = outputs & MEMBER_LEVEL_COLUMNS
+    if leaked:
+        raise AggregateQueryError(f"{query.name}: member-level output columns {sorted(leaked)}")
+
+    declared = set(query.required) | {name for name, _ in query.filters}
+    undeclared = set(params) - declared
+    if undeclared:
+        raise AggregateQueryError(f"{query.name}: undeclared parameters {sorted(undeclared)}")
+
+
+# ===== Registry =====
+
+_PLAN_FILTER = (("plan_id", "plan_id = :plan_id"),)
+
+AGGREGATE_QUERIES: Dict[str, AggregateQuery] = {}
+
+
+def register_query(query: AggregateQuery) -> AggregateQuery:
+    """Validate and add a query to the registry."""
+    validate_query(query)
+    AGGREGATE_QUERIES[query.name] = query
+    return query
+
+
+register_query(AggregateQuery(
+    name="gaps",
+    select="""
+        SELECT
+            measure_id,
+            COUNT(*) as gap_count,
+            AVG(predicted_success_rate) as avg_success_rate,
+            SUM(CASE WHEN risk_score > 0.7 THEN 1 ELSE 0 END) as high_risk_count
+        FROM member_gaps
+        WHERE measure_id = :measure_id
+    """,
+    group_by="measure_id",
+    tables=("member_gaps",),
+    required=("measure_id",),
+    filters=_PLAN_FILTER,
+))
+
+register_query(AggregateQuery(
+    name="performance",
+    select="""
+        SELECT
+            measure_id,
+            COUNT(DISTINCT member_id) as eligible_members,
+            COUNT(DISTINCT CASE WHEN is_compliant THEN member_id END) as compliant_members,
+            AVG(CASE WHEN is_compliant THEN 1.0 ELSE 0.0 END) * 100 as compliance_rate_pct
+        FROM member_gaps
+        WHERE measure_id = :measure_id
+    """,
+    group_by="measure_id",
+    tables=("member_gaps",),
+    required=("measure_id",),
+    filters=_PLAN_FILTER,
+))
+
+register_query(AggregateQuery(
+    name="intervention_costs",
+    select="""
+        SELECT
+            measure_id,
+            activity_type,
+            AVG(unit_cost) as avg_cost,
+            COUNT(*) as activity_count,
+            SUM(unit_cost) as total_cost
+        FROM intervention_activities
+        WHERE measure_id = :measure_id
+    """,
+    group_by="measure_id, activity_type",
+    tables=("intervention_activities",),
+    required=("measure_id",),
+    filters=_PLAN_FILTER,
+))
+
+register_query(AggregateQuery(
+    name="revenue_impact",
+    select="""
+        SELECT
+            measure_id,
+            star_weight,
+            revenue_per_star_point,
+            COUNT(DISTINCT member_id) as members_impacted,
+            revenue_per_star_point * star_weight as potential_revenue_impact
+        FROM measure_revenue_impact
+        WHERE measure_id = :measure_id
+    """,
+    group_by="measure_id, star_weight, revenue_per_star_point",
+    tables=("measure_revenue_impact",),
+    required=("measure_id",),
+    filters=_PLAN_FILTER,
+))
+
+
+# ===== Executor =====
+
+@dataclass
+class _Statement:
+    """One rendered filter/dialect variant of a query."""
+    name: str
+    sql: str
+    params: Tuple[str, ...]
+
+
+@dataclass
+class _CachedResult:
+    frame: pd.DataFrame
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class AggregateQueryExecutor:
+    """
+    Runs registry queries on one pooled connection with a result cache.
+
+    Args:
+        connect: Zero-argument connection factory (psycopg2 or sqlite3);
+            called once, and again only after a connection error
+        dialect: "postgres" or "sqlite"
+        registry: Query registry (default: AGGREGATE_QUERIES)
+        versions: Table version registry (default: the shared one used by
+            the chatbot QueryResultCache); on PostgreSQL a change probe for
+            the registry's tables is added to it
+        ttl_seconds: Cached result lifetime
+        max_entries: LRU bound of the result cache
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        dialect: str = POSTGRES,
+        registry: Optional[Dict[str, AggregateQuery]] = None,
+        versions: Optional[DataVersionRegistry] = None,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 512
+    ):
+        if dialect not in (POSTGRES, SQLITE):
+            raise ValueError(f"Unknown dialect: {dialect}. Use '{POSTGRES}' or '{SQLITE}'")
+        self.connect = connect
+        self.dialect = dialect
+        self.registry = registry if registry is not None else AGGREGATE_QUERIES
+        self.versions = versions or data_versions
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._conn = None
+        self._prepared: set = set()
+        self._statements: Dict[Tuple[str, Tuple[str, ...]], _Statement] = {}
+        self._cache: "OrderedDict[Tuple, _CachedResult]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "executions": 0, "prepares": 0}
+
+        if self.dialect == POSTGRES:
+            tables = sorted({table for query in self.registry.values() for table in query.tables})
+            register_change_probe(self._probe_query, tables, self.versions)
+
+    # ===== Public API =====
+
+    def run(self, name: str, params: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Run a registry query.
+
+        Args:
+            name: Query name (e.g. "gaps")
+            params: Query parameters; unknown keys are ignored
+
+        Returns:
+            Result DataFrame (a copy; callers may modify it)
+
+        Raises:
+            AggregateQueryError: Unknown query or missing required parameter
+        """
+        query = self.registry.get(name)
+        if query is None:
+            raise AggregateQueryError(f"Unknown query: {name}. Available: {sorted(self.registry)}")
+        missing = [p for p in query.required if params.get(p) in (None, "")]
+        if missing:
+            raise AggregateQueryError(f"{name}: missing required parameters {missing}")
+
+        filter_names = tuple(f for f, _ in query.filters if params.get(f) not in (None, ""))
+        bound = {p: params[p] for p in query.required + filter_names}
+        key = (name, tuple(sorted(bound.items())), self.versions.token(query.tables))
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached.created_at <= self.ttl_seconds:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached.frame.copy()
+            self.stats["misses"] += 1
+
+            statement = self._statement(query, filter_names)
+            frame = self._execute(statement, bound)
+
+            self._cache[key] = _CachedResult(frame)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return frame.copy()
+
+    def invalidate(self, *tables: str):
+        """Drop cached results (all, or those reading the given tables)."""
+        with self._lock:
+            if not tables:
+                self._cache.clear()
+                return
+            for key in [k for k in self._cache if set(self.registry[k[0]].tables) & set(tables)]:
+                del self._cache[key]
+
+    def close(self):
+        """Close the pooled connection."""
+        with self._lock:
+            self._reset_connection()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "cached_results": len(self._cache),
+                "hit_rate": self.stats["hits"] / total if total else 0.0,
+            }
+
+    def _probe_query(self, sql: str, params: Dict[str, Any]):
+        """Run a change-probe query on the pooled connection."""
+        with self._lock:
+            cursor = self._connection().cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    # ===== Statements =====
+
+    def _statement(self, query: AggregateQuery, filter_names: Tuple[str, ...]) -> _Statement:
+        key = (query.name, filter_names)
+        statement = self._statements.get(key)
+        if statement is None:
+            sql, params = query.render(filter_names)
+            suffix = "_".join(filter_names) or "base"
+            statement_name = f"agg_{query.name}_{suffix}"
+            if self.dialect == POSTGRES:
+                # Positional $n for PREPARE; repeated names reuse their slot
+                order = list(dict.fromkeys(params))
+                sql = _PARAM_RE.sub(lambda m: f"${order.index(m.group(1)) + 1}", sql)
+                params = tuple(order)
+            statement = self._statements[key] = _Statement(statement_name, sql, params)
+        return statement
+
+    def _execute(self, statement: _Statement, bound: Dict[str, Any]) -> pd.DataFrame:
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                cursor = conn.cursor()
+                try:
+                    if self.dialect == POSTGRES:
+                        if statement.name not in self._prepared:
+                            cursor.execute(f"PREPARE {statement.name} AS {statement.sql}")
+                            self._prepared.add(statement.name)
+                            self.stats["prepares"] += 1
+                        placeholders = ", ".join(["%s"] * len(statement.params))
+                        cursor.execute(
+                            f"EXECUTE {statement.name}({placeholders})" if placeholders else f"EXECUTE {statement.name}",
+                            [bound[p] for p in statement.params]
+                        )
+                    else:
+                        cursor.execute(statement.sql, bound)
+                    columns = [column[0] for column in cursor.description]
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+                self.stats["executions"] += 1
+                return pd.DataFrame.from_records(rows, columns=columns)
+            except Exception as e:
+                # A broken pooled connection is replaced once; SQL errors
+                # on a healthy connection surface immediately
+                if attempt == 2 or self._connection_alive(conn):
+                    self._rollback(conn)
+                    raise
+                logger.warning(f"Pooled connection failed ({e}). Reconnecting.")
+                self._reset_connection()
+
+    # ===== Connection =====
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = self.connect()
+            self._prepared.clear()
+            if self.dialect == POSTGRES and hasattr(self._conn, "autocommit"):
+                # Read-only aggregates; no open transaction between calls
+                self._conn.autocommit = True
+        return self._conn
+
+    @staticmethod
+    def _connection_alive(conn) -> bool:
+        closed = getattr(conn, "closed", 0)
+        if closed:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _rollback(conn):
+        try:
+            if not getattr(conn, "autocommit", True):
+                conn.rollback()
+        except Exception:
+            pass
+
+    def _reset_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._prepared.clear()
+
+
+_executor: Optional[AggregateQueryExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_aggregate_query_executor(connect: Optional[Callable[[], Any]] = None, dialect: str = POSTGRES) -> AggregateQueryExecutor:
+    """
+    Shared executor for the agent tool layer.
+
+    The first call fixes the connection factory; later calls return the
+    same executor (and its pooled connection and cache).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if connect is None:
+                raise AggregateQueryError("No connection factory configured for aggregate queries")
+            _executor = AggregateQueryExecutor(connect, dialect=dialect)
+        return _executor
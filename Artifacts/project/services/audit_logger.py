@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import sys
 import os
+import threading
 
 # Add project root to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -27,6 +28,12 @@ except ImportError:
     HAS_DB = False
     logger.warning("Database utilities not available. Audit logs will be stored in memory only.")
 
+try:
+    from src.database.audit_writer import BatchedAuditWriter
+    HAS_BATCH_WRITER = True
+except ImportError:
+    HAS_BATCH_WRITER = False
+
 try:
     from services.security.phi_validator import get_phi_validator
     HAS_PHI_VALIDATOR = True
@@ -35,6 +42,41 @@ except ImportError:
 
 from services.context_engine import estimate_tokens
 
+# One batched writer per process for audit_logs: every JointAuditLogger
+# shares it (and its spill file) instead of racing on the same path.
+_joint_writer = None
+_joint_writer_lock = threading.Lock()
+
+
+def get_joint_audit_writer():
+    """
+    Get the process-wide audit_logs writer, starting it on first use.
+    
+    The writer's close() is registered with atexit when it starts, so queued
+    entries are drained on interpreter exit even without an explicit close.
+    
+    Configuration (environment):
+        JOINT_AUDIT_SPILL_PATH: Spill file (default: ./.joint_audit_spill.jsonl)
+    """
+    global _joint_writer
+    with _joint_writer_lock:
+        if _joint_writer is None:
+            _joint_writer = BatchedAuditWriter(
+                sink=JointAuditLogger._store_batch_in_database,
+                spill_path=os.getenv("JOINT_AUDIT_SPILL_PATH", ".joint_audit_spill.jsonl"),
+                name="joint_audit",
+            ).start()
+        return _joint_writer
+
+
+def close_joint_audit_writer(timeout: float = 10.0):
+    """Drain and stop the shared audit_logs writer (call on shutdown)."""
+    global _joint_writer
+    with _joint_writer_lock:
+        writer, _joint_writer = _joint_writer, None
+    if writer is not None:
+        writer.close(timeout)
+
 
 class JointAuditLogger:
     """
@@ -49,18 +91,24 @@ class JointAuditLogger:
     - Query interface for compliance review
     """
     
-    def __init__(self, use_database: bool = True):
+    def __init__(self, use_database: bool = True, batched: bool = True):
         """
         Initialize joint audit logger.
         
         Args:
             use_database: If True, store logs in database (default: True)
+            batched: If True, database writes go through a background batched
+                writer instead of one INSERT per request (default: True)
         """
         self.use_database = use_database and HAS_DB
         self.audit_log = []  # In-memory fallback
+        self._writer = None
         
         if self.use_database:
             self._ensure_table_exists()
+        
+        if self.use_database and batched and HAS_BATCH_WRITER:
+            self._writer = get_joint_audit_writer()
     
     def _ensure_table_exists(self):
         """Ensure audit_logs table exists in database."""
@@ -207,7 +255,10 @@ class JointAuditLogger:
         }
         
         # Store in database if enabled
-        if self.use_database:
+        if self._writer is not None:
+            # Off the request path; spilled to disk (not lost) if the DB is down
+            self._writer.submit(audit_entry)
+        elif self.use_database:
             try:
                 self._store_in_database(audit_entry)
             except Exception as e:
@@ -225,26 +276,20 @@ class JointAuditLogger:
     
     def _store_in_database(self, audit_entry: Dict):
         """Store audit entry in database."""
-        if not HAS_DB:
+        self._store_batch_in_database([audit_entry])
+    
+    @staticmethod
+    def _store_batch_in_database(audit_entries: List[Dict]):
+        """
+        Store audit entries in database with one executemany INSERT.
+        
+        All entries are written in a single transaction (all or nothing),
+        so a failed batch can be retried or spilled as a unit.
+        """
+        if not HAS_DB or not audit_entries:
             return
         
         try:
-            # Prepare data for database
-            plan_steps_json = json.dumps(audit_entry["plan"]["steps"])
-            step_results_summary = json.dumps([
-                {
-                    "step_index": r["step_index"],
-                    "result_type": r["result_type"],
-                    "result_hash": r["result_hash"]
-                }
-                for r in audit_entry["step_results"]
-            ])
-            validation_results_json = json.dumps(audit_entry.get("validation_results")) if audit_entry.get("validation_results") else None
-            errors_json = json.dumps(audit_entry.get("errors")) if audit_entry.get("errors") else None
-            
-            # Full log data as JSONB
-            log_data_json = json.dumps(audit_entry)
-            
             insert_sql = text("""
                 INSERT INTO audit_logs (
                     timestamp, query_hash, query_length,
@@ -263,28 +308,10 @@ class JointAuditLogger:
                 )
             """)
             
-            params = {
-                "timestamp": datetime.fromisoformat(audit_entry["timestamp"]),
-                "query_hash": audit_entry["query_hash"],
-                "query_length": audit_entry["query_length"],
-                "initial_context_hash": audit_entry["initial_context"]["hash"],
-                "initial_context_size_tokens": audit_entry["initial_context"]["size_tokens"],
-                "initial_context_layers": json.dumps(audit_entry["initial_context"]["layers"]),
-                "plan_steps_count": audit_entry["plan"]["steps_count"],
-                "plan_steps": plan_steps_json,
-                "step_results_count": len(audit_entry["step_results"]),
-                "step_results_summary": step_results_summary,
-                "final_context_hash": audit_entry["final_context"]["hash"],
-                "final_context_size_tokens": audit_entry["final_context"]["size_tokens"],
-                "execution_time_ms": audit_entry.get("execution_time_ms"),
-                "validation_results": validation_results_json,
-                "errors": errors_json,
-                "log_data": log_data_json
-            }
+            params = [JointAuditLogger._to_db_params(entry) for entry in audit_entries]
             
-            with engine.connect() as conn:
+            with engine.begin() as conn:
                 conn.execute(insert_sql, params)
-                conn.commit()
         
         except SQLAlchemyError as e:
             logger.error(f"Database error storing audit log: {e}")
@@ -293,6 +320,61 @@ class JointAuditLogger:
             logger.error(f"Error storing audit log: {e}")
             raise
     
+    @staticmethod
+    def _to_db_params(audit_entry: Dict) -> Dict:
+        """Map an audit entry to audit_logs column values."""
+        step_results_summary = json.dumps([
+            {
+                "step_index": r["step_index"],
+                "result_type": r["result_type"],
+                "result_hash": r["result_hash"]
+            }
+            for r in audit_entry["step_results"]
+        ])
+        validation_results_json = json.dumps(audit_entry.get("validation_results")) if audit_entry.get("validation_results") else None
+        errors_json = json.dumps(audit_entry.get("errors")) if audit_entry.get("errors") else None
+        
+        return {
+            "timestamp": datetime.fromisoformat(audit_entry["timestamp"]),
+            "query_hash": audit_entry["query_hash"],
+            "query_length": audit_entry["query_length"],
+            "initial_context_hash": audit_entry["initial_context"]["hash"],
+            "initial_context_size_tokens": audit_entry["initial_context"]["size_tokens"],
+            "initial_context_layers": json.dumps(audit_entry["initial_context"]["layers"]),
+            "plan_steps_count": audit_entry["plan"]["steps_count"],
+            "plan_steps": json.dumps(audit_entry["plan"]["steps"]),
+            "step_results_count": len(audit_entry["step_results"]),
+            "step_results_summary": step_results_summary,
+            "final_context_hash": audit_entry["final_context"]["hash"],
+            "final_context_size_tokens": audit_entry["final_context"]["size_tokens"],
+            "execution_time_ms": audit_entry.get("execution_time_ms"),
+            "validation_results": validation_results_json,
+            "errors": errors_json,
+            # Full log data as JSONB
+            "log_data": json.dumps(audit_entry)
+        }
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for queued entries to reach the database.
+        
+        Called before queries so compliance reads see recent executions.
+        """
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """
+        Drain this logger's queued entries and detach from the shared writer.
+        
+        The writer itself keeps serving other loggers; it is stopped by
+        close_joint_audit_writer() or at interpreter exit.
+        """
+        if self._writer is not None:
+            self._writer.flush(timeout)
+            self._writer = None
+    
     def get_audit_log(self, limit: Optional[int] = None) -> List[Dict]:
         """
         Get audit log entries.
@@ -315,6 +397,8 @@ class JointAuditLogger:
         if not HAS_DB:
             return []
         
+        self.flush()
+        
         try:
             query_sql = """
                 SELECT 
@@ -382,6 +466,8 @@ class JointAuditLogger:
         if not HAS_DB:
             return []
         
+        self.flush()
+        
         try:
             query_sql = text("""
                 SELECT 
@@ -446,6 +532,8 @@ class JointAuditLogger:
         if not HAS_DB:
             return []
         
+        self.flush()
+        
         try:
             query_sql = text("""
                 SELECT 
@@ -503,6 +591,8 @@ class JointAuditLogger:
         if not HAS_DB:
             return {"error": "Database not available"}
         
+        self.flush()
+        
         try:
             stats_sql = text("""
                 SELECT 
@@ -4,7 +4,6 @@ Implements HIPAA-compliant context engineering with 3-layer hierarchy
 
 Based on Template 1 from CONTEXT_ENGINEERING_RULES.md
 """
-import re
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
@@ -33,6 +32,28 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.security.phi_scanner import CONTEXT_PATTERNS, QUERY_PATTERNS, get_phi_scanner
+from services.context_packer import ContextChunk, ContextPacker, PackedContext, count_structure_tokens, count_tokens
+
+try:
+    from services.security.phi_validator import PHIValidator, get_phi_validator
+    HAS_PHI_VALIDATOR = True
+except ImportError:
+    HAS_PHI_VALIDATOR = False
+    logger.warning("phi_validator not available. Using fallback query PHI check.")
+
+# Assembled contexts are checked with CONTEXT_PATTERNS: the default NAME
+# pattern would reject measure names and spec text
+_context_phi_validator = PHIValidator(CONTEXT_PATTERNS) if HAS_PHI_VALIDATOR else None
+
+try:
+    from services.hybrid_retriever import get_hedis_spec_retriever
+    HAS_HYBRID_RETRIEVER = True
+except ImportError:
+    HAS_HYBRID_RETRIEVER = False
+    logger.warning("hybrid_retriever not available. Layer 3 falls back to keywords.")
+
 # TERMINOLOGY_CONTEXT from Rule 1.4
 TERMINOLOGY_CONTEXT = """
 HEDIS: Healthcare Effectiveness Data and Information Set
@@ -63,6 +84,14 @@ HEDIS MY2025: Current specification version
 HEI: Health Equity Index (2027 requirement)
 """
 
+# Layer 1 field relevance for budget packing; required fields are always kept
+DOMAIN_FIELD_RELEVANCE = {
+    "terminology": 0.9,
+    "star_ratings": 0.7,
+    "temporal": 0.5,
+}
+REQUIRED_DOMAIN_FIELDS = ("hedis_overview", "compliance")
+
 
 class HierarchicalContextBuilder:
     """
@@ -74,14 +103,17 @@ class HierarchicalContextBuilder:
     3. Query-specific context (retrieved dynamically)
     """
     
-    def __init__(self, rag_retriever=None):
+    def __init__(self, rag_retriever=None, packer: Optional[ContextPacker] = None):
         """
         Initialize the hierarchical context builder.
         
         Args:
             rag_retriever: Optional RAG retriever for query-specific context
+            packer: Token budget packer (default: ContextPacker with the
+                default per-layer shares)
         """
         self.rag_retriever = rag_retriever
+        self.packer = packer or ContextPacker()
         
         # Measure name mappings for query extraction
         self.measure_keywords = {
@@ -98,12 +130,16 @@ class HierarchicalContextBuilder:
         """
         Build hierarchical context with token management.
         
+        Each domain field, measure and retrieved document is tokenized once
+        and packed into ``max_tokens`` by relevance (see ContextPacker).
+        
         Args:
             query: User query string
             max_tokens: Maximum token limit (default: 4000)
         
         Returns:
             Dictionary with layer_1_domain, layer_2_measure, layer_3_query
+            and the per-layer budget breakdown under "_token_budget"
         
         Raises:
             ValueError: If PHI is detected in query
@@ -132,31 +168,90 @@ class HierarchicalContextBuilder:
         
         # Validate context before returning (Rule 1.1)
         if HAS_PHI_VALIDATOR:
-            phi_validator = get_phi_validator()
-            validation_result = phi_validator.validate_before_context_assembly(
+            validation_result = _context_phi_validator.validate_before_context_assembly(
                 context,
                 log_violations=True
             )
             if not validation_result.is_valid:
                 raise ValueError(f"PHI detected in assembled context. Violation types: {validation_result.violation_types}")
         
-        # Compress if needed
-        estimated_tokens = estimate_tokens(context)
-        if estimated_tokens > max_tokens:
+        # Pack into the token budget
+        packed = self.packer.pack(self._context_chunks(context), max_tokens)
+        if packed.candidate_tokens > max_tokens:
             logger.warning(
-                f"Context exceeds token limit ({estimated_tokens} > {max_tokens}). "
-                "Compressing context..."
+                f"Context exceeds token limit ({packed.candidate_tokens} > {max_tokens}). "
+                f"Packed to {packed.total_tokens} tokens by relevance."
             )
-            context = self._compress_context(context, max_tokens)
+        context = self._assemble_context(packed)
         
         logger.info(
-            f"Built hierarchical context: {estimated_tokens} tokens, "
+            f"Built hierarchical context: {packed.total_tokens} tokens, "
             f"{len(context['layer_2_measure'])} measures, "
             f"{len(context['layer_3_query'].get('retrieved_docs', []))} retrieved docs"
         )
         
         return context
     
+    def _context_chunks(self, context: Dict) -> List[ContextChunk]:
+        """
+        Split the layers into scored chunks for packing.
+        
+        Layer 1: one chunk per field (hedis_overview and compliance required)
+        Layer 2: one chunk per measure (explicitly requested, full relevance)
+        Layer 3: one chunk per retrieved document, scored relative to the
+            best document, with a summarized variant for long documents;
+            keywords and query type are required
+        """
+        chunks = []
+        for key, value in context["layer_1_domain"].items():
+            chunks.append(ContextChunk(
+                "layer_1_domain", key, value,
+                score=DOMAIN_FIELD_RELEVANCE.get(key, 1.0),
+                required=key in REQUIRED_DOMAIN_FIELDS
+            ))
+        
+        for measure_id, measure_data in context["layer_2_measure"].items():
+            chunks.append(ContextChunk("layer_2_measure", measure_id, measure_data, score=1.0))
+        
+        query_layer = context["layer_3_query"]
+        docs = query_layer.get("retrieved_docs", [])
+        top_score = max((doc.get("score", 0.0) for doc in docs), default=0.0) or 1.0
+        for i, doc in enumerate(docs):
+            content = doc.get("content", "")
+            summary = None
+            if isinstance(content, str) and len(content) > 200:
+                summary = {
+                    **doc,
+                    "content": summarize_document(content, max_length=200),
+                    "original_length": len(content),
+                    "compressed": True
+                }
+            chunks.append(ContextChunk(
+                "layer_3_query", i, doc,
+                score=max(0.0, doc.get("score", 0.0)) / top_score,
+                summary=summary
+            ))
+        for key, value in query_layer.items():
+            if key not in ("retrieved_docs", "relevance_scores"):
+                chunks.append(ContextChunk("layer_3_query", key, value, required=True))
+        return chunks
+    
+    def _assemble_context(self, packed: PackedContext) -> Dict:
+        """Rebuild the layered context from the selected chunks."""
+        context = {
+            "layer_1_domain": {},
+            "layer_2_measure": {},
+            "layer_3_query": {"retrieved_docs": [], "relevance_scores": []}
+        }
+        for chunk in packed.selected:
+            if chunk.layer == "layer_3_query" and isinstance(chunk.key, int):
+                context["layer_3_query"]["retrieved_docs"].append(chunk.value)
+                context["layer_3_query"]["relevance_scores"].append(chunk.value.get("score", 0.0))
+            else:
+                context[chunk.layer][chunk.key] = chunk.value
+        context["_token_budget"] = packed.to_dict()
+        return context
+    
     def _get_domain_knowledge(self) -> Dict:
         """
         Layer 1: Core domain knowledge (HEDIS specs, terminology).
@@ -222,7 +317,8 @@ class HierarchicalContextBuilder:
         """
         Layer 3: Query-specific retrieved context.
         
-        Uses RAG to retrieve relevant documents if available.
+        Uses RAG to retrieve relevant documents if available; otherwise
+        hybrid BM25 + vector search over the HEDIS spec chunks.
         
         Args:
             query: User query string
@@ -230,9 +326,12 @@ class HierarchicalContextBuilder:
         Returns:
             Dictionary with retrieved documents and relevance scores
         """
-        if self.rag_retriever:
+        retriever = self.rag_retriever
+        if retriever is None and HAS_HYBRID_RETRIEVER:
+            retriever = get_hedis_spec_retriever()
+        if retriever:
             try:
-                retrieved = self.rag_retriever.retrieve(query, top_k=5)
+                retrieved = retriever.retrieve(query, top_k=5)
                 return {
                     "retrieved_docs": [
                         {
@@ -357,21 +456,13 @@ class HierarchicalContextBuilder:
         Returns:
             Tuple of (is_valid, list_of_errors)
         """
-        errors = []
-        
-        # PHI patterns from Rule 1.8
-        phi_patterns = [
-            (r'\b\d{3}-\d{2}-\d{4}\b', 'SSN pattern detected'),
-            (r'\b\d{3}-\d{2}-\d{4}\b', 'SSN pattern detected'),
-            (r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b', 'Potential name pattern detected'),
-            (r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'Potential date of birth pattern detected'),
-            (r'\b\d{10,}\b', 'Potential member ID pattern detected'),
+        # PHI patterns from Rule 1.8, compiled into one pass
+        scanner = get_phi_scanner(QUERY_PATTERNS)
+        matched = sorted({finding.pattern for finding in scanner.scan_text(query)})
+        errors = [
+            f"{scanner.patterns[i].description}: {scanner.patterns[i].regex}"
+            for i in matched
         ]
-        
-        for pattern, error_msg in phi_patterns:
-            if re.search(pattern, query):
-                errors.append(f"{error_msg}: {pattern}")
-        
         return len(errors) == 0, errors
     
     def _estimate_tokens(self, context: Dict) -> int:
@@ -532,17 +623,20 @@ def compress_context(context: Dict, target_tokens: int = 3000, logger: Optional[
         )
     
     # Step 3: Truncate long text fields if still over limit
-    current_tokens = estimate_tokens(compressed)
     if current_tokens > target_tokens:
-        # Truncate domain knowledge fields
+        # Truncate domain knowledge fields (running total, no re-count of
+        # the whole context per field)
         if "layer_1_domain" in compressed:
             domain = compressed["layer_1_domain"]
             for field in ["hedis_overview", "star_ratings"]:
-                if field in domain and isinstance(domain[field], str):
-                    max_field_tokens = (target_tokens - estimate_tokens(compressed)) + len(domain[field]) // 4
-                    max_field_chars = max_field_tokens * 4
-                    if len(domain[field]) > max_field_chars:
-                        domain[field] = domain[field][:max_field_chars] + "..."
+                if field in domain and isinstance(domain[field], str) and domain[field]:
+                    field_tokens = count_tokens(domain[field])
+                    max_field_tokens = target_tokens - current_tokens + field_tokens
+                    if field_tokens > max_field_tokens:
+                        max_field_chars = max(0, len(domain[field]) * max_field_tokens // field_tokens)
+                        truncated = domain[field][:max_field_chars] + "..."
+                        current_tokens += count_tokens(truncated) - field_tokens
+                        domain[field] = truncated
         
         # Truncate measure context if needed
         if "layer_2_measure" in compressed:
@@ -619,7 +713,9 @@ def estimate_tokens(context: Dict) -> int:
     """
     Estimate token count for context.
     
-    Uses simple approximation: ~4 characters per token.
+    Counts each string leaf with the local tokenizer (cached per string,
+    see context_packer.count_tokens) plus one token per key/item for
+    delimiters; the context is never serialized as a whole.
     
     Args:
         context: Context dictionary
@@ -627,7 +723,5 @@ def estimate_tokens(context: Dict) -> int:
     Returns:
         Estimated token count
     """
-    context_str = str(context)
-    # Rough approximation: 4 characters per token
-    return len(context_str) // 4
+    return count_structure_tokens(context)
 
@@ -0,0 +1,350 @@
+"""
+Token-Accurate, Budget-Aware Context Packing
+Selects which pieces of the hierarchical context fit a token budget.
+
+- Tokens are counted with a local tokenizer (tiktoken cl100k_base) when
+  installed, else with a word/digit/punctuation estimator approximating it;
+  counts are cached per string, so each chunk is tokenized once
+- The context is split into chunks (one per domain field, measure and
+  retrieved document), each serialized once and scored by relevance
+- Chunks are selected per layer with a 0/1 knapsack (maximize relevance
+  within the layer's token share); documents may also enter as a summary
+  (multiple-choice knapsack), and unused budget is pooled in a second pass
+- The result carries a per-layer budget breakdown
+
+Based on Template 4 from CONTEXT_ENGINEERING_RULES.md
+"""
+import re
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Share of the budget reserved for each layer in the first packing pass
+DEFAULT_LAYER_SHARES: Dict[str, float] = {
+    "layer_1_domain": 0.25,
+    "layer_2_measure": 0.35,
+    "layer_3_query": 0.40,
+}
+
+# Relevance of a summarized document relative to the full text
+SUMMARY_VALUE = 0.6
+
+# Knapsack capacity is quantized to at most this many cells (token counts
+# are rounded up, so quantization never overshoots the budget)
+MAX_KNAPSACK_CELLS = 4096
+
+# ===== Token counting =====
+
+_WORD_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        if HAS_TIKTOKEN:
+            try:
+                _encoder = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception as e:  # encoding files unavailable offline
+                logger.warning(f"tiktoken encoding {DEFAULT_ENCODING} unavailable ({e}). Using token estimator.")
+    return _encoder
+
+
+def _estimate_text_tokens(text: str) -> int:
+    # BPE vocabularies hold most words whole (longer words split roughly
+    # every 4 letters), numbers in 3-digit pieces, punctuation singly
+    tokens = 0
+    for piece in _WORD_PIECES.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 + max(0, len(piece) - 4) // 4
+        elif piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def count_tokens(text: str) -> int:
+    """Token count of one string (cached)."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return _estimate_text_tokens(text)
+
+
+def count_structure_tokens(value: Any) -> int:
+    """
+    Token count of a nested structure without serializing it as a whole.
+
+    Strings (and keys) are counted through the ``count_tokens`` cache; each
+    key/value pair and list item adds one token for its delimiters.
+    """
+    if value is None:
+        return 1
+    if isinstance(value, str):
+        return count_tokens(value)
+    if isinstance(value, dict):
+        return sum(
+            count_tokens(str(key)) + count_structure_tokens(item) + 1
+            for key, item in value.items()
+        ) + 1
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(count_structure_tokens(item) + 1 for item in value) + 1
+    return count_tokens(str(value))
+
+
+def serialize_chunk(value: Any) -> str:
+    """Compact text form of a chunk value (what is tokenized)."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+# ===== Chunks =====
+
+@dataclass
+class ContextChunk:
+    """
+    One selectable piece of context.
+
+    Attributes:
+        layer: Layer key (e.g. "layer_3_query")
+        key: Location inside the layer (field name, measure ID or doc index)
+        value: The context value placed back when selected
+        score: Relevance in [0, 1]
+        required: Always included (charged to the budget first)
+        summary: Optional cheaper variant of ``value``
+        tokens: Token count of ``value`` (filled by the packer)
+        summary_tokens: Token count of ``summary``
+    """
+    layer: str
+    key: Any
+    value: Any
+    score: float = 1.0
+    required: bool = False
+    summary: Any = None
+    tokens: int = 0
+    summary_tokens: int = 0
+
+
+@dataclass
+class LayerBudget:
+    """Per-layer budget breakdown."""
+    budget: int = 0
+    used: int = 0
+    candidates: int = 0
+    selected: int = 0
+    summarized: int = 0
+    dropped: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "budget": self.budget,
+            "used": self.used,
+            "candidates": self.candidates,
+            "selected": self.selected,
+            "summarized": self.summarized,
+            "dropped": self.dropped,
+        }
+
+
+@dataclass
+class PackedContext:
+    """
+    Packing result.
+
+    Attributes:
+        selected: Chosen chunks, in input order, with the chosen value
+            (full text or summary)
+        total_tokens: Tokens of the selected chunks
+        candidate_tokens: Tokens of all candidates at full size
+        max_tokens: Budget
+        layers: Layer key -> LayerBudget
+        tokenizer: "tiktoken" or "estimator"
+    """
+    selected: List[ContextChunk]
+    total_tokens: int
+    candidate_tokens: int
+    max_tokens: int
+    layers: Dict[str, LayerBudget] = field(default_factory=dict)
+    tokenizer: str = "estimator"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_tokens": self.max_tokens,
+            "total_tokens": self.total_tokens,
+            "candidate_tokens": self.candidate_tokens,
+            "tokenizer": self.tokenizer,
+            "layers": {layer: budget.to_dict() for layer, budget in self.layers.items()},
+        }
+
+
+# ===== Packing =====
+
+def _knapsack(options: Sequence[Sequence[Tuple[int, float]]], capacity: int) -> List[int]:
+    """
+    Multiple-choice 0/1 knapsack.
+
+    Args:
+        options: Per item, its (tokens, value) variants; at most one
+            variant per item is taken
+        capacity: Token budget
+
+    Returns:
+        Chosen variant index per item (-1 = not taken)
+    """
+    if capacity <= 0 or not options:
+        return [-1] * len(options)
+    # Quantize capacity; weights are rounded up so the plan stays feasible
+    unit = max(1, -(-capacity // MAX_KNAPSACK_CELLS))
+    cells = capacity // unit
+    best = np.zeros(cells + 1)
+    choices = np.full((len(options), cells + 1), -1, dtype=np.int8)
+    for i, variants in enumerate(options):
+        current = best.copy()
+        for v, (tokens, value) in enumerate(variants):
+            weight = -(-tokens // unit)
+            if weight > cells:
+                continue
+            candidate = np.full(cells + 1, -np.inf)
+            candidate[weight:] = best[:cells + 1 - weight] + value
+            better = candidate > current
+            current[better] = candidate[better]
+            choices[i, better] = v
+        best = current
+
+    # Trace back from the best reachable capacity
+    chosen = [-1] * len(options)
+    cell = int(np.argmax(best))
+    for i in range(len(options) - 1, -1, -1):
+        v = int(choices[i, cell])
+        if v >= 0:
+            chosen[i] = v
+            cell -= -(-options[i][v][0] // unit)
+    return chosen
+
+
+class ContextPacker:
+    """
+    Fills a token budget with the most relevant context chunks.
+
+    Args:
+        layer_shares: Layer key -> share of the budget for the first pass
+            (default: DEFAULT_LAYER_SHARES); layers not listed only get
+            pooled leftover budget
+    """
+
+    def __init__(self, layer_shares: Optional[Dict[str, float]] = None):
+        self.layer_shares = dict(layer_shares or DEFAULT_LAYER_SHARES)
+
+    @property
+    def tokenizer(self) -> str:
+        return "tiktoken" if _get_encoder() is not None else "estimator"
+
+    def measure(self, chunk: ContextChunk) -> ContextChunk:
+        """Tokenize a chunk (once; counts are kept on the chunk)."""
+        if not chunk.tokens:
+            chunk.tokens = count_tokens(serialize_chunk(chunk.value))
+        if chunk.summary is not None and not chunk.summary_tokens:
+            chunk.summary_tokens = count_tokens(serialize_chunk(chunk.summary))
+        return chunk
+
+    def pack(self, chunks: Sequence[ContextChunk], max_tokens: int) -> PackedContext:
+        """
+        Select chunks within ``max_tokens``.
+
+        Required chunks are taken first. Each layer then gets a knapsack over
+        its share of the remaining budget, and whatever is left is pooled
+        for a second knapsack over the chunks not yet taken.
+        """
+        chunks = [self.measure(chunk) for chunk in chunks]
+        layers: Dict[str, LayerBudget] = {}
+        for chunk in chunks:
+            layers.setdefault(chunk.layer, LayerBudget()).candidates += 1
+
+        chosen: Dict[int, int] = {}  # chunk index -> 0 full / 1 summary
+        used = 0
+        for i, chunk in enumerate(chunks):
+            if chunk.required:
+                chosen[i] = 0
+                used += chunk.tokens
+
+        # Pass 1: each layer within its share
+        remaining = max(0, max_tokens - used)
+        total_share = sum(self.layer_shares.get(layer, 0.0) for layer in layers) or 1.0
+        for layer, budget in layers.items():
+            budget.budget = int(remaining * self.layer_shares.get(layer, 0.0) / total_share)
+            pending = [i for i, c in enumerate(chunks) if c.layer == layer and i not in chosen]
+            for i, v in zip(pending, _knapsack([self._variants(chunks[i]) for i in pending], budget.budget)):
+                if v >= 0:
+                    chosen[i] = v
+                    used += self._tokens(chunks[i], v)
+
+        # Pass 2: pooled leftover
+        leftover = max_tokens - used
+        pending = [i for i in range(len(chunks)) if i not in chosen]
+        if leftover > 0 and pending:
+            for i, v in zip(pending, _knapsack([self._variants(chunks[i]) for i in pending], leftover)):
+                if v >= 0:
+                    chosen[i] = v
+                    used += self._tokens(chunks[i], v)
+
+        selected = []
+        for i, chunk in enumerate(chunks):
+            budget = layers[chunk.layer]
+            if i not in chosen:
+                budget.dropped += 1
+                continue
+            v = chosen[i]
+            tokens = self._tokens(chunk, v)
+            budget.used += tokens
+            budget.selected += 1
+            if v == 1:
+                budget.summarized += 1
+                chunk = ContextChunk(
+                    layer=chunk.layer, key=chunk.key, value=chunk.summary, score=chunk.score,
+                    required=chunk.required, tokens=tokens
+                )
+            selected.append(chunk)
+
+        return PackedContext(
+            selected=selected,
+            total_tokens=used,
+            candidate_tokens=sum(chunk.tokens for chunk in chunks),
+            max_tokens=max_tokens,
+            layers=layers,
+            tokenizer=self.tokenizer
+        )
+
+    @staticmethod
+    def _variants(chunk: ContextChunk) -> List[Tuple[int, float]]:
+        # Zero-relevance chunks still fill otherwise unused budget
+        score = max(chunk.score, 1e-6)
+        variants = [(chunk.tokens, score)]
+        if chunk.summary is not None:
+            variants.append((chunk.summary_tokens, score * SUMMARY_VALUE))
+        return variants
+
+    @staticmethod
+    def _tokens(chunk: ContextChunk, variant: int) -> int:
+        return chunk.summary_tokens if variant == 1 else chunk.tokens
@@ -0,0 +1,239 @@
+"""
+Batched, Cached Embedding Service
+Local embeddings for the chatbot knowledge base and queries.
+
+- Documents are encoded in configurable batches and persisted in an
+  on-disk cache keyed by content hash (model name + text), so an unchanged
+  knowledge base is never re-embedded across restarts.
+- Query embeddings are kept in an in-memory LRU.
+- Without a model (sentence-transformers not installed) a deterministic
+  hashing vectorizer is used, so retrieval still works offline.
+"""
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.query_cache import hashed_embedding
+
+
+HASHING_MODEL_NAME = "hashing-v1"
+
+
+def content_hash(text: str, model_name: str) -> str:
+    """Cache key for one text under one model."""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingService:
+    """
+    Batched encoder with a persistent document cache and a query LRU.
+
+    Args:
+        model: Object with ``encode(list_of_texts, batch_size=...)`` (e.g. a
+            SentenceTransformer); None uses the hashing vectorizer
+        model_name: Name stored in cache keys (switching models never
+            reuses old vectors)
+        cache_dir: Directory for the on-disk cache; None disables persistence
+        batch_size: Texts per ``encode`` call
+        query_cache_size: Max query embeddings kept in memory
+        hashing_dim: Vector size of the hashing fallback
+
+    Notes:
+        - Vectors are float32; the disk cache is a single ``.npz`` per model
+          (keys + matrix), rewritten atomically when new vectors are added
+        - Thread-safe
+    """
+
+    def __init__(
+        self,
+        model: Optional[Any] = None,
+        model_name: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        batch_size: int = 64,
+        query_cache_size: int = 1024,
+        hashing_dim: int = 384
+    ):
+        self.model = model
+        self.model_name = model_name or (type(model).__name__ if model is not None else HASHING_MODEL_NAME)
+        self.cache_dir = cache_dir
+        self.batch_size = max(1, batch_size)
+        self.query_cache_size = query_cache_size
+        self.hashing_dim = hashing_dim
+
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._disk_loaded = False
+        self._dirty = False
+        self._queries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "encoded": 0,
+            "batches": 0,
+            "document_cache_hits": 0,
+            "query_cache_hits": 0,
+            "query_cache_misses": 0,
+        }
+
+    @property
+    def uses_model(self) -> bool:
+        """False when running on the hashing fallback."""
+        return self.model is not None
+
+    @property
+    def cache_path(self) -> Optional[str]:
+        """On-disk cache file for this model (None when persistence is off)."""
+        if not self.cache_dir:
+            return None
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name)
+        return os.path.join(self.cache_dir, f"embeddings_{safe_name}.npz")
+
+    # ===== Public API =====
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed documents, encoding only texts not seen before.
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            float32 matrix, one row per text (input order)
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        keys = [content_hash(text, self.model_name) for text in texts]
+        with self._lock:
+            self._load_disk_cache()
+            missing: Dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in self._vectors and key not in missing:
+                    missing[key] = text
+            self.stats["document_cache_hits"] += len(keys) - len(missing)
+
+        if missing:
+            vectors = self._encode(list(missing.values()))
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    self._vectors[key] = vector
+                self._dirty = True
+                self._save_disk_cache()
+
+        with self._lock:
+            return np.stack([self._vectors[key] for key in keys])
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed one query, served from the in-memory LRU when repeated."""
+        with self._lock:
+            vector = self._queries.get(text)
+            if vector is not None:
+                self._queries.move_to_end(text)
+                self.stats["query_cache_hits"] += 1
+                return vector
+            self.stats["query_cache_misses"] += 1
+
+        vector = self._encode([text])[0]
+        with self._lock:
+            self._queries[text] = vector
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+    def embed_queries(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed several queries; uncached ones are encoded in one batch."""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                if text in self._queries:
+                    found[text] = self._queries[text]
+                    self._queries.move_to_end(text)
+                    self.stats["query_cache_hits"] += 1
+            missing = [text for text in dict.fromkeys(texts) if text not in found]
+            self.stats["query_cache_misses"] += len(missing)
+        if missing:
+            vectors = self._encode(missing)
+            with self._lock:
+                for text, vector in zip(missing, vectors):
+                    found[text] = vector
+                    self._queries[text] = vector
+                while len(self._queries) > self.query_cache_size:
+                    self._queries.popitem(last=False)
+        return np.stack([found[text] for text in texts])
+
+    @property
+    def dimension(self) -> int:
+        """Embedding vector size."""
+        if self.model is None:
+            return self.hashing_dim
+        get_dim = getattr(self.model, "get_sentence_embedding_dimension", None)
+        if get_dim is not None:
+            return int(get_dim())
+        return int(self._encode(["dimension probe"]).shape[1])
+
+    def get_stats(self) -> Dict:
+        """Encode/cache counters and cache sizes."""
+        with self._lock:
+            return {
+                **self.stats,
+                "model": self.model_name,
+                "documents_cached": len(self._vectors),
+                "queries_cached": len(self._queries),
+            }
+
+    # ===== Internals =====
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in batches of batch_size."""
+        chunks = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            if self.model is None:
+                encoded = np.stack([hashed_embedding(text, dim=self.hashing_dim) for text in batch])
+            else:
+                encoded = self.model.encode(batch, batch_size=self.batch_size)
+            chunks.append(np.asarray(encoded, dtype=np.float32).reshape(len(batch), -1))
+            self.stats["batches"] += 1
+        self.stats["encoded"] += len(texts)
+        return np.concatenate(chunks)
+
+    def _load_disk_cache(self):
+        # Caller holds the lock
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        path = self.cache_path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                for key, vector in zip(data["keys"], data["vectors"]):
+                    self._vectors.setdefault(str(key), vector)
+            logger.info(f"Loaded {len(self._vectors)} cached embeddings from {path}")
+        except Exception as e:
+            # A corrupt cache only costs a re-encode
+            logger.warning(f"Ignoring unreadable embedding cache {path}: {e}")
+
+    def _save_disk_cache(self):
+        # Caller holds the lock
+        path = self.cache_path
+        if not path or not self._dirty or not self._vectors:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        keys = list(self._vectors)
+        tmp_path = path + ".tmp.npz"
+        try:
+            np.savez(tmp_path, keys=np.array(keys), vectors=np.stack([self._vectors[k] for k in keys]))
+            os.replace(tmp_path, path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"Could not persist embedding cache {path}: {e}")
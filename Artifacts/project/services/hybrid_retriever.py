@@ -0,0 +1,445 @@
+"""
+Hybrid BM25 + Vector Retrieval
+Retrieval over the measure knowledge base and HEDIS specification chunks.
+
+- BM25Index: incremental inverted index. The tokenizer keeps codes whole
+  ("3044f", "e11.9", "pdc-rasa", "4548-4") as well as their parts, so exact
+  CPT/ICD-10/LOINC codes and measure IDs match where substring keyword
+  matching and embeddings miss them.
+- HybridRetriever: BM25 ranking fused with vector ranking
+  (services/vector_index.py) through reciprocal rank fusion (RRF), which
+  needs no score calibration between the two.
+
+Implements the ``retrieve(query, top_k)`` interface used by ToolExecutor and
+HierarchicalContextBuilder, so it can be passed as their ``rag_retriever``.
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.embedding_service import EmbeddingService
+from services.vector_index import VectorIndex, Where, create_index, matches_where
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from utils import hedis_specs
+    HAS_HEDIS_SPECS = True
+except ImportError:
+    hedis_specs = None
+    HAS_HEDIS_SPECS = False
+    logger.warning("hedis_specs not available. HEDIS spec chunks will be empty.")
+
+
+# Words or codes, with "." / "-" allowed inside (E11.9, PDC-RASA, 4548-4)
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "the", "to", "was", "what", "whats",
+    "which", "with", "me", "my", "our", "show", "tell", "give", "about",
+})
+
+# RRF damping constant from Cormack et al.; 60 is the usual default
+DEFAULT_RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for BM25.
+
+    Compound tokens are kept whole and also split, so "PDC-RASA" indexes as
+    ["pdc-rasa", "pdc", "rasa"] and matches both the code and its parts.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if "." in token or "-" in token:
+            terms.extend(part for part in re.split(r"[.\-]", token) if len(part) > 1 and part not in _STOPWORDS)
+    return terms
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = DEFAULT_RRF_K,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several best-first id lists: score(d) = sum_i w_i / (k + rank_i(d)).
+
+    Args:
+        rankings: One ranked id list per retriever (rank 1 = first)
+        k: Damping constant; larger flattens the rank contribution
+        weights: Optional per-ranking weights (default 1.0 each)
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index.
+
+    Args:
+        k1: Term-frequency saturation
+        b: Document-length normalization
+
+    Notes:
+        - Postings are appended per term and converted to NumPy arrays lazily,
+          so adding documents never rebuilds the index
+        - Re-adding an id replaces the document (the old row is tombstoned)
+        - Thread-safe
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._df: Counter = Counter()
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._doc_terms: List[Tuple[str, ...]] = []
+        self._lengths: List[int] = []
+        self._lengths_array = np.zeros(0, dtype=np.float32)
+        self._alive: List[bool] = []
+        self._alive_array = np.zeros(0, dtype=bool)
+        self._metadatas: List[Dict[str, Any]] = []
+        self._total_length = 0
+        self._live_count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Index (or replace) one document."""
+        self.add_many([(doc_id, text, metadata)])
+
+    def add_many(self, documents: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        """Index (or replace) a batch of (id, text, metadata) documents."""
+        with self._lock:
+            for doc_id, text, metadata in documents:
+                self._remove(doc_id)
+                counts = Counter(tokenize(text))
+                row = len(self._ids)
+                self._ids.append(doc_id)
+                self._id_to_row[doc_id] = row
+                self._doc_terms.append(tuple(counts))
+                self._lengths.append(sum(counts.values()))
+                self._alive.append(True)
+                self._metadatas.append(dict(metadata or {}))
+                self._total_length += self._lengths[-1]
+                self._live_count += 1
+                for term, tf in counts.items():
+                    rows, tfs = self._postings.setdefault(term, ([], []))
+                    rows.append(row)
+                    tfs.append(tf)
+                    self._df[term] += 1
+                    self._arrays.pop(term, None)
+            self._lengths_array = np.asarray(self._lengths, dtype=np.float32)
+            self._alive_array = np.asarray(self._alive, dtype=bool)
+
+    def remove(self, doc_id: str):
+        """Drop a document from results (no-op when unknown)."""
+        with self._lock:
+            self._remove(doc_id)
+            self._alive_array = np.asarray(self._alive, dtype=bool)
+
+    def _remove(self, doc_id: str):
+        # Caller holds the lock
+        row = self._id_to_row.pop(doc_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._total_length -= self._lengths[row]
+        self._live_count -= 1
+        for term in self._doc_terms[row]:
+            self._df[term] -= 1
+
+    def search(self, query: str, k: int = 10, where: Optional[Where] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k documents by BM25 score.
+
+        Args:
+            query: Query text
+            k: Number of results
+            where: Metadata filter (see ``services.vector_index.matches_where``)
+
+        Returns:
+            (id, score) pairs, best first; documents matching no term are omitted
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query))]
+        with self._lock:
+            n_docs = self._live_count
+            if n_docs == 0 or not terms:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                df = self._df.get(term, 0)
+                if df <= 0:
+                    continue
+                rows, tfs = self._term_arrays(term)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths_array[rows] / avg_length)
+                scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            scores[~self._alive_array] = 0.0
+
+            candidates = np.flatnonzero(scores > 0)
+            if where is not None:
+                candidates = np.array(
+                    [row for row in candidates if matches_where(self._metadatas[row], where)],
+                    dtype=np.int64
+                )
+            if len(candidates) == 0:
+                return []
+            if len(candidates) > k:
+                top = np.argpartition(-scores[candidates], k - 1)[:k]
+                candidates = candidates[top]
+            order = np.argsort(-scores[candidates], kind="stable")
+            return [(self._ids[row], float(scores[row])) for row in candidates[order]]
+
+    def _term_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        # Caller holds the lock
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows, tfs = self._postings[term]
+            arrays = (np.asarray(rows, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+
+
+class HybridRetriever:
+    """
+    BM25 + vector retrieval fused with reciprocal rank fusion.
+
+    Args:
+        embedding_service: Encoder for the vector side; None = BM25 only
+        vector_index: Index for document vectors (default: IVF-flat)
+        rrf_k: RRF damping constant
+        candidates_per_retriever: Each side contributes top_k * this many
+            candidates before fusion
+        bm25_weight: RRF weight of the BM25 ranking
+        vector_weight: RRF weight of the vector ranking
+
+    Notes:
+        - ``add_documents`` is incremental; unchanged documents (same id and
+          content) are skipped
+        - ``score`` in results is the fused RRF score scaled to 0-1
+          (1.0 = ranked first by every retriever)
+    """
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_index: Optional[VectorIndex] = None,
+        rrf_k: int = DEFAULT_RRF_K,
+        candidates_per_retriever: int = 4,
+        bm25_weight: float = 1.0,
+        vector_weight: float = 1.0
+    ):
+        self.embedding_service = embedding_service
+        self.vector_index = vector_index if vector_index is not None else (
+            create_index("ivf_flat") if embedding_service is not None else None
+        )
+        self.bm25 = BM25Index()
+        self.rrf_k = rrf_k
+        self.candidates_per_retriever = max(1, candidates_per_retriever)
+        self.bm25_weight = bm25_weight
+        self.vector_weight = vector_weight
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add_documents(self, documents: Sequence[Dict[str, Any]]) -> int:
+        """
+        Index documents given as ``{"id", "content", "metadata"}`` dicts.
+
+        Returns:
+            Number of new or changed documents indexed
+        """
+        changed = []
+        with self._lock:
+            for doc in documents:
+                doc_id = str(doc["id"])
+                fingerprint = hashlib.sha256(
+                    f"{doc['content']}\x00{sorted(doc.get('metadata', {}).items())}".encode("utf-8")
+                ).hexdigest()
+                if self._fingerprints.get(doc_id) == fingerprint:
+                    continue
+                self._fingerprints[doc_id] = fingerprint
+                self._documents[doc_id] = {"content": doc["content"], "metadata": dict(doc.get("metadata", {}))}
+                changed.append(doc_id)
+        if not changed:
+            return 0
+
+        self.bm25.add_many(
+            (doc_id, self._documents[doc_id]["content"], self._documents[doc_id]["metadata"])
+            for doc_id in changed
+        )
+        if self.vector_index is not None:
+            contents = [self._documents[doc_id]["content"] for doc_id in changed]
+            self.vector_index.add(
+                changed,
+                self.embedding_service.embed_documents(contents),
+                metadatas=[self._documents[doc_id]["metadata"] for doc_id in changed]
+            )
+        return len(changed)
+
+    def retrieve(self, query: str, top_k: int = 5, where: Optional[Where] = None) -> List[Dict]:
+        """
+        Hybrid search.
+
+        Args:
+            query: Query text
+            top_k: Number of results
+            where: Optional metadata filter applied to both retrievers
+
+        Returns:
+            List of dicts with content, score, metadata and the per-retriever
+            ranks under ``retrieval`` (None when a retriever missed the doc)
+        """
+        if not self._documents or top_k <= 0:
+            return []
+        n_candidates = top_k * self.candidates_per_retriever
+
+        bm25_ranking = [doc_id for doc_id, _ in self.bm25.search(query, k=n_candidates, where=where)]
+        rankings = [bm25_ranking]
+        weights = [self.bm25_weight]
+        vector_ranking: List[str] = []
+        if self.vector_index is not None:
+            query_vector = self.embedding_service.embed_query(query)
+            vector_ranking = [hit.id for hit in self.vector_index.search(query_vector, k=n_candidates, where=where)]
+            rankings.append(vector_ranking)
+            weights.append(self.vector_weight)
+
+        best_possible = sum(weight / (self.rrf_k + 1) for weight in weights)
+        bm25_ranks = {doc_id: rank for rank, doc_id in enumerate(bm25_ranking, start=1)}
+        vector_ranks = {doc_id: rank for rank, doc_id in enumerate(vector_ranking, start=1)}
+        results = []
+        for doc_id, fused in reciprocal_rank_fusion(rankings, k=self.rrf_k, weights=weights)[:top_k]:
+            doc = self._documents.get(doc_id)
+            if doc is None:
+                continue
+            results.append({
+                "id": doc_id,
+                "content": doc["content"],
+                "score": fused / best_possible,
+                "metadata": doc["metadata"],
+                "retrieval": {
+                    "bm25_rank": bm25_ranks.get(doc_id),
+                    "vector_rank": vector_ranks.get(doc_id),
+                },
+            })
+        return results
+
+
+# ===== HEDIS specification chunks =====
+
+# Value sets in utils.hedis_specs: (attribute, measure codes, description)
+VALUE_SETS = (
+    ("RETINAL_EXAM_CPT_CODES", ("EED",), "Retinal eye exam CPT codes"),
+    ("MAMMOGRAPHY_CPT_CODES", ("BCS",), "Mammography CPT codes"),
+    ("COLONOSCOPY_CPT_CODES", ("COL",), "Colonoscopy CPT codes"),
+    ("FIT_CPT_CODES", ("COL",), "FIT (fecal immunochemical test) CPT codes"),
+    ("COLOGUARD_CPT_CODES", ("COL",), "Cologuard (FIT-DNA) CPT codes"),
+    ("HBA1C_LOINC_CODES", ("GSD",), "HbA1c lab LOINC codes"),
+    ("EGFR_LOINC_CODES", ("KED",), "eGFR lab LOINC codes"),
+    ("ACR_LOINC_CODES", ("KED",), "Urine albumin-creatinine ratio (uACR) LOINC codes"),
+    ("BP_LOINC_CODES", ("CBP", "BPD"), "Blood pressure LOINC codes"),
+)
+
+
+def hedis_spec_chunks() -> List[Dict[str, Any]]:
+    """
+    Retrieval chunks built from utils.hedis_specs: one overview per measure,
+    its inclusion/exclusion code lists, and each value set.
+    """
+    if not HAS_HEDIS_SPECS:
+        return []
+    chunks = []
+    for code, spec in hedis_specs.MEASURE_REGISTRY.items():
+        base = {"measure": code, "content_type": "specifications", "spec_version": spec.hedis_spec_version}
+        age = f"ages {spec.age_min}-{spec.age_max}" if spec.age_min and spec.age_max else "all ages"
+        chunks.append({
+            "id": f"spec_{code}_overview",
+            "content": (
+                f"{code}: {spec.name}. HEDIS {spec.hedis_spec_version}. Tier {spec.tier}, "
+                f"weight {spec.weight:g}{' (triple-weighted)' if spec.weight >= 3 else ''}, status {spec.status}. "
+                f"Target population {spec.target_population.replace('_', ' ')}, {age}. "
+                f"Data sources: {', '.join(spec.data_sources)}. Star value {spec.star_value}."
+                f"{' New measure for 2025.' if spec.new_measure_2025 else ''}"
+            ),
+            "metadata": {**base, "section": "overview"},
+        })
+        for section, codes in (("inclusion_codes", spec.inclusion_codes), ("exclusion_codes", spec.exclusion_codes)):
+            if codes:
+                label = "Denominator inclusion" if section == "inclusion_codes" else "Exclusion"
+                chunks.append({
+                    "id": f"spec_{code}_{section}",
+                    "content": f"{code} {spec.name} {label} codes (ICD-10): {' '.join(sorted(codes))}",
+                    "metadata": {**base, "section": section},
+                })
+    for attribute, measures, description in VALUE_SETS:
+        codes = getattr(hedis_specs, attribute, None)
+        if not codes:
+            continue
+        code_system = "CPT" if "CPT" in attribute else "LOINC"
+        chunks.append({
+            "id": f"value_set_{attribute.lower()}",
+            "content": f"{'/'.join(measures)} {description}: " + " ".join(f"{code_system} {c}" for c in sorted(codes)),
+            "metadata": {
+                "measure": measures[0],
+                "measures": ",".join(measures),
+                "content_type": "specifications",
+                "section": "value_set",
+            },
+        })
+    return chunks
+
+
+_spec_retriever: Optional[HybridRetriever] = None
+_spec_retriever_lock = threading.Lock()
+
+
+def get_hedis_spec_retriever(embedding_service: Optional[EmbeddingService] = None) -> HybridRetriever:
+    """
+    Process-wide hybrid retriever over the HEDIS spec chunks (built on first use).
+
+    Args:
+        embedding_service: Encoder for the vector side on first build
+            (default: hashing embeddings, no model download)
+    """
+    global _spec_retriever
+    with _spec_retriever_lock:
+        if _spec_retriever is None:
+            retriever = HybridRetriever(embedding_service=embedding_service or EmbeddingService())
+            retriever.add_documents(hedis_spec_chunks())
+            logger.info(f"Built HEDIS spec retriever with {len(retriever)} chunks")
+            _spec_retriever = retriever
+        return _spec_retriever
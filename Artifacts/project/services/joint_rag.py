@@ -39,6 +39,8 @@ from services.agentic_rag import (
     ToolExecutionError
 )
 
+from services.plan_executor import PlanExecutor
+
 try:
     from services.audit_logger import JointAuditLogger
     HAS_AUDIT_LOGGER = True
@@ -941,7 +943,14 @@ class ContextAwareAgenticRAG:
     Based on Template 1 from JOINT_CONTEXT_AGENTIC_RULES.md
     """
     
-    def __init__(self, rag_retriever=None, use_llm: bool = False, llm_client=None):
+    def __init__(
+        self,
+        rag_retriever=None,
+        use_llm: bool = False,
+        llm_client=None,
+        max_parallel_steps: int = 4,
+        step_timeout: float = 30.0
+    ):
         """
         Initialize ContextAwareAgenticRAG.
         
@@ -949,6 +958,8 @@ class ContextAwareAgenticRAG:
             rag_retriever: Optional RAG retriever
             use_llm: If True, use LLM for planning/synthesis
             llm_client: Optional LLM client
+            max_parallel_steps: Max plan steps executing concurrently
+            step_timeout: Per-step timeout in seconds
         """
         # Context engineering components
         self.context_builder = HierarchicalContextBuilder(rag_retriever=rag_retriever)
@@ -969,6 +980,15 @@ class ContextAwareAgenticRAG:
             self.audit_logger = _InMemoryAuditLogger()
             logger.warning("Using in-memory audit logger. Install audit_logger module for database storage.")
         
+        # Concurrent step execution (dependency graph from step inputs/outputs)
+        self.plan_executor = PlanExecutor(
+            max_workers=max_parallel_steps,
+            step_timeout=step_timeout,
+            max_step_retries=1,
+            retry_on=(ToolExecutionError,)
+        )
+        self.last_execution: Optional[Dict] = None
+        
         # Configuration
         self.max_steps = 10
         self.max_tokens = 4000
@@ -1000,6 +1020,9 @@ class ContextAwareAgenticRAG:
         retry_count = 0
         original_query = query
         
+        # Successful step results survive query refinement retries
+        completed_steps: Dict[str, Any] = {}
+        
         # Track query start time for execution time calculation
         import time
         self._query_start_time = time.time()
@@ -1046,16 +1069,23 @@ class ContextAwareAgenticRAG:
                     "size": estimate_tokens(current_context)
                 })
                 
-                for i, step in enumerate(plan["steps"]):
-                    # Skip synthesize step (handled separately)
-                    if step["type"] == "synthesize":
-                        continue
-                    
-                    logger.info(f"Executing step {i+1}/{len(plan['steps'])}: {step['id']} ({step['type']})")
+                # Run independent steps concurrently. Tool params are enriched
+                # from the initial context layers (domain/measure), which the
+                # per-step refinement below never changes.
+                step_context = initial_context
+                execution = self.plan_executor.execute(
+                    plan["steps"],
+                    lambda step: self._execute_step_with_context(step, step_context),
+                    completed=completed_steps
+                )
+                self.last_execution = execution.summary()
+                
+                # Validate, accumulate and refine in plan order
+                for i, outcome in enumerate(execution.outcomes):
+                    step = outcome.step
                     
-                    # Execute step with context
-                    try:
-                        result = self._execute_step_with_context(step, current_context)
+                    if outcome.succeeded:
+                        result = outcome.result
                         
                         # Validate step result
                         is_valid, errors = self.result_validator.validate_step_result(
@@ -1074,68 +1104,63 @@ class ContextAwareAgenticRAG:
                                 "Continuing with other steps."
                             )
                             step_results.append(result)  # Still add for context
-                        
-                        # Refine context in loop (Practice 2)
-                        current_context, refinement_metrics = refine_context_in_loop(
-                            current_context,
-                            result,
-                            iteration=i,
-                            step_type=step["type"],
-                            step_id=step["id"]
-                        )
-                        
-                        # Track context size after refinement
-                        self.context_refinement_metrics["context_size_by_step"].append({
+                        fallback = False
+                    else:
+                        logger.error(f"Step {step['id']} failed: {outcome.error}")
+                        # Try fallback
+                        result = self._fallback_step_execution(step, current_context)
+                        if not result:
+                            continue
+                        self._accumulate_step_result(step["type"], result)
+                        step_results.append(result)
+                        fallback = True
+                    
+                    # Refine context in loop (Practice 2)
+                    current_context, refinement_metrics = refine_context_in_loop(
+                        current_context,
+                        result,
+                        iteration=i,
+                        step_type=step["type"],
+                        step_id=step["id"]
+                    )
+                    
+                    # Track context size after refinement
+                    size_entry = {
+                        "step": step["id"],
+                        "step_type": step["type"],
+                        "size": refinement_metrics["context_size_after"],
+                        "iteration": i
+                    }
+                    if fallback:
+                        size_entry["fallback"] = True
+                        self.context_refinement_metrics["context_size_by_step"].append(size_entry)
+                        continue
+                    self.context_refinement_metrics["context_size_by_step"].append(size_entry)
+                    
+                    # Track compression events
+                    if refinement_metrics["compression_applied"]:
+                        self.context_refinement_metrics["compression_events"].append({
                             "step": step["id"],
-                            "step_type": step["type"],
-                            "size": refinement_metrics["context_size_after"],
-                            "iteration": i
+                            "iteration": i,
+                            "size_before": refinement_metrics["context_size_before"],
+                            "size_after": refinement_metrics["context_size_after"]
                         })
-                        
-                        # Track compression events
-                        if refinement_metrics["compression_applied"]:
-                            self.context_refinement_metrics["compression_events"].append({
-                                "step": step["id"],
-                                "iteration": i,
-                                "size_before": refinement_metrics["context_size_before"],
-                                "size_after": refinement_metrics["context_size_after"]
-                            })
-                        
-                        # Track relevance scores
-                        if refinement_metrics["relevance_updated"]:
-                            # Get current relevance scores from context
-                            relevance_scores = current_context.get("relevance_scores", [])
-                            self.context_refinement_metrics["relevance_scores"].append({
-                                "step": step["id"],
-                                "iteration": i,
-                                "scores": relevance_scores.copy() if relevance_scores else []
-                            })
                     
-                    except (ToolExecutionError, Exception) as e:
-                        logger.error(f"Step {step['id']} failed: {e}")
-                        # Try fallback
-                        fallback_result = self._fallback_step_execution(step, current_context)
-                        if fallback_result:
-                            self._accumulate_step_result(step["type"], fallback_result)
-                            step_results.append(fallback_result)
-                            
-                            # Refine context with fallback result
-                            current_context, refinement_metrics = refine_context_in_loop(
-                                current_context,
-                                fallback_result,
-                                iteration=i,
-                                step_type=step["type"],
-                                step_id=step["id"]
-                            )
-                            
-                            # Track metrics for fallback
-                            self.context_refinement_metrics["context_size_by_step"].append({
-                                "step": step["id"],
-                                "step_type": step["type"],
-                                "size": refinement_metrics["context_size_after"],
-                                "iteration": i,
-                                "fallback": True
-                            })
+                    # Track relevance scores
+                    if refinement_metrics["relevance_updated"]:
+                        # Get current relevance scores from context
+                        relevance_scores = current_context.get("relevance_scores", [])
+                        self.context_refinement_metrics["relevance_scores"].append({
+                            "step": step["id"],
+                            "iteration": i,
+                            "scores": relevance_scores.copy() if relevance_scores else []
+                        })
+                
+                logger.info(
+                    f"Executed {len(execution.outcomes)} steps | "
+                    f"wall {execution.wall_time * 1000:.1f}ms | "
+                    f"critical path {execution.critical_path_time * 1000:.1f}ms"
+                )
                 
                 # Step 5: Get final accumulated context
                 final_context = self.context_accumulator.get_full_context()
@@ -1196,6 +1221,7 @@ class ContextAwareAgenticRAG:
                         "retry_count": retry_count,
                         "metrics": self._get_metrics(),
                         "context_refinement": self.context_refinement_metrics,
+                        "execution": execution.summary(),
                         "execution_time": total_execution_time,
                         "validation_passed": validation_passed
                     }
@@ -1439,4 +1465,8 @@ class ContextAwareAgenticRAG:
     def get_audit_log(self) -> List[Dict]:
         """Get joint audit log."""
         return self.audit_logger.get_audit_log()
-
+    
+    def close(self):
+        """Flush queued audit entries (call when the pipeline is discarded)."""
+        if hasattr(self.audit_logger, "close"):
+            self.audit_logger.close()
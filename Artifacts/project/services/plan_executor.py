@@ -0,0 +1,356 @@
+"""
+DAG Plan Executor for Agentic RAG
+Runs independent plan steps concurrently in a bounded thread pool.
+
+Dependencies are derived from what each step consumes and produces, not
+from the planner's ``depends_on`` (the rule-based planner chains every step
+to the previous one, which would force serial execution):
+
+- retrieve  -> produces "docs"
+- query_db  -> produces "data"
+- calculate -> produces "calculations"; consumes "data" when a param is
+               "from_step_data"
+- validate  -> produces "validation"; consumes "data" and "calculations"
+               when a param is "from_step_data"
+- synthesize is skipped (handled by the caller after execution)
+
+Steps may also declare ``inputs``/``outputs`` lists explicitly; these
+override the defaults above.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+STEP_OUTPUTS = {
+    "retrieve": ("docs",),
+    "query_db": ("data",),
+    "calculate": ("calculations",),
+    "validate": ("validation",),
+}
+
+# Inputs consumed when a step references prior results ("from_step_data")
+STEP_CHAINED_INPUTS = {
+    "retrieve": (),
+    "query_db": (),
+    "calculate": ("data",),
+    "validate": ("data", "calculations"),
+}
+
+STEP_DATA_PLACEHOLDERS = ("from_step_data", "all_results")
+
+
+class PlanStepTimeout(Exception):
+    """Raised (recorded) when a step exceeds its timeout."""
+    pass
+
+
+@dataclass
+class StepOutcome:
+    """Result of one plan step."""
+    step: Dict
+    status: str  # succeeded | failed | timed_out | cached
+    result: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    started_at: float = 0.0   # Seconds since plan start
+    finished_at: float = 0.0  # Seconds since plan start
+    depends_on: List[str] = field(default_factory=list)
+
+    @property
+    def step_id(self) -> str:
+        return self.step["id"]
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status in ("succeeded", "cached")
+
+    @property
+    def duration(self) -> float:
+        return max(self.finished_at - self.started_at, 0.0)
+
+
+@dataclass
+class PlanExecution:
+    """Outcomes of a plan run (in plan order) plus latency breakdown."""
+    outcomes: List[StepOutcome]
+    wall_time: float
+    critical_path: List[str]
+    critical_path_time: float
+
+    @property
+    def serial_time(self) -> float:
+        """Latency if the same steps had run one after another."""
+        return sum(outcome.duration for outcome in self.outcomes)
+
+    def summary(self) -> Dict:
+        """JSON-safe latency report for a query result."""
+        return {
+            "steps": len(self.outcomes),
+            "wall_time_ms": round(self.wall_time * 1000, 2),
+            "serial_time_ms": round(self.serial_time * 1000, 2),
+            "critical_path_ms": round(self.critical_path_time * 1000, 2),
+            "critical_path": self.critical_path,
+            "step_timings_ms": {
+                outcome.step_id: round(outcome.duration * 1000, 2) for outcome in self.outcomes
+            },
+            "step_status": {outcome.step_id: outcome.status for outcome in self.outcomes},
+        }
+
+
+def step_signature(step: Dict) -> str:
+    """Identity of a step's work (type + params), stable across re-plans."""
+    return json.dumps(
+        {"type": step.get("type"), "query": step.get("query"), "params": step.get("params", {})},
+        sort_keys=True,
+        default=str,
+    )
+
+
+def _step_inputs(step: Dict) -> Tuple[str, ...]:
+    if "inputs" in step:
+        return tuple(step["inputs"])
+    params = step.get("params", {}) or {}
+    if any(value in STEP_DATA_PLACEHOLDERS for value in params.values() if isinstance(value, str)):
+        return STEP_CHAINED_INPUTS.get(step.get("type"), ("data",))
+    return ()
+
+
+def _step_outputs(step: Dict) -> Tuple[str, ...]:
+    if "outputs" in step:
+        return tuple(step["outputs"])
+    return STEP_OUTPUTS.get(step.get("type"), ())
+
+
+def build_dependency_graph(steps: Sequence[Dict]) -> Dict[str, List[str]]:
+    """
+    Derive step dependencies from inputs and outputs.
+
+    A step depends on every *earlier* step that produces one of its inputs,
+    so the graph is acyclic by construction and plan order breaks ties.
+
+    Args:
+        steps: Plan steps (synthesize steps should already be excluded)
+
+    Returns:
+        Dictionary step_id -> list of step_ids it depends on
+    """
+    graph: Dict[str, List[str]] = {}
+    producers: Dict[str, List[str]] = {}
+
+    for step in steps:
+        deps: List[str] = []
+        for key in _step_inputs(step):
+            for producer in producers.get(key, []):
+                if producer not in deps:
+                    deps.append(producer)
+        graph[step["id"]] = deps
+        for key in _step_outputs(step):
+            producers.setdefault(key, []).append(step["id"])
+
+    return graph
+
+
+class PlanExecutor:
+    """
+    Execute plan steps as a DAG on a bounded thread pool.
+
+    Args:
+        max_workers: Max steps running at once
+        step_timeout: Default per-step timeout (seconds)
+        timeouts_by_type: Optional per step-type timeout overrides
+        max_step_retries: Retries for a failed step (only that step re-runs)
+        retry_on: Exception types worth retrying
+
+    Notes:
+        - A timed-out step is reported immediately and never retried; its
+          worker thread cannot be interrupted and keeps its pool slot until
+          it finishes, so a retry would duplicate side effects and starve
+          the remaining steps
+        - Dependents still run after a failed dependency (same as the serial
+          loop, which continues with other steps); the caller applies its
+          fallback to failed outcomes
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        step_timeout: float = 30.0,
+        timeouts_by_type: Optional[Dict[str, float]] = None,
+        max_step_retries: int = 1,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,)
+    ):
+        self.max_workers = max(1, max_workers)
+        self.step_timeout = step_timeout
+        self.timeouts_by_type = timeouts_by_type or {}
+        self.max_step_retries = max(0, max_step_retries)
+        self.retry_on = retry_on
+
+    def execute(
+        self,
+        steps: Sequence[Dict],
+        run_step: Callable[[Dict], Any],
+        completed: Optional[Dict[str, Any]] = None,
+        skip_types: Sequence[str] = ("synthesize",)
+    ) -> PlanExecution:
+        """
+        Run all steps, respecting derived dependencies.
+
+        Args:
+            steps: Plan steps in plan order
+            run_step: Callable executing one step and returning its result
+            completed: Optional signature -> result map of steps that already
+                succeeded (e.g. an earlier attempt of the same query); matching
+                steps are not re-run and the map is updated with new successes
+            skip_types: Step types not executed here
+
+        Returns:
+            PlanExecution with outcomes in plan order
+        """
+        runnable = [step for step in steps if step.get("type") not in skip_types]
+        graph = build_dependency_graph(runnable)
+        by_id = {step["id"]: step for step in runnable}
+        outcomes: Dict[str, StepOutcome] = {}
+        plan_start = time.perf_counter()
+
+        def now() -> float:
+            return time.perf_counter() - plan_start
+
+        # Reuse results of steps that already succeeded
+        if completed is not None:
+            for step in runnable:
+                signature = step_signature(step)
+                if signature in completed:
+                    outcomes[step["id"]] = StepOutcome(
+                        step=step, status="cached", result=completed[signature],
+                        started_at=now(), finished_at=now(), depends_on=graph[step["id"]]
+                    )
+
+        attempts: Dict[str, int] = {}
+        started: Dict[str, float] = {}
+        lock = threading.Lock()
+
+        def timed_run(step: Dict) -> Any:
+            with lock:
+                started[step["id"]] = now()
+            return run_step(step)
+
+        pending: Dict[Future, str] = {}
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="plan-step")
+
+        def next_wait() -> Optional[float]:
+            # Sleep until the earliest running step's deadline; poll while
+            # steps are still queued for a worker (their clock hasn't started)
+            current = now()
+            with lock:
+                remaining = [
+                    started[step_id] + self._timeout_for(by_id[step_id]) - current
+                    for step_id in pending.values() if step_id in started
+                ]
+                if any(step_id not in started for step_id in pending.values()):
+                    remaining.append(0.05)
+            return max(min(remaining), 0.0) if remaining else None
+
+        def ready_steps() -> List[str]:
+            running = set(pending.values())
+            return [
+                step_id for step_id in by_id
+                if step_id not in outcomes
+                and step_id not in running
+                and all(dep in outcomes for dep in graph[step_id])
+            ]
+
+        def submit(step_id: str):
+            attempts[step_id] = attempts.get(step_id, 0) + 1
+            with lock:
+                started.pop(step_id, None)
+            pending[pool.submit(timed_run, by_id[step_id])] = step_id
+
+        def record(step_id: str, status: str, result: Any = None, error: Optional[BaseException] = None):
+            with lock:
+                step_started = started.get(step_id, now())
+            outcomes[step_id] = StepOutcome(
+                step=by_id[step_id], status=status, result=result, error=error,
+                attempts=attempts[step_id], started_at=step_started, finished_at=now(),
+                depends_on=graph[step_id]
+            )
+            if status == "succeeded" and completed is not None:
+                completed[step_signature(by_id[step_id])] = result
+
+        def retry_or_record(step_id: str, status: str, error: BaseException) -> bool:
+            if attempts[step_id] <= self.max_step_retries and isinstance(error, self.retry_on):
+                logger.warning(
+                    f"Step {step_id} {status} ({error}); retrying "
+                    f"(attempt {attempts[step_id] + 1}/{self.max_step_retries + 1})"
+                )
+                submit(step_id)
+                return True
+            record(step_id, status, error=error)
+            return False
+
+        try:
+            for step_id in ready_steps():
+                submit(step_id)
+
+            while pending:
+                done, _ = wait(list(pending), timeout=next_wait(), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    step_id = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        record(step_id, "succeeded", result=future.result())
+                    else:
+                        retry_or_record(step_id, "failed", error)
+
+                # Expire steps that have been running past their timeout
+                for future, step_id in list(pending.items()):
+                    with lock:
+                        step_started = started.get(step_id)
+                    if step_started is not None and now() - step_started > self._timeout_for(by_id[step_id]):
+                        pending.pop(future)
+                        future.cancel()
+                        record(
+                            step_id, "timed_out",
+                            error=PlanStepTimeout(f"Step {step_id} exceeded {self._timeout_for(by_id[step_id])}s")
+                        )
+
+                for step_id in ready_steps():
+                    submit(step_id)
+        finally:
+            # Do not block on timed-out workers
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        ordered = [outcomes[step["id"]] for step in runnable if step["id"] in outcomes]
+        path, path_time = self._critical_path(ordered)
+        return PlanExecution(
+            outcomes=ordered,
+            wall_time=now(),
+            critical_path=path,
+            critical_path_time=path_time,
+        )
+
+    def _timeout_for(self, step: Dict) -> float:
+        return step.get("timeout") or self.timeouts_by_type.get(step.get("type"), self.step_timeout)
+
+    @staticmethod
+    def _critical_path(outcomes: List[StepOutcome]) -> Tuple[List[str], float]:
+        """Longest duration-weighted dependency chain (outcomes in plan order)."""
+        best: Dict[str, Tuple[float, List[str]]] = {}
+        for outcome in outcomes:
+            prior = max(
+                (best[dep] for dep in outcome.depends_on if dep in best),
+                key=lambda item: item[0],
+                default=(0.0, []),
+            )
+            best[outcome.step_id] = (prior[0] + outcome.duration, prior[1] + [outcome.step_id])
+        if not best:
+            return [], 0.0
+        total, path = max(best.values(), key=lambda item: item[0])
+        return path, total
@@ -0,0 +1,465 @@
+"""
+Query Result Cache for Agentic RAG
+Two-tier cache for chatbot answers, running entirely in-process.
+
+Tiers:
+- exact:    normalized query text + data version -> prior result
+- semantic: a prior result is reused when the query embedding is close
+            enough (cosine >= threshold) to a cached query with the same
+            data version and the same key entities (measure codes, numbers),
+            so "ROI of GSD outreach" never answers "ROI of CBP outreach"
+
+Invalidation:
+- Every entry is stamped with a data version. Writers that change
+  ``member_gaps`` or measure performance data call ``invalidate_tables``;
+  ``register_change_probe`` (called by HEDISAgenticRAG and the aggregate
+  query executor when the database is available) detects changes made by
+  other processes such as the ETL/SQL scripts. Entries from an older
+  version are dropped.
+- Entries also expire after a TTL.
+"""
+import copy
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Tables whose contents feed chatbot answers
+DEFAULT_TABLES = ("member_gaps", "measure_performance")
+
+# Measure codes are matched case-insensitively ("gsd" == "GSD")
+MEASURE_CODES = frozenset({
+    "GSD", "KED", "EED", "PDC-DR", "BPD", "CBP", "SUPD", "PDC-RASA",
+    "PDC-STA", "BCS", "COL", "HEI",
+})
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z-]*|\d+(?:\.\d+)?")
+
+# Words that carry no meaning for matching
+_STOPWORDS = frozenset({
+    "a", "an", "the", "of", "for", "to", "in", "on", "is", "are", "was",
+    "what", "whats", "s", "me", "my", "our", "please", "show", "tell", "give",
+    "can", "you", "i", "we", "do", "does", "about", "with", "by",
+})
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_WORD_RE.findall(query.lower()))
+
+
+def query_entities(query: str) -> Tuple[str, ...]:
+    """
+    Key entities that must match for a semantic hit.
+
+    Measure codes (GSD, CBP, ...) and numbers (years, percentages, counts)
+    change the answer even when the rest of the question is identical.
+    """
+    entities = set()
+    for token in _TOKEN_RE.findall(query):
+        if token[0].isdigit():
+            entities.add(token)
+        elif token.upper() in MEASURE_CODES:
+            entities.add(token.upper())
+    return tuple(sorted(entities))
+
+
+def hashed_embedding(text: str, dim: int = 512) -> np.ndarray:
+    """
+    Local fallback embedding: hashed word unigrams and bigrams.
+
+    Stable across processes (md5, not ``hash()``) and dependency-free;
+    good enough to match rephrasings of the same question.
+
+    Args:
+        text: Query text
+        dim: Vector size
+
+    Returns:
+        L2-normalized float32 vector
+    """
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+    features = words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        digest = hashlib.md5(feature.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class DataVersionRegistry:
+    """
+    Per-table version counters plus optional change probes.
+
+    ``bump`` is called by in-process writers; probes cover writes made by
+    other processes (ETL jobs, SQL scripts). Probe results are reused for
+    ``probe_interval`` seconds so a cache lookup never waits on the database
+    more than once per interval.
+    """
+
+    def __init__(self, probe_interval: float = 5.0):
+        self.probe_interval = probe_interval
+        self._versions: Dict[str, int] = {}
+        self._probes: Dict[str, Callable[[], Any]] = {}
+        self._probe_token: str = ""
+        self._probe_checked = 0.0
+        self._lock = threading.Lock()
+
+    def bump(self, *tables: str):
+        """Mark tables as changed."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def add_probe(self, probe: Callable[[], Any], key: Optional[str] = None):
+        """
+        Register a callable returning a value that changes when data changes.
+
+        A probe registered again under the same key replaces the earlier one,
+        so repeated setup (one agent per request) never stacks probes.
+        """
+        with self._lock:
+            self._probes[key or f"probe-{len(self._probes)}"] = probe
+            self._probe_checked = 0.0
+
+    def token(self, tables: Sequence[str] = DEFAULT_TABLES) -> str:
+        """Current version token for the given tables."""
+        probe_token = self._probed()
+        with self._lock:
+            local = ",".join(f"{t}:{self._versions.get(t, 0)}" for t in tables)
+        return f"{local}|{probe_token}" if probe_token else local
+
+    def _probed(self) -> str:
+        with self._lock:
+            if not self._probes or time.monotonic() - self._probe_checked < self.probe_interval:
+                return self._probe_token
+            probes = list(self._probes.values())
+        values = []
+        for probe in probes:
+            try:
+                values.append(repr(probe()))
+            except Exception as e:
+                # Unknown state: keep the previous token rather than flushing
+                # the cache on every transient DB error, and wait a full
+                # interval before probing again
+                logger.warning(f"Data version probe failed: {e}")
+                with self._lock:
+                    self._probe_checked = time.monotonic()
+                return self._probe_token
+        token = hashlib.md5("|".join(values).encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            self._probe_token = token
+            self._probe_checked = time.monotonic()
+        return token
+
+
+# Process-wide registry shared by all caches
+data_versions = DataVersionRegistry()
+
+
+def invalidate_tables(*tables: str):
+    """
+    Invalidate cached answers that depend on the given tables.
+
+    Call after writes to ``member_gaps`` or performance tables.
+    """
+    data_versions.bump(*(tables or DEFAULT_TABLES))
+
+
+def postgres_change_probe(run_query: Callable[[str, Dict], Any], tables: Sequence[str] = DEFAULT_TABLES) -> Callable[[], Any]:
+    """
+    Build a probe from PostgreSQL's per-table write counters.
+
+    Args:
+        run_query: Function executing SQL with params (e.g. query_to_dataframe)
+        tables: Tables to watch
+
+    Returns:
+        Probe callable for ``DataVersionRegistry.add_probe``
+
+    Notes:
+        - ``pg_stat_user_tables`` is updated asynchronously (sub-second lag)
+    """
+    sql = """
+        SELECT relname, n_tup_ins + n_tup_upd + n_tup_del AS writes
+        FROM pg_stat_user_tables
+        WHERE relname = ANY(%(tables)s)
+        ORDER BY relname
+    """
+
+    def probe():
+        result = run_query(sql, {"tables": list(tables)})
+        if hasattr(result, "to_dict"):
+            return result.to_dict("records")
+        return result
+
+    return probe
+
+
+def register_change_probe(
+    run_query: Callable[[str, Dict], Any],
+    tables: Sequence[str] = DEFAULT_TABLES,
+    registry: Optional[DataVersionRegistry] = None
+):
+    """
+    Watch ``tables`` for writes from any process via ``postgres_change_probe``.
+
+    Idempotent per table set, so every agent may call it on startup.
+    """
+    (registry or data_versions).add_probe(
+        postgres_change_probe(run_query, tables),
+        key=f"postgres:{','.join(sorted(tables))}"
+    )
+
+
+def is_degraded_result(result: Any) -> bool:
+    """
+    True for answers that should not be cached: errors, validation
+    warnings, failed plan steps or a fallback to a simpler pipeline
+    (checked at the top level and in a nested ``metadata`` dict).
+    """
+    if not isinstance(result, dict):
+        return False
+    markers = ("error", "validation_warning", "step_failures", "fallback_from")
+    metadata = result.get("metadata") if isinstance(result.get("metadata"), dict) else {}
+    return any(result.get(m) or metadata.get(m) for m in markers)
+
+
+@dataclass
+class _Entry:
+    key: Tuple[str, str, str]  # (scope, normalized query, data version)
+    entities: Tuple[str, ...]
+    vector: Optional[np.ndarray]
+    result: Any
+    expires_at: float
+
+
+class QueryResultCache:
+    """
+    Exact + semantic cache of query results.
+
+    Args:
+        embedder: Callable text -> vector (default: ``hashed_embedding``);
+            return None to skip the semantic tier for a query
+        similarity_threshold: Min cosine similarity for a semantic hit
+        ttl: Seconds an entry stays valid
+        max_entries: LRU bound across both tiers
+        tables: Tables the cached answers depend on
+        versions: Version registry (default: process-wide ``data_versions``)
+        entity_key: Callable query -> entities that must match for a
+            semantic hit (default: ``query_entities``)
+        name: Name used in logs and stats
+
+    Notes:
+        - Results are deep-copied on the way in and out, so callers may
+          mutate what they get back
+        - Thread-safe
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Callable[[str], Optional[np.ndarray]]] = None,
+        similarity_threshold: float = 0.9,
+        ttl: float = 900.0,
+        max_entries: int = 512,
+        tables: Sequence[str] = DEFAULT_TABLES,
+        versions: Optional[DataVersionRegistry] = None,
+        entity_key: Callable[[str], Tuple[str, ...]] = query_entities,
+        name: str = "query"
+    ):
+        self.embedder = embedder or hashed_embedding
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tables = tuple(tables)
+        self.versions = versions or data_versions
+        self.entity_key = entity_key
+        self.name = name
+
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._version = ""
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    # ===== Public API =====
+
+    def get(self, query: str, scope: str = "") -> Optional[Tuple[Any, Dict]]:
+        """
+        Look up a cached result.
+
+        Args:
+            query: Raw user query
+            scope: Extra key (e.g. processing route or input fingerprint)
+
+        Returns:
+            (result, info) on a hit, where info has "tier" and "similarity";
+            None on a miss
+        """
+        version = self._current_version()
+        key = (scope, normalize_query(query), version)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return copy.deepcopy(entry.result), {"tier": "exact", "similarity": 1.0}
+            if entry is not None:
+                self._remove(key, "expirations")
+
+        vector = self._embed(query)
+        if vector is not None:
+            match = self._semantic_match(scope, version, self.entity_key(query), vector, now)
+            if match is not None:
+                entry, similarity = match
+                return copy.deepcopy(entry.result), {"tier": "semantic", "similarity": round(similarity, 4)}
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, query: str, result: Any, scope: str = ""):
+        """Store a result for a query under the current data version."""
+        version = self._current_version()
+        key = (scope, normalize_query(query), version)
+        entry = _Entry(
+            key=key,
+            entities=self.entity_key(query),
+            vector=self._embed(query),
+            result=copy.deepcopy(result),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], Any],
+        scope: str = "",
+        cacheable: Callable[[Any], bool] = lambda result: True
+    ) -> Tuple[Any, Optional[Dict]]:
+        """
+        Return a cached result or compute and store it.
+
+        Returns:
+            (result, info) where info is None when the result was computed
+        """
+        hit = self.get(query, scope)
+        if hit is not None:
+            return hit
+        result = compute()
+        if cacheable(result):
+            self.put(query, result, scope)
+        return result, None
+
+    def clear(self):
+        """Drop all entries (stats are kept)."""
+        with self._lock:
+            self.stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def hit_rate(self) -> float:
+        """Share of lookups answered from either tier."""
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def get_stats(self) -> Dict:
+        """Counters plus hit rates and current size."""
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        return {
+            **stats,
+            "name": self.name,
+            "entries": size,
+            "lookups": lookups,
+            "hit_rate": round(self.hit_rate(), 3),
+            "semantic_hit_rate": round(stats["semantic_hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    # ===== Internals =====
+
+    def _current_version(self) -> str:
+        version = self.versions.token(self.tables)
+        with self._lock:
+            if version != self._version:
+                stale = [key for key in self._entries if key[2] != version]
+                for key in stale:
+                    self._remove(key, "invalidations")
+                if stale:
+                    logger.info(f"Query cache '{self.name}' invalidated {len(stale)} entries (data changed)")
+                self._version = version
+        return version
+
+    def _remove(self, key: Tuple[str, str, str], reason: str):
+        # Caller holds the lock
+        if self._entries.pop(key, None) is not None:
+            self.stats[reason] += 1
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        try:
+            vector = self.embedder(query)
+        except Exception as e:
+            logger.warning(f"Query cache '{self.name}' embedding failed: {e}")
+            return None
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _semantic_match(
+        self,
+        scope: str,
+        version: str,
+        entities: Tuple[str, ...],
+        vector: np.ndarray,
+        now: float
+    ) -> Optional[Tuple[_Entry, float]]:
+        with self._lock:
+            candidates = [
+                entry for entry in self._entries.values()
+                if entry.key[0] == scope and entry.key[2] == version
+                and entry.entities == entities and entry.vector is not None
+                and entry.vector.shape == vector.shape and entry.expires_at > now
+            ]
+            if not candidates:
+                return None
+            similarities = np.stack([entry.vector for entry in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            entry = candidates[best]
+            self._entries.move_to_end(entry.key)
+            self.stats["semantic_hits"] += 1
+            return entry, float(similarities[best])
@@ -7,12 +7,34 @@ from .phi_validator import (
     get_phi_validator,
     validate_no_phi
 )
+from .phi_scanner import (
+    PHIFinding,
+    PHIPattern,
+    PHIScanner,
+    PHIStreamScanner,
+    get_phi_scanner
+)
+from .deidentifier import (
+    DeidentificationReport,
+    Deidentifier,
+    deidentify,
+    get_deidentifier
+)
 
 __all__ = [
     'PHIValidator',
     'PHIValidationResult',
     'get_phi_validator',
-    'validate_no_phi'
+    'validate_no_phi',
+    'PHIFinding',
+    'PHIPattern',
+    'PHIScanner',
+    'PHIStreamScanner',
+    'get_phi_scanner',
+    'DeidentificationReport',
+    'Deidentifier',
+    'deidentify',
+    'get_deidentifier'
 ]
 
 
@@ -0,0 +1,377 @@
+"""
+Vectorized De-identification
+Column-level de-identification of tool results before they reach the LLM,
+the audit log or the dashboard.
+
+- Policies are applied per column over the whole DataFrame (no per-cell
+  Python): drop, keyed hash, generalize dates to year, bucket ages
+- Aggregate count columns are small-cell suppressed (1..min_cell_size-1
+  become NaN); zero counts are not identifying and are kept
+- Dicts and lists are handled key-wise with the same policies, so one
+  ``deidentify`` call covers every tool result shape
+- Every call produces a DeidentificationReport (what was dropped, hashed,
+  generalized and suppressed) for the audit trail; it never contains values
+"""
+import os
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+logger = logging.getLogger(__name__)
+
+# ===== Policies =====
+
+DROP = "drop"
+HASH = "hash"
+YEAR = "year"
+AGE_BUCKET = "age_bucket"
+KEEP = "keep"
+
+ACTIONS = (DROP, HASH, YEAR, AGE_BUCKET, KEEP)
+
+# Keyed by lowercase column / dict key name
+DEFAULT_COLUMN_POLICIES: Dict[str, str] = {
+    # Direct identifiers (the ToolExecutor's original drop list)
+    "member_id": DROP,
+    "member_name": DROP,
+    "ssn": DROP,
+    "date_of_birth": DROP,
+    "phone": DROP,
+    "email": DROP,
+    # Other direct identifiers
+    "first_name": DROP,
+    "last_name": DROP,
+    "patient_name": DROP,
+    "phone_number": DROP,
+    "address": DROP,
+    "street_address": DROP,
+    "medical_record_number": DROP,
+    "mrn": DROP,
+    # Quasi-identifiers kept in generalized form (Safe Harbor)
+    "dob": YEAR,
+    "birth_date": YEAR,
+    "service_date": YEAR,
+    "admission_date": YEAR,
+    "discharge_date": YEAR,
+    "age": AGE_BUCKET,
+    "member_age": AGE_BUCKET,
+    # Pseudonymous linkage keys
+    "subscriber_id": HASH,
+    "patient_id": HASH,
+}
+
+# Ages 90+ are top-coded into one bucket (Safe Harbor)
+DEFAULT_AGE_BUCKETS: Tuple[int, ...] = (0, 18, 45, 65, 75, 90)
+
+# CMS cell-size suppression: counts 1-10 are not released
+DEFAULT_MIN_CELL_SIZE = 11
+
+# Aggregate member-count columns subject to small-cell suppression.
+# Operational counts (intervention_count, activity_count, steps_count) are
+# not member cells and are released as-is.
+COUNT_COLUMN_PATTERN = re.compile(
+    r"^(n|count)$|(^|_)(members|patients|numerator|denominator|(member|patient|gap|risk)_count)$",
+    re.IGNORECASE
+)
+
+# Keys redacted (not just de-identified) in audit logs
+SECRET_KEYS = frozenset(["password", "secret", "token", "api_key"])
+
+REDACTED = "***REDACTED***"
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype="S1")
+
+
+@dataclass
+class DeidentificationReport:
+    """
+    What one ``deidentify`` call changed (column names and counts only).
+
+    Attributes:
+        rows: DataFrame rows processed
+        cells: DataFrame cells processed
+        dropped: Dropped columns / dict keys
+        hashed: Hashed columns / dict keys
+        generalized: Column -> action for year / age bucket generalization
+        suppressed: Count column -> number of small cells suppressed
+        elapsed_ms: Wall time of the call
+    """
+    rows: int = 0
+    cells: int = 0
+    dropped: List[str] = field(default_factory=list)
+    hashed: List[str] = field(default_factory=list)
+    generalized: Dict[str, str] = field(default_factory=dict)
+    suppressed: Dict[str, int] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.dropped or self.hashed or self.generalized or self.suppressed)
+
+    @property
+    def suppressed_cells(self) -> int:
+        return sum(self.suppressed.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Audit log representation."""
+        return {
+            "rows": self.rows,
+            "cells": self.cells,
+            "dropped": list(self.dropped),
+            "hashed": list(self.hashed),
+            "generalized": dict(self.generalized),
+            "suppressed": dict(self.suppressed),
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+def _default_hash_key() -> str:
+    # Keyed hashing: without the key, hashed IDs cannot be recomputed from a
+    # list of known member IDs. Set DEIDENTIFY_HASH_KEY for hashes that are
+    # stable across processes; otherwise a per-process key is used.
+    key = os.getenv("DEIDENTIFY_HASH_KEY")
+    if key:
+        return (key * 16)[:16]
+    return os.urandom(8).hex()
+
+
+class Deidentifier:
+    """
+    Applies column policies and small-cell suppression to tool results.
+
+    Args:
+        policies: Lowercase column name -> action (drop, hash, year,
+            age_bucket, keep); merged over DEFAULT_COLUMN_POLICIES
+        min_cell_size: Counts in [1, min_cell_size) are suppressed in count
+            columns; 0 disables suppression
+        age_buckets: Lower bucket edges; the last edge is open-ended
+        hash_key: 16-character key for the keyed hash (see
+            ``_default_hash_key``)
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Mapping[str, str]] = None,
+        min_cell_size: int = DEFAULT_MIN_CELL_SIZE,
+        age_buckets: Tuple[int, ...] = DEFAULT_AGE_BUCKETS,
+        hash_key: Optional[str] = None
+    ):
+        merged = dict(DEFAULT_COLUMN_POLICIES)
+        for name, action in (policies or {}).items():
+            if action not in ACTIONS:
+                raise ValueError(f"Unknown de-identification action {action!r} for {name!r}. Use one of {ACTIONS}")
+            merged[name.lower()] = action
+        self.policies = merged
+        self.min_cell_size = max(0, int(min_cell_size))
+        self.age_buckets = tuple(age_buckets)
+        self.age_labels = [
+            f"{low}-{high - 1}" for low, high in zip(self.age_buckets, self.age_buckets[1:])
+        ] + [f"{self.age_buckets[-1]}+"]
+        self.hash_key = (hash_key or _default_hash_key())[:16].ljust(16, "0")
+
+    def policy_for(self, name: Any) -> str:
+        return self.policies.get(str(name).lower(), KEEP)
+
+    # ===== Entry point =====
+
+    def deidentify(self, result: Any) -> Tuple[Any, DeidentificationReport]:
+        """
+        De-identify a tool result.
+
+        Args:
+            result: DataFrame, dict, list or scalar
+
+        Returns:
+            Tuple of (de-identified copy, report); the input is not modified
+        """
+        started = time.perf_counter()
+        report = DeidentificationReport()
+        result = self._apply(result, report, prefix="")
+        report.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result, report
+
+    def _apply(self, value: Any, report: DeidentificationReport, prefix: str) -> Any:
+        if HAS_PANDAS and isinstance(value, pd.DataFrame):
+            return self.deidentify_frame(value, report, prefix)
+        if isinstance(value, dict):
+            return self._deidentify_mapping(value, report, prefix)
+        if isinstance(value, list):
+            return [self._apply(item, report, prefix) for item in value]
+        return value
+
+    # ===== DataFrames =====
+
+    def deidentify_frame(
+        self,
+        frame: "pd.DataFrame",
+        report: Optional[DeidentificationReport] = None,
+        prefix: str = ""
+    ) -> "pd.DataFrame":
+        """Column policies and small-cell suppression over a whole frame."""
+        report = report if report is not None else DeidentificationReport()
+        report.rows += len(frame)
+        report.cells += frame.size
+
+        actions = {column: self.policy_for(column) for column in frame.columns}
+        to_drop = [column for column, action in actions.items() if action == DROP]
+        if to_drop:
+            report.dropped.extend(f"{prefix}{column}" for column in to_drop)
+            frame = frame.drop(columns=to_drop)
+
+        updates = {}
+        for column in frame.columns:
+            action = actions[column]
+            name = f"{prefix}{column}"
+            if action == HASH:
+                updates[column] = self.hash_values(frame[column])
+                report.hashed.append(name)
+            elif action == YEAR:
+                updates[column] = self.generalize_year(frame[column])
+                report.generalized[name] = YEAR
+            elif action == AGE_BUCKET:
+                updates[column] = self.bucket_ages(frame[column])
+                report.generalized[name] = AGE_BUCKET
+            elif self.min_cell_size and COUNT_COLUMN_PATTERN.search(str(column)):
+                suppressed, n = self.suppress_small_cells(frame[column])
+                if n:
+                    updates[column] = suppressed
+                    report.suppressed[name] = report.suppressed.get(name, 0) + n
+
+        if updates:
+            frame = frame.copy()
+            for column, values in updates.items():
+                frame[column] = values
+        return frame
+
+    def hash_values(self, values: "pd.Series") -> "pd.Series":
+        """Keyed 64-bit hash as 16 hex chars; missing values stay missing."""
+        hashed = pd.util.hash_pandas_object(
+            values.astype(str), index=False, hash_key=self.hash_key
+        ).to_numpy()
+        # uint64 -> 16 hex digits without a per-cell format call
+        octets = hashed.astype(">u8").view(np.uint8).reshape(-1, 8)
+        nibbles = np.empty((len(octets), 16), dtype=np.uint8)
+        nibbles[:, 0::2] = octets >> 4
+        nibbles[:, 1::2] = octets & 0x0F
+        digits = _HEX_DIGITS[nibbles].view("S16").ravel().astype(str).astype(object)
+        digits[values.isna().to_numpy()] = None
+        return pd.Series(digits, index=values.index, name=values.name)
+
+    @staticmethod
+    def generalize_year(values: "pd.Series") -> "pd.Series":
+        """Dates (or date strings) reduced to their year; unparseable -> NA."""
+        if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+            values = pd.to_datetime(values, errors="coerce")
+        return values.dt.year.astype("Int64")
+
+    def bucket_ages(self, values: "pd.Series") -> "pd.Series":
+        """Numeric ages mapped to range labels, 90+ top-coded."""
+        ages = pd.to_numeric(values, errors="coerce")
+        return pd.cut(
+            ages,
+            bins=list(self.age_buckets) + [np.inf],
+            labels=self.age_labels,
+            right=False
+        )
+
+    def suppress_small_cells(self, values: "pd.Series") -> Tuple["pd.Series", int]:
+        """Counts in [1, min_cell_size) -> NaN; returns (values, suppressed)."""
+        if not pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+            return values, 0
+        counts = values.to_numpy()
+        small = (counts > 0) & (counts < self.min_cell_size)
+        n = int(np.count_nonzero(small))
+        if n == 0:
+            return values, 0
+        return values.mask(small), n
+
+    # ===== Mappings =====
+
+    def _deidentify_mapping(self, mapping: Dict, report: DeidentificationReport, prefix: str) -> Dict:
+        result = {}
+        for key, value in mapping.items():
+            action = self.policy_for(key)
+            name = f"{prefix}{key}"
+            if action == DROP:
+                _note(report.dropped, name)
+                continue
+            if value is not None and not isinstance(value, (dict, list)) and not (
+                HAS_PANDAS and isinstance(value, pd.DataFrame)
+            ):
+                if action == HASH:
+                    value = self.hash_values(pd.Series([value])).iloc[0]
+                    _note(report.hashed, name)
+                elif action == YEAR:
+                    year = self.generalize_year(pd.Series([value])).iloc[0]
+                    value = None if pd.isna(year) else int(year)
+                    report.generalized[name] = YEAR
+                elif action == AGE_BUCKET:
+                    bucket = self.bucket_ages(pd.Series([value])).iloc[0]
+                    value = None if pd.isna(bucket) else str(bucket)
+                    report.generalized[name] = AGE_BUCKET
+                elif self.min_cell_size and COUNT_COLUMN_PATTERN.search(str(key)) \
+                        and isinstance(value, (int, float, np.integer, np.floating)) \
+                        and not isinstance(value, bool) and 0 < value < self.min_cell_size:
+                    value = None
+                    report.suppressed[name] = report.suppressed.get(name, 0) + 1
+                result[key] = value
+            else:
+                result[key] = self._apply(value, report, f"{name}.")
+        return result
+
+    # ===== Logging =====
+
+    def sanitize_for_logging(self, data: Any) -> Any:
+        """
+        Audit-log form of tool params / results.
+
+        Secret keys and identifier keys (drop / hash policies) are redacted,
+        and DataFrames are summarized by shape and columns instead of being
+        copied cell by cell into the log.
+        """
+        if HAS_PANDAS and isinstance(data, pd.DataFrame):
+            return {"dataframe": {"rows": len(data), "columns": [str(c) for c in data.columns]}}
+        if isinstance(data, dict):
+            sanitized = {}
+            for key, value in data.items():
+                lowered = str(key).lower()
+                if lowered in SECRET_KEYS or self.policies.get(lowered) in (DROP, HASH):
+                    sanitized[key] = REDACTED
+                else:
+                    sanitized[key] = self.sanitize_for_logging(value)
+            return sanitized
+        if isinstance(data, list):
+            return [self.sanitize_for_logging(item) for item in data]
+        return data
+
+
+def _note(names: List[str], name: str):
+    # Record lists repeat the same keys; report each once
+    if name not in names:
+        names.append(name)
+
+
+_deidentifier: Optional[Deidentifier] = None
+
+
+def get_deidentifier() -> Deidentifier:
+    """Shared Deidentifier with the default policies."""
+    global _deidentifier
+    if _deidentifier is None:
+        _deidentifier = Deidentifier()
+    return _deidentifier
+
+
+def deidentify(result: Any) -> Tuple[Any, DeidentificationReport]:
+    """Convenience wrapper around the shared Deidentifier."""
+    return get_deidentifier().deidentify(result)
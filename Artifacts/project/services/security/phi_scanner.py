@@ -0,0 +1,325 @@
+"""
+Single-Pass PHI Scanner
+One detection engine shared by every PHI check in the chatbot pipeline.
+
+- All patterns of a profile are compiled into one alternation with a named
+  group per pattern, so text is scanned once regardless of pattern count
+- Nested dicts/lists are walked leaf by leaf (no ``str()`` of the whole
+  structure); findings carry the path to the leaf and character offsets
+- DataFrame columns are scanned vectorized: the distinct values of a column
+  are joined into one NUL-separated string, scanned once, and offsets are
+  mapped back to every row holding that value
+- PHIStreamScanner scans streamed text (e.g. LLM tokens) incrementally
+
+Findings never contain the matched text, only type, offsets and location,
+so they are safe to log.
+"""
+import re
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PHIPattern:
+    """One PHI pattern; ``ignore_case`` scopes IGNORECASE to this pattern only."""
+    type: str
+    regex: str
+    description: str
+    ignore_case: bool = False
+
+
+@dataclass(frozen=True)
+class PHIFinding:
+    """
+    One PHI match.
+
+    Attributes:
+        type: PHI type (SSN, NAME, DOB, MEMBER_ID)
+        pattern: Index of the matching pattern in the scanner's profile
+        description: Pattern description (safe to log)
+        start: Start offset within the scanned string
+        end: End offset within the scanned string
+        path: Location in the scanned structure, e.g. ("query_results", 3, "name");
+            DataFrame cells are (..., column, row position)
+    """
+    type: str
+    pattern: int
+    description: str
+    start: int
+    end: int
+    path: Tuple = ()
+
+
+# PHIValidator profile (Rule 1.1)
+DEFAULT_PATTERNS: Tuple[PHIPattern, ...] = (
+    PHIPattern('SSN', r'\b\d{3}-\d{2}-\d{4}\b', 'Social Security Number pattern detected'),
+    PHIPattern('NAME', r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b', 'Potential name pattern detected'),
+    PHIPattern('DOB', r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'Date of birth pattern detected'),
+    PHIPattern('MEMBER_ID', r'\bMBR\d{6,}\b', 'Member ID pattern detected', ignore_case=True),
+    PHIPattern('SSN', r'\b\d{3}\.\d{2}\.\d{4}\b', 'SSN pattern (dotted format) detected'),
+    PHIPattern('SSN', r'\b\d{9}\b', 'SSN pattern (9 digits, no separators) detected'),
+    PHIPattern('DOB', r'\b\d{2}-\d{2}-\d{4}\b', 'Date pattern (MM-DD-YYYY) detected'),
+)
+
+# Fallback profile for tool parameters and queries (Rule 1.8)
+QUERY_PATTERNS: Tuple[PHIPattern, ...] = (
+    PHIPattern('SSN', r'\b\d{3}-\d{2}-\d{4}\b', 'SSN pattern detected'),
+    PHIPattern('NAME', r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b', 'Potential name pattern detected'),
+    PHIPattern('DOB', r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'Potential date of birth pattern detected'),
+    PHIPattern('MEMBER_ID', r'\b\d{10,}\b', 'Potential member ID pattern detected'),
+)
+
+# Assembled chatbot context: measure names and spec text ("Glycemic Status
+# Assessment") are capitalized word runs, so the NAME pattern is left out;
+# identifiers and dates are still caught
+CONTEXT_PATTERNS: Tuple[PHIPattern, ...] = (
+    PHIPattern('SSN', r'\b\d{3}-\d{2}-\d{4}\b', 'Social Security Number pattern detected'),
+    PHIPattern('DOB', r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'Date of birth pattern detected'),
+    PHIPattern('MEMBER_ID', r'\bMBR\d{6,}\b', 'Member ID pattern detected', ignore_case=True),
+    PHIPattern('SSN', r'\b\d{3}\.\d{2}\.\d{4}\b', 'SSN pattern (dotted format) detected'),
+    PHIPattern('SSN', r'\b\d{9}\b', 'SSN pattern (9 digits, no separators) detected'),
+    PHIPattern('DOB', r'\b\d{2}-\d{2}-\d{4}\b', 'Date pattern (MM-DD-YYYY) detected'),
+)
+
+# Synthesized results: only full (3+ word) names count as names
+RESULT_PATTERNS: Tuple[PHIPattern, ...] = (
+    PHIPattern('SSN', r'\b\d{3}-\d{2}-\d{4}\b', 'SSN pattern'),
+    PHIPattern('NAME', r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\b', 'Full name pattern'),
+    PHIPattern('DOB', r'\b\d{1,2}/\d{1,2}/\d{4}\b', 'DOB pattern'),
+)
+
+# Joins DataFrame cells; \x00 is neither a word char nor whitespace, so no
+# pattern can match across two cells
+_CELL_SEPARATOR = "\x00"
+
+FalsePositive = Callable[[PHIPattern, str], bool]
+
+
+class PHIScanner:
+    """
+    Compiled, single-pass PHI detector for one pattern profile.
+
+    Args:
+        patterns: Pattern profile (order decides which pattern claims a span
+            when two could match at the same position)
+        false_positive: Optional ``(pattern, matched_text) -> bool``; matches
+            for which it returns True are dropped
+    """
+
+    def __init__(
+        self,
+        patterns: Sequence[PHIPattern] = DEFAULT_PATTERNS,
+        false_positive: Optional[FalsePositive] = None
+    ):
+        self.patterns = tuple(patterns)
+        self.false_positive = false_positive
+        # A shared leading \b is hoisted out of the alternation, so the
+        # branches are only tried at word starts
+        hoist = all(pattern.regex.startswith(r"\b") for pattern in self.patterns)
+        alternatives = []
+        for i, pattern in enumerate(self.patterns):
+            body = pattern.regex[2:] if hoist else pattern.regex
+            body = f"(?i:{body})" if pattern.ignore_case else body
+            alternatives.append(f"(?P<p{i}>{body})")
+        combined = "|".join(alternatives)
+        self._regex = re.compile(rf"\b(?:{combined})" if hoist else combined)
+
+    # ===== Strings =====
+
+    def scan_text(self, text: str, path: Tuple = (), base_offset: int = 0) -> List[PHIFinding]:
+        """All findings in one string (offsets relative to ``base_offset``)."""
+        findings = []
+        for match in self._regex.finditer(text):
+            finding = self._finding(match, path, base_offset)
+            if finding is not None:
+                findings.append(finding)
+        return findings
+
+    def _finding(self, match: "re.Match", path: Tuple, base_offset: int = 0) -> Optional[PHIFinding]:
+        index = int(match.lastgroup[1:])
+        pattern = self.patterns[index]
+        if self.false_positive is not None and self.false_positive(pattern, match.group()):
+            return None
+        return PHIFinding(
+            type=pattern.type,
+            pattern=index,
+            description=pattern.description,
+            start=base_offset + match.start(),
+            end=base_offset + match.end(),
+            path=path
+        )
+
+    # ===== Structures =====
+
+    def scan(self, content: Any, path: Tuple = ()) -> List[PHIFinding]:
+        """
+        Findings anywhere in ``content``.
+
+        Strings are scanned directly; dict keys and values, list/tuple/set
+        items, DataFrame/Series cells and other scalars (via ``str``) are
+        visited without stringifying the enclosing structure.
+        """
+        return list(self._iter_walk(content, path))
+
+    def contains_phi(self, content: Any) -> bool:
+        """True at the first finding (stops early)."""
+        for _ in self._iter_walk(content, ()):
+            return True
+        return False
+
+    def _iter_walk(self, content: Any, path: Tuple) -> Iterable[PHIFinding]:
+        if content is None or isinstance(content, bool):
+            return
+        if isinstance(content, str):
+            yield from self.scan_text(content, path)
+        elif isinstance(content, dict):
+            for key, value in content.items():
+                yield from self.scan_text(str(key), path + (key, "<key>"))
+                yield from self._iter_walk(value, path + (key,))
+        elif HAS_PANDAS and isinstance(content, pd.DataFrame):
+            yield from self.scan_dataframe(content, path)
+        elif HAS_PANDAS and isinstance(content, pd.Series):
+            yield from self._scan_column(content, path + (content.name,))
+        elif isinstance(content, np.ndarray):
+            yield from self._scan_column(content.ravel().tolist(), path)
+        elif isinstance(content, (list, tuple, set, frozenset)):
+            for i, item in enumerate(content):
+                yield from self._iter_walk(item, path + (i,))
+        else:
+            yield from self.scan_text(str(content), path)
+
+    # ===== DataFrames =====
+
+    def scan_dataframe(self, frame: "pd.DataFrame", path: Tuple = ()) -> List[PHIFinding]:
+        """Findings in column names and every cell, one regex pass per column."""
+        findings = []
+        for column in frame.columns:
+            findings.extend(self.scan_text(str(column), path + (column, "<column>")))
+            findings.extend(self._scan_column(frame[column], path + (column,)))
+        return findings
+
+    def _scan_column(self, values: Any, path: Tuple) -> List[PHIFinding]:
+        # Each distinct value is scanned once (measure codes, statuses and
+        # dates repeat heavily) and hits are fanned back out to their rows;
+        # booleans and NaN/None can never match
+        if HAS_PANDAS and isinstance(values, pd.Series):
+            if pd.api.types.is_bool_dtype(values.dtype) or len(values) == 0:
+                return []
+            try:
+                codes, uniques = pd.factorize(values)
+            except TypeError:  # unhashable cells (lists, dicts)
+                codes, uniques = pd.factorize(values.astype(str).where(values.notna(), ""))
+            cells = [str(value) for value in uniques]
+        else:
+            cells = ["" if value is None else str(value) for value in values]
+            codes = None
+        if not cells:
+            return []
+
+        joined = _CELL_SEPARATOR.join(cells)
+        lengths = np.fromiter((len(cell) + 1 for cell in cells), dtype=np.int64, count=len(cells))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        order = bounds = None
+        findings = []
+        for match in self._regex.finditer(joined):
+            value = int(np.searchsorted(starts, match.start(), side="right") - 1)
+            if codes is None:
+                rows = (value,)
+            else:
+                if order is None:
+                    # Rows grouped by value code, built on the first hit only
+                    order = np.argsort(codes, kind="stable")
+                    bounds = np.searchsorted(codes[order], np.arange(len(cells) + 1))
+                rows = order[bounds[value]:bounds[value + 1]].tolist()
+            for row in rows:
+                finding = self._finding(match, path + (row,), -int(starts[value]))
+                if finding is not None:
+                    findings.append(finding)
+        return findings
+
+    # ===== Streaming =====
+
+    def stream(self, holdback: int = 64) -> "PHIStreamScanner":
+        """Incremental scanner for streamed text using this profile."""
+        return PHIStreamScanner(self, holdback=holdback)
+
+
+class PHIStreamScanner:
+    """
+    Incremental PHI scanning of streamed text.
+
+    ``feed`` returns findings that can no longer change; a match touching the
+    last ``holdback`` characters is held until more text arrives (or
+    ``close``), since the next chunk could extend it. Offsets are absolute
+    positions in the full stream.
+
+    Args:
+        scanner: Compiled scanner (pattern profile)
+        holdback: Characters kept unconfirmed at the end of the buffer; must
+            exceed the longest match that should be detected whole
+    """
+
+    def __init__(self, scanner: PHIScanner, holdback: int = 64):
+        self.scanner = scanner
+        self.holdback = max(1, holdback)
+        self._buffer = ""
+        self._offset = 0  # absolute position of _buffer[0]
+        self._emitted_until = 0  # absolute end of the last emitted finding
+        self.findings: List[PHIFinding] = []
+
+    def feed(self, chunk: str) -> List[PHIFinding]:
+        """Add text; returns newly confirmed findings."""
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def close(self) -> List[PHIFinding]:
+        """End of stream; returns the remaining findings."""
+        return self._drain(final=True)
+
+    @property
+    def has_phi(self) -> bool:
+        return bool(self.findings)
+
+    def _drain(self, final: bool) -> List[PHIFinding]:
+        safe_end = len(self._buffer) if final else len(self._buffer) - self.holdback
+        confirmed = []
+        pending_start = None
+        for finding in self.scanner.scan_text(self._buffer, base_offset=self._offset):
+            if finding.start < self._emitted_until:
+                continue
+            if finding.end - self._offset <= safe_end:
+                confirmed.append(finding)
+                self._emitted_until = finding.end
+            elif pending_start is None:
+                pending_start = finding.start - self._offset
+
+        # Keep the unconfirmed tail (plus one char of left context for \b)
+        cut = max(0, safe_end) if pending_start is None else pending_start
+        cut = max(0, min(cut, len(self._buffer)) - 1)
+        self._buffer = self._buffer[cut:]
+        self._offset += cut
+        self.findings.extend(confirmed)
+        return confirmed
+
+
+_scanners = {}
+
+
+def get_phi_scanner(patterns: Sequence[PHIPattern] = DEFAULT_PATTERNS) -> PHIScanner:
+    """Shared compiled scanner for a built-in profile (no false-positive hook)."""
+    key = tuple(patterns)
+    scanner = _scanners.get(key)
+    if scanner is None:
+        scanner = _scanners[key] = PHIScanner(key)
+    return scanner
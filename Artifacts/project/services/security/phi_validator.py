@@ -6,10 +6,12 @@ Based on Rule 1.1 from CONTEXT_ENGINEERING_RULES.md
 """
 import re
 import logging
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Sequence
 from dataclasses import dataclass
 from datetime import datetime
 
+from .phi_scanner import PHIFinding, PHIPattern, PHIScanner
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,11 +23,19 @@ class PHIValidationResult:
     violation_types: List[str]
     violation_count: int
     timestamp: str
+    findings: List[PHIFinding]
     
-    def __init__(self, is_valid: bool, errors: List[str] = None, violation_types: List[str] = None):
+    def __init__(
+        self,
+        is_valid: bool,
+        errors: List[str] = None,
+        violation_types: List[str] = None,
+        findings: List[PHIFinding] = None
+    ):
         self.is_valid = is_valid
         self.errors = errors or []
         self.violation_types = violation_types or []
+        self.findings = findings or []
         self.violation_count = len(self.errors)
         self.timestamp = datetime.now().isoformat()
 
@@ -78,10 +88,25 @@ class PHIValidator:
         'execution time', 'steps executed'
     ]
     
-    def __init__(self):
-        """Initialize PHI validator."""
+    def __init__(self, patterns: Optional[Sequence[PHIPattern]] = None):
+        """
+        Initialize PHI validator.
+        
+        Args:
+            patterns: Optional scan profile (e.g. phi_scanner.CONTEXT_PATTERNS);
+                defaults to PHI_PATTERNS
+        """
         self.violation_count = 0
         self.validation_count = 0
+        if patterns is None:
+            patterns = [
+                PHIPattern(violation_type, pattern, error_msg, ignore_case=violation_type != 'NAME')
+                for pattern, violation_type, error_msg in self.PHI_PATTERNS
+            ]
+        self.scanner = PHIScanner(
+            patterns,
+            false_positive=lambda pattern, match: not self._filter_false_positives([match], "")
+        )
     
     def validate_no_phi(
         self,
@@ -102,34 +127,29 @@ class PHIValidator:
         """
         self.validation_count += 1
         
-        # Convert content to string for pattern matching
-        content_str = self._content_to_string(content)
+        # One compiled pass over each leaf (false positives already dropped)
+        findings = self.scanner.scan(content)
+        match_counts: Dict[int, int] = {}
+        for finding in findings:
+            match_counts[finding.pattern] = match_counts.get(finding.pattern, 0) + 1
         
         errors = []
         violation_types = []
         
-        # Check each PHI pattern
-        for pattern, violation_type, error_msg in self.PHI_PATTERNS:
-            # Use case-sensitive matching for name patterns, case-insensitive for others
-            flags = 0 if violation_type == 'NAME' else re.IGNORECASE
-            matches = re.findall(pattern, content_str, flags)
+        # Report in pattern order, as before
+        for index in sorted(match_counts):
+            pattern = self.scanner.patterns[index]
+            errors.append(f"{pattern.description} ({pattern.type})")
+            if pattern.type not in violation_types:
+                violation_types.append(pattern.type)
             
-            if matches:
-                # Filter out false positives
-                real_matches = self._filter_false_positives(matches, content_str)
-                
-                if real_matches:
-                    errors.append(f"{error_msg} ({violation_type})")
-                    if violation_type not in violation_types:
-                        violation_types.append(violation_type)
-                    
-                    # Log violation (without PHI content)
-                    if log_violations:
-                        self._log_violation(
-                            violation_type=violation_type,
-                            context=context,
-                            match_count=len(real_matches)
-                        )
+            # Log violation (without PHI content)
+            if log_violations:
+                self._log_violation(
+                    violation_type=pattern.type,
+                    context=context,
+                    match_count=match_counts[index]
+                )
         
         is_valid = len(errors) == 0
         
@@ -139,7 +159,8 @@ class PHIValidator:
         return PHIValidationResult(
             is_valid=is_valid,
             errors=errors,
-            violation_types=violation_types
+            violation_types=violation_types,
+            findings=findings
         )
     
     def _content_to_string(self, content: Any) -> str:
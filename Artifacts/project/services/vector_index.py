@@ -0,0 +1,470 @@
+"""
+Local Vector Index
+Self-contained cosine-similarity index over NumPy float32 matrices, used
+as an alternative to ChromaDB for retrieval.
+
+Backends (same interface):
+- FlatIndex:    exact brute-force search (one matrix-vector product)
+- IVFFlatIndex: inverted file over k-means centroids; only the ``nprobe``
+                closest lists are scanned, trading a little recall for QPS
+
+Both support batch insert, top-k search, Chroma-style metadata filtering
+(``where={"field": value}``) and on-disk persistence as a single ``.npz``.
+"""
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+Where = Union[Dict[str, Any], Callable[[Dict[str, Any]], bool]]
+
+
+@dataclass
+class SearchHit:
+    """One search result; score is cosine similarity (higher is closer)."""
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    document: Optional[str] = None
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Where]) -> bool:
+    """Equality filter (all keys must match) or a predicate."""
+    if where is None:
+        return True
+    if callable(where):
+        return bool(where(metadata))
+    for key, expected in where.items():
+        value = metadata.get(key)
+        if isinstance(expected, (list, tuple, set, frozenset)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class VectorIndex(ABC):
+    """
+    Base class: storage, filtering and persistence shared by all backends.
+
+    Subclasses implement ``_candidates`` (which rows to score for a query)
+    and may hook ``_on_add``/``_state``/``_restore`` for their own structures.
+
+    Args:
+        dim: Vector size; inferred from the first insert when None
+
+    Notes:
+        - Vectors are normalized on insert; queries on search
+        - Re-adding an existing id overwrites its vector and metadata
+        - Thread-safe (one lock around mutation and search)
+    """
+
+    kind = "base"
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._metadatas: List[Dict[str, Any]] = []
+        self._documents: List[Optional[str]] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def count(self) -> int:
+        """Number of stored vectors (Chroma-compatible name)."""
+        return self._size
+
+    # ===== Insert =====
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        documents: Optional[Sequence[str]] = None
+    ):
+        """
+        Insert a batch of vectors.
+
+        Args:
+            ids: Unique ids, one per row
+            vectors: Matrix (n, dim)
+            metadatas: Optional metadata dict per row (used by ``where``)
+            documents: Optional source text per row
+        """
+        vectors = _normalize(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        if metadatas is not None and len(metadatas) != len(ids):
+            raise ValueError("metadatas must have one entry per id")
+        if documents is not None and len(documents) != len(ids):
+            raise ValueError("documents must have one entry per id")
+        if len(ids) == 0:
+            return
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}-d")
+
+            new_rows = []
+            for i, doc_id in enumerate(ids):
+                doc_id = str(doc_id)
+                metadata = dict(metadatas[i]) if metadatas is not None else {}
+                document = documents[i] if documents is not None else None
+                row = self._id_to_row.get(doc_id)
+                if row is not None:
+                    self._vectors[row] = vectors[i]
+                    self._metadatas[row] = metadata
+                    self._documents[row] = document
+                    self._on_update(row, vectors[i])
+                    continue
+                self._id_to_row[doc_id] = self._size + len(new_rows)
+                self._ids.append(doc_id)
+                self._metadatas.append(metadata)
+                self._documents.append(document)
+                new_rows.append(i)
+
+            if new_rows:
+                start = self._size
+                self._reserve(start + len(new_rows))
+                self._vectors[start:start + len(new_rows)] = vectors[new_rows]
+                self._size += len(new_rows)
+                self._on_add(start, self._size)
+
+    def _reserve(self, capacity: int):
+        # Grow geometrically so repeated small batches stay amortized O(1)
+        if capacity <= len(self._vectors):
+            return
+        new_capacity = max(capacity, 2 * len(self._vectors), 64)
+        grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    # ===== Search =====
+
+    def search(self, query: np.ndarray, k: int = 10, where: Optional[Where] = None) -> List[SearchHit]:
+        """
+        Top-k most similar vectors.
+
+        Args:
+            query: Query vector (dim,)
+            k: Number of results
+            where: Equality filter ``{"field": value}`` (a list/tuple value
+                matches any of its items) or a predicate on metadata
+
+        Returns:
+            Hits, best first (fewer than k when the filter is selective)
+        """
+        return self.search_batch(np.asarray(query).reshape(1, -1), k=k, where=where)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int = 10, where: Optional[Where] = None) -> List[List[SearchHit]]:
+        """Top-k for several queries at once."""
+        queries = _normalize(queries)
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return [[] for _ in range(len(queries))]
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d queries, got {queries.shape[1]}-d")
+            allowed = self._filter_mask(where)
+            results = []
+            for query in queries:
+                rows = self._candidates(query)
+                if rows is None and allowed is None:
+                    # Exhaustive and unfiltered: score the matrix in place
+                    scores = self._vectors[:self._size] @ query
+                    best = _top_k(scores, k)
+                    results.append(self._hits(best, scores[best]))
+                    continue
+                if rows is None:
+                    rows = np.flatnonzero(allowed)
+                elif allowed is not None:
+                    rows = rows[allowed[rows]]
+                if len(rows) == 0:
+                    results.append([])
+                    continue
+                scores = self._vectors[rows] @ query
+                best = _top_k(scores, k)
+                results.append(self._hits(rows[best], scores[best]))
+            return results
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[SearchHit]:
+        return [
+            SearchHit(
+                id=self._ids[row],
+                score=float(score),
+                metadata=self._metadatas[row],
+                document=self._documents[row]
+            )
+            for row, score in zip(rows, scores)
+        ]
+
+    def _filter_mask(self, where: Optional[Where]) -> Optional[np.ndarray]:
+        if where is None:
+            return None
+        return np.fromiter(
+            (matches_where(metadata, where) for metadata in self._metadatas),
+            dtype=bool,
+            count=self._size
+        )
+
+    @abstractmethod
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Row numbers to score for this query (None = all rows)."""
+
+    # ===== Hooks =====
+
+    def _on_add(self, start: int, stop: int):
+        pass
+
+    def _on_update(self, row: int, vector: np.ndarray):
+        pass
+
+    def _state(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def _restore(self, data: Dict[str, np.ndarray]):
+        pass
+
+    def _params(self) -> Dict[str, Any]:
+        return {}
+
+    # ===== Persistence =====
+
+    def save(self, path: str):
+        """Write the index to ``path`` (.npz), replacing it atomically."""
+        with self._lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            header = {
+                "kind": self.kind,
+                "dim": self.dim,
+                "params": self._params(),
+                "ids": self._ids,
+                "metadatas": self._metadatas,
+                "documents": self._documents,
+            }
+            tmp_path = path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                header=np.array(json.dumps(header, default=str)),
+                vectors=self._vectors[:self._size],
+                **self._state()
+            )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """Read an index written by ``save`` (the stored backend is restored)."""
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            index_cls = _BACKENDS[header["kind"]]
+            index = index_cls(dim=header["dim"], **header["params"])
+            index._vectors = np.array(data["vectors"], dtype=np.float32)
+            index._size = len(index._vectors)
+            index._ids = list(header["ids"])
+            index._id_to_row = {doc_id: row for row, doc_id in enumerate(index._ids)}
+            index._metadatas = list(header["metadatas"])
+            index._documents = list(header["documents"])
+            index._restore({key: data[key] for key in data.files})
+        logger.info(f"Loaded {index.kind} vector index with {len(index)} vectors from {path}")
+        return index
+
+
+class FlatIndex(VectorIndex):
+    """Exact search: every stored vector is scored."""
+
+    kind = "flat"
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        return None
+
+
+class IVFFlatIndex(VectorIndex):
+    """
+    Inverted-file index with exact scoring inside the probed lists.
+
+    Until ``train_size`` vectors are stored the index searches exhaustively;
+    at that point k-means centroids are trained once on the stored vectors
+    and every later insert is assigned to its nearest centroid.
+
+    Args:
+        dim: Vector size (inferred when None)
+        nlist: Number of centroids/lists (default: ~sqrt(train_size))
+        nprobe: Lists scanned per query; higher = better recall, lower QPS
+        train_size: Vectors required before training
+        kmeans_iters: Lloyd iterations when training
+        seed: RNG seed for reproducible centroids
+    """
+
+    kind = "ivf_flat"
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_size: int = 4096,
+        kmeans_iters: int = 10,
+        seed: int = 0
+    ):
+        super().__init__(dim=dim)
+        self.nlist = nlist
+        self.nprobe = max(1, nprobe)
+        self.train_size = train_size
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def train(self):
+        """Train centroids on the stored vectors (normally automatic)."""
+        with self._lock:
+            if self._size == 0:
+                return
+            vectors = self._vectors[:self._size]
+            nlist = self.nlist or max(1, int(np.sqrt(self._size)))
+            nlist = min(nlist, self._size)
+            rng = np.random.default_rng(self.seed)
+
+            # Lloyd's k-means on a sample (cosine: re-normalized centroids)
+            sample_size = min(self._size, max(nlist * 64, 10000))
+            sample = vectors[rng.choice(self._size, sample_size, replace=False)]
+            centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+            for _ in range(self.kmeans_iters):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = np.bincount(labels, minlength=nlist) == 0
+                sums[empty] = centroids[empty]
+                centroids = _normalize(sums)
+
+            self.nlist = nlist
+            self._centroids = centroids
+            self._assignments = self._assign(vectors)
+            self._rebuild_lists()
+            logger.info(f"Trained IVF index: {nlist} lists over {self._size} vectors")
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        # Chunked so a 1M-row assignment never materializes a huge score matrix
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 65536):
+            chunk = vectors[start:start + 65536]
+            labels[start:start + len(chunk)] = np.argmax(chunk @ self._centroids.T, axis=1)
+        return labels
+
+    def _rebuild_lists(self):
+        order = np.argsort(self._assignments, kind="stable")
+        bounds = np.searchsorted(self._assignments[order], np.arange(self.nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.nlist)]
+
+    def _on_add(self, start: int, stop: int):
+        if not self.is_trained:
+            if self._size >= self.train_size:
+                self.train()
+            return
+        labels = self._assign(self._vectors[start:stop])
+        self._assignments = np.concatenate([self._assignments, labels])
+        for label in np.unique(labels):
+            rows = np.arange(start, stop)[labels == label]
+            self._lists[label] = np.concatenate([self._lists[label], rows])
+
+    def _on_update(self, row: int, vector: np.ndarray):
+        if not self.is_trained:
+            return
+        label = int(np.argmax(self._centroids @ vector))
+        old = int(self._assignments[row])
+        if label != old:
+            self._assignments[row] = label
+            self._lists[old] = self._lists[old][self._lists[old] != row]
+            self._lists[label] = np.append(self._lists[label], row)
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if not self.is_trained:
+            return None
+        probe = _top_k(self._centroids @ query, min(self.nprobe, self.nlist))
+        return np.concatenate([self._lists[i] for i in probe])
+
+    def _params(self) -> Dict[str, Any]:
+        return {
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "train_size": self.train_size,
+            "kmeans_iters": self.kmeans_iters,
+            "seed": self.seed,
+        }
+
+    def _state(self) -> Dict[str, np.ndarray]:
+        if not self.is_trained:
+            return {}
+        return {"centroids": self._centroids, "assignments": self._assignments}
+
+    def _restore(self, data: Dict[str, np.ndarray]):
+        if "centroids" in data:
+            self._centroids = np.array(data["centroids"], dtype=np.float32)
+            self._assignments = np.array(data["assignments"], dtype=np.int32)
+            self.nlist = len(self._centroids)
+            self._rebuild_lists()
+
+
+_BACKENDS = {
+    FlatIndex.kind: FlatIndex,
+    IVFFlatIndex.kind: IVFFlatIndex,
+}
+
+
+def create_index(kind: str = "ivf_flat", **kwargs) -> VectorIndex:
+    """Factory for a backend by name ("flat" or "ivf_flat")."""
+    if kind not in _BACKENDS:
+        raise ValueError(f"Unknown vector index '{kind}'. Choose from: {sorted(_BACKENDS)}")
+    return _BACKENDS[kind](**kwargs)
+
+
+def load_or_create_index(path: Optional[str], kind: str = "ivf_flat", **kwargs) -> VectorIndex:
+    """Load ``path`` if it exists and is readable, else return a new empty index."""
+    if path and os.path.exists(path):
+        try:
+            return VectorIndex.load(path)
+        except Exception as e:
+            # A corrupt index only costs a rebuild
+            logger.warning(f"Ignoring unreadable vector index {path}: {e}")
+    return create_index(kind, **kwargs)
@@ -0,0 +1,193 @@
+"""
+Model clients shared by Planner, Worker and Reviewer.
+
+- RetryingClient wraps an Anthropic-style client (``client.messages.create``)
+  with a bounded semaphore on in-flight calls and exponential backoff with
+  jitter on transient errors (rate limits, overload, timeouts)
+- StubModelClient is a deterministic offline model with the same interface,
+  for tests and throughput benchmarks without the network
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+try:
+    # APITimeoutError subclasses APIConnectionError; neither carries a status
+    from anthropic import APIConnectionError  # type: ignore[import-not-found]
+    _TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (TimeoutError, ConnectionError, APIConnectionError)
+except ImportError:
+    _TRANSIENT_ERRORS = (TimeoutError, ConnectionError)
+
+MODEL = "claude-sonnet-4-20250514"
+
+# HTTP status retried besides 5xx (rate limited)
+_RATE_LIMITED = 429
+
+
+class StubOverloadedError(Exception):
+    """Transient failure injected by StubModelClient (like a 529 overload)."""
+
+    status_code = 529
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Only transient errors are retried: timeouts, connection errors, 429 and 5xx.
+
+    Anything else (bad requests, auth failures, bugs raising without a
+    status) fails immediately instead of burning the retry budget.
+    """
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status == _RATE_LIMITED or status >= 500)
+
+
+class RetryingClient:
+    """
+    Anthropic-compatible client with bounded concurrency and retries.
+
+    Args:
+        client: Object exposing ``messages.create(**kwargs)``
+        max_in_flight: Maximum concurrent model calls (bounded semaphore)
+        retries: Retries after the first attempt for transient errors
+        base_delay: First backoff delay in seconds (doubles per retry)
+        max_delay: Backoff cap in seconds
+        sleep: Sleep function (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_in_flight: int = 4,
+        retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.client = client
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self._semaphore = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0}
+
+    @property
+    def messages(self) -> "RetryingClient":
+        # Same call shape as the Anthropic client: client.messages.create(...)
+        return self
+
+    def create(self, **kwargs: Any) -> Any:
+        """``messages.create`` with semaphore and backoff."""
+        attempt = 0
+        while True:
+            try:
+                with self._semaphore:
+                    with self._lock:
+                        self.stats["calls"] += 1
+                    return self.client.messages.create(**kwargs)
+            except Exception as e:
+                if attempt >= self.retries or not is_retryable(e):
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    raise
+                # Full jitter: uniform in [0, capped exponential delay]
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                with self._lock:
+                    self.stats["retries"] += 1
+                attempt += 1
+                self.sleep(random.uniform(0, delay))
+
+
+_FIELD_RE = re.compile(r"(resource_id|violation_type|regulation_cited)[=:]\s*([^,\n]*)")
+
+
+class StubModelClient:
+    """
+    Deterministic offline model for the three agents.
+
+    Responses depend only on the prompt: the planner gets a JSON plan, the
+    worker compliant HCL (KMS encryption, approved region, PHI tag) and the
+    reviewer an APPROVED verdict. Token usage is ~4 characters per token.
+
+    Args:
+        latency: Seconds each call takes (simulates model latency)
+        failures: Number of initial calls that raise StubOverloadedError
+    """
+
+    def __init__(self, latency: float = 0.0, failures: int = 0) -> None:
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def messages(self) -> "StubModelClient":
+        return self
+
+    def create(self, model: str = MODEL, max_tokens: int = 1024, system: str = "", messages: list | None = None, **_: Any) -> Any:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if call <= self.failures:
+                raise StubOverloadedError("stub model overloaded")
+            user = "".join(str(m.get("content", "")) for m in (messages or []))
+            text = self._respond(system, user)
+            return SimpleNamespace(
+                content=[SimpleNamespace(text=text)],
+                usage=SimpleNamespace(
+                    input_tokens=(len(system) + len(user)) // 4,
+                    output_tokens=len(text) // 4,
+                ),
+            )
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    @staticmethod
+    def _respond(system: str, user: str) -> str:
+        fields = {k: v.strip() for k, v in _FIELD_RE.findall(system + "\n" + user)}
+        resource_id = fields.get("resource_id", "resource")
+        violation_type = fields.get("violation_type", "unknown")
+        if "remediation planner" in system:
+            return json.dumps({
+                "fix_strategy": f"Remediate {violation_type} on {resource_id}: enforce KMS encryption, approved region and DataClass=PHI tag.",
+                "priority": "HIGH" if violation_type in ("is_public", "cmk_encryption") else "MEDIUM",
+                "regulation_cited": fields.get("regulation_cited") or "HIPAA §164.312",
+            })
+        if "Terraform expert" in system:
+            name = re.sub(r"[^A-Za-z0-9_]", "_", resource_id)[:40]
+            return (
+                f'resource "aws_s3_bucket" "fix_{name}" {{\n'
+                f'  bucket = "{resource_id}"\n'
+                f'  tags = {{\n    DataClass = "PHI"\n  }}\n'
+                f"}}\n"
+                f'resource "aws_s3_bucket_server_side_encryption_configuration" "fix_{name}" {{\n'
+                f"  bucket = aws_s3_bucket.fix_{name}.id\n"
+                f"  rule {{\n    apply_server_side_encryption_by_default {{\n"
+                f'      sse_algorithm = "aws:kms"\n    }}\n  }}\n'
+                f"}}\n"
+            )
+        if "compliance reviewer" in system:
+            return json.dumps({
+                "verdict": "APPROVED",
+                "notes": f"Stub review of {violation_type} fix for {resource_id}.",
+                "checks_passed": ["Region check", "CMK check", "PHI DataClass tag", "Not public"],
+                "checks_failed": [],
+            })
+        return "{}"
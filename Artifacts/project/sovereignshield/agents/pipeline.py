@@ -0,0 +1,256 @@
+"""
+RemediationPipeline — runs Planner → Worker → Reviewer for many violations concurrently.
+
+- Independent violations are remediated in parallel on a thread pool; the
+  three steps of one violation stay sequential (each needs the previous)
+- Model calls share one RetryingClient: a bounded semaphore caps in-flight
+  requests and transient errors are retried with exponential backoff
+- Identical violations on different resources (same type, regulation,
+  severity and detail once the resource_id is masked) are remediated once
+  and the result is re-targeted to each resource
+- Prior fixes for all violations are retrieved from the knowledge base in
+  one batched call before planning; approved fixes can be bulk-upserted
+  after review (store_approved)
+"""
+from __future__ import annotations
+
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any
+
+from .model_client import RetryingClient
+from .planner import PlannerAgent, PlannerResult
+from .reviewer import ReviewerAgent, ReviewerResult
+from .worker import WorkerAgent, WorkerResult
+
+try:
+    from ..rag.retriever import kb_text, retrieve_for_violations, store_remediations  # type: ignore
+    _RAG_AVAILABLE = True
+except ImportError:
+    kb_text = None
+    retrieve_for_violations = None
+    store_remediations = None
+    _RAG_AVAILABLE = False
+
+
+@dataclass
+class RemediationOutcome:
+    """Planner, Worker and Reviewer results for one violation."""
+
+    violation: dict[str, Any]
+    plan: PlannerResult | None
+    work: WorkerResult | None
+    result: ReviewerResult | None
+    duplicate_of: str | None = None  # resource_id whose remediation was reused
+    error: str | None = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def tokens_used(self) -> int:
+        if self.duplicate_of is not None:
+            return 0  # no model calls were made for this violation
+        return sum(r.tokens_used for r in (self.plan, self.work, self.result) if r is not None)
+
+
+def violation_signature(violation: dict[str, Any]) -> tuple[str, str, str, str]:
+    """Key under which violations share one remediation (resource_id masked out of detail)."""
+    resource_id = str(violation.get("resource_id", ""))
+    detail = str(violation.get("detail", ""))
+    if resource_id:
+        detail = detail.replace(resource_id, "<resource>")
+    return (
+        str(violation.get("violation_type", "")),
+        str(violation.get("regulation_cited", "")),
+        str(violation.get("severity", "")),
+        detail,
+    )
+
+
+def _safe_name(resource_id: str) -> str:
+    # Terraform label form used by Worker and StubModelClient
+    return re.sub(r"[^A-Za-z0-9_]", "_", resource_id)[:40]
+
+
+def _retarget(text: str, source_id: str, target_id: str) -> str:
+    text = text.replace(source_id, target_id)
+    source_name, target_name = _safe_name(source_id), _safe_name(target_id)
+    if source_name != source_id:
+        text = text.replace(source_name, target_name)
+    return text
+
+
+def _default_client(max_in_flight: int, retries: int) -> Any | None:
+    """Anthropic client wrapped in RetryingClient, or None without an API key."""
+    if not os.environ.get("ANTHROPIC_API_KEY"):
+        return None
+    try:
+        from anthropic import Anthropic
+    except ImportError:
+        return None
+    return RetryingClient(Anthropic(), max_in_flight=max_in_flight, retries=retries)
+
+
+class RemediationPipeline:
+    """
+    Concurrent Planner → Worker → Reviewer loop.
+
+    Args:
+        client: Model client for all three agents (default: Anthropic() in a
+            RetryingClient when ANTHROPIC_API_KEY is set); pass
+            StubModelClient for offline tests and benchmarks
+        max_concurrency: Violations remediated in parallel
+        max_in_flight: Concurrent model calls (used for the default client)
+        retries: Retries per model call (used for the default client)
+        deduplicate: Remediate identical violations once
+        store_approved: Bulk-upsert APPROVED fixes into the knowledge base
+            after each run (off by default; the app stores per remediation)
+        planner, worker, reviewer: Agents to use instead of ones built on ``client``
+    """
+
+    def __init__(
+        self,
+        client: Any | None = None,
+        max_concurrency: int = 4,
+        max_in_flight: int = 4,
+        retries: int = 3,
+        deduplicate: bool = True,
+        store_approved: bool = False,
+        planner: PlannerAgent | None = None,
+        worker: WorkerAgent | None = None,
+        reviewer: ReviewerAgent | None = None,
+    ) -> None:
+        if client is None:
+            client = _default_client(max_in_flight, retries)
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self.deduplicate = deduplicate
+        self.store_approved = store_approved
+        self.planner = planner or PlannerAgent(client=client)
+        self.worker = worker or WorkerAgent(client=client)
+        self.reviewer = reviewer or ReviewerAgent(client=client)
+        self.last_stats: dict[str, Any] = {}
+
+    def run_one(
+        self,
+        violation: dict[str, Any],
+        started_at: datetime | None = None,
+        rag_result: tuple[str | None, float] | None = None,
+    ) -> RemediationOutcome:
+        """Remediate a single violation (sequential Planner → Worker → Reviewer)."""
+        t0 = time.perf_counter()
+        started_at = started_at or datetime.now()
+        try:
+            if rag_result is None:
+                plan = self.planner.run(dict(violation))
+            else:
+                plan = self.planner.run(dict(violation), rag_result=rag_result)
+            work = self.worker.run(plan)
+            result = self.reviewer.run(plan, work, started_at=started_at)
+        except Exception as e:
+            return RemediationOutcome(
+                violation=violation, plan=None, work=None, result=None,
+                error=f"{type(e).__name__}: {e!s}", elapsed_seconds=time.perf_counter() - t0,
+            )
+        return RemediationOutcome(
+            violation=violation, plan=plan, work=work, result=result,
+            elapsed_seconds=time.perf_counter() - t0,
+        )
+
+    def run(self, violations: list[dict[str, Any]]) -> list[RemediationOutcome]:
+        """
+        Remediate violations concurrently.
+
+        Returns one RemediationOutcome per violation, in input order. A
+        failure in one violation is recorded on its outcome and does not
+        stop the others.
+        """
+        t0 = time.perf_counter()
+        groups: dict[Any, list[int]] = {}
+        for i, violation in enumerate(violations):
+            key = violation_signature(violation) if self.deduplicate else i
+            groups.setdefault(key, []).append(i)
+
+        representatives = [members[0] for members in groups.values()]
+        rag_results = self._prefetch([violations[i] for i in representatives])
+
+        outcomes: list[RemediationOutcome | None] = [None] * len(violations)
+        workers = min(self.max_concurrency, len(groups)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="remediate") as pool:
+            futures = {
+                i: pool.submit(self.run_one, violations[i], None, rag)
+                for i, rag in zip(representatives, rag_results)
+            }
+            for members in groups.values():
+                first = futures[members[0]].result()
+                outcomes[members[0]] = first
+                for i in members[1:]:
+                    outcomes[i] = self._reuse(first, violations[i])
+
+        stored = self._store_approved([outcomes[i] for i in representatives]) if self.store_approved else 0
+        elapsed = time.perf_counter() - t0
+        self.last_stats = {
+            "kb_stored": stored,
+            "violations": len(violations),
+            "remediated": len(groups),
+            "deduplicated": len(violations) - len(groups),
+            "errors": sum(1 for o in outcomes if o is not None and o.error),
+            "concurrency": workers,
+            "elapsed_seconds": round(elapsed, 3),
+            "violations_per_second": round(len(violations) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        return [o for o in outcomes if o is not None]
+
+    def _prefetch(self, violations: list[dict[str, Any]]) -> list[tuple[str | None, float] | None]:
+        """Knowledge-base hits for all violations in one batched retrieval."""
+        if not _RAG_AVAILABLE or retrieve_for_violations is None or not violations:
+            return [None] * len(violations)
+        try:
+            return list(retrieve_for_violations(violations, threshold=self.planner.rag_threshold))
+        except Exception:
+            return [None] * len(violations)
+
+    @staticmethod
+    def _store_approved(outcomes: list[RemediationOutcome | None]) -> int:
+        """Bulk-upsert approved fixes (one knowledge-base write per run)."""
+        if not _RAG_AVAILABLE or store_remediations is None:
+            return 0
+        records = [
+            (
+                kb_text(o.violation),
+                o.work.hcl_code,
+                {"regulatory_context": o.plan.regulation_cited, "confidence_score": "0.95"},
+            )
+            for o in outcomes
+            if o is not None and o.result is not None and o.result.verdict == "APPROVED"
+        ]
+        return store_remediations(records) if records else 0
+
+    @staticmethod
+    def _reuse(source: RemediationOutcome, violation: dict[str, Any]) -> RemediationOutcome:
+        """Copy of ``source`` re-targeted to the resource of ``violation``."""
+        source_id = str(source.violation.get("resource_id", ""))
+        target_id = str(violation.get("resource_id", ""))
+        if source.plan is None or source.work is None or source.result is None:
+            return replace(source, violation=violation, duplicate_of=source_id)
+        task_id = str(uuid.uuid4())
+        plan = replace(
+            source.plan, task_id=task_id, resource_id=target_id,
+            fix_strategy=_retarget(source.plan.fix_strategy, source_id, target_id),
+        )
+        hcl = _retarget(source.work.hcl_code, source_id, target_id)
+        work = replace(source.work, task_id=task_id, resource_id=target_id, hcl_code=hcl)
+        result = replace(
+            source.result, task_id=task_id, resource_id=target_id,
+            notes=_retarget(source.result.notes, source_id, target_id),
+            checks_passed=list(source.result.checks_passed),
+            checks_failed=list(source.result.checks_failed),
+        )
+        return RemediationOutcome(
+            violation=violation, plan=plan, work=work, result=result,
+            duplicate_of=source_id, elapsed_seconds=0.0,
+        )
@@ -27,9 +27,10 @@ for _p in _env_candidates:
 
 # RAG: guard with try/except — rag/retriever.py doesn't exist until Chat 7
 try:
-    from ..rag.retriever import retrieve_similar  # type: ignore
+    from ..rag.retriever import kb_text, retrieve_similar  # type: ignore
     _RAG_AVAILABLE = True
 except ImportError:
+    kb_text = None
     retrieve_similar = None
     _RAG_AVAILABLE = False
 
@@ -52,11 +53,22 @@ class PlannerResult:
 class PlannerAgent:
     """Plans fix strategy for compliance violations using Claude Sonnet and optional RAG."""
 
-    def __init__(self, rag_threshold: float = 0.85) -> None:
+    def __init__(self, rag_threshold: float = 0.85, client: Any | None = None) -> None:
         self.rag_threshold = rag_threshold
-
-    def run(self, violation: dict[str, Any]) -> PlannerResult:
-        """Plan remediation for a single violation. Returns PlannerResult."""
+        # Injected model client (e.g. RetryingClient, StubModelClient); None = Anthropic()
+        self.client = client
+
+    def run(
+        self,
+        violation: dict[str, Any],
+        rag_result: tuple[str | None, float] | None = None,
+    ) -> PlannerResult:
+        """
+        Plan remediation for a single violation. Returns PlannerResult.
+
+        rag_result is a prefetched (fix_code, similarity) from
+        rag.retriever.retrieve_for_violations; when given, no retrieval is made.
+        """
         task_id = str(uuid.uuid4())
         resource_id = str(violation.get("resource_id", ""))
         violation_type = str(violation.get("violation_type", ""))
@@ -65,10 +77,12 @@ class PlannerAgent:
         # RAG retrieval
         rag_hit = False
         rag_source: str | None = None
-        if _RAG_AVAILABLE and retrieve_similar is not None:
+        if rag_result is not None or (_RAG_AVAILABLE and retrieve_similar is not None):
             try:
-                query = f"{violation_type} {resource_id} {regulation_cited_from_violation}"
-                result = retrieve_similar(query)
+                if rag_result is not None:
+                    result = rag_result
+                else:
+                    result = retrieve_similar(kb_text(violation))
                 # Assume (text, score) or similar; adapt based on actual retriever API
                 if isinstance(result, tuple) and len(result) >= 2:
                     text, score = result[0], result[1]
@@ -100,7 +114,7 @@ class PlannerAgent:
         import os
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
-        if not api_key:
+        if not api_key and self.client is None:
             return PlannerResult(
                 task_id=task_id,
                 resource_id=resource_id,
@@ -114,9 +128,11 @@ class PlannerAgent:
             )
 
         try:
-            from anthropic import Anthropic
+            client = self.client
+            if client is None:
+                from anthropic import Anthropic
 
-            client = Anthropic()
+                client = Anthropic()
             response = client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=1024,
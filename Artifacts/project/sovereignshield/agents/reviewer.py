@@ -8,7 +8,7 @@ import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 
 from dotenv import load_dotenv
 
@@ -94,8 +94,10 @@ Required: is_public must be False"""
 class ReviewerAgent:
     """Reviews Terraform HCL against OPA policy rules using Claude Sonnet."""
 
-    def __init__(self, max_iterations: int = 3) -> None:
+    def __init__(self, max_iterations: int = 3, client: Any | None = None) -> None:
         self.max_iterations = max_iterations
+        # Injected model client (e.g. RetryingClient, StubModelClient); None = Anthropic()
+        self.client = client
 
     def run(
         self,
@@ -137,7 +139,7 @@ class ReviewerAgent:
         except Exception:
             api_key = None
 
-        if not api_key:
+        if not api_key and self.client is None:
             return ReviewerResult(
                 task_id=task_id,
                 resource_id=resource_id,
@@ -153,9 +155,11 @@ class ReviewerAgent:
             )
 
         try:
-            from anthropic import Anthropic
+            client = self.client
+            if client is None:
+                from anthropic import Anthropic
 
-            client = Anthropic()
+                client = Anthropic()
             response = client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=1024,
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from dotenv import load_dotenv
 
@@ -54,8 +55,9 @@ def _fallback_stub(resource_id: str, violation_type: str) -> str:
 class WorkerAgent:
     """Generates HIPAA-compliant Terraform HCL fixes using Claude Sonnet."""
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, client: Any | None = None) -> None:
+        # Injected model client (e.g. RetryingClient, StubModelClient); None = Anthropic()
+        self.client = client
 
     def run(self, plan: PlannerResult) -> WorkerResult:
         """Generate HCL remediation from plan. Returns WorkerResult."""
@@ -71,7 +73,7 @@ class WorkerAgent:
         except Exception:
             api_key = None
 
-        if not api_key:
+        if not api_key and self.client is None:
             hcl = _fallback_stub(resource_id, violation_type)
             return WorkerResult(
                 task_id=task_id,
@@ -95,9 +97,11 @@ class WorkerAgent:
         )
 
         try:
-            from anthropic import Anthropic
+            client = self.client
+            if client is None:
+                from anthropic import Anthropic
 
-            client = Anthropic()
+                client = Anthropic()
             response = client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=2048,
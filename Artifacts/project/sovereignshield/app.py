@@ -7,8 +7,6 @@ from __future__ import annotations
 import atexit
 import base64
 import io
-import json
-import re
 import time
 from datetime import datetime
 from pathlib import Path
@@ -64,24 +62,29 @@ _USE_REAL_MODULES = True
 try:
     from core.opa_eval import evaluate
     from core.audit_db import db
+    from core.incremental import IncrementalScanner
     from core.audit_log import write_run, fetch_history
-    from agents.planner import planner
-    from agents.worker import worker
-    from agents.reviewer import reviewer
-    from rag.retriever import embed_and_store, kb_count, retrieve_similar
+    from agents.pipeline import RemediationPipeline
+    from rag.retriever import embed_and_store, kb_count, kb_text, retrieve_similar
 except ImportError:
     _USE_REAL_MODULES = False
     evaluate = None  # type: ignore[assignment]
     db = None  # type: ignore[assignment]
+    IncrementalScanner = None  # type: ignore[assignment]
     write_run = None  # type: ignore[assignment]
     fetch_history = None  # type: ignore[assignment]
-    planner = None  # type: ignore[assignment]
-    worker = None  # type: ignore[assignment]
-    reviewer = None  # type: ignore[assignment]
+    RemediationPipeline = None  # type: ignore[assignment]
     embed_and_store = None  # type: ignore[assignment]
     kb_count = None  # type: ignore[assignment]
+    kb_text = None  # type: ignore[assignment]
     retrieve_similar = None  # type: ignore[assignment]
 
+# Shared agent pipeline: retrying model client with bounded in-flight calls
+pipeline = RemediationPipeline() if RemediationPipeline is not None else None
+
+# Diff-aware scans: only new/changed resources are re-evaluated between uploads
+scanner = IncrementalScanner(db) if IncrementalScanner is not None and db is not None else None
+
 _CHARTS_AVAILABLE = True
 try:
     from core import charts
@@ -94,6 +97,7 @@ try:
 except ImportError:
     raise ImportError("shiny is required. Run: pip install shiny")
 
+from core.tfstate import ResourceTable, load_resource_table
 from ui.mobile_badge import mobile_badge
 from loading_overlay import loading_overlay_css, loading_overlay_ui
 from shared.supabase_findings import insert_finding
@@ -120,68 +124,28 @@ RESOURCES: list[dict[str, Any]] = [
 ]
 
 
-def parse_terraform(file_path: str) -> list[dict[str, Any]]:
+def load_terraform_table(file_path: str) -> ResourceTable:
     """
-    Parse Terraform .tf or .tfstate file and extract resources.
-    Returns list of dicts with keys: resource_id, region, type, encryption_enabled, is_public, tags.
+    Parse Terraform .tf or .tfstate file into a columnar ResourceTable (streamed, cached by file hash).
     Falls back to RESOURCES if parsing fails or returns empty.
     """
-    result: list[dict[str, Any]] = []
     path = Path(file_path)
     if not path.exists():
-        return RESOURCES
+        return ResourceTable.from_records(RESOURCES)
     try:
-        suffix = path.suffix.lower()
-        if suffix in (".tfstate", ".json"):
-            data = json.loads(path.read_text(encoding="utf-8"))
-            resources = data.get("resources") or []
-            for r in resources:
-                res_type = str(r.get("type", ""))
-                res_name = str(r.get("name", ""))
-                resource_id = f"{res_type}-{res_name}".replace("aws_", "").replace("_", "-") if res_type and res_name else res_name or res_type
-                instances = r.get("instances") or []
-                region = ""
-                tags: dict[str, str] = {}
-                if instances:
-                    attrs = instances[0].get("attributes") or {}
-                    region = str(attrs.get("region") or attrs.get("region_name") or "")
-                    if not region and attrs.get("availability_zone"):
-                        az = str(attrs["availability_zone"])
-                        match = re.match(r"^([a-z]+-[a-z]+-\d+)", az)
-                        region = match.group(1) if match else "us-east-1"
-                    raw_tags = attrs.get("tags") or {}
-                    if isinstance(raw_tags, dict):
-                        tags = {str(k): str(v) for k, v in raw_tags.items()}
-                if not region:
-                    region = "us-east-1"
-                result.append({
-                    "resource_id": resource_id or f"resource-{len(result)}",
-                    "resource_type": res_type,
-                    "region": region,
-                    "type": res_type.split("_")[-1] if "_" in res_type else res_type,
-                    "encryption_enabled": False,
-                    "is_public": False,
-                    "tags": tags,
-                })
-        elif suffix == ".tf":
-            content = path.read_text(encoding="utf-8")
-            pattern = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{', re.MULTILINE)
-            for m in pattern.finditer(content):
-                res_type = m.group(1).strip()
-                res_name = m.group(2).strip()
-                resource_id = f"{res_type}-{res_name}".replace("aws_", "").replace("_", "-") if res_type and res_name else res_name or res_type
-                result.append({
-                    "resource_id": resource_id or f"resource-{len(result)}",
-                    "resource_type": res_type,
-                    "region": "us-east-1",
-                    "type": res_type.split("_")[-1] if "_" in res_type else res_type,
-                    "encryption_enabled": False,
-                    "is_public": False,
-                    "tags": {},
-                })
+        table = load_resource_table(path)
     except Exception:
-        return RESOURCES
-    return result if result else RESOURCES
+        return ResourceTable.from_records(RESOURCES)
+    return table if len(table) else ResourceTable.from_records(RESOURCES)
+
+
+def parse_terraform(file_path: str) -> list[dict[str, Any]]:
+    """
+    Parse Terraform .tf or .tfstate file and extract resources.
+    Returns list of dicts with keys: resource_id, region, type, encryption_enabled, is_public, tags.
+    Falls back to RESOURCES if parsing fails or returns empty.
+    """
+    return load_terraform_table(file_path).to_records()
 
 # Canonical 5 OPA checks for waterfall trace: (policy_id, message)
 _OPA_CHECKS: list[tuple[str, str]] = [
@@ -305,7 +269,7 @@ def _effective_log(limit: int = 10) -> list[dict[str, Any]]:
 
 def _chart_to_base64_png(
     chart_fn: Callable[..., Any],
-    runs: list[dict[str, Any]],
+    runs: Any,
     **kwargs: Any,
 ) -> str:
     """
@@ -334,7 +298,7 @@ def _run_agents(resource_id: str, violation_type: str, resources: list[dict[str,
     Run real agent loop: evaluate → planner → worker → reviewer.
     Returns dict with trace, verdict, checks_passed, checks_failed, etc.
     """
-    if not _USE_REAL_MODULES or evaluate is None or planner is None or worker is None or reviewer is None:
+    if not _USE_REAL_MODULES or evaluate is None or pipeline is None:
         sim_trace = _build_waterfall_trace(
             ["Region check", "CMK check"],
             ["PHI DataClass tag missing"],
@@ -378,9 +342,10 @@ def _run_agents(resource_id: str, violation_type: str, resources: list[dict[str,
         }
 
     t0 = datetime.now()
-    plan = planner.run(dict(selected))  # Violation TypedDict → dict for planner
-    work = worker.run(plan)
-    result = reviewer.run(plan, work, started_at=t0)
+    outcome = pipeline.run_one(dict(selected), started_at=t0)  # Violation TypedDict → dict for planner
+    if outcome.error:
+        raise RuntimeError(outcome.error)
+    plan, work, result = outcome.plan, outcome.work, outcome.result
 
     # Waterfall trace: all 5 OPA checks with ✓/✗ [policy_id] - [message] ([severity])
     resource_violations_pre = [v for v in violations if str(v.get("resource_id", "")) == resource_id]
@@ -389,12 +354,9 @@ def _run_agents(resource_id: str, violation_type: str, resources: list[dict[str,
 
     # On APPROVED: embed fix into RAG
     if result.verdict == "APPROVED" and embed_and_store is not None:
-        detail = selected.get("detail") or (
-            f"{selected.get('violation_type', '')} {selected.get('resource_id', '')} "
-            f"{selected.get('regulation_cited', '')}"
-        )
+        # Same normalization as the scan prefetch (resource_id masked)
         embed_and_store(
-            detail,
+            kb_text(dict(selected)),
             work.hcl_code,
             {
                 "regulatory_context": str(selected.get("regulation_cited", "")),
@@ -615,15 +577,15 @@ def server(input: Any, output: Any, session: Any) -> None:
         atexit.register(_fc_session_end)
 
     @reactive.calc
-    def active_resources() -> list[dict[str, Any]]:
+    def active_table() -> ResourceTable:
         f = input.tf_upload()
         if f is None or len(f) == 0:
-            return RESOURCES
-        try:
-            parsed = parse_terraform(f[0]["datapath"])
-            return parsed if parsed else RESOURCES
-        except Exception:
-            return RESOURCES
+            return ResourceTable.from_records(RESOURCES)
+        return load_terraform_table(f[0]["datapath"])
+
+    @reactive.calc
+    def active_resources() -> list[dict[str, Any]]:
+        return active_table().to_records()
 
     @render.text
     def upload_status() -> str:
@@ -631,13 +593,25 @@ def server(input: Any, output: Any, session: Any) -> None:
         if f is None or len(f) == 0:
             return "Using synthetic demo data"
         r = active_resources()
-        return f"Loaded {len(r)} resources from {f[0]['name']}"
+        status = f"Loaded {len(r)} resources from {f[0]['name']}"
+        report = _scan()
+        if report is not None and report.carried_forward:
+            status += (
+                f" ({len(report.evaluated)} new/changed, {len(report.carried_forward)} unchanged,"
+                f" {report.time_saved_seconds:.2f}s saved)"
+            )
+        return status
+
+    @reactive.calc
+    def _scan() -> Any:
+        if not _USE_REAL_MODULES or scanner is None:
+            return None
+        return scanner.scan(active_table())
 
     @reactive.calc
     def _violations() -> list[dict[str, Any]]:
-        v = (
-            evaluate(active_resources()) if _USE_REAL_MODULES and evaluate is not None else []
-        )
+        report = _scan()
+        v = report.violations if report is not None else []
         if not v:
             v = [
                 {
@@ -693,10 +667,8 @@ def server(input: Any, output: Any, session: Any) -> None:
 
     @render.ui
     def catalogue_table() -> Any:
-        import pandas as pd
-        resources = active_resources()
         violations = _violations()
-        df = pd.DataFrame(resources)
+        df = active_table().to_frame()
         cols = ["resource_id", "region", "type", "encryption_enabled", "is_public"]
         for c in cols:
             if c not in df.columns:
@@ -853,10 +825,11 @@ def server(input: Any, output: Any, session: Any) -> None:
         )
 
     @reactive.calc
-    def _intel_runs() -> list[dict[str, Any]]:
+    def _intel_runs() -> Any:
+        """Pre-aggregated snapshot from the audit DB, else recent seed events."""
         refresh_trigger()
         if _USE_REAL_MODULES and db is not None:
-            return db.fetch_recent(50)
+            return db.analytics_snapshot()
         return _effective_log(50)
 
     @render.ui
@@ -973,10 +946,26 @@ def server(input: Any, output: Any, session: Any) -> None:
             return db.fetch_recent(50)
         return _effective_log(50)
 
+    @reactive.calc
+    def _analytics_snapshot() -> Any:
+        """Chart data: pre-aggregated snapshot from the audit DB, else recent events."""
+        analytics_refresh_trigger()
+        if _USE_REAL_MODULES and db is not None:
+            return db.analytics_snapshot()
+        return _analytics_runs()
+
     @reactive.calc
     def _analytics_kpi_values() -> tuple[int, float, float, float]:
         """Total runs, avg MTTR, compliance rate %, RAG hit rate %."""
-        runs = _analytics_runs()
+        data = _analytics_snapshot()
+        if not isinstance(data, list):
+            return (
+                data.recent_events,
+                data.avg_mttr,
+                data.approval_rate * 100.0,
+                data.rag_hit_rate * 100.0,
+            )
+        runs = data
         if not runs:
             return (0, 0.0, 0.0, 0.0)
         total = len(runs)
@@ -1032,8 +1021,7 @@ def server(input: Any, output: Any, session: Any) -> None:
     def analytics_chart_heatmap() -> Any:
         if not _CHARTS_AVAILABLE or charts is None:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
-        runs = _analytics_runs()
-        enc = _chart_to_base64_png(charts.compliance_heatmap, runs)
+        enc = _chart_to_base64_png(charts.compliance_heatmap, _analytics_snapshot())
         if not enc:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
         return ui.div(
@@ -1050,8 +1038,7 @@ def server(input: Any, output: Any, session: Any) -> None:
     def analytics_chart_mttr() -> Any:
         if not _CHARTS_AVAILABLE or charts is None:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
-        runs = _analytics_runs()
-        enc = _chart_to_base64_png(charts.mttr_trend, runs)
+        enc = _chart_to_base64_png(charts.mttr_trend, _analytics_snapshot())
         if not enc:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
         return ui.div(
@@ -1068,8 +1055,7 @@ def server(input: Any, output: Any, session: Any) -> None:
     def analytics_chart_donut() -> Any:
         if not _CHARTS_AVAILABLE or charts is None:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
-        runs = _analytics_runs()
-        enc = _chart_to_base64_png(charts.violation_donut, runs)
+        enc = _chart_to_base64_png(charts.violation_donut, _analytics_snapshot())
         if not enc:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
         return ui.div(
@@ -1086,8 +1072,7 @@ def server(input: Any, output: Any, session: Any) -> None:
     def analytics_chart_kb() -> Any:
         if not _CHARTS_AVAILABLE or charts is None:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
-        runs = _analytics_runs()
-        enc = _chart_to_base64_png(charts.kb_growth, runs)
+        enc = _chart_to_base64_png(charts.kb_growth, _analytics_snapshot())
         if not enc:
             return ui.div(ui.p("Chart unavailable"), class_="metric-card")
         return ui.div(
@@ -0,0 +1,308 @@
+"""
+Audit analytics — rolling aggregates over agent interaction events and batch runs.
+
+Aggregates are updated as events are recorded (AuditDB.insert) and runs are
+written (audit_log.write_run), so dashboards never re-fetch or re-scan events.
+They cover the same windows the dashboards always showed:
+- the latest ``window`` events (default 50): compliance per (resource_id,
+  violation_type), counts by violation type and severity, MTTR histogram and
+  trend, KB additions per session (calendar day), and the Analytics tab KPIs
+  (event count, MTTR, approval and RAG hit rate)
+- the latest ``kpi_window`` events (default 100): the Intelligence tab's
+  avg MTTR and RAG hit rate (AuditDB.avg_mttr / rag_hit_rate)
+
+Events written by other processes only reach the aggregates when AuditDB
+re-seeds them from the store (``reset``, every few seconds of dashboard use).
+Batch-run summaries cover runs written by this process.
+
+``snapshot()`` returns an immutable AnalyticsSnapshot; it is rebuilt at most
+once per change (cost proportional to the window, not the event history)
+and shared by all readers until the next change.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, NamedTuple
+
+import pandas as pd
+
+SEVERITIES = ("HIGH", "MEDIUM", "LOW", "INFO")
+
+# MTTR histogram bin edges in seconds (last bin is open-ended)
+MTTR_BIN_EDGES: tuple[float, ...] = (0.0, 5.0, 15.0, 30.0, 60.0, 300.0)
+MTTR_BIN_LABELS: tuple[str, ...] = ("0-5s", "5-15s", "15-30s", "30-60s", "60-300s", "300s+")
+
+
+def session_of(timestamp: Any) -> str:
+    """Calendar day of an event timestamp (same rule as charts.kb_growth_data)."""
+    try:
+        return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return str(timestamp)[:10] if timestamp else "unknown"
+
+
+def normalize_severity(value: Any) -> str:
+    severity = str(value if value is not None else "INFO").upper().strip()
+    return severity if severity in SEVERITIES else "INFO"
+
+
+class _Contribution(NamedTuple):
+    """What one event adds to the aggregates (subtracted again on eviction)."""
+
+    timestamp: str
+    cell: tuple[str, str]
+    violation_type: str
+    severity: str
+    compliant: bool
+    session: str
+    mttr: float | None
+    rag_hit: bool
+    approved: bool
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    """Consistent, read-only view of the aggregates (frames must not be mutated)."""
+
+    version: int
+    total_events: int  # folded in since the last reset (not shown on dashboards)
+    heatmap: pd.DataFrame
+    mttr_trend: pd.DataFrame
+    donut: pd.DataFrame
+    kb_growth: pd.DataFrame
+    kb_size: pd.DataFrame
+    mttr_histogram: pd.DataFrame
+    violation_counts: dict[str, int] = field(default_factory=dict)
+    severity_counts: dict[str, int] = field(default_factory=dict)
+    avg_mttr: float = 0.0  # over the ``window`` events, like the other charts
+    rag_hit_rate: float = 0.0
+    approval_rate: float = 0.0
+    recent_events: int = 0  # events in the window ("Total runs" KPI)
+    trend_size: int = 0  # events in the trend window (mttr_trend omits those without MTTR)
+    kpi_avg_mttr: float = 0.0  # over the ``kpi_window`` events
+    kpi_rag_hit_rate: float = 0.0
+    runs: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+class RunAnalytics:
+    """
+    Incrementally maintained dashboard aggregates (thread-safe).
+
+    Args:
+        window: Latest events behind the charts and Analytics KPIs
+        kpi_window: Latest events behind avg_mttr / rag_hit_rate KPIs
+        max_runs: Batch-run summaries kept
+
+    Events are expected roughly oldest first (``reset`` sorts its input);
+    the windows hold the most recently added events.
+    """
+
+    def __init__(self, window: int = 50, kpi_window: int = 100, max_runs: int = 500) -> None:
+        self.window = window
+        self.kpi_window = kpi_window
+        self.refreshed_at: float | None = None  # set by AuditDB when seeded from the store
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: AnalyticsSnapshot | None = None
+        self._runs: deque[dict[str, Any]] = deque(maxlen=max_runs)
+        self._kb_size = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self._total = 0
+        self._events: deque[_Contribution] = deque()
+        self._heat: Counter[tuple[tuple[str, str], bool]] = Counter()  # (cell, compliant) -> n
+        self._violation_counts: Counter[str] = Counter()
+        self._severity_counts: Counter[str] = Counter()
+        self._kb_by_session: Counter[str] = Counter()
+        self._mttr_hist = [0] * len(MTTR_BIN_LABELS)
+        self._mttr_sum = 0.0
+        self._mttr_n = 0
+        self._rag = 0
+        self._approved = 0
+        self._kpi: deque[tuple[float | None, bool]] = deque()
+        self._kpi_mttr_sum = 0.0
+        self._kpi_mttr_n = 0
+        self._kpi_rag = 0
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def add(self, event: dict[str, Any]) -> None:
+        """Fold one agent interaction event into the aggregates."""
+        with self._lock:
+            self._add(event)
+            self._changed()
+
+    def add_many(self, events: list[dict[str, Any]]) -> None:
+        with self._lock:
+            for event in events:
+                self._add(event)
+            self._changed()
+
+    def reset(self, events: list[dict[str, Any]], kb_size: int | None = None) -> None:
+        """Replace the event aggregates with ``events`` (e.g. re-read from the store)."""
+        ordered = sorted(events, key=lambda e: str(e.get("timestamp", "")))
+        with self._lock:
+            self._clear()
+            for event in ordered[-max(self.window, self.kpi_window):]:
+                self._add(event, grow_kb=False)
+            if kb_size is not None:
+                self._kb_size = int(kb_size)
+            self._changed()
+
+    def set_kb_size(self, size: int) -> None:
+        """Current KB size (the KB size series ends here)."""
+        with self._lock:
+            self._kb_size = int(size)
+            self._changed()
+
+    def add_run(self, batch_results: list[dict[str, Any]], run_at: str | None = None) -> None:
+        """Record a batch run summary (as written by audit_log.write_run)."""
+        total = len(batch_results)
+        compliant = sum(
+            1 for r in batch_results
+            if str(r.get("verdict", "")).strip().upper() in ("COMPLIANT", "APPROVED")
+        )
+        mttrs = [float(r["mttr_seconds"]) for r in batch_results if r.get("mttr_seconds") is not None]
+        with self._lock:
+            self._runs.append({
+                "run_at": run_at or datetime.now().isoformat(),
+                "total_resources": total,
+                "compliant_count": compliant,
+                "violation_count": sum(int(r.get("violations", 0) or 0) for r in batch_results),
+                "avg_mttr_seconds": sum(mttrs) / len(mttrs) if mttrs else 0.0,
+                "compliance_rate": compliant / total * 100.0 if total else 0.0,
+            })
+            self._changed()
+
+    def _changed(self) -> None:
+        self._version += 1
+        self._snapshot = None
+
+    def _add(self, event: dict[str, Any], grow_kb: bool = True) -> None:
+        self._total += 1
+        raw_mttr = event.get("mttr_seconds")
+        item = _Contribution(
+            timestamp=str(event.get("timestamp", "")),
+            cell=(str(event.get("resource_id", "")), str(event.get("violation_type", ""))),
+            violation_type=str(event.get("violation_type", "")),
+            severity=normalize_severity(event.get("severity", "INFO")),
+            compliant=bool(event.get("is_compliant", False)),
+            session=session_of(event.get("timestamp", "")),
+            mttr=float(raw_mttr) if raw_mttr is not None else None,
+            rag_hit=event.get("rag_hit") is True,
+            approved=str(event.get("reviewer_verdict", "")).strip().upper() == "APPROVED",
+        )
+        if grow_kb and item.compliant:
+            self._kb_size += 1  # each compliant event stores its fix in the KB
+
+        self._events.append(item)
+        self._fold(item, 1)
+        if len(self._events) > self.window:
+            self._fold(self._events.popleft(), -1)
+
+        self._kpi.append((item.mttr, item.rag_hit))
+        self._fold_kpi(self._kpi[-1], 1)
+        if len(self._kpi) > self.kpi_window:
+            self._fold_kpi(self._kpi.popleft(), -1)
+
+    def _fold(self, item: _Contribution, sign: int) -> None:
+        self._heat[(item.cell, item.compliant)] += sign
+        self._violation_counts[item.violation_type] += sign
+        self._severity_counts[item.severity] += sign
+        if item.compliant:
+            self._kb_by_session[item.session] += sign
+        if item.mttr is not None:
+            self._mttr_hist[max(0, bisect.bisect_right(MTTR_BIN_EDGES, item.mttr) - 1)] += sign
+            self._mttr_sum += sign * item.mttr
+            self._mttr_n += sign
+        self._rag += sign * item.rag_hit
+        self._approved += sign * item.approved
+
+    def _fold_kpi(self, item: tuple[float | None, bool], sign: int) -> None:
+        mttr, rag_hit = item
+        if mttr is not None:
+            self._kpi_mttr_sum += sign * mttr
+            self._kpi_mttr_n += sign
+        self._kpi_rag += sign * rag_hit
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> AnalyticsSnapshot:
+        """Current aggregates; the same object is returned until the next update."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._build()
+            return self._snapshot
+
+    def _build(self) -> AnalyticsSnapshot:
+        cells: dict[tuple[str, str], list[int]] = {}  # cell -> [compliant, total]
+        for (cell, compliant), n in self._heat.items():
+            if n > 0:
+                counts = cells.setdefault(cell, [0, 0])
+                counts[0] += n if compliant else 0
+                counts[1] += n
+        heatmap = pd.DataFrame(
+            [
+                {
+                    "resource_id": rid,
+                    "violation_type": vtype,
+                    "status": "compliant" if ok == n else "violation" if ok == 0 else "mixed",
+                    "run_count": n,
+                }
+                for (rid, vtype), (ok, n) in cells.items()
+            ],
+            columns=["resource_id", "violation_type", "status", "run_count"],
+        )
+        trend = sorted(self._events, key=lambda e: e.timestamp)
+        mttr_trend = pd.DataFrame(
+            [
+                {"run_index": i + 1, "mttr_seconds": e.mttr, "timestamp": e.timestamp}
+                for i, e in enumerate(trend)
+                if e.mttr is not None
+            ],
+            columns=["run_index", "mttr_seconds", "timestamp"],
+        )
+        donut = pd.DataFrame(
+            [{"severity": s, "count": self._severity_counts[s]} for s in SEVERITIES if self._severity_counts[s] > 0],
+            columns=["severity", "count"],
+        )
+        sessions = sorted((s, c) for s, c in self._kb_by_session.items() if c > 0)
+        kb_growth = pd.DataFrame(
+            [{"session": s, "kb_added": c} for s, c in sessions], columns=["session", "kb_added"]
+        )
+        size = max(0, self._kb_size - sum(c for _, c in sessions))
+        kb_rows = []
+        for s, c in sessions:
+            size += c
+            kb_rows.append({"session": s, "kb_size": size})
+        recent = len(self._events)
+        kpi = len(self._kpi)
+        return AnalyticsSnapshot(
+            version=self._version,
+            total_events=self._total,
+            heatmap=heatmap,
+            mttr_trend=mttr_trend,
+            donut=donut,
+            kb_growth=kb_growth,
+            kb_size=pd.DataFrame(kb_rows, columns=["session", "kb_size"]),
+            mttr_histogram=pd.DataFrame({"bin": list(MTTR_BIN_LABELS), "count": list(self._mttr_hist)}),
+            violation_counts={k: v for k, v in self._violation_counts.items() if v > 0},
+            severity_counts={s: self._severity_counts[s] for s in SEVERITIES},
+            avg_mttr=self._mttr_sum / self._mttr_n if self._mttr_n else 0.0,
+            rag_hit_rate=self._rag / recent if recent else 0.0,
+            approval_rate=self._approved / recent if recent else 0.0,
+            recent_events=recent,
+            trend_size=recent,
+            kpi_avg_mttr=self._kpi_mttr_sum / self._kpi_mttr_n if self._kpi_mttr_n else 0.0,
+            kpi_rag_hit_rate=self._kpi_rag / kpi if kpi else 0.0,
+            runs=pd.DataFrame(list(self._runs)),
+        )
+
+
+# Shared aggregates for AuditDB.insert and audit_log.write_run
+analytics: RunAnalytics = RunAnalytics()
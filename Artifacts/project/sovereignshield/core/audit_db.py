@@ -3,15 +3,22 @@ Audit database — Supabase-backed agent_interactions with local fallback.
 Schema matches: task_id, timestamp, violation_type, resource_id, planner_output,
 worker_output, reviewer_verdict, reviewer_notes, is_compliant, mttr_seconds,
 tokens_used, rag_hit.
+Every insert also updates the rolling dashboard aggregates (core.analytics),
+which are re-seeded from the latest stored events every
+ANALYTICS_REFRESH_SECONDS so other processes' events show up too.
 """
 from __future__ import annotations
 
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
 from dotenv import load_dotenv
 
+from .analytics import AnalyticsSnapshot, RunAnalytics, analytics
+
 _path = Path(__file__).resolve()
 _pkg = _path.parents[1]
 _env_candidates: list[Path] = [_pkg / ".env"]
@@ -48,6 +55,15 @@ except Exception:
 _TABLE = "agent_interactions"
 _LOCAL_EVENTS: list[dict[str, Any]] = []
 
+# Last scan verdict per resource fingerprint (core.incremental), oldest first
+_LOCAL_VERDICTS: dict[str, dict[str, Any]] = {}
+_MAX_LOCAL_VERDICTS = 100_000
+
+# Aggregates are re-seeded from the store at most this often (picks up events
+# written by other processes) and updated on every insert in between
+ANALYTICS_REFRESH_SECONDS = float(os.environ.get("SOVEREIGNSHIELD_ANALYTICS_REFRESH_SECONDS", "30"))
+_analytics_lock = threading.Lock()
+
 # Seed events for local fallback when Supabase unavailable
 _SEED_EVENTS: list[dict[str, Any]] = [
     {
@@ -70,13 +86,42 @@ _SEED_EVENTS: list[dict[str, Any]] = [
 class AuditDB:
     """Supabase-backed audit store with local fallback."""
 
+    def __init__(self, analytics_store: RunAnalytics | None = None) -> None:
+        self.analytics = analytics_store or analytics
+
     @property
     def is_connected(self) -> bool:
         """True if Supabase client is available and configured."""
         return _SUPABASE_AVAILABLE and _client is not None
 
+    def _ensure_analytics(self) -> None:
+        """(Re-)seed the aggregates from the latest stored events when stale."""
+        def fresh() -> bool:
+            refreshed_at = self.analytics.refreshed_at
+            return refreshed_at is not None and time.monotonic() - refreshed_at < ANALYTICS_REFRESH_SECONDS
+
+        if fresh():
+            return
+        with _analytics_lock:
+            if fresh():
+                return
+            history = self.fetch_recent(max(self.analytics.window, self.analytics.kpi_window))
+            try:
+                kb_size: int | None = self.kb_count()
+            except Exception:
+                kb_size = None
+            self.analytics.reset(history, kb_size=kb_size)
+            self.analytics.refreshed_at = time.monotonic()
+
+    def analytics_snapshot(self) -> AnalyticsSnapshot:
+        """Pre-aggregated dashboard data (cached until the next insert or refresh)."""
+        self._ensure_analytics()
+        return self.analytics.snapshot()
+
     def insert(self, event: dict[str, Any]) -> bool:
         """Insert agent interaction event. Returns True if persisted to Supabase."""
+        self._ensure_analytics()
+        self.analytics.add(event)
         if _SUPABASE_AVAILABLE and _client is not None:
             try:
                 row = {
@@ -121,18 +166,24 @@ class AuditDB:
         return combined[:limit]
 
     def avg_mttr(self) -> float:
-        """Average MTTR in seconds. 0 if no data."""
-        events = self.fetch_recent(100)
-        vals = [float(e.get("mttr_seconds", 0)) for e in events if e.get("mttr_seconds") is not None]
-        return sum(vals) / len(vals) if vals else 0.0
+        """Average MTTR in seconds over the last 100 events. 0 if no data."""
+        return self.analytics_snapshot().kpi_avg_mttr
 
     def rag_hit_rate(self) -> float:
-        """Fraction of events with rag_hit=True. 0 if no data."""
-        events = self.fetch_recent(100)
-        if not events:
-            return 0.0
-        hits = sum(1 for e in events if e.get("rag_hit") is True)
-        return hits / len(events)
+        """Fraction of the last 100 events with rag_hit=True. 0 if no data."""
+        return self.analytics_snapshot().kpi_rag_hit_rate
+
+    def fetch_verdicts(self, fingerprints: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Stored scan verdicts for the given resource fingerprints (local store)."""
+        return {fp: _LOCAL_VERDICTS[fp] for fp in fingerprints if fp in _LOCAL_VERDICTS}
+
+    def store_verdicts(self, records: dict[str, dict[str, Any]]) -> None:
+        """Store scan verdicts by resource fingerprint; evicts the oldest past the cap."""
+        for fp, record in records.items():
+            _LOCAL_VERDICTS.pop(fp, None)
+            _LOCAL_VERDICTS[fp] = record
+        while len(_LOCAL_VERDICTS) > _MAX_LOCAL_VERDICTS:
+            del _LOCAL_VERDICTS[next(iter(_LOCAL_VERDICTS))]
 
     def kb_count(self) -> int:
         """RAG knowledge base document count."""
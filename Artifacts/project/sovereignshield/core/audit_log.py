@@ -2,6 +2,7 @@
 Audit log — Supabase-backed audit_runs and audit_results for batch remediation history.
 Sprint 6: Persist every batch run and individual resource verdict for compliance trending.
 Uses same Sovereign project (SUPABASE_URL, SUPABASE_ANON_KEY) as audit_db.
+Written runs are also folded into the rolling run aggregates (core.analytics).
 """
 from __future__ import annotations
 
@@ -11,6 +12,8 @@ from typing import Any
 
 from dotenv import load_dotenv
 
+from .analytics import analytics
+
 _path = Path(__file__).resolve()
 _pkg = _path.parents[1]
 _env_candidates: list[Path] = [_pkg / ".env"]
@@ -100,6 +103,7 @@ def write_run(
             })
         if result_rows:
             _client.table(_TABLE_RESULTS).insert(result_rows).execute()
+        analytics.add_run(batch_results, run_at=resp.data[0].get("run_at"))
         return str(run_id)
     except Exception:
         return None
@@ -1,6 +1,8 @@
 """
 SovereignShield chart generation — plotnine-based visualizations for compliance analytics.
 Data helpers and ggplot builders for heatmap, MTTR trend, violation donut, KB growth.
+Each accepts a list of audit events or a pre-aggregated AnalyticsSnapshot
+(core.analytics); snapshots are read directly instead of re-scanning events.
 """
 from __future__ import annotations
 
@@ -9,13 +11,20 @@ from typing import Any
 
 import pandas as pd
 
-def heatmap_data(runs: list[dict[str, Any]]) -> pd.DataFrame:
+from .analytics import AnalyticsSnapshot
+
+Runs = list[dict[str, Any]] | AnalyticsSnapshot
+
+
+def heatmap_data(runs: Runs) -> pd.DataFrame:
     """
     Build resource × policy compliance matrix for heatmap.
     Returns DataFrame with columns: resource_id, violation_type, status, run_count.
     status is one of 'compliant', 'violation', 'mixed'.
     Uses most recent run per (resource_id, violation_type) for status.
     """
+    if isinstance(runs, AnalyticsSnapshot):
+        return runs.heatmap
     if not runs:
         return pd.DataFrame(columns=["resource_id", "violation_type", "status", "run_count"])
 
@@ -48,12 +57,18 @@ def heatmap_data(runs: list[dict[str, Any]]) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def mttr_trend_data(runs: list[dict[str, Any]], limit: int = 20) -> pd.DataFrame:
+def mttr_trend_data(runs: Runs, limit: int = 20) -> pd.DataFrame:
     """
     Build MTTR trend data for line chart.
     Returns DataFrame with columns: run_index, mttr_seconds, timestamp.
     Sorted chronologically (oldest first) for plotting.
     """
+    if isinstance(runs, AnalyticsSnapshot):
+        offset = max(0, runs.trend_size - limit)
+        data = runs.mttr_trend
+        if offset:
+            data = data[data["run_index"] > offset].assign(run_index=lambda d: d["run_index"] - offset)
+        return data.reset_index(drop=True)
     if not runs:
         return pd.DataFrame(columns=["run_index", "mttr_seconds", "timestamp"])
 
@@ -77,12 +92,14 @@ def mttr_trend_data(runs: list[dict[str, Any]], limit: int = 20) -> pd.DataFrame
     return pd.DataFrame(rows)
 
 
-def donut_data(runs: list[dict[str, Any]]) -> pd.DataFrame:
+def donut_data(runs: Runs) -> pd.DataFrame:
     """
     Build severity counts for violation donut chart.
     Returns DataFrame with columns: severity, count.
     Severity normalized to HIGH, MEDIUM, LOW, INFO; unknown -> INFO.
     """
+    if isinstance(runs, AnalyticsSnapshot):
+        return runs.donut
     if not runs:
         return pd.DataFrame(columns=["severity", "count"])
 
@@ -102,13 +119,15 @@ def donut_data(runs: list[dict[str, Any]]) -> pd.DataFrame:
     )
 
 
-def kb_growth_data(runs: list[dict[str, Any]]) -> pd.DataFrame:
+def kb_growth_data(runs: Runs) -> pd.DataFrame:
     """
     Build KB entries added per session for bar chart.
     Session = calendar day (from timestamp).
     KB entries = runs where is_compliant=True (each triggers embed_and_store).
     Returns DataFrame with columns: session, kb_added.
     """
+    if isinstance(runs, AnalyticsSnapshot):
+        return runs.kb_growth
     if not runs:
         return pd.DataFrame(columns=["session", "kb_added"])
 
@@ -128,7 +147,7 @@ def kb_growth_data(runs: list[dict[str, Any]]) -> pd.DataFrame:
     return pd.DataFrame(rows, columns=["session", "kb_added"])
 
 
-def compliance_heatmap(runs: list[dict[str, Any]]) -> Any:
+def compliance_heatmap(runs: Runs) -> Any:
     """
     Plot compliance heatmap: resource × policy matrix, red/amber/green cells.
     Returns plotnine ggplot object.
@@ -147,7 +166,8 @@ def compliance_heatmap(runs: list[dict[str, Any]]) -> Any:
 
     color_map = {"compliant": "#28a745", "violation": "#dc3545", "mixed": "#ffc107"}
     fill_order = ["compliant", "violation", "mixed"]
-    data["status"] = pd.Categorical(data["status"], categories=fill_order, ordered=True)
+    # assign() copies: snapshot frames are shared and must not be mutated
+    data = data.assign(status=pd.Categorical(data["status"], categories=fill_order, ordered=True))
 
     p = (
         ggplot(data, aes(x="resource_id", y="violation_type", fill="status"))
@@ -158,7 +178,7 @@ def compliance_heatmap(runs: list[dict[str, Any]]) -> Any:
     return p
 
 
-def mttr_trend(runs: list[dict[str, Any]], limit: int = 20) -> Any:
+def mttr_trend(runs: Runs, limit: int = 20) -> Any:
     """
     Plot MTTR trend line chart over last N runs.
     Returns plotnine ggplot object.
@@ -178,7 +198,7 @@ def mttr_trend(runs: list[dict[str, Any]], limit: int = 20) -> Any:
     return p
 
 
-def violation_donut(runs: list[dict[str, Any]]) -> Any:
+def violation_donut(runs: Runs) -> Any:
     """
     Plot violation breakdown donut: HIGH/MEDIUM/LOW counts.
     Returns plotnine ggplot object.
@@ -201,7 +221,7 @@ def violation_donut(runs: list[dict[str, Any]]) -> Any:
     return p
 
 
-def kb_growth(runs: list[dict[str, Any]]) -> Any:
+def kb_growth(runs: Runs) -> Any:
     """
     Plot KB entries added per session as bar chart.
     Returns plotnine ggplot object.
@@ -0,0 +1,206 @@
+"""
+Incremental compliance scanning — re-evaluates only new or changed resources.
+
+Each normalized resource is fingerprinted (SHA-256 of its canonical JSON
+plus the policy hash) and the last verdict per fingerprint is kept in the
+audit store (AuditDB.fetch_verdicts / store_verdicts). A scan evaluates,
+and optionally remediates, only resources whose fingerprint is unknown;
+the rest are carried forward, so the report still covers every resource.
+Verdicts containing engine errors (``opa_error``) are reported but never
+stored, so those resources are evaluated again on the next scan.
+Changing the policy text changes every fingerprint, forcing a full scan.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Literal, Protocol
+
+from .opa_eval import _DEFAULT_POLICY, _normalize_resource, evaluate
+from .tfstate import ResourceTable
+
+# violation_type opa_eval reports when the engine failed for a resource
+_ENGINE_ERROR = "opa_error"
+
+
+class VerdictStore(Protocol):
+    """Fingerprint → verdict store (implemented by core.audit_db.AuditDB)."""
+
+    def fetch_verdicts(self, fingerprints: Any) -> dict[str, dict[str, Any]]: ...
+
+    def store_verdicts(self, records: dict[str, dict[str, Any]]) -> None: ...
+
+
+def policy_hash(policy: str | None = None) -> str:
+    """SHA-256 of the policy text (default policy when None)."""
+    return hashlib.sha256((policy or _DEFAULT_POLICY).encode("utf-8")).hexdigest()
+
+
+def resource_fingerprint(resource: dict[str, Any], policy_digest: str) -> str:
+    """Fingerprint of a normalized resource under a policy (key order independent)."""
+    canonical = json.dumps(
+        _normalize_resource(resource), sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(f"{policy_digest}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def _remediation_summary(outcome: Any) -> dict[str, Any]:
+    """Storable summary of a remediation outcome (RemediationOutcome or dict)."""
+    if isinstance(outcome, dict):
+        return dict(outcome)
+    violation = getattr(outcome, "violation", None) or {}
+    plan = getattr(outcome, "plan", None)
+    result = getattr(outcome, "result", None)
+    return {
+        "violation_type": str(violation.get("violation_type", "")),
+        "task_id": getattr(plan, "task_id", None),
+        "verdict": getattr(result, "verdict", None),
+        "is_compliant": bool(getattr(result, "is_compliant", False)),
+        "error": getattr(outcome, "error", None),
+    }
+
+
+@dataclass
+class ScanReport:
+    """Full scan result; ``carried_forward`` resources were not re-evaluated."""
+
+    violations: list[dict[str, Any]]
+    remediations: dict[str, list[dict[str, Any]]]
+    evaluated: list[str]
+    carried_forward: list[str]
+    fingerprints: dict[str, str] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    time_saved_seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "resources": len(self.evaluated) + len(self.carried_forward),
+            "evaluated": len(self.evaluated),
+            "carried_forward": len(self.carried_forward),
+            "violations": len(self.violations),
+            "elapsed_seconds": round(self.elapsed_seconds, 4),
+            "time_saved_seconds": round(self.time_saved_seconds, 4),
+        }
+
+
+class IncrementalScanner:
+    """
+    Diff-aware scan over resources.
+
+    Args:
+        store: Verdict store (e.g. core.audit_db.db)
+        engine: opa_eval.evaluate engine
+        remediate: Optional callable taking the new violations and returning
+            one outcome per violation (e.g. RemediationPipeline.run); only
+            violations of new or changed resources are passed
+    """
+
+    def __init__(
+        self,
+        store: VerdictStore,
+        engine: Literal["auto", "builtin", "opa", "subprocess"] = "auto",
+        remediate: Callable[[list[dict[str, Any]]], list[Any]] | None = None,
+    ) -> None:
+        self.store = store
+        self.engine = engine
+        self.remediate = remediate
+
+    def scan(
+        self,
+        resources: list[dict[str, Any]] | ResourceTable,
+        policy: str | None = None,
+        full: bool = False,
+    ) -> ScanReport:
+        """
+        Scan resources, evaluating only those without a stored verdict.
+
+        Args:
+            resources: Resource dicts or a ResourceTable
+            policy: Rego policy text (default policy when None)
+            full: Ignore stored verdicts and evaluate everything
+
+        Returns:
+            ScanReport covering every resource, in input order
+        """
+        t0 = time.perf_counter()
+        records = resources.to_records() if isinstance(resources, ResourceTable) else [
+            _normalize_resource(r) for r in resources
+        ]
+        digest = policy_hash(policy)
+        fingerprints = [resource_fingerprint(r, digest) for r in records]
+        stored = {} if full else self.store.fetch_verdicts(set(fingerprints))
+        changed = [i for i, fp in enumerate(fingerprints) if fp not in stored]
+
+        # Evaluate (and remediate) only new or changed resources
+        t_eval = time.perf_counter()
+        new_violations = (
+            evaluate([records[i] for i in changed], policy=policy, engine=self.engine) if changed else []
+        )
+        eval_seconds = time.perf_counter() - t_eval
+        by_resource: dict[str, list[dict[str, Any]]] = {}
+        for v in new_violations:
+            by_resource.setdefault(str(v.get("resource_id", "")), []).append(v)
+
+        remediations: dict[str, list[dict[str, Any]]] = {}
+        remediate_seconds = 0.0
+        if self.remediate is not None and new_violations:
+            t_fix = time.perf_counter()
+            outcomes = self.remediate([dict(v) for v in new_violations])
+            remediate_seconds = time.perf_counter() - t_fix
+            for v, outcome in zip(new_violations, outcomes):
+                remediations.setdefault(str(v.get("resource_id", "")), []).append(_remediation_summary(outcome))
+
+        scanned_at = datetime.now().isoformat()
+        eval_share = eval_seconds / len(changed) if changed else 0.0
+        fix_share = remediate_seconds / len(new_violations) if new_violations else 0.0
+        new_records: dict[str, dict[str, Any]] = {}
+        for i in changed:
+            rid = str(records[i].get("resource_id", "unknown"))
+            found = by_resource.get(rid, [])
+            new_records[fingerprints[i]] = {
+                "resource_id": rid,
+                "violations": found,
+                "remediations": remediations.get(rid, []),
+                # What re-scanning this resource costs; summed into time saved
+                "cost_seconds": eval_share + fix_share * len(found),
+                "scanned_at": scanned_at,
+            }
+        # An engine error is not a verdict: keep it out of the store so the
+        # resource is re-evaluated next scan instead of carried forward
+        storable = {
+            fp: record for fp, record in new_records.items()
+            if not any(v.get("violation_type") == _ENGINE_ERROR for v in record["violations"])
+        }
+        if storable:
+            self.store.store_verdicts(storable)
+
+        # Full report: fresh results for changed resources, stored ones for the rest
+        violations: list[dict[str, Any]] = []
+        all_remediations: dict[str, list[dict[str, Any]]] = {}
+        evaluated: list[str] = []
+        carried: list[str] = []
+        saved = 0.0
+        for fp in fingerprints:
+            record = new_records.get(fp)
+            if record is None:
+                record = stored[fp]
+                carried.append(record["resource_id"])
+                saved += float(record.get("cost_seconds", 0.0))
+            else:
+                evaluated.append(record["resource_id"])
+            violations.extend(dict(v) for v in record["violations"])
+            if record.get("remediations"):
+                all_remediations[record["resource_id"]] = [dict(r) for r in record["remediations"]]
+
+        return ScanReport(
+            violations=violations,
+            remediations=all_remediations,
+            evaluated=evaluated,
+            carried_forward=carried,
+            fingerprints={str(r.get("resource_id", "unknown")): fp for r, fp in zip(records, fingerprints)},
+            elapsed_seconds=time.perf_counter() - t0,
+            time_saved_seconds=saved,
+        )
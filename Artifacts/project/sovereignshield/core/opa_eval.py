@@ -1,11 +1,24 @@
-"""OPA policy evaluation — evaluates resources against compliance rules via real OPA binary."""
+"""
+OPA policy evaluation — evaluates resources against compliance rules.
+
+Engines (``evaluate(..., engine=...)``):
+- builtin: in-process evaluator for _DEFAULT_POLICY, vectorized over a
+  resource table (no OPA binary needed)
+- opa: one ``opa eval`` over the whole input array (policy compiled once)
+- subprocess: one ``opa eval`` per resource (original path, kept for parity)
+- auto (default): builtin for the default policy, opa for custom policies
+"""
 from __future__ import annotations
 
 import json
 import os
 import subprocess
 import tempfile
-from typing import Any
+from typing import Any, Literal
+
+import numpy as np
+
+from .tfstate import ResourceTable
 
 _DEFAULT_POLICY = """package sovereignshield.compliance
 
@@ -142,28 +155,181 @@ def _eval_single_resource(resource: dict[str, Any], policy: str) -> list[str]:
         return [str(x) for x in raw]
 
 
+def _opa_error_dict(resource_id: str, vstr: str) -> dict[str, Any]:
+    return {
+        "resource_id": resource_id,
+        "violation_type": "opa_error",
+        "severity": "HIGH",
+        "regulation_cited": "",
+        "detail": vstr,
+    }
+
+
+def _to_violation_dicts(resource_id: str, raw_violations: list[str]) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    for vstr in raw_violations:
+        if vstr.startswith("OPA error:") or vstr.startswith("OPA parse error:"):
+            out.append(_opa_error_dict(resource_id, vstr))
+        else:
+            out.append(_violation_str_to_dict(resource_id, vstr))
+    return out
+
+
+# ── Batched OPA (one process for all resources) ──────────────────────────────
+
+# Evaluates the policy once per input element; keys are array indexes
+_BATCH_QUERY = (
+    "{i: vs | some i; r := input[i]; "
+    "vs := data.sovereignshield.compliance.violation with input as r}"
+)
+
+
+def _eval_batch_opa(resources: list[dict[str, Any]], policy: str) -> list[list[str]]:
+    """Run one OPA eval over all (normalized) resources. Returns violation strings per resource."""
+    if not resources:
+        return []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        policy_path = os.path.join(tmpdir, "policy.rego")
+        with open(policy_path, "w") as f:
+            f.write(policy)
+
+        input_path = os.path.join(tmpdir, "input.json")
+        with open(input_path, "w") as f:
+            json.dump(resources, f)
+
+        result = subprocess.run(
+            ["opa", "eval", "-d", policy_path, "-i", input_path, _BATCH_QUERY],
+            capture_output=True,
+            text=True,
+            timeout=10 + len(resources) // 1000,
+        )
+
+    if result.returncode != 0:
+        return [[f"OPA error: {result.stderr.strip()}"]] * len(resources)
+    try:
+        output = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return [[f"OPA parse error: {result.stdout[:200]}"]] * len(resources)
+
+    value = output.get("result", [{}])[0].get("expressions", [{}])[0].get("value", {})
+    if not isinstance(value, dict):
+        return [[] for _ in resources]
+    return [[str(x) for x in value.get(str(i), []) or []] for i in range(len(resources))]
+
+
+# ── Builtin evaluator for _DEFAULT_POLICY ─────────────────────────────────────
+
+_APPROVED_REGIONS = ("us-east-1", "us-gov-east-1")
+
+# Rules in the order OPA returns them (violation set sorted by string)
+_DEFAULT_RULES: tuple[tuple[str, str], ...] = (
+    ("approved_regions", "Approved regions: us-east-1, us-gov-east-1"),
+    ("cmk_encryption", "CMK encryption (aws:kms) required"),
+    ("data_residency", "data residency / region constraint"),
+    ("is_public", "is_public must be False"),
+    ("phi_tag", "DataClass=PHI tag on all resources"),
+)
+
+# Rego equality is type-strict: only JSON booleans satisfy `== true/false`
+_is_bool = np.frompyfunc(lambda v: isinstance(v, (bool, np.bool_)), 1, 1)
+
+
+def _default_policy_passes(
+    region: list[Any],
+    encryption_enabled: list[Any],
+    is_public: list[Any],
+    tags: list[Any],
+) -> np.ndarray:
+    """Boolean (n_resources, len(_DEFAULT_RULES)) matrix: True where the rule passes."""
+    n = len(region)
+    if not n:
+        return np.zeros((0, len(_DEFAULT_RULES)), dtype=bool)
+    regions = np.empty(n, dtype=object)
+    encryption = np.empty(n, dtype=object)
+    public = np.empty(n, dtype=object)
+    data_class = np.empty(n, dtype=object)
+    regions[:] = region
+    encryption[:] = encryption_enabled
+    public[:] = is_public
+    data_class[:] = [t.get("DataClass") if isinstance(t, dict) else None for t in tags]
+
+    region_ok = np.zeros(n, dtype=bool)
+    for approved in _APPROVED_REGIONS:
+        region_ok |= (regions == approved).astype(bool)
+    return np.column_stack([
+        region_ok,
+        _is_bool(encryption).astype(bool) & (encryption == True).astype(bool),  # noqa: E712
+        (regions != "").astype(bool) & region_ok,
+        _is_bool(public).astype(bool) & (public == False).astype(bool),  # noqa: E712
+        (data_class == "PHI").astype(bool),
+    ])
+
+
+def _eval_builtin(resources: list[dict[str, Any]] | ResourceTable) -> list[dict[str, Any]]:
+    """Evaluate _DEFAULT_POLICY in process. Same output as the OPA engines."""
+    if isinstance(resources, ResourceTable):
+        ids = resources.resource_id
+        passes = _default_policy_passes(
+            resources.region, resources.encryption_enabled, resources.is_public, resources.tags
+        )
+    else:
+        ids = [str(r.get("resource_id", "unknown")) for r in resources]
+        passes = _default_policy_passes(
+            [r["region"] for r in resources],
+            [r["encryption_enabled"] for r in resources],
+            [r["is_public"] for r in resources],
+            [r["tags"] for r in resources],
+        )
+    rows, cols = np.nonzero(~passes)  # row-major: resource order, then rule order
+    violations: list[dict[str, Any]] = []
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        rid = ids[row]
+        vtype, msg = _DEFAULT_RULES[col]
+        violations.append({
+            "resource_id": rid,
+            "violation_type": vtype,
+            "severity": "HIGH",
+            "regulation_cited": _REGULATION_MAP.get(vtype, ""),
+            "detail": f"{vtype} for {rid}: {msg}",
+        })
+    return violations
+
+
 def evaluate(
-    resources: list[dict[str, Any]],
+    resources: list[dict[str, Any]] | ResourceTable,
     policy: str | None = None,
+    engine: Literal["auto", "builtin", "opa", "subprocess"] = "auto",
 ) -> list[dict[str, Any]]:
-    """Evaluate resources against OPA policies. Returns list of violations (dicts)."""
+    """
+    Evaluate resources against OPA policies. Returns list of violations (dicts).
+
+    All engines return violations in resource order, each resource's
+    violations sorted as OPA sorts the violation set. A ResourceTable
+    (core.tfstate) is evaluated from its columns by the builtin engine.
+    """
     policy_text = policy or _DEFAULT_POLICY
+    if engine == "auto":
+        engine = "builtin" if policy_text == _DEFAULT_POLICY else "opa"
+    if engine == "builtin" and policy_text != _DEFAULT_POLICY:
+        raise ValueError("builtin engine only implements the default policy")
+
+    if isinstance(resources, ResourceTable):
+        if engine == "builtin":
+            return _eval_builtin(resources)
+        resources = resources.to_records()
+    normalized = [_normalize_resource(r) for r in resources]
+    if engine == "builtin":
+        return _eval_builtin(normalized)
+
+    if engine == "opa":
+        per_resource = _eval_batch_opa(normalized, policy_text)
+    elif engine == "subprocess":
+        per_resource = [_eval_single_resource(r, policy_text) for r in normalized]
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
     violations: list[dict[str, Any]] = []
-    for r in resources:
-        resource_dict = _normalize_resource(r)
+    for resource_dict, raw_violations in zip(normalized, per_resource):
         rid = str(resource_dict.get("resource_id", "unknown"))
-        raw_violations = _eval_single_resource(resource_dict, policy_text)
-        for vstr in raw_violations:
-            if vstr.startswith("OPA error:") or vstr.startswith("OPA parse error:"):
-                violations.append(
-                    {
-                        "resource_id": rid,
-                        "violation_type": "opa_error",
-                        "severity": "HIGH",
-                        "regulation_cited": "",
-                        "detail": vstr,
-                    }
-                )
-            else:
-                violations.append(_violation_str_to_dict(rid, vstr))
+        violations.extend(_to_violation_dicts(rid, raw_violations))
     return violations
@@ -0,0 +1,360 @@
+"""
+Terraform state parsing — streams .tfstate files into a columnar resource table.
+
+- The state JSON is read incrementally: resources are decoded one at a time
+  (ijson when installed, else chunked json.JSONDecoder.raw_decode), so the
+  parsed document is never held in memory; memory grows with the table only
+- Every instance of every resource is a row, in root and child modules
+  (count/for_each instances get an ``[index_key]`` suffix, module resources a
+  ``module.<name>.`` prefix); data sources are skipped
+- Parsed tables are cached by file content hash (SHA-256)
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import pandas as pd
+
+try:
+    import ijson
+    _IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    _IJSON_AVAILABLE = False
+
+CHUNK_SIZE = 1 << 20  # 1 MiB reads
+CACHE_SIZE = 8
+DEFAULT_REGION = "us-east-1"
+
+_AZ_REGION_RE = re.compile(r"^([a-z]+-[a-z]+-\d+)")
+_TF_RESOURCE_RE = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{', re.MULTILINE)
+_PUBLIC_ACLS = frozenset({"public-read", "public-read-write", "authenticated-read"})
+
+
+# ── Resource table ────────────────────────────────────────────────────────────
+
+
+@dataclass
+class ResourceTable:
+    """Normalized resources as columns (one row per resource instance)."""
+
+    resource_id: list[str] = field(default_factory=list)
+    resource_type: list[str] = field(default_factory=list)
+    type: list[str] = field(default_factory=list)
+    region: list[str] = field(default_factory=list)
+    encryption_enabled: list[bool] = field(default_factory=list)
+    is_public: list[bool] = field(default_factory=list)
+    tags: list[dict[str, str]] = field(default_factory=list)
+
+    COLUMNS = ("resource_id", "resource_type", "type", "region", "encryption_enabled", "is_public", "tags")
+
+    def __post_init__(self) -> None:
+        # Repeated strings (types, regions) are stored once
+        self._interned: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.resource_id)
+
+    def append(self, row: dict[str, Any]) -> None:
+        intern = self._interned.setdefault
+        self.resource_id.append(str(row.get("resource_id", "")))
+        resource_type = str(row.get("resource_type", ""))
+        self.resource_type.append(intern(resource_type, resource_type))
+        short_type = str(row.get("type", ""))
+        self.type.append(intern(short_type, short_type))
+        region = str(row.get("region", ""))
+        self.region.append(intern(region, region))
+        self.encryption_enabled.append(bool(row.get("encryption_enabled", False)))
+        self.is_public.append(bool(row.get("is_public", False)))
+        tags = row.get("tags") or {}
+        self.tags.append(tags if isinstance(tags, dict) else {})
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, Any]]) -> ResourceTable:
+        table = cls()
+        for row in records:
+            table.append(row)
+        return table
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """Row dicts as consumed by the app and opa_eval.evaluate."""
+        return [
+            {
+                "resource_id": rid,
+                "resource_type": rtype,
+                "region": region,
+                "type": short_type,
+                "encryption_enabled": enc,
+                "is_public": public,
+                "tags": dict(tags),
+            }
+            for rid, rtype, short_type, region, enc, public, tags in zip(
+                self.resource_id, self.resource_type, self.type, self.region,
+                self.encryption_enabled, self.is_public, self.tags,
+            )
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame with one column per table column (tags as dicts)."""
+        return pd.DataFrame({name: getattr(self, name) for name in self.COLUMNS})
+
+
+# ── Streaming JSON ────────────────────────────────────────────────────────────
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Decodes JSON values one at a time from a text file, buffering only what is needed."""
+
+    def __init__(self, fp: io.TextIOBase, chunk_size: int = CHUNK_SIZE) -> None:
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int) -> None:
+        # Drop consumed text so the buffer never exceeds a chunk plus one value
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        data = self.fp.read(size)
+        if not data:
+            self.eof = True
+        self.buf += data
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+            self._fill(self.chunk_size)
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in Terraform state, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number ending at the buffer edge may continue in the next read
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+
+def _iter_resources_stdlib(fp: io.TextIOBase, chunk_size: int) -> Iterator[dict[str, Any]]:
+    stream = _JsonStream(fp, chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key == "resources" and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                while True:
+                    item = stream.value()
+                    if isinstance(item, dict):
+                        yield item
+                    sep = stream.peek()
+                    stream.pos += 1
+                    if sep == "]":
+                        break
+                    if sep != ",":
+                        raise ValueError(f"Expected ',' or ']' in resources, found {sep!r}")
+        else:
+            stream.value()  # outputs, check_results, ... (not needed)
+        sep = stream.peek()
+        stream.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"Expected ',' or '}}' in Terraform state, found {sep!r}")
+
+
+def iter_state_resources(path: str | Path, chunk_size: int = CHUNK_SIZE) -> Iterator[dict[str, Any]]:
+    """Yield each entry of a .tfstate ``resources`` array without loading the file."""
+    if _IJSON_AVAILABLE:
+        with open(path, "rb") as fp:
+            yield from ijson.items(fp, "resources.item", use_float=True)
+        return
+    with open(path, encoding="utf-8") as fp:
+        yield from _iter_resources_stdlib(fp, chunk_size)
+
+
+# ── Normalization ─────────────────────────────────────────────────────────────
+
+
+def _base_resource_id(res_type: str, res_name: str) -> str:
+    if res_type and res_name:
+        return f"{res_type}-{res_name}".replace("aws_", "").replace("_", "-")
+    return res_name or res_type
+
+
+def _short_type(res_type: str) -> str:
+    return res_type.split("_")[-1] if "_" in res_type else res_type
+
+
+def _region(attrs: dict[str, Any]) -> str:
+    region = str(attrs.get("region") or attrs.get("region_name") or "")
+    if not region and attrs.get("availability_zone"):
+        match = _AZ_REGION_RE.match(str(attrs["availability_zone"]))
+        region = match.group(1) if match else DEFAULT_REGION
+    return region or DEFAULT_REGION
+
+
+def _contains_key_value(value: Any, keys: frozenset[str]) -> bool:
+    """True if a nested block (lists/dicts as Terraform stores them) sets any of ``keys``."""
+    if isinstance(value, dict):
+        return any((k in keys and bool(v)) or _contains_key_value(v, keys) for k, v in value.items())
+    if isinstance(value, list):
+        return any(_contains_key_value(v, keys) for v in value)
+    return False
+
+
+# Only a customer-managed key id satisfies cmk_encryption: "encrypted",
+# "storage_encrypted" or sse_algorithm "aws:kms" alone mean an AWS-managed key
+_ENCRYPTION_FLAGS = ("kms_key_id", "kms_master_key_id", "kms_key_arn")
+_NESTED_ENCRYPTION_KEYS = frozenset(_ENCRYPTION_FLAGS)
+
+
+def _encryption_enabled(attrs: dict[str, Any]) -> bool:
+    if any(attrs.get(flag) for flag in _ENCRYPTION_FLAGS):
+        return True
+    for block in ("server_side_encryption_configuration", "root_block_device", "encryption_configuration"):
+        if _contains_key_value(attrs.get(block), _NESTED_ENCRYPTION_KEYS):
+            return True
+    return False
+
+
+def _is_public(attrs: dict[str, Any]) -> bool:
+    if str(attrs.get("acl") or "") in _PUBLIC_ACLS:
+        return True
+    return any(
+        attrs.get(flag) is True
+        for flag in ("publicly_accessible", "associate_public_ip_address", "map_public_ip_on_launch")
+    )
+
+
+def _tags(attrs: dict[str, Any]) -> dict[str, str]:
+    raw = attrs.get("tags") or attrs.get("tags_all") or {}
+    return {str(k): str(v) for k, v in raw.items()} if isinstance(raw, dict) else {}
+
+
+def normalize_state_resource(resource: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Rows for one .tfstate resource entry (one per instance; none for data sources)."""
+    if resource.get("mode") == "data":
+        return
+    res_type = str(resource.get("type", ""))
+    base_id = _base_resource_id(res_type, str(resource.get("name", "")))
+    module = str(resource.get("module") or "")
+    if module and base_id:
+        base_id = f"{module}.{base_id}"
+    for instance in resource.get("instances") or [{}]:
+        attrs = instance.get("attributes") or {}
+        index_key = instance.get("index_key")
+        yield {
+            "resource_id": f"{base_id}[{index_key}]" if index_key is not None and base_id else base_id,
+            "resource_type": res_type,
+            "region": _region(attrs),
+            "type": _short_type(res_type),
+            "encryption_enabled": _encryption_enabled(attrs),
+            "is_public": _is_public(attrs),
+            "tags": _tags(attrs),
+        }
+
+
+def parse_tfstate(path: str | Path, chunk_size: int = CHUNK_SIZE) -> ResourceTable:
+    """Stream a .tfstate (or state JSON) file into a ResourceTable."""
+    table = ResourceTable()
+    for resource in iter_state_resources(path, chunk_size):
+        for row in normalize_state_resource(resource):
+            if not row["resource_id"]:
+                row["resource_id"] = f"resource-{len(table)}"
+            table.append(row)
+    return table
+
+
+def parse_tf_source(path: str | Path) -> ResourceTable:
+    """Resource blocks declared in a .tf file (no attributes are evaluated)."""
+    table = ResourceTable()
+    content = Path(path).read_text(encoding="utf-8")
+    for m in _TF_RESOURCE_RE.finditer(content):
+        res_type, res_name = m.group(1).strip(), m.group(2).strip()
+        table.append({
+            "resource_id": _base_resource_id(res_type, res_name) or f"resource-{len(table)}",
+            "resource_type": res_type,
+            "region": DEFAULT_REGION,
+            "type": _short_type(res_type),
+            "encryption_enabled": False,
+            "is_public": False,
+            "tags": {},
+        })
+    return table
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+_cache: OrderedDict[tuple[str, str], ResourceTable] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_resource_table(path: str | Path) -> ResourceTable:
+    """
+    Parse a .tf, .tfstate or .json file into a ResourceTable.
+
+    Results are cached by (suffix, content hash), so re-uploading the same
+    state (or re-running a reactive calc) does not parse it again. Callers
+    must not mutate the returned table.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    key = (suffix, file_sha256(path))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    if suffix in (".tfstate", ".json"):
+        table = parse_tfstate(path)
+    elif suffix == ".tf":
+        table = parse_tf_source(path)
+    else:
+        table = ResourceTable()
+    with _cache_lock:
+        _cache[key] = table
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return table
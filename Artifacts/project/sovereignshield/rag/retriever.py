@@ -2,13 +2,29 @@
 RAG retriever for SovereignShield — ChromaDB-backed knowledge base of compliance
 violations and their remediation fixes. Uses sentence-transformers for embeddings
 and cosine similarity for retrieval.
+
+Set SOVEREIGNSHIELD_VECTOR_BACKEND=local (or run without ChromaDB) to use the
+in-process vector index from rag/vector_index.py instead; it persists to a
+single .npz next to the Chroma directory and falls back to hashing embeddings
+when sentence-transformers is not installed.
+
+Scans use the batched API: retrieve_for_violations embeds and queries all
+violations in one call (identical texts deduplicated, best hits cached in an
+LRU by (violation_type, normalized detail)), and store_remediations
+bulk-inserts reviewed fixes. Stored and queried texts go through the same
+normalize_detail, and every stored fix keeps its own record (content hash
+plus store time), so a newer fix for the same violation wins retrieval
+without erasing the history.
 """
 from __future__ import annotations
 
+import hashlib
 import os
 import tempfile
-from typing import Any
-from uuid import uuid4
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Sequence
 
 _COLLECTION_NAME: str = "sovereign_compliance_kb"
 _PERSIST_DIR: str = (
@@ -16,7 +32,13 @@ _PERSIST_DIR: str = (
     if os.name != "nt"
     else os.path.join(tempfile.gettempdir(), "chroma_db")
 )
+_LOCAL_INDEX_PATH: str = os.path.join(
+    os.path.dirname(_PERSIST_DIR), "sovereign_vector_index.npz"
+)
+_BACKEND: str = os.environ.get("SOVEREIGNSHIELD_VECTOR_BACKEND", "chroma").lower()
 _collection: Any = None
+_local_index: Any = None
+_embedder: Any = None
 
 try:
     import chromadb  # type: ignore[import-not-found]
@@ -25,7 +47,7 @@ except ImportError:
     chromadb = None
     embedding_functions = None
 
-if chromadb is not None and embedding_functions is not None:
+if _BACKEND != "local" and chromadb is not None and embedding_functions is not None:
     try:
         _ef = embedding_functions.SentenceTransformerEmbeddingFunction(
             model_name="all-MiniLM-L6-v2"
@@ -39,6 +61,237 @@ if chromadb is not None and embedding_functions is not None:
     except Exception:
         _collection = None
 
+if _collection is None:
+    from .vector_index import Embedder, load_or_create_index
+
+    try:
+        from sentence_transformers import SentenceTransformer  # type: ignore[import-not-found]
+
+        _model: Any = SentenceTransformer("all-MiniLM-L6-v2")
+    except Exception:
+        _model = None  # hashing fallback
+    _embedder = Embedder(_model)
+    _local_index = load_or_create_index(_LOCAL_INDEX_PATH)
+
+
+# Hits fetched per query; the newest of equally similar fixes wins
+_HISTORY_DEPTH = 4
+_TIE_TOLERANCE = 1e-6
+_last_stored_at = 0
+
+# LRU of best hits (unthresholded) by (violation_type, normalized detail)
+_HIT_CACHE_SIZE = 1024
+_hit_cache: OrderedDict[tuple[str, str], tuple[str | None, float]] = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats: dict[str, int] = {"hits": 0, "misses": 0, "queries": 0}
+
+
+def _normalize_metadata(metadata: dict[str, Any]) -> dict[str, str | int | float | bool]:
+    """Metadata values must be str, int, float, or bool (ChromaDB rule, kept for both backends)."""
+    normalized: dict[str, str | int | float | bool] = {}
+    for k, v in metadata.items():
+        if isinstance(v, (str, int, float, bool)):
+            normalized[k] = v
+        else:
+            normalized[k] = str(v)
+    return normalized
+
+
+def normalize_detail(detail: str, resource_id: str = "") -> str:
+    """Lower-cased, whitespace-collapsed detail with the resource_id masked out."""
+    if resource_id:
+        detail = detail.replace(resource_id, "resource")
+    return " ".join(detail.lower().split())
+
+
+def kb_text(violation: dict[str, Any]) -> str:
+    """Normalized knowledge-base text of a violation (used to store and to query)."""
+    vtype = str(violation.get("violation_type", ""))
+    detail = str(violation.get("detail") or f"{vtype} {violation.get('regulation_cited', '')}")
+    return normalize_detail(detail, str(violation.get("resource_id", "")))
+
+
+def _doc_id(text: str, stored_at: int) -> str:
+    # Content hash plus store time: re-storing a violation adds a record
+    content = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+    return f"{content}-{stored_at:x}"
+
+
+def _next_stored_at() -> int:
+    """Strictly increasing store timestamp (ns) so ids never collide."""
+    global _last_stored_at
+    with _cache_lock:
+        _last_stored_at = max(time.time_ns(), _last_stored_at + 1)
+        return _last_stored_at
+
+
+def _pick_newest(hits: list[tuple[str | None, float, int]]) -> tuple[str | None, float]:
+    """Best (fix_code, similarity); among equally similar hits the latest stored."""
+    hits = [h for h in hits if isinstance(h[0], str)]
+    if not hits:
+        return (None, 0.0)
+    best = max(score for _, score, _ in hits)
+    fix_code, score, _ = max(
+        (h for h in hits if h[1] >= best - _TIE_TOLERANCE), key=lambda h: h[2]
+    )
+    return fix_code, score
+
+
+def _stored_at(metadata: Any) -> int:
+    try:
+        return int(metadata.get("stored_at", 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def _query_best(texts: list[str]) -> list[tuple[str | None, float]] | None:
+    """
+    Best (fix_code, similarity) per text, one backend call for all texts.
+
+    Returns None when the backend raised, so callers can tell a transient
+    failure (not cached) from "no knowledge-base fix".
+    """
+    if not texts:
+        return []
+    with _cache_lock:
+        _cache_stats["queries"] += 1
+    empty: list[tuple[str | None, float]] = [(None, 0.0)] * len(texts)
+    try:
+        if _collection is None:
+            if _local_index is None or len(_local_index) == 0:
+                return empty
+            hits = _local_index.search_batch(_embedder.embed_queries(texts), k=_HISTORY_DEPTH)
+            return [
+                _pick_newest([
+                    (h.metadata.get("fix_code"), float(h.score), _stored_at(h.metadata)) for h in row
+                ])
+                for row in hits
+            ]
+        if _collection.count() == 0:
+            return empty
+        results = _collection.query(
+            query_texts=texts, n_results=_HISTORY_DEPTH, include=["metadatas", "distances"]
+        )
+        distances = results.get("distances") or []
+        metadatas = results.get("metadatas") or []
+        best: list[tuple[str | None, float]] = []
+        for i in range(len(texts)):
+            row_distances = distances[i] if i < len(distances) else []
+            row_metadatas = metadatas[i] if i < len(metadatas) and metadatas[i] else []
+            best.append(_pick_newest([
+                (meta.get("fix_code"), 1.0 - float(distance), _stored_at(meta))
+                for distance, meta in zip(row_distances, row_metadatas)
+                if isinstance(meta, dict)
+            ]))
+        return best
+    except Exception:
+        return None
+
+
+def _apply_threshold(hit: tuple[str | None, float], threshold: float) -> tuple[str | None, float]:
+    fix_code, similarity = hit
+    return (fix_code, similarity) if fix_code is not None and similarity >= threshold else (None, 0.0)
+
+
+def retrieve_similar_batch(
+    violation_texts: Sequence[str],
+    threshold: float = 0.85,
+) -> list[tuple[str | None, float]]:
+    """
+    retrieve_similar for many texts with one embedding/query call.
+
+    Returns:
+        One (fix_code, similarity) or (None, 0.0) per input text
+    """
+    texts = [normalize_detail(text) for text in violation_texts]
+    unique = list(dict.fromkeys(texts))
+    found = dict(zip(unique, _query_best(unique) or [(None, 0.0)] * len(unique)))
+    return [_apply_threshold(found[text], threshold) for text in texts]
+
+
+def retrieve_for_violations(
+    violations: Sequence[dict[str, Any]],
+    threshold: float = 0.85,
+) -> list[tuple[str | None, float]]:
+    """
+    Retrieve prior fixes for all violations of a scan.
+
+    Violations are keyed by (violation_type, normalized detail); keys in the
+    LRU are answered from memory and the rest are queried in one batch.
+
+    Returns:
+        One (fix_code, similarity) or (None, 0.0) per violation, input order
+    """
+    keys = [(str(v.get("violation_type", "")), kb_text(v)) for v in violations]
+
+    found: dict[tuple[str, str], tuple[str | None, float]] = {}
+    with _cache_lock:
+        for key in dict.fromkeys(keys):
+            if key in _hit_cache:
+                _hit_cache.move_to_end(key)
+                found[key] = _hit_cache[key]
+                _cache_stats["hits"] += 1
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        _cache_stats["misses"] += len(missing)
+
+    if missing:
+        results = _query_best([detail for _, detail in missing])
+        if results is None:
+            # Backend error: answer "no fix" for this scan only, retry next time
+            found.update((key, (None, 0.0)) for key in missing)
+            return [_apply_threshold(found[key], threshold) for key in keys]
+        with _cache_lock:
+            for key, hit in zip(missing, results):
+                found[key] = hit
+                _hit_cache[key] = hit
+            while len(_hit_cache) > _HIT_CACHE_SIZE:
+                _hit_cache.popitem(last=False)
+    return [_apply_threshold(found[key], threshold) for key in keys]
+
+
+def store_remediations(
+    records: Sequence[tuple[str, str, dict[str, Any]]],
+) -> int:
+    """
+    Bulk-insert reviewed fixes into the knowledge base.
+
+    Texts are normalized like queries (build them with kb_text to mask
+    the resource id). Earlier fixes for the same text are kept; retrieval
+    prefers the newest.
+
+    Args:
+        records: (violation_text, fix_code, metadata) per approved fix; the
+            last record wins for identical texts within one call
+
+    Returns:
+        Number of documents stored (0 on failure)
+    """
+    if not records or (_collection is None and _local_index is None):
+        return 0
+    stored_at = _next_stored_at()
+    batch: dict[str, tuple[str, dict[str, str | int | float | bool]]] = {}
+    for text, fix_code, metadata in records:
+        text = normalize_detail(text)
+        batch[_doc_id(text, stored_at)] = (
+            text,
+            _normalize_metadata({"fix_code": fix_code, **metadata, "stored_at": stored_at}),
+        )
+    ids = list(batch)
+    documents = [batch[i][0] for i in ids]
+    metadatas = [batch[i][1] for i in ids]
+    try:
+        if _collection is None:
+            _local_index.add(ids, _embedder.embed_documents(documents), metadatas=metadatas, documents=documents)
+            _local_index.save(_LOCAL_INDEX_PATH)
+        else:
+            _collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+    except Exception:
+        return 0
+    # New fixes can turn cached misses into hits
+    with _cache_lock:
+        _hit_cache.clear()
+    return len(ids)
+
 
 def embed_and_store(
     violation_text: str,
@@ -49,36 +302,15 @@ def embed_and_store(
     Embed a violation and store it in the knowledge base with its fix.
 
     Args:
-        violation_text: The violation description (stored as document).
+        violation_text: The violation description (stored normalized as
+            document; use kb_text to mask the resource id).
         fix_code: The remediation code (stored in metadata).
         metadata: Additional metadata (regulatory_context, confidence_score, etc.).
 
     Returns:
         True on success, False on failure (e.g., ChromaDB/sentence-transformers unavailable).
     """
-    if _collection is None:
-        return False
-    try:
-        doc_id = str(uuid4())
-        combined_metadata: dict[str, str | float] = {
-            "fix_code": fix_code,
-            **metadata,
-        }
-        # ChromaDB metadata values must be str, int, float, or bool
-        normalized: dict[str, str | int | float | bool] = {}
-        for k, v in combined_metadata.items():
-            if isinstance(v, (str, int, float, bool)):
-                normalized[k] = v
-            else:
-                normalized[k] = str(v)
-        _collection.add(
-            ids=[doc_id],
-            documents=[violation_text],
-            metadatas=[normalized],
-        )
-        return True
-    except Exception:
-        return False
+    return store_remediations([(violation_text, fix_code, metadata)]) == 1
 
 
 def retrieve_similar(
@@ -96,39 +328,19 @@ def retrieve_similar(
         (fix_code, similarity_score) if a hit above threshold exists,
         (None, 0.0) if collection is empty or no hit above threshold.
     """
-    if _collection is None:
-        return (None, 0.0)
-    try:
-        count = _collection.count()
-        if count == 0:
-            return (None, 0.0)
-        results = _collection.query(
-            query_texts=[violation_text],
-            n_results=1,
-            include=["metadatas", "distances"],
-        )
-        distances = results.get("distances")
-        metadatas = results.get("metadatas")
-        if not distances or not distances[0]:
-            return (None, 0.0)
-        distance: float = float(distances[0][0])
-        similarity: float = 1.0 - distance
-        if similarity < threshold:
-            return (None, 0.0)
-        if metadatas and metadatas[0]:
-            meta = metadatas[0][0]
-            fix_code = meta.get("fix_code") if isinstance(meta, dict) else None
-            if isinstance(fix_code, str):
-                return (fix_code, similarity)
-        return (None, 0.0)
-    except Exception:
-        return (None, 0.0)
+    return retrieve_similar_batch([violation_text], threshold)[0]
+
+
+def cache_stats() -> dict[str, int]:
+    """Hit-cache hits/misses and backend query calls since start."""
+    with _cache_lock:
+        return {**_cache_stats, "cached": len(_hit_cache)}
 
 
 def kb_count() -> int:
     """Return the number of documents in the RAG knowledge base."""
     if _collection is None:
-        return 0
+        return len(_local_index) if _local_index is not None else 0
     try:
         return _collection.count()
     except Exception:
@@ -0,0 +1,236 @@
+"""
+Local vector index for the SovereignShield knowledge base.
+
+Self-contained (NumPy only) so the standalone Space image can run retrieval
+without ChromaDB or the parent project's services/ package:
+
+- VectorIndex: abstract base with upsert-by-id, batched top-k cosine search
+  and atomic single-file .npz persistence
+- FlatIndex: exact search (the knowledge base holds hundreds of fixes, so a
+  single matrix product per batch is the fastest option)
+- Embedder: sentence-transformers model when installed, else deterministic
+  hashed word uni/bigrams (same scheme as services/query_cache.py)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class SearchHit:
+    """One search result; score is cosine similarity (higher is closer)."""
+
+    id: str
+    score: float
+    metadata: dict[str, Any] = field(default_factory=dict)
+    document: str | None = None
+
+
+def _normalize(vectors: Any) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class VectorIndex(ABC):
+    """
+    Storage, upsert and persistence shared by all index kinds.
+
+    Subclasses choose which rows to score for a query (``_candidates``).
+    Re-adding an existing id overwrites its vector, metadata and document.
+    Thread-safe (one lock around mutation and search).
+    """
+
+    kind = "base"
+
+    def __init__(self, dim: int | None = None) -> None:
+        self.dim = dim
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        self._ids: list[str] = []
+        self._id_to_row: dict[str, int] = {}
+        self._metadatas: list[dict[str, Any]] = []
+        self._documents: list[str | None] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @abstractmethod
+    def _candidates(self, query: np.ndarray) -> np.ndarray | None:
+        """Row numbers to score for this query (None = all rows)."""
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        metadatas: Sequence[dict[str, Any]] | None = None,
+        documents: Sequence[str | None] | None = None,
+    ) -> None:
+        """Insert or overwrite a batch of vectors (one row per id)."""
+        vectors = _normalize(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        if len(ids) == 0:
+            return
+        with self._lock:
+            if self.dim is None or len(self._ids) == 0:
+                self.dim = vectors.shape[1]
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}-d")
+            appended: list[np.ndarray] = []
+            for i, doc_id in enumerate(ids):
+                doc_id = str(doc_id)
+                metadata = dict(metadatas[i]) if metadatas is not None else {}
+                document = documents[i] if documents is not None else None
+                row = self._id_to_row.get(doc_id)
+                if row is None:
+                    self._id_to_row[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._metadatas.append(metadata)
+                    self._documents.append(document)
+                    appended.append(vectors[i])
+                else:
+                    self._vectors[row] = vectors[i]
+                    self._metadatas[row] = metadata
+                    self._documents[row] = document
+            if appended:
+                self._vectors = np.vstack([self._vectors, np.stack(appended)])
+
+    def search_batch(self, queries: Any, k: int = 1) -> list[list[SearchHit]]:
+        """Top-k hits per query, best first."""
+        queries = _normalize(queries)
+        with self._lock:
+            if not self._ids or k <= 0:
+                return [[] for _ in range(len(queries))]
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-d queries, got {queries.shape[1]}-d")
+            results = []
+            for query in queries:
+                rows = self._candidates(query)
+                if rows is None:
+                    rows = np.arange(len(self._ids))
+                scores = self._vectors[rows] @ query
+                best = _top_k(scores, k)
+                results.append([
+                    SearchHit(self._ids[r], float(s), self._metadatas[r], self._documents[r])
+                    for r, s in zip(rows[best], scores[best])
+                ])
+            return results
+
+    def search(self, query: Any, k: int = 1) -> list[SearchHit]:
+        """Top-k hits for one query."""
+        return self.search_batch(np.asarray(query).reshape(1, -1), k=k)[0]
+
+    def save(self, path: str) -> None:
+        """Write the index to ``path`` (.npz), replacing it atomically."""
+        with self._lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            header = {
+                "kind": self.kind,
+                "dim": self.dim,
+                "ids": self._ids,
+                "metadatas": self._metadatas,
+                "documents": self._documents,
+            }
+            tmp_path = path + ".tmp.npz"
+            np.savez(tmp_path, header=np.array(json.dumps(header, default=str)), vectors=self._vectors)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> VectorIndex:
+        """Read an index written by ``save``."""
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            index = _KINDS[header["kind"]](dim=header["dim"])
+            index._vectors = np.array(data["vectors"], dtype=np.float32)
+        index._ids = list(header["ids"])
+        index._id_to_row = {doc_id: row for row, doc_id in enumerate(index._ids)}
+        index._metadatas = list(header["metadatas"])
+        index._documents = list(header["documents"])
+        return index
+
+
+class FlatIndex(VectorIndex):
+    """Exact search: every stored vector is scored."""
+
+    kind = "flat"
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray | None:
+        return None
+
+
+_KINDS: dict[str, type[VectorIndex]] = {FlatIndex.kind: FlatIndex}
+
+
+def load_or_create_index(path: str | None) -> VectorIndex:
+    """Load ``path`` when it exists and is readable, else a new empty FlatIndex."""
+    if path and os.path.exists(path):
+        try:
+            return VectorIndex.load(path)
+        except Exception:
+            pass  # A corrupt index only costs a rebuild
+    return FlatIndex()
+
+
+def hashed_embedding(text: str, dim: int = 512) -> np.ndarray:
+    """Hashed word unigrams and bigrams (stable across processes, dependency-free)."""
+    words = _WORD_RE.findall(text.lower())
+    features = words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        digest = hashlib.md5(feature.encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dim] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class Embedder:
+    """
+    Document/query embeddings for the index.
+
+    Args:
+        model: Object with ``encode(list_of_texts)`` (e.g. a SentenceTransformer);
+            None uses hashed_embedding
+        dim: Vector size of the hashing fallback
+    """
+
+    def __init__(self, model: Any = None, dim: int = 512) -> None:
+        self.model = model
+        self.dim = dim
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.model is None:
+            return np.stack([hashed_embedding(text, self.dim) for text in texts])
+        return np.asarray(self.model.encode(list(texts)), dtype=np.float32).reshape(len(texts), -1)
+
+    embed_queries = embed_documents
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
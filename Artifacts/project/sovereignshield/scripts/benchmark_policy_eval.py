@@ -0,0 +1,81 @@
+"""
+Policy Evaluation Benchmark
+
+Times the compliance evaluation engines on synthetic resources: the
+in-process builtin evaluator, one batched ``opa eval`` and the original
+per-resource ``opa eval`` (OPA engines only when the binary is installed;
+per-resource only up to --max-subprocess resources).
+
+Usage:
+    python sovereignshield/scripts/benchmark_policy_eval.py --sizes 10,1000,100000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.core.opa_eval import evaluate
+
+
+def generate_resources(n: int, seed: int = 42) -> list[dict]:
+    """Synthetic resources; roughly a third violate each rule."""
+    rng = random.Random(seed)
+    return [
+        {
+            "resource_id": f"res-{i:07d}",
+            "resource_type": rng.choice(("aws_s3_bucket", "aws_db_instance", "aws_instance")),
+            "region": rng.choice(("us-east-1", "us-gov-east-1", "eu-west-1")),
+            "encryption_enabled": rng.random() > 0.3,
+            "is_public": rng.random() < 0.3,
+            "tags": {"DataClass": "PHI"} if rng.random() > 0.3 else {},
+        }
+        for i in range(n)
+    ]
+
+
+def time_engine(resources: list[dict], engine: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    violations = evaluate(resources, engine=engine)
+    return time.perf_counter() - start, len(violations)
+
+
+def run(n: int, max_subprocess: int, has_opa: bool) -> None:
+    print(f"\n=== {n:,} resources ===")
+    resources = generate_resources(n)
+    engines = ["builtin"]
+    if has_opa:
+        engines.append("opa")
+        if n <= max_subprocess:
+            engines.append("subprocess")
+    for engine in engines:
+        elapsed, found = time_engine(resources, engine)
+        print(f"  {engine:<10} {elapsed:9.3f}s  {n / elapsed:12,.0f} resources/s  {found:,} violations")
+    if not has_opa:
+        print("  opa/subprocess: OPA binary not installed, skipped")
+    elif n > max_subprocess:
+        print(f"  subprocess: skipped above {max_subprocess:,} resources")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark compliance policy evaluation engines")
+    parser.add_argument("--sizes", type=str, default="10,1000,100000",
+                        help="Comma-separated resource counts")
+    parser.add_argument("--max-subprocess", type=int, default=1000,
+                        help="Largest size to run the per-resource OPA path on")
+    args = parser.parse_args()
+
+    has_opa = shutil.which("opa") is not None
+    for n in (int(v) for v in args.sizes.split(",")):
+        run(n, args.max_subprocess, has_opa)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Rolling analytics tests — snapshot aggregates match the list-based chart helpers.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Ensure sovereignshield package is importable
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.core.analytics import RunAnalytics
+from sovereignshield.core.charts import donut_data, heatmap_data, kb_growth_data, mttr_trend_data
+
+
+def _events(n: int = 60) -> list[dict]:
+    severities = ["HIGH", "medium", "LOW", "bogus", None]
+    return [
+        {
+            "timestamp": f"2025-03-{1 + i % 5:02d}T12:{i:02d}:00",
+            "resource_id": f"s3-{i % 4}",
+            "violation_type": ["encryption", "region", "phi_tag"][i % 3],
+            "severity": severities[i % 5],
+            "is_compliant": i % 3 != 1,
+            "reviewer_verdict": "APPROVED" if i % 3 != 1 else "REJECTED",
+            "mttr_seconds": None if i % 7 == 0 else float(i),
+            "rag_hit": i % 2 == 0,
+        }
+        for i in range(n)
+    ]
+
+
+def _sorted(df: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    return df.sort_values(by).reset_index(drop=True)
+
+
+def test_snapshot_matches_list_based_chart_data():
+    # Charts cover the latest 50 events, like the dashboards' fetch_recent(50)
+    analytics = RunAnalytics()
+    analytics.add_many(_events())
+    events = _events()[-50:]
+    snap = analytics.snapshot()
+
+    keys = ["resource_id", "violation_type"]
+    pd.testing.assert_frame_equal(_sorted(heatmap_data(snap), keys), _sorted(heatmap_data(events), keys))
+    pd.testing.assert_frame_equal(
+        _sorted(donut_data(snap), ["severity"]), _sorted(donut_data(events), ["severity"]), check_dtype=False
+    )
+    pd.testing.assert_frame_equal(kb_growth_data(snap), kb_growth_data(events))
+    for limit in (5, 20, 50):
+        pd.testing.assert_frame_equal(mttr_trend_data(snap, limit=limit), mttr_trend_data(events, limit=limit))
+
+
+def _avg_mttr(events: list[dict]) -> float:
+    mttrs = [e["mttr_seconds"] for e in events if e["mttr_seconds"] is not None]
+    return sum(mttrs) / len(mttrs)
+
+
+def test_rolling_window_kpis_match_recent_events():
+    events = _events(150)
+    analytics = RunAnalytics(window=50, kpi_window=100)
+    for event in events:
+        analytics.add(event)
+    snap = analytics.snapshot()
+
+    recent = events[-50:]
+    assert snap.total_events == 150
+    assert snap.recent_events == 50
+    assert snap.avg_mttr == pytest.approx(_avg_mttr(recent))
+    assert snap.rag_hit_rate == pytest.approx(sum(e["rag_hit"] for e in recent) / 50)
+    assert snap.approval_rate == pytest.approx(sum(e["reviewer_verdict"] == "APPROVED" for e in recent) / 50)
+    assert sum(snap.violation_counts.values()) == 50
+    assert snap.mttr_histogram["count"].sum() == sum(1 for e in recent if e["mttr_seconds"] is not None)
+    assert snap.kpi_avg_mttr == pytest.approx(_avg_mttr(events[-100:]))
+    assert snap.kpi_rag_hit_rate == pytest.approx(sum(e["rag_hit"] for e in events[-100:]) / 100)
+
+
+def test_reset_replaces_aggregates_with_store_contents():
+    analytics = RunAnalytics(window=50)
+    analytics.add_many(_events(10))
+    stored = _events(60)
+    analytics.reset(list(reversed(stored)), kb_size=40)  # store returns newest first
+    snap = analytics.snapshot()
+
+    latest = sorted(stored, key=lambda e: e["timestamp"])[-50:]
+    assert snap.recent_events == 50
+    pd.testing.assert_frame_equal(kb_growth_data(snap), kb_growth_data(latest))
+    assert snap.kb_size["kb_size"].iloc[-1] == 40
+
+
+def test_snapshot_is_cached_until_next_write():
+    analytics = RunAnalytics()
+    analytics.add_many(_events(10))
+    first = analytics.snapshot()
+    assert analytics.snapshot() is first
+
+    analytics.add(_events(1)[0])
+    second = analytics.snapshot()
+    assert second is not first
+    assert second.version > first.version
+    assert first.total_events == 10 and second.total_events == 11
+
+
+def test_kb_size_series_and_run_summaries():
+    analytics = RunAnalytics()
+    analytics.set_kb_size(5)
+    analytics.add_many(_events(10))
+    analytics.add_run(
+        [
+            {"resource_id": "a", "verdict": "APPROVED", "violations": 0, "mttr_seconds": 2.0},
+            {"resource_id": "b", "verdict": "REJECTED", "violations": 2, "mttr_seconds": 4.0},
+        ],
+        run_at="2025-03-09T12:00:00",
+    )
+    snap = analytics.snapshot()
+    assert snap.kb_size["kb_size"].iloc[-1] == 5 + kb_growth_data(_events(10))["kb_added"].sum()
+    assert snap.kb_size["kb_size"].is_monotonic_increasing
+    run = snap.runs.iloc[0]
+    assert run["compliance_rate"] == 50.0
+    assert run["violation_count"] == 2
+    assert run["avg_mttr_seconds"] == 3.0
+
+
+def test_chart_builder_does_not_mutate_snapshot():
+    pytest.importorskip("plotnine")
+    from sovereignshield.core.charts import compliance_heatmap
+
+    analytics = RunAnalytics()
+    analytics.add_many(_events(10))
+    snap = analytics.snapshot()
+    compliance_heatmap(snap)
+    assert snap.heatmap["status"].dtype == object
+
+
+def test_audit_db_updates_analytics_on_insert():
+    pytest.importorskip("dotenv")
+    from sovereignshield.core.audit_db import AuditDB
+
+    store = AuditDB(RunAnalytics())
+    before = store.analytics_snapshot()
+    assert before.total_events >= 1  # seeded from stored events
+    store.insert({**_events(1)[0], "mttr_seconds": 10.0})
+    after = store.analytics_snapshot()
+    assert after.total_events == before.total_events + 1
+    assert store.avg_mttr() == after.kpi_avg_mttr
+
+
+def test_audit_db_reseeds_stale_analytics(monkeypatch):
+    pytest.importorskip("dotenv")
+    from sovereignshield.core import audit_db
+
+    store = audit_db.AuditDB(RunAnalytics())
+    store.analytics_snapshot()
+    store.analytics.add_many(_events(3))  # not in the store
+    store.analytics.refreshed_at -= audit_db.ANALYTICS_REFRESH_SECONDS + 1
+    assert store.analytics_snapshot().recent_events == len(store.fetch_recent(50))
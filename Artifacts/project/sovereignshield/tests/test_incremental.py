@@ -0,0 +1,151 @@
+"""
+Incremental scan tests — fingerprints, carried-forward results, policy changes.
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+# Ensure sovereignshield package is importable
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.core.incremental import IncrementalScanner, policy_hash, resource_fingerprint
+from sovereignshield.core.opa_eval import _DEFAULT_POLICY, evaluate
+from sovereignshield.core.tfstate import ResourceTable
+
+
+class DictStore:
+    """In-memory verdict store with the AuditDB interface."""
+
+    def __init__(self) -> None:
+        self.records: dict[str, dict[str, Any]] = {}
+        self.writes = 0
+
+    def fetch_verdicts(self, fingerprints):
+        return {fp: self.records[fp] for fp in fingerprints if fp in self.records}
+
+    def store_verdicts(self, records):
+        self.writes += 1
+        self.records.update(records)
+
+
+def _resources() -> list[dict]:
+    return [
+        {"resource_id": "s3-a", "region": "eu-west-1", "encryption_enabled": False, "is_public": True, "tags": {}},
+        {"resource_id": "ec2-b", "region": "us-east-1", "encryption_enabled": True, "is_public": False,
+         "tags": {"DataClass": "PHI"}},
+        {"resource_id": "rds-c", "region": "us-east-1", "encryption_enabled": False, "is_public": False,
+         "tags": {"DataClass": "PHI"}},
+    ]
+
+
+def test_fingerprint_ignores_key_order_but_not_values_or_policy():
+    digest = policy_hash()
+    r = _resources()[0]
+    reordered = dict(reversed(list(r.items())))
+    assert resource_fingerprint(r, digest) == resource_fingerprint(reordered, digest)
+    assert resource_fingerprint(r, digest) != resource_fingerprint({**r, "is_public": False}, digest)
+    assert resource_fingerprint(r, digest) != resource_fingerprint(r, policy_hash(_DEFAULT_POLICY + "\n"))
+
+
+def test_second_scan_carries_forward_unchanged_resources():
+    store = DictStore()
+    scanner = IncrementalScanner(store)
+
+    first = scanner.scan(_resources())
+    assert first.evaluated == ["s3-a", "ec2-b", "rds-c"]
+    assert first.carried_forward == []
+
+    changed = _resources()
+    changed[2]["encryption_enabled"] = True
+    second = scanner.scan(changed)
+
+    assert second.evaluated == ["rds-c"]
+    assert second.carried_forward == ["s3-a", "ec2-b"]
+    assert second.violations == evaluate(changed)  # full report, same as a full scan
+    assert second.time_saved_seconds >= 0
+    assert second.to_dict()["carried_forward"] == 2
+
+
+@patch("sovereignshield.core.opa_eval.subprocess.run")
+def test_policy_change_forces_full_rescan(mock_run):
+    """A custom policy goes to batched OPA (mocked: no violations)."""
+    opa_result = {"result": [{"expressions": [{"value": {}}]}]}
+    mock_run.return_value = type("R", (), {"returncode": 0, "stdout": json.dumps(opa_result), "stderr": ""})()
+    store = DictStore()
+    scanner = IncrementalScanner(store)
+    scanner.scan(_resources())
+
+    report = scanner.scan(_resources(), policy=_DEFAULT_POLICY + "\n# reviewed\n")
+    assert report.carried_forward == []
+    assert len(report.evaluated) == 3
+    assert mock_run.call_count == 1
+
+
+def test_full_scan_ignores_stored_verdicts():
+    scanner = IncrementalScanner(DictStore())
+    scanner.scan(_resources())
+    assert scanner.scan(_resources(), full=True).carried_forward == []
+
+
+def test_remediates_only_new_violations_and_carries_results_forward():
+    calls: list[list[dict]] = []
+
+    def remediate(violations):
+        calls.append(violations)
+        return [{"violation_type": v["violation_type"], "verdict": "APPROVED"} for v in violations]
+
+    scanner = IncrementalScanner(DictStore(), remediate=remediate)
+    first = scanner.scan(_resources())
+    second = scanner.scan(_resources())
+
+    assert len(calls) == 1
+    assert {v["resource_id"] for v in calls[0]} == {"s3-a", "rds-c"}
+    assert second.remediations == first.remediations
+    assert [r["verdict"] for r in second.remediations["rds-c"]] == ["APPROVED"]
+
+
+def test_scan_accepts_resource_table_and_returns_copies():
+    store = DictStore()
+    scanner = IncrementalScanner(store)
+    table = ResourceTable.from_records(_resources())
+
+    report = scanner.scan(table)
+    report.violations[0]["detail"] = "mutated"
+    again = scanner.scan(table)
+    assert again.violations[0]["detail"] != "mutated"
+    assert store.writes == 1
+
+
+def test_audit_db_verdict_store_round_trip():
+    pytest.importorskip("dotenv")
+    from sovereignshield.core.audit_db import AuditDB
+
+    store = AuditDB()
+    scanner = IncrementalScanner(store)
+    scanner.scan(_resources())
+    assert scanner.scan(_resources()).carried_forward == ["s3-a", "ec2-b", "rds-c"]
+
+
+def test_engine_errors_are_not_stored_and_are_re_evaluated():
+    store = DictStore()
+    scanner = IncrementalScanner(store)
+    error = {"resource_id": "s3-a", "violation_type": "opa_error", "severity": "HIGH",
+             "regulation_cited": "", "detail": "OPA error: timeout"}
+
+    with patch("sovereignshield.core.incremental.evaluate", return_value=[error]):
+        first = scanner.scan(_resources())
+    assert first.violations == [error]
+    assert len(store.records) == 2  # ec2-b and rds-c only
+
+    second = scanner.scan(_resources())
+    assert second.evaluated == ["s3-a"]
+    assert second.carried_forward == ["ec2-b", "rds-c"]
+    assert all(v["violation_type"] != "opa_error" for v in second.violations)
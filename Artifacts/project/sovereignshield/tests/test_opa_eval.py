@@ -18,6 +18,7 @@ if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
 from sovereignshield.core.opa_eval import (
+    _DEFAULT_POLICY,
     _normalize_resource,
     _violation_str_to_dict,
     evaluate,
@@ -98,7 +99,7 @@ def test_evaluate_parses_opa_output(mock_run):
             "tags": {},
         }
     ]
-    violations = evaluate(resources)
+    violations = evaluate(resources, engine="subprocess")
 
     assert len(violations) == 2
     assert all(v["resource_id"] == "s3-staging-analytics" for v in violations)
@@ -112,7 +113,7 @@ def test_evaluate_handles_opa_error(mock_run):
     """evaluate returns opa_error violation when OPA returns non-zero."""
     mock_run.return_value = type("R", (), {"returncode": 1, "stdout": "", "stderr": "policy compile error"})()
 
-    violations = evaluate([{"resource_id": "r1", "region": "us-east-1"}])
+    violations = evaluate([{"resource_id": "r1", "region": "us-east-1"}], engine="subprocess")
     assert len(violations) == 1
     assert violations[0]["violation_type"] == "opa_error"
     assert "OPA error" in violations[0]["detail"]
@@ -133,10 +134,118 @@ def test_evaluate_empty_violations(mock_run):
             "tags": {"DataClass": "PHI"},
         }
     ]
-    violations = evaluate(resources)
+    violations = evaluate(resources, engine="subprocess")
     assert violations == []
 
 
+@patch("sovereignshield.core.opa_eval.subprocess.run")
+def test_evaluate_opa_engine_single_batched_call(mock_run):
+    """engine='opa' evaluates all resources in one OPA process, keyed by input index."""
+    opa_result = {
+        "result": [
+            {
+                "expressions": [
+                    {
+                        "value": {
+                            "0": ["cmk_encryption|CMK encryption (aws:kms) required"],
+                            "1": [],
+                            "2": ["is_public|is_public must be False", "phi_tag|DataClass=PHI tag on all resources"],
+                        },
+                    }
+                ]
+            }
+        ]
+    }
+    mock_run.return_value = type("R", (), {"returncode": 0, "stdout": json.dumps(opa_result), "stderr": ""})()
+
+    violations = evaluate([{"resource_id": f"r{i}"} for i in range(3)], engine="opa")
+
+    assert mock_run.call_count == 1
+    assert [(v["resource_id"], v["violation_type"]) for v in violations] == [
+        ("r0", "cmk_encryption"),
+        ("r2", "is_public"),
+        ("r2", "phi_tag"),
+    ]
+
+
+@patch("sovereignshield.core.opa_eval.subprocess.run")
+def test_evaluate_opa_engine_error_per_resource(mock_run):
+    mock_run.return_value = type("R", (), {"returncode": 1, "stdout": "", "stderr": "rego_parse_error"})()
+
+    violations = evaluate([{"resource_id": "a"}, {"resource_id": "b"}], engine="opa")
+    assert [(v["resource_id"], v["violation_type"]) for v in violations] == [("a", "opa_error"), ("b", "opa_error")]
+
+
+@patch("sovereignshield.core.opa_eval.subprocess.run")
+def test_evaluate_default_policy_runs_in_process(mock_run):
+    """Default engine evaluates the default policy without spawning OPA."""
+    resources = [
+        {
+            "resource_id": "s3-staging-analytics",
+            "region": "eu-west-1",
+            "encryption_enabled": False,
+            "is_public": True,
+            "tags": {},
+        },
+        {
+            "resource_id": "ec2-prod",
+            "region": "us-east-1",
+            "encryption_enabled": True,
+            "is_public": False,
+            "tags": {"DataClass": "PHI"},
+        },
+    ]
+    violations = evaluate(resources)
+
+    mock_run.assert_not_called()
+    assert [v["violation_type"] for v in violations] == [
+        "approved_regions", "cmk_encryption", "data_residency", "is_public", "phi_tag",
+    ]
+    assert violations[0] == _violation_str_to_dict(
+        "s3-staging-analytics", "approved_regions|Approved regions: us-east-1, us-gov-east-1"
+    )
+
+
+def test_builtin_engine_follows_rego_strict_equality():
+    """Only JSON booleans and exact strings satisfy the policy, as in Rego."""
+    base = {"region": "us-gov-east-1", "encryption_enabled": True, "is_public": False, "tags": {"DataClass": "PHI"}}
+    cases = {
+        "ok": {},
+        "enc-int": {"encryption_enabled": 1},
+        "public-none": {"is_public": None},
+        "tags-none": {"tags": None},
+        "tag-lower": {"tags": {"DataClass": "phi"}},
+        "no-region": {"region": ""},
+    }
+    resources = [{**base, **override, "resource_id": rid} for rid, override in cases.items()]
+    found = {(v["resource_id"], v["violation_type"]) for v in evaluate(resources, engine="builtin")}
+    assert found == {
+        ("enc-int", "cmk_encryption"),
+        ("public-none", "is_public"),
+        ("tags-none", "phi_tag"),
+        ("tag-lower", "phi_tag"),
+        ("no-region", "approved_regions"),
+        ("no-region", "data_residency"),
+    }
+
+
+def test_builtin_engine_rejects_custom_policy():
+    with pytest.raises(ValueError):
+        evaluate([], policy=_DEFAULT_POLICY.replace("us-east-1", "eu-west-1"), engine="builtin")
+
+
+def test_builtin_engine_handles_empty_and_large_inputs():
+    assert evaluate([]) == []
+    resources = [
+        {"resource_id": f"r{i}", "region": "us-east-1", "encryption_enabled": i % 2 == 0,
+         "is_public": False, "tags": {"DataClass": "PHI"}}
+        for i in range(10_000)
+    ]
+    violations = evaluate(resources)
+    assert len(violations) == 5_000
+    assert {v["violation_type"] for v in violations} == {"cmk_encryption"}
+
+
 # ── Integration tests (real OPA binary) ────────────────────────────────────────
 
 
@@ -184,3 +293,27 @@ def test_evaluate_integration_compliant():
     ]
     violations = evaluate(resources)
     assert violations == []
+
+
+def _parity_resources() -> list[dict]:
+    resources = []
+    for i, (region, enc, public, tags) in enumerate(
+        (region, enc, public, tags)
+        for region in ("us-east-1", "us-gov-east-1", "eu-west-1", "", None)
+        for enc in (True, False, 1, None)
+        for public in (False, True, 0)
+        for tags in ({"DataClass": "PHI"}, {"DataClass": "phi"}, {}, None)
+    ):
+        resources.append(
+            {"resource_id": f"r{i}", "region": region, "encryption_enabled": enc, "is_public": public, "tags": tags}
+        )
+    return resources
+
+
+@pytest.mark.skipif(not _opa_available(), reason="OPA binary not installed")
+def test_builtin_and_batched_engines_match_subprocess():
+    """Parity: builtin and batched OPA return exactly what per-resource OPA returns."""
+    resources = _parity_resources()
+    expected = evaluate(resources, engine="subprocess")
+    assert evaluate(resources, engine="builtin") == expected
+    assert evaluate(resources, engine="opa") == expected
@@ -0,0 +1,186 @@
+"""
+Concurrent remediation pipeline tests.
+All model calls go to StubModelClient — no network or API key needed.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Ensure sovereignshield package is importable
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.agents.model_client import (
+    RetryingClient,
+    StubModelClient,
+    StubOverloadedError,
+    is_retryable,
+)
+
+pytest.importorskip("dotenv")
+
+from sovereignshield.agents.pipeline import RemediationPipeline, violation_signature
+
+
+def _violation(resource_id: str, vtype: str = "missing_phi_tag", detail: str = "DataClass tag missing") -> dict:
+    return {
+        "resource_id": resource_id,
+        "violation_type": vtype,
+        "severity": "HIGH",
+        "regulation_cited": "HIPAA §164.312",
+        "detail": f"{vtype} for {resource_id}: {detail}",
+    }
+
+
+# ── Model client ──────────────────────────────────────────────────────────────
+
+
+def test_retrying_client_retries_transient_errors():
+    """Overload errors are retried with backoff until the call succeeds."""
+    delays: list[float] = []
+    client = RetryingClient(StubModelClient(failures=2), retries=3, sleep=delays.append)
+    response = client.messages.create(system="You are a compliance reviewer", messages=[])
+    assert "APPROVED" in response.content[0].text
+    assert client.stats == {"calls": 3, "retries": 2, "failures": 0}
+    assert len(delays) == 2 and all(0 <= d <= 1.0 for d in delays)
+
+
+def test_retrying_client_gives_up_after_retries():
+    client = RetryingClient(StubModelClient(failures=10), retries=1, sleep=lambda _: None)
+    with pytest.raises(StubOverloadedError):
+        client.messages.create(system="", messages=[])
+    assert client.stats["failures"] == 1
+
+
+def _status_error(status: int) -> Exception:
+    error = Exception(f"HTTP {status}")
+    error.status_code = status  # type: ignore[attr-defined]
+    return error
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (_status_error(429), True),
+        (_status_error(503), True),
+        (StubOverloadedError(), True),
+        (_status_error(400), False),
+        (_status_error(409), False),
+        (ValueError("bug"), False),
+        (KeyError("content"), False),
+    ],
+)
+def test_is_retryable_only_for_transient_errors(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_retrying_client_does_not_retry_unknown_errors():
+    class Broken:
+        calls = 0
+
+        @property
+        def messages(self):
+            return self
+
+        def create(self, **kwargs):
+            Broken.calls += 1
+            raise ValueError("malformed request")
+
+    client = RetryingClient(Broken(), retries=3, sleep=lambda _: None)
+    with pytest.raises(ValueError):
+        client.messages.create(system="", messages=[])
+    assert Broken.calls == 1
+
+
+def test_retrying_client_caps_in_flight_calls():
+    stub = StubModelClient(latency=0.02)
+    client = RetryingClient(stub, max_in_flight=2)
+    threads = [
+        threading.Thread(target=client.messages.create, kwargs={"system": "", "messages": []})
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stub.calls == 8
+    assert stub.max_concurrent <= 2
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+
+
+def test_pipeline_stub_run_is_approved_and_ordered():
+    violations = [_violation("s3-a"), _violation("s3-b", "cmk_encryption", "AES256 only")]
+    outcomes = RemediationPipeline(client=StubModelClient()).run(violations)
+    assert [o.violation["resource_id"] for o in outcomes] == ["s3-a", "s3-b"]
+    for o in outcomes:
+        assert o.error is None
+        assert o.result.verdict == "APPROVED"
+        assert o.plan.task_id == o.work.task_id == o.result.task_id
+        assert o.work.resource_id in o.work.hcl_code
+        assert o.tokens_used > 0
+
+
+def test_pipeline_deduplicates_identical_violations():
+    """Same violation on three buckets → one model round, re-targeted results."""
+    stub = StubModelClient()
+    pipeline = RemediationPipeline(client=stub)
+    outcomes = pipeline.run([_violation("s3-a"), _violation("s3-b"), _violation("s3-c")])
+    assert stub.calls == 3  # planner + worker + reviewer, once
+    assert pipeline.last_stats["remediated"] == 1
+    assert pipeline.last_stats["deduplicated"] == 2
+    b = outcomes[1]
+    assert b.duplicate_of == "s3-a"
+    assert b.plan.resource_id == b.work.resource_id == b.result.resource_id == "s3-b"
+    assert '"s3-b"' in b.work.hcl_code and "s3-a" not in b.work.hcl_code
+    assert b.plan.task_id != outcomes[0].plan.task_id
+    assert b.tokens_used == 0
+
+
+def test_violation_signature_keeps_resource_specific_detail():
+    a = _violation("s3-a", "region", "eu-west-1 not approved")
+    b = _violation("s3-b", "region", "ap-south-1 not approved")
+    c = _violation("s3-c", "region", "eu-west-1 not approved")
+    assert violation_signature(a) != violation_signature(b)
+    assert violation_signature(a) == violation_signature(c)
+
+
+def test_pipeline_runs_violations_concurrently():
+    violations = [_violation(f"s3-{i}", f"type_{i}") for i in range(8)]
+    serial = RemediationPipeline(client=StubModelClient(latency=0.02), max_concurrency=1)
+    parallel = RemediationPipeline(client=StubModelClient(latency=0.02), max_concurrency=8)
+
+    t0 = time.perf_counter()
+    serial.run(violations)
+    serial_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    parallel.run(violations)
+    parallel_s = time.perf_counter() - t0
+
+    assert parallel.client.max_concurrent > 1
+    assert parallel_s < serial_s / 2
+
+
+def test_pipeline_records_errors_per_violation():
+    class BrokenPlanner:
+        rag_threshold = 0.85
+
+        def run(self, violation, rag_result=None):
+            if violation["resource_id"] == "s3-bad":
+                raise ValueError("boom")
+            return RemediationPipeline(client=StubModelClient()).planner.run(violation)
+
+    pipeline = RemediationPipeline(client=StubModelClient(), planner=BrokenPlanner())
+    outcomes = pipeline.run([_violation("s3-bad", "a"), _violation("s3-ok", "b")])
+    assert outcomes[0].error == "ValueError: boom"
+    assert outcomes[1].error is None and outcomes[1].result.verdict == "APPROVED"
+    assert pipeline.last_stats["errors"] == 1
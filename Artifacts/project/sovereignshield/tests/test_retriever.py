@@ -0,0 +1,147 @@
+"""
+RAG retriever tests — batched retrieval, hit cache, bulk upsert.
+Runs against the in-memory fallback index and a recording Chroma-like collection.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure sovereignshield package is importable
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.rag import retriever, vector_index
+
+
+@pytest.fixture
+def memory_kb(monkeypatch, tmp_path):
+    """Fresh in-memory index and empty hit cache for each test."""
+    monkeypatch.setattr(retriever, "_collection", None)
+    monkeypatch.setattr(retriever, "_local_index", vector_index.FlatIndex())
+    monkeypatch.setattr(retriever, "_embedder", vector_index.Embedder())
+    monkeypatch.setattr(retriever, "_LOCAL_INDEX_PATH", str(tmp_path / "kb.npz"))
+    retriever._hit_cache.clear()
+    yield retriever
+    retriever._hit_cache.clear()
+
+
+def _violation(resource_id: str, vtype: str = "cmk_encryption", msg: str = "CMK encryption (aws:kms) required") -> dict:
+    return {"resource_id": resource_id, "violation_type": vtype, "detail": f"{vtype} for {resource_id}: {msg}"}
+
+
+def test_store_and_retrieve_round_trip(memory_kb):
+    assert memory_kb.embed_and_store("cmk_encryption for s3-a: CMK encryption (aws:kms) required", "hcl-1", {}) is True
+    fix, score = memory_kb.retrieve_similar("cmk_encryption for s3-a: CMK encryption (aws:kms) required")
+    assert fix == "hcl-1" and score > 0.99
+    assert memory_kb.retrieve_similar("completely unrelated text") == (None, 0.0)
+
+
+def test_store_remediations_keeps_history_and_prefers_newest(memory_kb):
+    text = "phi_tag for s3-a: DataClass=PHI tag on all resources"
+    stored = memory_kb.store_remediations([(text, "old", {}), (text, "new", {"confidence_score": 0.9})])
+    assert stored == 1  # identical texts within one call collapse
+    memory_kb.store_remediations([(text.upper(), "newest", {})])  # same normalized text
+    assert memory_kb.kb_count() == 2  # earlier fix kept
+    assert memory_kb.retrieve_similar(text)[0] == "newest"
+
+
+def test_stored_violation_matches_prefetch_for_other_resources(memory_kb):
+    # As stored by app.py / the pipeline after an approved fix on s3-a
+    memory_kb.embed_and_store(memory_kb.kb_text(_violation("s3-a")), "kms-fix", {})
+    assert memory_kb.retrieve_for_violations([_violation("s3-b")])[0] == ("kms-fix", pytest.approx(1.0))
+
+
+def test_retrieve_for_violations_batches_dedupes_and_caches(memory_kb):
+    memory_kb.store_remediations([
+        ("cmk_encryption for resource: cmk encryption (aws:kms) required", "kms-fix", {}),
+    ])
+    violations = [_violation("s3-a"), _violation("s3-b"), _violation("s3-c", "is_public", "is_public must be False")]
+
+    before = memory_kb.cache_stats()
+    results = memory_kb.retrieve_for_violations(violations)
+    after = memory_kb.cache_stats()
+
+    assert results[0] == results[1] and results[0][0] == "kms-fix"
+    assert results[2] == (None, 0.0)
+    assert after["queries"] - before["queries"] == 1  # one backend call
+    assert after["misses"] - before["misses"] == 2  # two unique keys
+
+    memory_kb.retrieve_for_violations([_violation("s3-z")])
+    assert memory_kb.cache_stats()["queries"] == after["queries"]  # served from LRU
+
+
+def test_store_invalidates_cached_misses(memory_kb):
+    v = _violation("s3-a", "is_public", "is_public must be False")
+    assert memory_kb.retrieve_for_violations([v]) == [(None, 0.0)]
+    memory_kb.store_remediations([(v["detail"].replace("s3-a", "resource"), "private-acl", {})])
+    assert memory_kb.retrieve_for_violations([v])[0][0] == "private-acl"
+
+
+def test_threshold_applied_after_cache(memory_kb):
+    memory_kb.store_remediations([("cmk_encryption for resource: cmk encryption required", "kms-fix", {})])
+    v = _violation("s3-a")
+    loose = memory_kb.retrieve_for_violations([v], threshold=0.1)
+    strict = memory_kb.retrieve_for_violations([v], threshold=0.999)
+    assert loose[0][0] == "kms-fix"
+    assert strict == [(None, 0.0)]
+
+
+class RecordingCollection:
+    """Chroma-like collection that records calls."""
+
+    def __init__(self) -> None:
+        self.queries: list[list[str]] = []
+        self.upserts: list[list[str]] = []
+
+    def count(self) -> int:
+        return 1
+
+    def query(self, query_texts, n_results, include):
+        self.queries.append(list(query_texts))
+        return {
+            "distances": [[0.05] for _ in query_texts],
+            "metadatas": [[{"fix_code": f"fix for {t}"}] for t in query_texts],
+        }
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserts.append(list(ids))
+
+
+def test_chroma_backend_single_query_and_bulk_upsert(monkeypatch):
+    collection = RecordingCollection()
+    monkeypatch.setattr(retriever, "_collection", collection)
+    retriever._hit_cache.clear()
+
+    results = retriever.retrieve_similar_batch(["a", "b", "a"])
+    assert collection.queries == [["a", "b"]]
+    assert results[0] == results[2] == ("fix for a", pytest.approx(0.95))
+
+    assert retriever.store_remediations([("a", "x", {}), ("b", "y", {}), ("a", "z", {})]) == 2
+    assert len(collection.upserts) == 1
+    retriever._hit_cache.clear()
+
+
+def test_backend_error_is_not_cached(monkeypatch):
+    collection = RecordingCollection()
+    original_query = collection.query
+    calls = {"n": 0}
+
+    def flaky_query(query_texts, n_results, include):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise ConnectionError("chroma unavailable")
+        return original_query(query_texts, n_results, include)
+
+    collection.query = flaky_query
+    monkeypatch.setattr(retriever, "_collection", collection)
+    retriever._hit_cache.clear()
+
+    v = _violation("s3-a")
+    assert retriever.retrieve_for_violations([v]) == [(None, 0.0)]
+    assert retriever._hit_cache == {}
+    assert retriever.retrieve_for_violations([v])[0][0] is not None
+    retriever._hit_cache.clear()
@@ -0,0 +1,176 @@
+"""
+Terraform state parsing tests — streaming reader, instance/module coverage, cache.
+"""
+from __future__ import annotations
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure sovereignshield package is importable
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.core import tfstate
+from sovereignshield.core.opa_eval import evaluate
+from sovereignshield.core.tfstate import (
+    ResourceTable,
+    _iter_resources_stdlib,
+    load_resource_table,
+    parse_tfstate,
+)
+
+
+def _state() -> dict:
+    return {
+        "version": 4,
+        "serial": 12345,
+        "outputs": {"bucket": {"value": "x" * 5000, "type": "string"}},
+        "resources": [
+            {
+                "mode": "managed",
+                "type": "aws_s3_bucket",
+                "name": "logs",
+                "instances": [
+                    {
+                        "attributes": {
+                            "region": "us-east-1",
+                            "acl": "public-read",
+                            "tags": {"DataClass": "PHI"},
+                            "server_side_encryption_configuration": [
+                                {"rule": [{"apply_server_side_encryption_by_default": [
+                                    {"sse_algorithm": "aws:kms", "kms_master_key_id": "arn:aws:kms:us-east-1:1:key/logs"}
+                                ]}]}
+                            ],
+                        }
+                    }
+                ],
+            },
+            {
+                "mode": "managed",
+                "type": "aws_instance",
+                "name": "web",
+                "instances": [
+                    {"index_key": 0, "attributes": {"availability_zone": "eu-west-1a"}},
+                    {"index_key": 1, "attributes": {"availability_zone": "eu-west-1b", "associate_public_ip_address": True}},
+                ],
+            },
+            {
+                "module": "module.db",
+                "mode": "managed",
+                "type": "aws_db_instance",
+                "name": "main",
+                "instances": [{"index_key": "primary", "attributes": {"storage_encrypted": True, "kms_key_id": "arn:aws:kms:us-east-1:1:key/db", "tags": None}}],
+            },
+            {"mode": "data", "type": "aws_caller_identity", "name": "current", "instances": [{"attributes": {}}]},
+        ],
+        "check_results": None,
+    }
+
+
+def _write(tmp_path: Path, data: dict, name: str = "main.tfstate") -> Path:
+    path = tmp_path / name
+    path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    return path
+
+
+def test_parse_covers_every_instance_and_module(tmp_path):
+    table = parse_tfstate(_write(tmp_path, _state()))
+
+    assert table.resource_id == ["s3-bucket-logs", "instance-web[0]", "instance-web[1]", "module.db.db-instance-main[primary]"]
+    assert table.region == ["us-east-1", "eu-west-1", "eu-west-1", "us-east-1"]
+    assert table.type == ["bucket", "instance", "instance", "instance"]
+    assert table.encryption_enabled == [True, False, False, True]
+    assert table.is_public == [True, False, True, False]
+    assert table.tags[0] == {"DataClass": "PHI"}
+    assert table.tags[3] == {}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_stdlib_stream_is_chunk_size_independent(chunk_size):
+    text = json.dumps(_state())
+    resources = list(_iter_resources_stdlib(io.StringIO(text), chunk_size))
+    assert resources == _state()["resources"]
+
+
+def test_stdlib_stream_handles_empty_state():
+    assert list(_iter_resources_stdlib(io.StringIO("{}"), 4)) == []
+    assert list(_iter_resources_stdlib(io.StringIO('{"version": 4, "resources": []}'), 4)) == []
+
+
+def test_stdlib_stream_rejects_malformed_state():
+    with pytest.raises(ValueError):
+        list(_iter_resources_stdlib(io.StringIO('{"resources": [{"type": "a"} {"type": "b"}]}'), 8))
+
+
+def test_table_feeds_evaluate_like_records(tmp_path):
+    table = parse_tfstate(_write(tmp_path, _state()))
+    assert evaluate(table) == evaluate(table.to_records())
+    assert evaluate(ResourceTable()) == []
+
+
+def test_to_frame_has_normalized_columns(tmp_path):
+    frame = parse_tfstate(_write(tmp_path, _state())).to_frame()
+    assert list(frame.columns) == list(ResourceTable.COLUMNS)
+    assert len(frame) == 4
+
+
+def test_load_resource_table_cached_by_content_hash(tmp_path, monkeypatch):
+    path = _write(tmp_path, _state())
+    first = load_resource_table(path)
+
+    calls = []
+    monkeypatch.setattr(tfstate, "parse_tfstate", lambda p: calls.append(p) or ResourceTable())
+    copy = _write(tmp_path, _state(), name="copy.tfstate")
+    assert load_resource_table(copy) is first
+    assert calls == []
+
+    changed = _state()
+    changed["resources"] = changed["resources"][:1]
+    load_resource_table(_write(tmp_path, changed, name="changed.tfstate"))
+    assert len(calls) == 1
+
+
+def test_tf_source_lists_resource_blocks(tmp_path):
+    path = tmp_path / "main.tf"
+    path.write_text('resource "aws_s3_bucket" "logs" {\n  bucket = "x"\n}\n', encoding="utf-8")
+    table = load_resource_table(path)
+    assert table.resource_id == ["s3-bucket-logs"]
+    assert table.region == ["us-east-1"]
+
+
+@pytest.mark.parametrize(
+    "sse, expected",
+    [
+        ({"sse_algorithm": "AES256"}, False),
+        ({"sse_algorithm": "aws:kms"}, False),
+        ({"sse_algorithm": "aws:kms", "kms_master_key_id": "arn:aws:kms:us-east-1:1:key/k"}, True),
+    ],
+)
+def test_cmk_encryption_requires_kms(sse, expected):
+    attrs = {"server_side_encryption_configuration": [{"rule": [{"apply_server_side_encryption_by_default": [sse]}]}]}
+    row = next(tfstate.normalize_state_resource(
+        {"mode": "managed", "type": "aws_s3_bucket", "name": "b", "instances": [{"attributes": attrs}]}
+    ))
+    assert row["encryption_enabled"] is expected
+
+
+@pytest.mark.parametrize(
+    "attrs, expected",
+    [
+        ({"encrypted": True}, False),
+        ({"storage_encrypted": True}, False),
+        ({"root_block_device": [{"encrypted": True}]}, False),
+        ({"encrypted": True, "kms_key_id": "arn:aws:kms:us-east-1:1:key/k"}, True),
+        ({"root_block_device": [{"encrypted": True, "kms_key_id": "arn:aws:kms:us-east-1:1:key/k"}]}, True),
+    ],
+)
+def test_aws_managed_encryption_is_not_cmk(attrs, expected):
+    row = next(tfstate.normalize_state_resource(
+        {"mode": "managed", "type": "aws_ebs_volume", "name": "v", "instances": [{"attributes": attrs}]}
+    ))
+    assert row["encryption_enabled"] is expected
@@ -0,0 +1,52 @@
+"""
+Vendored vector index tests — upsert, batched search, persistence, hashing embedder.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure sovereignshield package is importable
+_root = Path(__file__).resolve().parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from sovereignshield.rag.vector_index import Embedder, FlatIndex, VectorIndex, load_or_create_index
+
+
+def test_base_index_is_abstract():
+    with pytest.raises(TypeError):
+        VectorIndex()
+
+
+def test_upsert_search_and_round_trip(tmp_path):
+    embedder = Embedder()
+    index = FlatIndex()
+    texts = ["cmk encryption required", "phi tag missing", "bucket is public"]
+    index.add(["a", "b", "c"], embedder.embed_documents(texts), metadatas=[{"fix_code": t} for t in "abc"])
+    index.add(["a"], embedder.embed_documents(["cmk encryption required"]), metadatas=[{"fix_code": "a2"}])
+    assert len(index) == 3
+
+    hits = index.search_batch(embedder.embed_queries(["phi tag missing", "cmk encryption required"]), k=1)
+    assert [h[0].id for h in hits] == ["b", "a"]
+    assert hits[1][0].metadata == {"fix_code": "a2"} and hits[1][0].score == pytest.approx(1.0)
+
+    path = str(tmp_path / "kb.npz")
+    index.save(path)
+    loaded = load_or_create_index(path)
+    assert len(loaded) == 3 and loaded.search(embedder.embed_query("bucket is public"))[0].id == "c"
+
+
+def test_missing_or_corrupt_file_gives_empty_index(tmp_path):
+    corrupt = tmp_path / "bad.npz"
+    corrupt.write_bytes(b"not an npz")
+    assert len(load_or_create_index(str(corrupt))) == 0
+    assert len(load_or_create_index(None)) == 0
+
+
+def test_hashing_embeddings_are_deterministic_and_normalized():
+    first, second = Embedder().embed_documents(["Same text", "same   TEXT"])
+    assert np.allclose(first, second) and np.linalg.norm(first) == pytest.approx(1.0)
@@ -3,17 +3,24 @@ Authentication & Rate Limiting
 API key authentication and rate limiting middleware.
 """
 
-import time
 import hashlib
 import secrets
+import threading
+from collections import OrderedDict
 from typing import Dict, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime
 
 from fastapi import Header, HTTPException, status, Request
 from pydantic import BaseModel, Field
 
 from .config import settings
+from .rate_limit import (
+    InMemoryBackend,
+    RateLimitBackend,
+    RateLimitResult,
+    RateLimitRules,
+    create_backend,
+)
 
 
 # ===== API Key Models =====
@@ -158,15 +165,61 @@ api_key_manager = APIKeyManager()
 
 class RateLimiter:
     """
-    Simple in-memory rate limiter.
+    Sliding-window-counter rate limiter.
     
-    Tracks requests per API key per time window.
+    O(1) memory and work per API key. State lives in a pluggable backend
+    (in-process, shared mmap file, or Redis); see ``rate_limit.py``.
+    Only denied decisions are kept for ``get_retry_after``, in an LRU of at
+    most ``max_tracked_keys`` entries.
     """
     
-    def __init__(self, requests_per_window: int = 100, window_seconds: int = 60):
+    def __init__(
+        self,
+        requests_per_window: int = 100,
+        window_seconds: int = 60,
+        backend: Optional[RateLimitBackend] = None,
+        rules: Optional[RateLimitRules] = None,
+        max_tracked_keys: int = 10000
+    ):
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
-        self._requests: Dict[str, list] = defaultdict(list)
+        self.backend = backend or InMemoryBackend()
+        self.rules = rules or RateLimitRules(requests_per_window, window_seconds)
+        self.max_tracked_keys = max_tracked_keys
+        self._last_results: "OrderedDict[str, RateLimitResult]" = OrderedDict()
+        self._results_lock = threading.Lock()
+    
+    def check(
+        self,
+        key_hash: str,
+        key_id: Optional[str] = None,
+        path: Optional[str] = None,
+        cost: int = 1
+    ) -> RateLimitResult:
+        """
+        Record a request and return the full decision.
+        
+        Args:
+            key_hash: Hashed API key
+            key_id: API key identifier (for per-key limits)
+            path: Request path (for per-route limits)
+            cost: Weight of this request
+            
+        Returns:
+            RateLimitResult: allowed flag, remaining budget and reset timing
+        """
+        policy = self.rules.resolve(key_id=key_id, path=path)
+        bucket = f"{key_hash}:{policy.scope}"
+        result = self.backend.hit(bucket, policy.limit, policy.window_seconds, cost)
+        with self._results_lock:
+            if result.allowed:
+                self._last_results.pop(key_hash, None)
+            else:
+                self._last_results[key_hash] = result
+                self._last_results.move_to_end(key_hash)
+                while len(self._last_results) > self.max_tracked_keys:
+                    self._last_results.popitem(last=False)
+        return result
     
     def is_allowed(self, key_hash: str) -> tuple[bool, int]:
         """
@@ -178,25 +231,8 @@ class RateLimiter:
         Returns:
             tuple: (allowed, remaining_requests)
         """
-        now = time.time()
-        window_start = now - self.window_seconds
-        
-        # Get requests for this key
-        requests = self._requests[key_hash]
-        
-        # Remove old requests outside the window
-        requests = [req_time for req_time in requests if req_time > window_start]
-        self._requests[key_hash] = requests
-        
-        # Check if under limit
-        if len(requests) < self.requests_per_window:
-            # Add this request
-            requests.append(now)
-            remaining = self.requests_per_window - len(requests)
-            return True, remaining
-        else:
-            remaining = 0
-            return False, remaining
+        result = self.check(key_hash)
+        return result.allowed, result.remaining
     
     def get_retry_after(self, key_hash: str) -> int:
         """
@@ -206,23 +242,27 @@ class RateLimiter:
             key_hash: Hashed API key
             
         Returns:
-            int: Seconds until reset
+            int: Seconds until reset (0 if the last request was allowed)
         """
-        requests = self._requests[key_hash]
-        if not requests:
-            return 0
-        
-        oldest_request = min(requests)
-        reset_time = oldest_request + self.window_seconds
-        retry_after = max(0, int(reset_time - time.time()))
-        
-        return retry_after
+        result = self._last_results.get(key_hash)
+        return result.retry_after if result else 0
 
 
 # Global rate limiter
 rate_limiter = RateLimiter(
     requests_per_window=settings.rate_limit_requests,
-    window_seconds=settings.rate_limit_window
+    window_seconds=settings.rate_limit_window,
+    backend=create_backend(
+        settings.rate_limit_backend,
+        shared_path=settings.rate_limit_shared_path,
+        redis_url=settings.rate_limit_redis_url
+    ),
+    rules=RateLimitRules(
+        default_limit=settings.rate_limit_requests,
+        window_seconds=settings.rate_limit_window,
+        key_limits=settings.rate_limit_key_limits,
+        route_limits=settings.rate_limit_route_limits
+    )
 )
 
 
@@ -275,25 +315,16 @@ async def verify_api_key(
     
     # Check rate limit if enabled
     if settings.rate_limit_enabled:
-        allowed, remaining = rate_limiter.is_allowed(key_hash)
+        result = rate_limiter.check(key_hash, key_id=api_key.key_id, path=request.url.path)
         
-        # Add rate limit headers to response (will be added by middleware)
-        request.state.rate_limit_remaining = remaining
-        request.state.rate_limit_limit = settings.rate_limit_requests
-        request.state.rate_limit_reset = rate_limiter.window_seconds
+        # Rate limit headers are added to the response by middleware
+        request.state.rate_limit = result
         
-        if not allowed:
-            retry_after = rate_limiter.get_retry_after(key_hash)
-            
+        if not result.allowed:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Rate limit exceeded. Try again in {retry_after} seconds.",
-                headers={
-                    "Retry-After": str(retry_after),
-                    "X-RateLimit-Limit": str(settings.rate_limit_requests),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(retry_after)
-                }
+                detail=f"Rate limit exceeded. Try again in {result.retry_after} seconds.",
+                headers=result.headers()
             )
     
     return key_hash
@@ -301,18 +332,18 @@ async def verify_api_key(
 
 # ===== Rate Limit Middleware =====
 
-@app.middleware("http")
 async def add_rate_limit_headers(request: Request, call_next):
     """
     Add rate limit headers to responses.
+    
+    Registered in ``main.py`` with ``app.middleware("http")``.
     """
     response = await call_next(request)
     
     # Add rate limit headers if available
-    if hasattr(request.state, 'rate_limit_remaining'):
-        response.headers["X-RateLimit-Limit"] = str(request.state.rate_limit_limit)
-        response.headers["X-RateLimit-Remaining"] = str(request.state.rate_limit_remaining)
-        response.headers["X-RateLimit-Reset"] = str(request.state.rate_limit_reset)
+    result = getattr(request.state, "rate_limit", None)
+    if result is not None:
+        for name, value in result.headers().items():
+            response.headers[name] = value
     
     return response
-
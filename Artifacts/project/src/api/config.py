@@ -4,7 +4,7 @@ Manages environment-specific configuration for the HEDIS API.
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -67,6 +67,26 @@ class APISettings(BaseSettings):
         default=60,
         description="Rate limit window in seconds"
     )
+    rate_limit_backend: str = Field(
+        default="memory",
+        description="Rate limit storage: memory, shared (local workers) or redis"
+    )
+    rate_limit_shared_path: Optional[str] = Field(
+        default=None,
+        description="mmap file for the shared backend (default: ./.ratelimit.mmap)"
+    )
+    rate_limit_redis_url: Optional[str] = Field(
+        default=None,
+        description="Redis URL for the redis backend"
+    )
+    rate_limit_key_limits: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per API key_id request limits, e.g. {\"dev-key-001\": 1000}"
+    )
+    rate_limit_route_limits: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per route-prefix request limits, e.g. {\"/api/v1/predict/batch\": 10}"
+    )
     
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
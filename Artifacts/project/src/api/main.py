@@ -11,16 +11,18 @@ import time
 import uuid
 import logging
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from .config import settings
 from .dependencies import model_cache
+from .auth import add_rate_limit_headers
+from . import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -57,6 +59,21 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 HEDIS API Shutting Down...")
+
+    # Drain queued audit entries before the DB pools go away
+    try:
+        from src.database.audit_writer import close_audit_writer
+        close_audit_writer()
+    except ImportError as e:
+        logger.debug(f"Audit writer unavailable: {e}")
+
+    # Dispose the async DB pool if any router opted in to get_async_db
+    try:
+        from src.database.async_connection import close_async_database_connections
+        await close_async_database_connections()
+    except ImportError as e:
+        logger.debug(f"Async database path unavailable: {e}")
+
     logger.info("✅ Cleanup Complete")
 
 
@@ -107,12 +124,26 @@ async def add_request_id(request: Request, call_next):
 async def add_process_time_header(request: Request, call_next):
     """
     Track and log request processing time.
+    Records request count and latency histograms for /metrics.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.record_request(
+            request.method, metrics.route_template(request), 500,
+            time.perf_counter() - start_time, metrics.measure_label(request)
+        )
+        raise
     
-    process_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+    elapsed = time.perf_counter() - start_time
+    metrics.record_request(
+        request.method, metrics.route_template(request), response.status_code,
+        elapsed, metrics.measure_label(request)
+    )
+    
+    process_time = elapsed * 1000  # Convert to milliseconds
     response.headers["X-Process-Time-Ms"] = str(round(process_time, 2))
     
     # Log request if enabled
@@ -147,6 +178,10 @@ async def log_requests(request: Request, call_next):
     return response
 
 
+# Rate Limit Headers Middleware
+app.middleware("http")(add_rate_limit_headers)
+
+
 # ===== Exception Handlers =====
 
 @app.exception_handler(StarletteHTTPException)
@@ -292,12 +327,35 @@ async def liveness_check() -> Dict[str, Any]:
     }
 
 
+# ===== Metrics Endpoints =====
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    """
+    Prometheus scrape endpoint (text exposition format 0.0.4).
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/stats", tags=["Health"])
+async def api_stats(endpoint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    API statistics since process start.
+    
+    Computed from in-process metrics (no audit-log scan): request count,
+    error rate, latency percentiles, model/SHAP time and cache hit ratios.
+    Filter by route template, e.g. `/api/v1/predict/{measure_code}`.
+    """
+    return metrics.get_stats(endpoint)
+
+
 # ===== Router Registration =====
-from .routers import prediction, portfolio, analytics, measures
+from .routers import prediction, portfolio, analytics, measures, exports
 app.include_router(prediction.router, prefix="/api/v1", tags=["Predictions"])
 app.include_router(portfolio.router, prefix="/api/v1", tags=["Portfolio"])
 app.include_router(analytics.router, prefix="/api/v1", tags=["Analytics"])
 app.include_router(measures.router, prefix="/api/v1", tags=["Measures"])
+app.include_router(exports.router, prefix="/api/v1", tags=["Exports"])
 
 
 # ===== Main Entry Point =====
@@ -0,0 +1,473 @@
+"""
+API Metrics
+In-process counters and latency histograms exposed in Prometheus text format.
+
+Overhead:
+    Recording is a dict lookup, a bisect over <= 15 bucket bounds and a
+    few integer adds under a per-metric lock - no allocation per request
+    once a label set has been seen. Rendering happens only on /metrics.
+
+Cardinality:
+    Routes are labelled with their template (``/api/v1/predict/{measure_code}``),
+    never the raw path, so member hashes cannot leak into label values.
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets (seconds): 5ms .. 10s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+# Model/SHAP/DB-wait buckets (seconds): 0.1ms .. 2.5s
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    """Base class: name, help text, label names and a lock."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines for this metric (HELP/TYPE header first)."""
+
+    @abstractmethod
+    def reset(self):
+        """Clear recorded samples."""
+
+
+class Counter(_Metric):
+    """Monotonic counter keyed by label values."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram keyed by label values.
+
+    Notes:
+        - Bucket counts are stored non-cumulatively and summed at render time
+        - ``quantile`` interpolates linearly inside a bucket, like PromQL's
+          histogram_quantile
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of the enclosed block (seconds)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **match) -> Tuple[List[int], float]:
+        """
+        Merge bucket counts and sums across label sets matching ``match``.
+
+        Returns:
+            tuple: (non-cumulative bucket counts incl. +Inf, sum)
+        """
+        filters = [(self.labelnames.index(k), str(v)) for k, v in match.items()]
+        merged = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        with self._lock:
+            for key, counts in self._counts.items():
+                if all(key[i] == v for i, v in filters):
+                    for i, c in enumerate(counts):
+                        merged[i] += c
+                    total += self._sums[key]
+        return merged, total
+
+    def count(self, **match) -> int:
+        return sum(self.snapshot(**match)[0])
+
+    def mean(self, **match) -> float:
+        counts, total = self.snapshot(**match)
+        n = sum(counts)
+        return total / n if n else 0.0
+
+    def quantile(self, q: float, **match) -> float:
+        counts, _ = self.snapshot(**match)
+        n = sum(counts)
+        if not n:
+            return 0.0
+        rank = q * n
+        cumulative = 0
+        for i, c in enumerate(counts):
+            if cumulative + c >= rank and c:
+                if i == len(self.buckets):
+                    # Observations above the top bucket: report its bound
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * ((rank - cumulative) / c)
+            cumulative += c
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, c in zip(bounds, counts):
+                cumulative += c
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class GaugeCallback(_Metric):
+    """Gauge whose samples are read from a callback at render time."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            samples = self.callback() or {}
+        except Exception:
+            return []
+        lines = self.header()
+        for key, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def reset(self):
+        pass  # Samples live in the callback's source
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self.started_at = time.time()
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = ()
+    ) -> GaugeCallback:
+        return self.register(GaugeCallback(name, documentation, callback, labelnames))
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Clear recorded samples (tests)."""
+        for metric in self._metrics.values():
+            metric.reset()
+        self.started_at = time.time()
+
+
+# ===== Global Registry =====
+
+registry = MetricsRegistry()
+
+REQUESTS_TOTAL = registry.counter(
+    "hedis_api_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+
+REQUEST_LATENCY = registry.histogram(
+    "hedis_api_request_duration_seconds",
+    "HTTP request latency by route template and measure.",
+    ("method", "route", "measure"),
+)
+
+MODEL_INFERENCE_SECONDS = registry.histogram(
+    "hedis_model_inference_seconds",
+    "Model predict_proba time per call.",
+    ("measure",),
+    buckets=FAST_BUCKETS,
+)
+
+SHAP_SECONDS = registry.histogram(
+    "hedis_shap_seconds",
+    "SHAP explanation time per call.",
+    ("measure",),
+    buckets=FAST_BUCKETS,
+)
+
+CACHE_REQUESTS = registry.counter(
+    "hedis_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ("cache", "result"),
+)
+
+
+def _pool_wait_samples() -> Dict[Tuple[str, ...], float]:
+    from src.database.async_connection import pool_metrics
+    from src.database.connection import sync_pool_metrics
+    samples = {}
+    for pool_name, source in (("async", pool_metrics), ("sync", sync_pool_metrics)):
+        snapshot = source.snapshot()
+        samples[(pool_name, "avg")] = snapshot["avg_checkout_wait_ms"] / 1000.0
+        samples[(pool_name, "max")] = snapshot["max_checkout_wait_ms"] / 1000.0
+    return samples
+
+
+registry.gauge_callback(
+    "hedis_db_pool_checkout_wait_seconds",
+    "DB pool checkout wait since start by pool (async/sync) and stat (avg/max).",
+    _pool_wait_samples,
+    ("pool", "stat"),
+)
+
+
+def _sync_pool_samples() -> Dict[Tuple[str, ...], float]:
+    from src.database.connection import engine
+    # QueuePool.overflow() starts at -pool_size and only reaches 0 once the
+    # pool is full, so clamp it to the number of overflow connections in use
+    return {
+        ("checked_out",): max(0, engine.pool.checkedout()),
+        ("checked_in",): max(0, engine.pool.checkedin()),
+        ("overflow",): max(0, engine.pool.overflow()),
+    }
+
+
+registry.gauge_callback(
+    "hedis_db_pool_connections",
+    "Sync DB pool connections by state.",
+    _sync_pool_samples,
+    ("state",),
+)
+
+
+# ===== Recording Helpers =====
+
+def route_template(request) -> str:
+    """
+    Return the matched route template, or 'unmatched' (bounded cardinality).
+
+    Routes from an included router carry a template relative to that router
+    (``/predict/{measure_code}``); the include prefix is restored from the
+    leading segments of the request path, which are literal by construction.
+    """
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    if ":path}" in template:
+        return template
+    path_segments = request.url.path.rstrip("/").split("/")
+    template_segments = template.rstrip("/").split("/")
+    extra = len(path_segments) - len(template_segments)
+    if extra > 0:
+        template = "/".join(path_segments[:extra + 1]) + template
+    return template or "/"
+
+
+def measure_label(request) -> str:
+    """Return the measure_code path parameter, if the route has one."""
+    measure = request.path_params.get("measure_code") if request.path_params else None
+    return measure.upper() if measure else ""
+
+
+def record_request(method: str, route: str, status_code: int, duration_seconds: float, measure: str = ""):
+    """Record one completed HTTP request."""
+    REQUESTS_TOTAL.inc(method=method, route=route, status=status_code)
+    REQUEST_LATENCY.observe(duration_seconds, method=method, route=route, measure=measure)
+
+
+def record_cache(cache: str, hit: bool):
+    """Record one cache lookup."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_ratio(cache: Optional[str] = None) -> Optional[float]:
+    """Hit ratio for one cache (or all caches); None before any lookups."""
+    hits = misses = 0.0
+    for (name, result), value in CACHE_REQUESTS.items():
+        if cache is not None and name != cache:
+            continue
+        if result == "hit":
+            hits += value
+        else:
+            misses += value
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+# ===== Stats =====
+
+def get_stats(endpoint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    API statistics since process start, computed from in-process metrics.
+
+    Args:
+        endpoint: Optional route template filter
+
+    Returns:
+        dict: Same keys as crud.get_api_stats (total_requests,
+        avg_response_time, error_rate, requests_by_endpoint) plus latency
+        percentiles, model/SHAP timing and cache hit ratios
+    """
+    total = errors = 0.0
+    by_endpoint: Dict[str, float] = {}
+    for (method, route, status_code), value in REQUESTS_TOTAL.items():
+        if endpoint and route != endpoint:
+            continue
+        total += value
+        if int(status_code) >= 400:
+            errors += value
+        by_endpoint[route] = by_endpoint.get(route, 0) + value
+
+    match = {"route": endpoint} if endpoint else {}
+    caches = sorted({name for (name, _), _ in CACHE_REQUESTS.items()})
+
+    return {
+        "total_requests": int(total),
+        "avg_response_time": round(REQUEST_LATENCY.mean(**match) * 1000, 2),
+        "error_rate": round(errors / total * 100, 2) if total else 0,
+        "requests_by_endpoint": {route: int(count) for route, count in by_endpoint.items()},
+        "latency_ms": {
+            "p50": round(REQUEST_LATENCY.quantile(0.50, **match) * 1000, 2),
+            "p95": round(REQUEST_LATENCY.quantile(0.95, **match) * 1000, 2),
+            "p99": round(REQUEST_LATENCY.quantile(0.99, **match) * 1000, 2),
+        },
+        "model_inference_ms": {
+            "count": MODEL_INFERENCE_SECONDS.count(),
+            "avg": round(MODEL_INFERENCE_SECONDS.mean() * 1000, 3),
+            "p95": round(MODEL_INFERENCE_SECONDS.quantile(0.95) * 1000, 3),
+        },
+        "shap_ms": {
+            "count": SHAP_SECONDS.count(),
+            "avg": round(SHAP_SECONDS.mean() * 1000, 3),
+            "p95": round(SHAP_SECONDS.quantile(0.95) * 1000, 3),
+        },
+        "cache_hit_ratio": {name: cache_hit_ratio(name) for name in caches},
+        "uptime_seconds": round(time.time() - registry.started_at, 1),
+    }
@@ -0,0 +1,431 @@
+"""
+Rate Limiting Subsystem
+Sliding-window-counter rate limiting with pluggable storage backends.
+
+Algorithm:
+    Each (key, scope) keeps three numbers: the index of the current fixed
+    window, the count in that window, and the count in the previous window.
+    The estimated rate is ``previous * overlap + current`` where ``overlap``
+    is the fraction of the previous window still inside the sliding window.
+    Memory per key and work per request are both O(1).
+
+Backends:
+    - memory: per-process dict (default)
+    - shared: mmap'd slot table in a local file, shared by workers on one host
+    - redis: atomic Lua script, shared across hosts
+"""
+
+import os
+import math
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    FCNTL_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+# ===== Core Algorithm =====
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a single rate-limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int  # Seconds until the current window rolls over
+    retry_after: int  # Seconds until a denied request would be allowed (0 if allowed)
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Standard ``RateLimit-*`` headers plus legacy ``X-RateLimit-*`` aliases.
+        """
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_after),
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_after),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+# (window_index, current_count, previous_count)
+WindowState = Tuple[int, float, float]
+
+
+def sliding_window_hit(
+    state: Optional[WindowState],
+    now: float,
+    limit: int,
+    window_seconds: int,
+    cost: int = 1
+) -> Tuple[WindowState, RateLimitResult]:
+    """
+    Apply one request to a sliding-window-counter state.
+
+    Args:
+        state: Previous state or None for a new key
+        now: Current time (seconds)
+        limit: Max requests per window
+        window_seconds: Window length in seconds
+        cost: Weight of this request
+
+    Returns:
+        tuple: (new_state, result). The count only increases if allowed.
+    """
+    index = int(now // window_seconds)
+    current, previous = 0.0, 0.0
+
+    if state is not None:
+        last_index, last_current, last_previous = state
+        if index == last_index:
+            current, previous = last_current, last_previous
+        elif index == last_index + 1:
+            previous = last_current
+
+    elapsed = now - index * window_seconds
+    overlap = 1.0 - elapsed / window_seconds
+    estimated = previous * overlap + current
+    reset_after = max(1, math.ceil(window_seconds - elapsed))
+
+    if estimated + cost <= limit:
+        current += cost
+        remaining = max(0, int(limit - (estimated + cost)))
+        return (index, current, previous), RateLimitResult(True, limit, remaining, reset_after, 0)
+
+    # Denied: find when previous-window decay frees enough room
+    room = limit - current - cost
+    if room >= 0 and previous > 0:
+        wait = (window_seconds * (1.0 - room / previous)) - elapsed
+    else:
+        # Current window alone is full; next window inherits it as "previous"
+        wait = window_seconds - elapsed
+        next_room = limit - cost
+        if current > 0 and next_room >= 0:
+            wait += window_seconds * (1.0 - next_room / current)
+    retry_after = max(1, math.ceil(wait))
+
+    return (index, current, previous), RateLimitResult(False, limit, 0, reset_after, retry_after)
+
+
+# ===== Backends =====
+
+class RateLimitBackend(ABC):
+    """Storage backend for sliding-window state."""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: int, cost: int = 1) -> RateLimitResult:
+        """Record a request for ``key`` and return the decision."""
+
+    def reset(self, key: Optional[str] = None) -> None:
+        """Clear state for one key, or all keys."""
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Per-process backend.
+
+    Each worker process keeps its own counters, so the effective limit is
+    multiplied by the worker count. Use ``shared`` or ``redis`` for
+    multi-worker deployments.
+
+    Like the Redis backend, a key expires after two windows of inactivity
+    (its state no longer affects the estimate); expired keys are swept at
+    most once per ``sweep_interval`` seconds, so memory tracks active keys.
+    """
+
+    def __init__(self, clock=time.time, sweep_interval: float = 60.0):
+        self._clock = clock
+        self.sweep_interval = sweep_interval
+        # key -> (state, expires_at)
+        self._states: Dict[str, Tuple[WindowState, float]] = {}
+        self._next_sweep = clock() + sweep_interval
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: int, cost: int = 1) -> RateLimitResult:
+        now = self._clock()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            stored = self._states.get(key)
+            state = stored[0] if stored is not None and stored[1] > now else None
+            state, result = sliding_window_hit(state, now, limit, window_seconds, cost)
+            self._states[key] = (state, now + 2 * window_seconds)
+        return result
+
+    def _sweep(self, now: float) -> None:
+        for key in [k for k, (_, expires_at) in self._states.items() if expires_at <= now]:
+            del self._states[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+
+
+class SharedFileBackend(RateLimitBackend):
+    """
+    Backend shared by worker processes on one host via an mmap'd file.
+
+    Layout:
+        Fixed table of ``slots`` records; each record is
+        (key_hash uint64, window_index int64, current float64, previous float64).
+        Keys are placed by open addressing over ``probe`` neighbouring slots.
+        A stale slot (no activity in the last two windows) is reclaimed when
+        the probe range is full.
+
+    Notes:
+        - Whole-table ``flock`` for cross-process atomicity; the critical
+          section is a handful of struct reads/writes
+        - POSIX only (requires fcntl)
+    """
+
+    _RECORD = struct.Struct("<Qqdd")
+
+    def __init__(self, path: str, slots: int = 4096, probe: int = 8, clock=time.time):
+        if not FCNTL_AVAILABLE:
+            raise RuntimeError("SharedFileBackend requires fcntl (POSIX)")
+
+        self.path = path
+        self.slots = slots
+        self.probe = min(probe, slots)
+        self._clock = clock
+        self._thread_lock = threading.Lock()
+
+        size = self._RECORD.size * slots
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock_file = open(path, "rb")
+
+    @staticmethod
+    def _key_hash(key: str) -> int:
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        # 0 marks an empty slot
+        return int.from_bytes(digest, "little") or 1
+
+    def _read(self, slot: int) -> Tuple[int, int, float, float]:
+        return self._RECORD.unpack_from(self._mm, slot * self._RECORD.size)
+
+    def _write(self, slot: int, key_hash: int, state: WindowState) -> None:
+        self._RECORD.pack_into(self._mm, slot * self._RECORD.size, key_hash, *state)
+
+    def _find_slot(self, key_hash: int, window_index: int) -> Tuple[int, Optional[WindowState]]:
+        start = key_hash % self.slots
+        reclaim = None
+        for i in range(self.probe):
+            slot = (start + i) % self.slots
+            stored_hash, index, current, previous = self._read(slot)
+            if stored_hash == key_hash:
+                return slot, (index, current, previous)
+            if stored_hash == 0:
+                return (reclaim if reclaim is not None else slot), None
+            if reclaim is None and index < window_index - 1:
+                reclaim = slot
+        # Table region full of live keys: evict the home slot
+        return (reclaim if reclaim is not None else start), None
+
+    def hit(self, key: str, limit: int, window_seconds: int, cost: int = 1) -> RateLimitResult:
+        key_hash = self._key_hash(key)
+        now = self._clock()
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                slot, state = self._find_slot(key_hash, int(now // window_seconds))
+                new_state, result = sliding_window_hit(state, now, limit, window_seconds, cost)
+                self._write(slot, key_hash, new_state)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        return result
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                if key is None:
+                    self._mm[:] = b"\x00" * len(self._mm)
+                else:
+                    key_hash = self._key_hash(key)
+                    start = key_hash % self.slots
+                    for i in range(self.probe):
+                        slot = (start + i) % self.slots
+                        if self._read(slot)[0] == key_hash:
+                            self._write(slot, 0, (0, 0.0, 0.0))
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        """Release the mapping and lock file."""
+        self._mm.close()
+        self._lock_file.close()
+
+
+# Same algorithm as sliding_window_hit, executed atomically inside Redis.
+# KEYS[1] = state hash; ARGV = now, limit, window_seconds, cost
+_REDIS_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local index = math.floor(now / window)
+
+local state = redis.call('HMGET', KEYS[1], 'i', 'c', 'p')
+local current, previous = 0, 0
+local last_index = tonumber(state[1])
+if last_index then
+    if index == last_index then
+        current = tonumber(state[2]); previous = tonumber(state[3])
+    elseif index == last_index + 1 then
+        previous = tonumber(state[2])
+    end
+end
+
+local elapsed = now - index * window
+local estimated = previous * (1 - elapsed / window) + current
+local allowed = 0
+if estimated + cost <= limit then
+    current = current + cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'i', index, 'c', current, 'p', previous)
+redis.call('EXPIRE', KEYS[1], window * 2)
+return {allowed, tostring(current), tostring(previous), index}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Backend shared across hosts through Redis.
+
+    The read-modify-write runs in one Lua script, so concurrent workers
+    never double count. Keys expire after two windows of inactivity.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = "ratelimit:", clock=time.time):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("RedisBackend requires the 'redis' package")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self._client = client
+        self._prefix = prefix
+        self._clock = clock
+        self._script = client.register_script(_REDIS_SLIDING_WINDOW_LUA)
+
+    def hit(self, key: str, limit: int, window_seconds: int, cost: int = 1) -> RateLimitResult:
+        now = self._clock()
+        allowed, current, previous, index = self._script(
+            keys=[self._prefix + key], args=[now, limit, window_seconds, cost]
+        )
+        # Re-derive headers locally from the authoritative post-update state
+        state = (int(index), float(current) - (cost if allowed else 0), float(previous))
+        _, result = sliding_window_hit(state, now, limit, window_seconds, cost)
+        return result
+
+    def reset(self, key: Optional[str] = None) -> None:
+        if key is not None:
+            self._client.delete(self._prefix + key)
+            return
+        for found in self._client.scan_iter(match=self._prefix + "*"):
+            self._client.delete(found)
+
+
+def create_backend(name: str, shared_path: Optional[str] = None, redis_url: Optional[str] = None) -> RateLimitBackend:
+    """
+    Build a backend by name, falling back to in-memory if unavailable.
+
+    Args:
+        name: "memory", "shared" or "redis"
+        shared_path: File for the shared backend
+        redis_url: Connection URL for the redis backend
+
+    Returns:
+        RateLimitBackend: Configured backend
+    """
+    name = (name or "memory").lower()
+    try:
+        if name == "shared":
+            return SharedFileBackend(shared_path or os.path.join(os.getcwd(), ".ratelimit.mmap"))
+        if name == "redis":
+            return RedisBackend(url=redis_url)
+    except Exception as e:
+        logger.warning(f"Rate limit backend '{name}' unavailable ({e}); using in-memory backend")
+        return InMemoryBackend()
+
+    if name != "memory":
+        logger.warning(f"Unknown rate limit backend '{name}'; using in-memory backend")
+    return InMemoryBackend()
+
+
+# ===== Policies =====
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Limit applied to a request."""
+    limit: int
+    window_seconds: int
+    scope: str = "global"
+
+
+class RateLimitRules:
+    """
+    Resolve which policy applies to a request.
+
+    The longest matching route prefix wins, then the default. A key override
+    replaces that key's global budget, and on a limited route applies only
+    if it is stricter (the lower of the two limits), so an override never
+    loosens a route limit. Route policies use their own counters so a tight
+    limit on one endpoint doesn't consume the global budget.
+    """
+
+    def __init__(
+        self,
+        default_limit: int,
+        window_seconds: int,
+        key_limits: Optional[Dict[str, int]] = None,
+        route_limits: Optional[Dict[str, int]] = None
+    ):
+        self.default = RateLimitPolicy(default_limit, window_seconds)
+        self.key_limits = dict(key_limits or {})
+        # Longest prefix first
+        self.route_limits = sorted((route_limits or {}).items(), key=lambda item: -len(item[0]))
+        self.window_seconds = window_seconds
+
+    def resolve(self, key_id: Optional[str] = None, path: Optional[str] = None) -> RateLimitPolicy:
+        key_limit = self.key_limits.get(key_id) if key_id else None
+        if path:
+            for prefix, limit in self.route_limits:
+                if path.startswith(prefix):
+                    if key_limit is not None:
+                        limit = min(limit, key_limit)
+                    return RateLimitPolicy(limit, self.window_seconds, f"route:{prefix}")
+        if key_limit is not None:
+            return RateLimitPolicy(key_limit, self.window_seconds)
+        return self.default
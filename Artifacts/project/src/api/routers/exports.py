@@ -0,0 +1,159 @@
+"""
+Exports Router
+Streaming NDJSON/CSV exports for large gap lists and member prediction histories.
+"""
+
+import logging
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Query
+from fastapi.responses import StreamingResponse
+
+from ..auth import verify_api_key
+from ..streaming import streaming_export
+
+# Import database layer
+import sys
+sys.path.append(".")
+from src.database import crud
+from src.database.connection import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+GAP_EXPORT_FIELDS = [
+    "gap_id", "member_hash", "measure_code", "measurement_year",
+    "gap_probability", "priority_score", "intervention_type",
+    "estimated_cost", "estimated_value", "status",
+]
+
+PREDICTION_EXPORT_FIELDS = [
+    "prediction_id", "member_hash", "measure_code", "measurement_year",
+    "gap_probability", "risk_tier", "risk_score", "top_features",
+    "recommendation", "model_version", "prediction_date",
+]
+
+EXPORT_FORMAT = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv")
+
+
+# ===== Dependencies =====
+
+def get_session_factory():
+    """
+    Session factory used by streaming exports.
+
+    Streams outlive the request's dependency scope, so each stream opens
+    and closes its own session instead of using ``get_db``.
+    """
+    return SessionLocal
+
+
+def _stream_rows(session_factory, query_fn, request_id: str, **filters) -> Iterator:
+    """Yield rows from a crud ``iter_*`` function inside a dedicated session."""
+    db = session_factory()
+    try:
+        yield from query_fn(db, **filters)
+    except Exception as e:
+        logger.error(f"Export stream failed | Error: {e} | Request-ID: {request_id}")
+        raise
+    finally:
+        db.close()
+
+
+def _audit_export(request: Request, key_hash: str, entity_type: str, entity_id: str, changes: dict):
+    """Record a bulk export in the audit log (queued; never blocks the stream)."""
+    crud.queue_audit_log(
+        event_type="data_export",
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action="export",
+        changes=changes,
+        user_id=key_hash,
+        ip_address=request.client.host if request.client else None
+    )
+
+
+# ===== Export Endpoints =====
+
+@router.get("/exports/gaps", tags=["Exports"])
+async def export_gaps(
+    request: Request,
+    format: str = EXPORT_FORMAT,
+    measure_code: Optional[str] = Query(None, description="Filter by measure code"),
+    gap_status: Optional[str] = Query(None, alias="status", description="Filter by gap status"),
+    min_priority: Optional[float] = Query(None, ge=0, description="Minimum priority score"),
+    batch_size: int = Query(1000, ge=100, le=10000, description="Rows fetched per DB round-trip"),
+    key_hash: str = Depends(verify_api_key),
+    session_factory=Depends(get_session_factory)
+) -> StreamingResponse:
+    """
+    Stream all gaps matching the filters, highest priority first.
+
+    **Formats:** NDJSON (one JSON object per line) or CSV
+
+    **Trailer:** The last line carries the row count
+    (`{"_meta": {"row_count": N}}` or `# row_count=N`).
+
+    **Memory:** Constant - rows are read through a server-side cursor.
+    """
+    request_id = getattr(request.state, 'request_id', 'unknown')
+
+    logger.info(
+        f"Gap Export | Format: {format} | Measure: {measure_code or 'all'} | "
+        f"Request-ID: {request_id}"
+    )
+
+    _audit_export(request, key_hash, "GapAnalysis", measure_code or "all", {
+        "format": format, "status": gap_status, "min_priority": min_priority
+    })
+
+    rows = _stream_rows(
+        session_factory,
+        crud.iter_gaps,
+        request_id,
+        measure_code=measure_code.upper() if measure_code else None,
+        status=gap_status,
+        min_priority=min_priority,
+        batch_size=batch_size
+    )
+    return streaming_export(rows, format, GAP_EXPORT_FIELDS, "gaps")
+
+
+@router.get("/exports/members/{member_hash}/predictions", tags=["Exports"])
+async def export_member_predictions(
+    member_hash: str,
+    request: Request,
+    format: str = EXPORT_FORMAT,
+    measure_code: Optional[str] = Query(None, description="Filter by measure code"),
+    measurement_year: Optional[int] = Query(None, description="Filter by measurement year"),
+    key_hash: str = Depends(verify_api_key),
+    session_factory=Depends(get_session_factory)
+) -> StreamingResponse:
+    """
+    Stream a member's prediction history, newest first.
+
+    **PHI Protection:** Accepts the hashed member ID only.
+    """
+    request_id = getattr(request.state, 'request_id', 'unknown')
+
+    if len(member_hash) not in (16, 64):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="member_hash must be a hashed member ID"
+        )
+
+    _audit_export(request, key_hash, "Prediction", member_hash, {
+        "format": format, "measure_code": measure_code, "measurement_year": measurement_year
+    })
+
+    rows = _stream_rows(
+        session_factory,
+        crud.iter_member_predictions,
+        request_id,
+        member_hash=member_hash,
+        measure_code=measure_code.upper() if measure_code else None,
+        measurement_year=measurement_year
+    )
+    return streaming_export(rows, format, PREDICTION_EXPORT_FIELDS, "member_predictions")
@@ -9,7 +9,7 @@ from typing import Dict, List, Optional, Any
 import hashlib
 
 from fastapi import APIRouter, HTTPException, status, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from ..schemas.prediction import (
     PredictionRequest,
@@ -21,6 +21,8 @@ from ..schemas.prediction import (
 )
 from ..dependencies import get_model_cache, hash_member_id, ModelCache
 from ..config import get_settings, APISettings
+from ..streaming import iter_ndjson, NDJSON_MEDIA_TYPE
+from .. import metrics
 
 # Import HEDIS utilities
 import sys
@@ -41,6 +43,7 @@ def load_measure_model(measure_code: str, cache: ModelCache):
     """
     # Check cache first
     model = cache.get_model(measure_code)
+    metrics.record_cache("model", model is not None)
     if model is not None:
         return model
     
@@ -130,10 +133,28 @@ def extract_member_features(member_id: str, measure_code: str, measurement_year:
     return features
 
 
-def calculate_shap_values(model: Any, features: Dict, feature_names: List[str]) -> Dict[str, float]:
+def predict_gap_probability(model: Any, feature_array: Any, measure_code: str) -> float:
+    """
+    Gap probability for one prepared feature row (timed for /metrics).
+    """
+    with metrics.MODEL_INFERENCE_SECONDS.time(measure=measure_code):
+        return float(model.predict_proba(feature_array)[0][1])
+
+
+def calculate_shap_values(
+    model: Any,
+    features: Dict,
+    feature_names: List[str],
+    measure_code: str = ""
+) -> Dict[str, float]:
     """
     Calculate SHAP values for model interpretability.
     """
+    with metrics.SHAP_SECONDS.time(measure=measure_code):
+        return _calculate_shap_values(model, features, feature_names)
+
+
+def _calculate_shap_values(model: Any, features: Dict, feature_names: List[str]) -> Dict[str, float]:
     try:
         import shap
         import pandas as pd
@@ -202,6 +223,62 @@ def generate_recommendation(measure_code: str, probability: float, features: Dic
         return f"Low risk for {measure_name} gap. Continue routine monitoring."
 
 
+def predict_member(
+    member_id: str,
+    measure_code: str,
+    model: Any,
+    scaler: Any,
+    measurement_year: int,
+    include_shap: bool,
+    model_version: str
+) -> PredictionResponse:
+    """
+    Score one member for one measure (batch and streaming batch path).
+    
+    SHAP values are only calculated for high-risk members when include_shap=True.
+    """
+    import pandas as pd
+    
+    # Hash member ID
+    member_hash = hash_member_id(member_id)
+    
+    # Extract features
+    features = extract_member_features(member_id, measure_code, measurement_year)
+    
+    # Prepare and scale features
+    feature_df = pd.DataFrame([features])
+    if scaler:
+        feature_array = scaler.transform(feature_df)
+    else:
+        feature_array = feature_df.values
+    
+    # Predict
+    gap_probability = predict_gap_probability(model, feature_array, measure_code)
+    risk_tier = determine_risk_tier(gap_probability)
+    
+    # Calculate SHAP only for high-risk if requested
+    shap_values = None
+    top_features = []
+    if include_shap and risk_tier == "high":
+        shap_values = calculate_shap_values(model, features, list(features.keys()), measure_code)
+        top_features = [
+            {"name": name, "value": features.get(name), "impact": impact}
+            for name, impact in shap_values.items()
+        ]
+    
+    return PredictionResponse(
+        member_hash=member_hash,
+        measure_code=measure_code,
+        risk_score=gap_probability,
+        risk_tier=risk_tier,
+        gap_probability=gap_probability,
+        shap_values=shap_values,
+        top_features=top_features,
+        recommendation=generate_recommendation(measure_code, gap_probability, features),
+        model_version=model_version
+    )
+
+
 # ===== Prediction Endpoints =====
 
 @router.post("/predict/{measure_code}", response_model=PredictionResponse, tags=["Predictions"])
@@ -264,14 +341,14 @@ async def predict_single_member(
             feature_array = feature_df.values
         
         # Generate prediction
-        gap_probability = float(model.predict_proba(feature_array)[0][1])
+        gap_probability = predict_gap_probability(model, feature_array, measure_code)
         risk_tier = determine_risk_tier(gap_probability)
         
         # Calculate SHAP values if requested
         shap_values = None
         top_features = []
         if request_data.include_shap and hasattr(model, 'feature_importances_'):
-            shap_values = calculate_shap_values(model, features, list(features.keys()))
+            shap_values = calculate_shap_values(model, features, list(features.keys()), measure_code)
             top_features = [
                 {"name": name, "value": features.get(name), "impact": impact}
                 for name, impact in shap_values.items()
@@ -358,57 +435,24 @@ async def predict_batch(
         
         # Process each member
         for member_id in request_data.member_ids:
-            # Hash member ID
-            member_hash = hash_member_id(member_id)
-            
-            # Extract features
-            features = extract_member_features(member_id, measure_code, request_data.measurement_year)
-            
-            # Prepare and scale features
-            import pandas as pd
-            feature_df = pd.DataFrame([features])
-            if scaler:
-                feature_array = scaler.transform(feature_df)
-            else:
-                feature_array = feature_df.values
-            
-            # Predict
-            gap_probability = float(model.predict_proba(feature_array)[0][1])
-            risk_tier = determine_risk_tier(gap_probability)
+            pred = predict_member(
+                member_id,
+                measure_code,
+                model,
+                scaler,
+                request_data.measurement_year,
+                request_data.include_shap,
+                settings.api_version
+            )
             
             # Count by risk tier
-            if risk_tier == "high":
+            if pred.risk_tier == "high":
                 high_risk_count += 1
-            elif risk_tier == "medium":
+            elif pred.risk_tier == "medium":
                 medium_risk_count += 1
             else:
                 low_risk_count += 1
             
-            # Calculate SHAP only for high-risk if requested
-            shap_values = None
-            top_features = []
-            if request_data.include_shap and risk_tier == "high":
-                shap_values = calculate_shap_values(model, features, list(features.keys()))
-                top_features = [
-                    {"name": name, "value": features.get(name), "impact": impact}
-                    for name, impact in shap_values.items()
-                ]
-            
-            # Generate recommendation
-            recommendation = generate_recommendation(measure_code, gap_probability, features)
-            
-            # Create prediction response
-            pred = PredictionResponse(
-                member_hash=member_hash,
-                measure_code=measure_code,
-                risk_score=gap_probability,
-                risk_tier=risk_tier,
-                gap_probability=gap_probability,
-                shap_values=shap_values,
-                top_features=top_features,
-                recommendation=recommendation,
-                model_version=settings.api_version
-            )
             predictions.append(pred)
         
         # Calculate processing time
@@ -447,6 +491,59 @@ async def predict_batch(
         )
 
 
+@router.post("/predict/batch/{measure_code}/stream", tags=["Predictions"])
+async def predict_batch_stream(
+    measure_code: str,
+    request_data: BatchPredictionRequest,
+    request: Request,
+    cache: ModelCache = Depends(get_model_cache),
+    settings: APISettings = Depends(get_settings)
+) -> StreamingResponse:
+    """
+    Stream batch predictions as NDJSON, one `PredictionResponse` per line.
+    
+    Unlike `/predict/batch/{measure_code}`, results are written as they are
+    scored, so time-to-first-byte is one member and memory stays flat.
+    
+    **Trailer:** The last line is `{"_meta": {"row_count": N, "complete": true}}`.
+    """
+    request_id = getattr(request.state, 'request_id', 'unknown')
+    
+    # Validate measure code
+    measure_code = measure_code.upper()
+    if measure_code not in MEASURE_REGISTRY:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Invalid measure code: {measure_code}"
+        )
+    
+    # Load model once for all predictions (fail before streaming starts)
+    model = load_measure_model(measure_code, cache)
+    scaler = load_measure_scaler(measure_code, cache)
+    
+    def _predictions():
+        for member_id in request_data.member_ids:
+            yield predict_member(
+                member_id,
+                measure_code,
+                model,
+                scaler,
+                request_data.measurement_year,
+                request_data.include_shap,
+                settings.api_version
+            )
+    
+    logger.info(
+        f"Streaming Batch Prediction: {measure_code} | Members: {len(request_data.member_ids)} | "
+        f"Request-ID: {request_id}"
+    )
+    
+    return StreamingResponse(
+        iter_ndjson(_predictions(), to_dict=lambda pred: pred.model_dump(mode="json"), chunk_rows=50),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+
 @router.post("/predict/portfolio", response_model=PortfolioPredictionResponse, tags=["Predictions"])
 async def predict_portfolio(
     request_data: PortfolioPredictionRequest,
@@ -516,14 +613,14 @@ async def predict_portfolio(
                 else:
                     feature_array = feature_df.values
                 
-                gap_probability = float(model.predict_proba(feature_array)[0][1])
+                gap_probability = predict_gap_probability(model, feature_array, measure_code)
                 risk_tier = determine_risk_tier(gap_probability)
                 
                 # SHAP values
                 shap_values = None
                 top_features = []
                 if request_data.include_shap:
-                    shap_values = calculate_shap_values(model, features, list(features.keys()))
+                    shap_values = calculate_shap_values(model, features, list(features.keys()), measure_code)
                     top_features = [
                         {"name": name, "value": features.get(name), "impact": impact}
                         for name, impact in shap_values.items()
@@ -0,0 +1,179 @@
+"""
+Streaming Responses
+NDJSON and CSV encoders for large exports, served through StreamingResponse.
+
+Backpressure:
+    Encoders are plain (sync) generators. Starlette pulls the next chunk
+    only after the previous one has been written to the client, so a slow
+    consumer pauses the database cursor instead of buffering rows in memory.
+
+Trailer:
+    Each stream ends with a row count so clients can detect truncation:
+    - NDJSON: a final ``{"_meta": {"row_count": N, "complete": true}}`` line
+    - CSV: a final ``# row_count=N`` comment line
+"""
+
+import csv
+import io
+import json
+import uuid
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+DEFAULT_CHUNK_ROWS = 500
+
+
+def _json_default(value: Any) -> Any:
+    """JSON encoder for DB column types."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def model_to_dict(obj: Any, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Convert an ORM row to a flat dict of its column values.
+
+    Args:
+        obj: SQLAlchemy model instance
+        fields: Optional subset/ordering of columns
+
+    Returns:
+        dict: Column name -> value
+    """
+    names = fields or [column.key for column in obj.__table__.columns]
+    return {name: getattr(obj, name) for name in names}
+
+
+def iter_ndjson(
+    rows: Iterable[Any],
+    to_dict: Callable[[Any], Dict[str, Any]] = model_to_dict,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    trailer: bool = True
+) -> Iterator[bytes]:
+    """
+    Encode rows as newline-delimited JSON, ``chunk_rows`` lines per chunk.
+
+    Args:
+        rows: Any iterable (ORM rows, dicts, pydantic models via to_dict)
+        to_dict: Row -> dict converter
+        chunk_rows: Lines buffered per yielded chunk
+        trailer: Append the row-count trailer line
+
+    Yields:
+        bytes: UTF-8 encoded NDJSON chunks
+    """
+    buffer: List[str] = []
+    count = 0
+
+    for row in rows:
+        buffer.append(json.dumps(to_dict(row), default=_json_default))
+        count += 1
+        if len(buffer) >= chunk_rows:
+            yield ("\n".join(buffer) + "\n").encode("utf-8")
+            buffer.clear()
+
+    if trailer:
+        buffer.append(json.dumps({"_meta": {"row_count": count, "complete": True}}))
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode("utf-8")
+
+
+def iter_csv(
+    rows: Iterable[Any],
+    fieldnames: List[str],
+    to_dict: Callable[[Any], Dict[str, Any]] = model_to_dict,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    trailer: bool = True
+) -> Iterator[bytes]:
+    """
+    Encode rows as CSV with a header, ``chunk_rows`` rows per chunk.
+
+    Args:
+        rows: Any iterable of rows
+        fieldnames: Column order (extra keys are ignored)
+        to_dict: Row -> dict converter
+        chunk_rows: Rows buffered per yielded chunk
+        trailer: Append the ``# row_count=N`` trailer line
+
+    Yields:
+        bytes: UTF-8 encoded CSV chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+
+    for row in rows:
+        record = to_dict(row)
+        writer.writerow({
+            key: (json.dumps(value, default=_json_default) if isinstance(value, (dict, list)) else value)
+            for key, value in record.items()
+        })
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if trailer:
+        buffer.write(f"# row_count={count}\n")
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def streaming_export(
+    rows: Iterable[Any],
+    export_format: str,
+    fieldnames: List[str],
+    filename: str,
+    to_dict: Callable[[Any], Dict[str, Any]] = model_to_dict,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> StreamingResponse:
+    """
+    Build a StreamingResponse for ``rows`` in NDJSON or CSV.
+
+    Args:
+        rows: Lazily produced rows (e.g. a crud ``iter_*`` generator)
+        export_format: "ndjson" or "csv"
+        fieldnames: Column order
+        filename: Download filename without extension
+        to_dict: Row -> dict converter
+        chunk_rows: Rows buffered per chunk
+
+    Returns:
+        StreamingResponse: Chunked response
+
+    Raises:
+        ValueError: If export_format is not supported
+    """
+    export_format = export_format.lower()
+
+    def _select(row):
+        record = to_dict(row)
+        return {name: record.get(name) for name in fieldnames}
+
+    if export_format == "ndjson":
+        body = iter_ndjson(rows, to_dict=_select, chunk_rows=chunk_rows)
+        media_type = NDJSON_MEDIA_TYPE
+    elif export_format == "csv":
+        body = iter_csv(rows, fieldnames, to_dict=_select, chunk_rows=chunk_rows)
+        media_type = CSV_MEDIA_TYPE
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
@@ -9,6 +9,7 @@ Date: October 2025
 """
 
 from src.database.connection import get_db, engine, SessionLocal
+from src.database.async_connection import get_async_db, get_async_engine
 from src.database.models import (
     Base,
     Member,
@@ -26,6 +27,8 @@ __all__ = [
     "get_db",
     "engine",
     "SessionLocal",
+    "get_async_db",
+    "get_async_engine",
     "Base",
     "Member",
     "Prediction",
@@ -0,0 +1,362 @@
+"""
+Async Database Connection Management
+
+Provides an asyncio engine and session factory that run alongside the
+synchronous ``SessionLocal`` path in ``connection.py``. Routers opt in by
+depending on ``get_async_db`` instead of ``get_db``; nothing else changes.
+
+Drivers:
+- PostgreSQL: asyncpg (``postgresql+asyncpg://``)
+- SQLite (local tests): aiosqlite (``sqlite+aiosqlite://``)
+
+HIPAA Compliance:
+- Connection strings sanitized (no credentials in logs)
+- Connection pooling with timeout
+- Health check and pool metrics for monitoring
+
+Author: Robert Reichert
+Date: October 2025
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import AsyncGenerator, Optional
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, DisconnectionError
+from sqlalchemy.pool import NullPool, StaticPool
+
+from src.database.connection import DATABASE_URL, PoolMetrics
+
+try:
+    from sqlalchemy.ext.asyncio import (
+        AsyncEngine,
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+    ASYNC_AVAILABLE = True
+except ImportError:  # pragma: no cover - SQLAlchemy < 1.4
+    ASYNC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing (mirrors the sync engine defaults, overridable per deployment)
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "5"))
+ASYNC_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "15"))
+ASYNC_POOL_TIMEOUT = int(os.getenv("ASYNC_DB_POOL_TIMEOUT", "30"))
+ASYNC_POOL_RECYCLE = int(os.getenv("ASYNC_DB_POOL_RECYCLE", "3600"))
+
+# Sync driver name -> async driver name
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+_engine: Optional["AsyncEngine"] = None
+_session_factory: Optional["async_sessionmaker"] = None
+_engine_lock = threading.Lock()
+
+
+# Global pool metrics for the async engine
+pool_metrics = PoolMetrics()
+
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a synchronous database URL to its async-driver equivalent.
+
+    Args:
+        url: Database URL (e.g. ``postgresql://...`` or ``sqlite:///file.db``)
+
+    Returns:
+        str: URL using asyncpg (PostgreSQL) or aiosqlite (SQLite)
+
+    Notes:
+        - URLs that already name an async driver are returned unchanged
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _resolve_async_url() -> str:
+    """ASYNC_DATABASE_URL wins; otherwise derive from DATABASE_URL."""
+    return os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+
+def _attach_pool_listeners(engine: "AsyncEngine") -> None:
+    """Wire pool events on the underlying sync engine into ``pool_metrics``."""
+    sync_pool = engine.sync_engine.pool
+
+    @event.listens_for(sync_pool, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        pool_metrics.record_connect()
+        logger.debug("New async database connection established")
+
+    @event.listens_for(sync_pool, "checkout")
+    def _on_checkout(dbapi_conn, connection_record, connection_proxy):
+        pool_metrics.record_checkout()
+
+    @event.listens_for(sync_pool, "checkin")
+    def _on_checkin(dbapi_conn, connection_record):
+        pool_metrics.record_checkin()
+
+    @event.listens_for(sync_pool, "invalidate")
+    def _on_invalidate(dbapi_conn, connection_record, exception):
+        pool_metrics.record_invalidate()
+
+
+def create_async_db_engine(url: Optional[str] = None, **engine_kwargs) -> "AsyncEngine":
+    """
+    Create an async engine with pooling appropriate for the backend.
+
+    Args:
+        url: Optional database URL (sync or async form). Defaults to
+            ASYNC_DATABASE_URL or DATABASE_URL.
+        **engine_kwargs: Overrides passed through to ``create_async_engine``
+
+    Returns:
+        AsyncEngine: Configured async engine
+
+    Raises:
+        RuntimeError: If SQLAlchemy asyncio support is unavailable
+    """
+    if not ASYNC_AVAILABLE:
+        raise RuntimeError("SQLAlchemy asyncio extension is not available")
+
+    async_url = to_async_url(url) if url else _resolve_async_url()
+    backend = make_url(async_url).get_backend_name()
+
+    if backend == "sqlite":
+        database = make_url(async_url).database
+        in_memory = not database or database == ":memory:"
+        options = {
+            "poolclass": StaticPool if in_memory else NullPool,
+            "connect_args": {"check_same_thread": False},
+        }
+    else:
+        options = {
+            "pool_size": ASYNC_POOL_SIZE,
+            "max_overflow": ASYNC_MAX_OVERFLOW,
+            "pool_timeout": ASYNC_POOL_TIMEOUT,
+            "pool_recycle": ASYNC_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+    options["echo"] = False
+    options.update(engine_kwargs)
+
+    engine = create_async_engine(async_url, **options)
+    _attach_pool_listeners(engine)
+    logger.info(f"Async database engine created (backend={backend})")
+    return engine
+
+
+def get_async_engine() -> "AsyncEngine":
+    """
+    Get the process-wide async engine, creating it on first use.
+
+    Notes:
+        - Lazy so importing this module never requires asyncpg/aiosqlite
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_async_db_engine()
+                _session_factory = async_sessionmaker(
+                    bind=_engine,
+                    class_=AsyncSession,
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+    return _engine
+
+
+def get_async_session_factory() -> "async_sessionmaker":
+    """Get the async session factory bound to the global async engine."""
+    get_async_engine()
+    return _session_factory
+
+
+def configure_async_engine(url: str, **engine_kwargs) -> "AsyncEngine":
+    """
+    Replace the global async engine (tests, alternate deployments).
+
+    Args:
+        url: Database URL (sync or async form)
+        **engine_kwargs: Overrides passed through to ``create_async_engine``
+
+    Returns:
+        AsyncEngine: The newly configured engine
+
+    Notes:
+        - Caller is responsible for disposing the previous engine
+    """
+    global _engine, _session_factory
+    with _engine_lock:
+        _engine = create_async_db_engine(url, **engine_kwargs)
+        _session_factory = async_sessionmaker(
+            bind=_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        pool_metrics.reset()
+    return _engine
+
+
+async def _open_session() -> "AsyncSession":
+    """Open a session and time its connection checkout."""
+    session = get_async_session_factory()()
+    start = time.perf_counter()
+    await session.connection()
+    pool_metrics.record_checkout_wait((time.perf_counter() - start) * 1000)
+    return session
+
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    """
+    FastAPI dependency for an async database session.
+
+    Usage:
+        @router.get("/endpoint")
+        async def endpoint(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Model))
+
+    Yields:
+        AsyncSession: SQLAlchemy async session
+
+    Notes:
+        - Automatically closes session after request
+        - Rolls back transaction on error
+        - PHI-safe error logging
+    """
+    session = await _open_session()
+    try:
+        yield session
+    except Exception as e:
+        logger.error(f"Async database session error: {str(e)}")
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+@asynccontextmanager
+async def get_async_db_context():
+    """
+    Async context manager for a database session (for non-FastAPI use).
+
+    Usage:
+        async with get_async_db_context() as db:
+            result = await db.execute(select(Model))
+
+    Yields:
+        AsyncSession: SQLAlchemy async session (committed on success)
+    """
+    session = await _open_session()
+    try:
+        yield session
+        await session.commit()
+    except Exception as e:
+        logger.error(f"Async database context error: {str(e)}")
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+def get_async_pool_status() -> dict:
+    """
+    Get sanitized async pool sizing and activity metrics.
+
+    Returns:
+        dict: Pool configuration, current usage and event counters
+
+    Notes:
+        - Does NOT include credentials
+        - PHI-safe
+    """
+    engine = get_async_engine()
+    sync_pool = engine.sync_engine.pool
+    info = {
+        "pool_class": type(sync_pool).__name__,
+        "status": sync_pool.status(),
+    }
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        getter = getattr(sync_pool, name, None)
+        if callable(getter):
+            info[name] = getter()
+    info.update(pool_metrics.snapshot())
+    return info
+
+
+async def check_async_database_health() -> dict:
+    """
+    Check async database connection health.
+
+    Returns:
+        dict: Health status
+            - status: "healthy" or "unhealthy"
+            - message: Description
+            - latency_ms: Round-trip time for ``SELECT 1``
+            - pool_info: Output of ``get_async_pool_status``
+    """
+    try:
+        engine = get_async_engine()
+        start = time.perf_counter()
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        return {
+            "status": "healthy",
+            "message": "Async database connection successful",
+            "latency_ms": round(latency_ms, 2),
+            "pool_info": get_async_pool_status(),
+        }
+
+    except (OperationalError, DisconnectionError) as e:
+        logger.error(f"Async database health check failed: {str(e)}")
+        return {
+            "status": "unhealthy",
+            "message": f"Database connection failed: {str(e)}",
+            "latency_ms": None,
+            "pool_info": None,
+        }
+    except Exception as e:
+        logger.error(f"Unexpected async database error: {str(e)}")
+        return {
+            "status": "unhealthy",
+            "message": f"Unexpected error: {str(e)}",
+            "latency_ms": None,
+            "pool_info": None,
+        }
+
+
+async def close_async_database_connections():
+    """
+    Dispose the async engine and its pooled connections.
+
+    Notes:
+        - Called on application shutdown
+        - Safe to call when the engine was never created
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        return
+    logger.info("Closing all async database connections...")
+    await _engine.dispose()
+    _engine = None
+    _session_factory = None
+    logger.info("Async database connections closed")
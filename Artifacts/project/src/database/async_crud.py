@@ -0,0 +1,222 @@
+"""
+Async CRUD Operations
+
+Async counterparts of the hot-path functions in ``crud.py`` for routers
+that opt in to ``get_async_db``. Signatures mirror the sync versions with
+``AsyncSession`` in place of ``Session``.
+
+HIPAA Compliance:
+- All operations use hashed member IDs
+- PHI-safe error logging
+- Audit logging for all data changes
+
+Author: Robert Reichert
+Date: October 2025
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any
+
+from sqlalchemy import select, update, desc, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Member, Prediction, APILog, AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+# ===== Member CRUD =====
+
+async def get_member(db: AsyncSession, member_hash: str) -> Optional[Member]:
+    """Get member by hashed ID."""
+    result = await db.execute(select(Member).where(Member.member_hash == member_hash))
+    return result.scalars().first()
+
+
+async def get_or_create_member(db: AsyncSession, member_hash: str) -> Member:
+    """Get existing member or create new one."""
+    member = await get_member(db, member_hash)
+    if not member:
+        member = Member(member_hash=member_hash)
+        db.add(member)
+        await db.flush()
+        logger.info(f"Created member record: {member_hash[:8]}...")
+    return member
+
+
+# ===== Prediction CRUD =====
+
+async def create_prediction(db: AsyncSession, prediction_data: Dict[str, Any]) -> Prediction:
+    """
+    Create a new prediction record.
+
+    Args:
+        db: Async database session
+        prediction_data: Dictionary with prediction fields
+
+    Returns:
+        Prediction: Created prediction record
+
+    Notes:
+        - Member upsert, insert and activity update share one commit
+          (the sync version commits three times)
+    """
+    member_hash = prediction_data.get("member_hash")
+    await get_or_create_member(db, member_hash)
+
+    prediction = Prediction(**prediction_data)
+    db.add(prediction)
+
+    await db.execute(
+        update(Member)
+        .where(Member.member_hash == member_hash)
+        .values(
+            last_updated=datetime.utcnow(),
+            total_predictions=Member.total_predictions + 1
+        )
+    )
+    await db.commit()
+    await db.refresh(prediction)
+
+    logger.info(f"Created prediction: {str(prediction.prediction_id)[:8]}... for measure {prediction.measure_code}")
+    return prediction
+
+
+async def get_member_predictions(
+    db: AsyncSession,
+    member_hash: str,
+    measure_code: Optional[str] = None,
+    measurement_year: Optional[int] = None
+) -> List[Prediction]:
+    """
+    Get all predictions for a member.
+
+    Args:
+        db: Async database session
+        member_hash: SHA-256 hashed member ID
+        measure_code: Optional measure code filter
+        measurement_year: Optional year filter
+
+    Returns:
+        List[Prediction]: Member's predictions, newest first
+    """
+    query = select(Prediction).where(Prediction.member_hash == member_hash)
+
+    if measure_code:
+        query = query.where(Prediction.measure_code == measure_code)
+    if measurement_year:
+        query = query.where(Prediction.measurement_year == measurement_year)
+
+    result = await db.execute(query.order_by(desc(Prediction.prediction_date)))
+    return list(result.scalars().all())
+
+
+# ===== API Logging CRUD =====
+
+async def get_api_stats(db: AsyncSession, hours: int = 24, endpoint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get API statistics for last N hours.
+
+    Returns:
+        dict: API statistics (same shape as ``crud.get_api_stats``)
+            - total_requests: Total request count
+            - avg_response_time: Average response time (ms)
+            - error_rate: Percentage of error responses
+            - requests_by_endpoint: Count by endpoint
+
+    Notes:
+        - Aggregated in the database instead of loading every row
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    filters = [APILog.timestamp >= cutoff]
+    if endpoint:
+        filters.append(APILog.endpoint == endpoint)
+
+    totals = await db.execute(
+        select(
+            func.count(APILog.log_id),
+            func.avg(APILog.response_time_ms),
+            func.sum(case((APILog.status_code >= 400, 1), else_=0)),
+        ).where(*filters)
+    )
+    total, avg_time, errors = totals.one()
+
+    if not total:
+        return {"total_requests": 0, "avg_response_time": 0, "error_rate": 0}
+
+    by_endpoint = await db.execute(
+        select(APILog.endpoint, func.count(APILog.log_id))
+        .where(*filters)
+        .group_by(APILog.endpoint)
+    )
+
+    return {
+        "total_requests": total,
+        "avg_response_time": round(float(avg_time), 2),
+        "error_rate": round((errors or 0) / total * 100, 2),
+        "requests_by_endpoint": {name: count for name, count in by_endpoint.all()}
+    }
+
+
+# ===== Audit Logging CRUD =====
+
+async def create_audit_log(
+    db: AsyncSession,
+    event_type: str,
+    entity_type: str,
+    entity_id: str,
+    action: str,
+    changes: Optional[Dict[str, Any]] = None,
+    user_id: Optional[str] = None,
+    ip_address: Optional[str] = None
+) -> AuditLog:
+    """
+    Create an audit log entry.
+
+    Args:
+        db: Async database session
+        event_type: Type of event (prediction/gap/intervention/etc)
+        entity_type: Type of entity (Member/Prediction/Gap/etc)
+        entity_id: Entity identifier (UUID or member_hash)
+        action: Action performed (create/update/delete)
+        changes: Optional changes dictionary
+        user_id: Optional user identifier
+        ip_address: Optional IP address
+
+    Returns:
+        AuditLog: Created audit log entry
+    """
+    audit_log = AuditLog(
+        event_type=event_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action=action,
+        changes=changes,
+        user_id=user_id or "system",
+        ip_address=ip_address
+    )
+    db.add(audit_log)
+    await db.commit()
+    return audit_log
+
+
+async def create_audit_logs(db: AsyncSession, entries: List[Dict[str, Any]]) -> int:
+    """
+    Insert several audit log entries in one transaction.
+
+    Args:
+        db: Async database session
+        entries: Dicts with ``create_audit_log`` keyword arguments
+
+    Returns:
+        int: Number of entries written
+    """
+    if not entries:
+        return 0
+    db.add_all([
+        AuditLog(**{**entry, "user_id": entry.get("user_id") or "system"})
+        for entry in entries
+    ])
+    await db.commit()
+    return len(entries)
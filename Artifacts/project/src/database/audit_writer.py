@@ -0,0 +1,486 @@
+"""
+Batched Audit Writer
+
+Moves audit-log writes off the request path: callers enqueue an entry and
+return immediately; a background thread flushes entries to the database
+in batches (by size or interval).
+
+Author: Robert Reichert
+Date: October 2025
+
+Durability:
+    - Entries are never dropped. If the queue is full, or a batch cannot
+      be written, entries are appended to a local JSON-lines spill file
+      (fsync'd) and replayed once the sink succeeds again.
+    - ``close()`` drains the queue and the spill file before returning;
+      anything still unwritten stays in the spill file for the next start.
+    - ``start()`` registers ``close()`` with atexit, so a process that
+      never calls it explicitly still drains on interpreter exit.
+    - Spill lines that cannot be decoded (e.g. torn by a crash mid-append)
+      are moved to ``<spill>.corrupt``; entries the sink rejects on their
+      own ``max_replay_attempts`` times while other writes succeed are
+      moved to ``<spill>.dead``. Neither blocks the entries behind them.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A sink writes one batch in a single transaction and raises on failure.
+AuditSink = Callable[[List[Dict[str, Any]]], None]
+
+_STOP = object()
+
+# Consecutive single-entry replay failures, with no write accepted since the
+# last replay pass, that mark the sink as down rather than the entries as bad
+_OUTAGE_PROBES = 3
+
+# Locks per spill file (append/rename, replay): writers sharing a path must
+# not interleave appends with the rename to ``.replay`` or replay it twice.
+_spill_locks: Dict[str, Tuple[threading.Lock, threading.Lock]] = {}
+_spill_locks_guard = threading.Lock()
+
+
+def _spill_locks_for(path: str) -> Tuple[threading.Lock, threading.Lock]:
+    with _spill_locks_guard:
+        return _spill_locks.setdefault(
+            os.path.abspath(path), (threading.Lock(), threading.Lock())
+        )
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return {"__datetime__": value.isoformat()}
+    return str(value)
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    if set(obj) == {"__datetime__"}:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class BatchedAuditWriter:
+    """
+    Bounded queue + background writer thread for audit entries.
+
+    Args:
+        sink: Callable that persists a list of entries in one transaction
+        spill_path: JSON-lines file used when the queue is full or the sink fails
+        batch_size: Max entries per sink call
+        flush_interval: Max seconds an entry waits before being flushed
+        max_queue: Queue bound (memory cap)
+        retry_interval: Seconds between spill-file replay attempts after a failure
+        max_replay_attempts: Individual replay failures (while the sink is
+            otherwise healthy) before an entry is dead-lettered
+        name: Name used in logs and the thread name
+
+    Notes:
+        - ``submit`` never blocks on I/O in the common case (queue put only)
+        - Order is preserved within the queue; spilled entries are replayed
+          later, so readers should order by the entry's own timestamp
+        - Thread-safe; one writer thread per instance. Writers in one process
+          that share a spill_path share its lock, but a single shared writer
+          per sink is preferred
+    """
+
+    def __init__(
+        self,
+        sink: AuditSink,
+        spill_path: str,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        retry_interval: float = 5.0,
+        max_replay_attempts: int = 5,
+        name: str = "audit"
+    ):
+        self.sink = sink
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.max_replay_attempts = max(1, max_replay_attempts)
+        self.name = name
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._spill_lock, self._replay_lock = _spill_locks_for(spill_path)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._next_replay = 0.0
+        # Serialized spill line -> individual replay failures so far
+        self._replay_failures: Dict[str, int] = {}
+        # Set when the sink accepts a write; cleared after each replay pass
+        self._sink_healthy = False
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "sink_errors": 0,
+            "dead_lettered": 0,
+            "corrupt_lines": 0,
+            "writer_errors": 0,
+        }
+
+    # ===== Lifecycle =====
+
+    def start(self) -> "BatchedAuditWriter":
+        """Start the writer thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._closed = False
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.name}-writer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def close(self, timeout: float = 10.0):
+        """
+        Stop accepting entries, drain the queue and replay the spill file.
+
+        Args:
+            timeout: Max seconds to wait for the writer thread
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+        # Anything left (thread never started or timed out) goes through
+        # the same path synchronously, spilling on failure.
+        remaining = self._drain_queue()
+        if remaining:
+            self._write(remaining)
+        self._replay_spill(force=True)
+
+        logger.info(f"Audit writer '{self.name}' closed | {self.stats}")
+
+    def _count(self, **deltas: int):
+        """Add to stats (called from caller threads and the writer thread)."""
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+
+    # ===== Producer API =====
+
+    def submit(self, entry: Dict[str, Any]):
+        """
+        Enqueue one entry without waiting for the database.
+
+        If the queue is full (sustained DB slowness) the entry is appended
+        to the spill file instead of being dropped.
+        """
+        self._count(submitted=1)
+        if self._closed:
+            self._spill([entry])
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._spill([entry])
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Block until everything submitted so far has been handed to the sink.
+
+        Used before reads that must see recent entries.
+
+        Returns:
+            bool: True if the queue emptied within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                break
+            time.sleep(0.005)
+        return self._queue.unfinished_tasks == 0
+
+    @property
+    def pending(self) -> int:
+        """Entries queued but not yet written."""
+        return self._queue.qsize()
+
+    # ===== Writer Thread =====
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect_batch()
+            try:
+                if batch:
+                    self._write(batch)
+                if not stop:
+                    self._replay_spill()
+            except Exception as e:
+                # Never let one bad batch or replay kill the writer thread
+                self._count(writer_errors=1)
+                logger.exception(f"Audit writer '{self.name}' error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _collect_batch(self):
+        """Wait for the first entry, then gather up to batch_size within flush_interval."""
+        batch: List[Dict[str, Any]] = []
+        try:
+            item = self._queue.get(timeout=self.retry_interval)
+        except queue.Empty:
+            return batch, False
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _drain_queue(self) -> List[Dict[str, Any]]:
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            self._queue.task_done()
+            if item is not _STOP:
+                items.append(item)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write one batch; spill it on failure. Returns True on success."""
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                self.sink(chunk)
+                self._sink_healthy = True
+                self._count(written=len(chunk), batches=1)
+            except Exception as e:
+                self._count(sink_errors=1)
+                logger.error(f"Audit writer '{self.name}' sink failed, spilling {len(batch) - start} entries: {e}")
+                self._spill(batch[start:])
+                self._next_replay = time.monotonic() + self.retry_interval
+                return False
+        return True
+
+    # ===== Spill File =====
+
+    def _spill(self, entries: List[Dict[str, Any]]):
+        """Append entries to the spill file and fsync."""
+        with self._spill_lock:
+            self._append_lines(self.spill_path, [json.dumps(entry, default=_json_default) for entry in entries])
+        self._count(spilled=len(entries))
+
+    @staticmethod
+    def _append_lines(path: str, lines: List[str], mode: str = "a"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, mode, encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_spill(self, force: bool = False):
+        """
+        Re-submit spilled entries to the sink, oldest first.
+
+        The spill file is moved onto the end of ``.replay`` before replay so
+        concurrent spills go to a fresh file. A failing chunk is retried one
+        entry at a time. If the sink has accepted nothing since the last pass
+        and these entries fail too, it is treated as down and the pass stops;
+        otherwise each failing entry stays in ``.replay`` until it has failed
+        ``max_replay_attempts`` times and is then dead-lettered.
+        """
+        if not force and time.monotonic() < self._next_replay:
+            return
+        # Another writer on the same path is already replaying it
+        if not self._replay_lock.acquire(blocking=False):
+            return
+        try:
+            self._replay_spill_locked()
+        finally:
+            self._replay_lock.release()
+
+    def _replay_spill_locked(self):
+        replay_path = self.spill_path + ".replay"
+
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replay_path):
+                    with open(self.spill_path, "r", encoding="utf-8") as f:
+                        self._append_lines(replay_path, f.read().splitlines())
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, replay_path)
+            elif not os.path.exists(replay_path):
+                return
+
+        with open(replay_path, "r", encoding="utf-8") as f:
+            lines = [line.rstrip("\n") for line in f if line.strip()]
+
+        entries, corrupt = [], []
+        for line in lines:
+            try:
+                entries.append((line, json.loads(line, object_hook=_json_object_hook)))
+            except ValueError:
+                corrupt.append(line)
+        if corrupt:
+            self._append_lines(self.spill_path + ".corrupt", corrupt)
+            self._count(corrupt_lines=len(corrupt))
+            logger.error(f"Audit writer '{self.name}' moved {len(corrupt)} undecodable spill lines to .corrupt")
+
+        keep, dead, replayed = [], [], 0
+        for start in range(0, len(entries), self.batch_size):
+            chunk = entries[start:start + self.batch_size]
+            try:
+                self.sink([entry for _, entry in chunk])
+                self._sink_healthy = True
+                written, failed = chunk, []
+            except Exception as e:
+                self._count(sink_errors=1)
+                result = self._replay_rows(chunk)
+                if result is None:
+                    # Sink is down: keep this chunk and the tail for the next attempt
+                    logger.warning(f"Audit writer '{self.name}' replay deferred: {e}")
+                    keep.extend(line for line, _ in entries[start:])
+                    break
+                written, failed = result
+            for line in failed:
+                attempts = self._replay_failures.get(line, 0) + 1
+                if attempts >= self.max_replay_attempts:
+                    self._replay_failures.pop(line, None)
+                    dead.append(line)
+                else:
+                    self._replay_failures[line] = attempts
+                    keep.append(line)
+            for line, _ in written:
+                self._replay_failures.pop(line, None)
+            if written:
+                replayed += len(written)
+                self._count(written=len(written), replayed=len(written), batches=1)
+
+        if dead:
+            self._append_lines(self.spill_path + ".dead", dead)
+            self._count(dead_lettered=len(dead))
+            logger.error(
+                f"Audit writer '{self.name}' moved {len(dead)} entries to .dead after "
+                f"{self.max_replay_attempts} failed replays"
+            )
+        if keep:
+            tmp_path = replay_path + ".tmp"
+            self._append_lines(tmp_path, keep, mode="w")
+            os.replace(tmp_path, replay_path)
+            self._next_replay = time.monotonic() + self.retry_interval
+        else:
+            os.remove(replay_path)
+        self._sink_healthy = False
+        if replayed:
+            logger.info(f"Audit writer '{self.name}' replayed {replayed} spilled entries")
+
+    def _replay_rows(self, chunk: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Write a failed chunk one entry at a time.
+
+        Returns:
+            (written entries, failed lines), or None when the sink accepted
+            nothing since the last replay pass and the first few entries
+            failed too (an outage, so no entry is charged an attempt)
+        """
+        written, failed = [], []
+        for line, entry in chunk:
+            if not self._sink_healthy and len(failed) >= _OUTAGE_PROBES:
+                return None
+            try:
+                self.sink([entry])
+            except Exception:
+                failed.append(line)
+                continue
+            self._sink_healthy = True
+            written.append((line, entry))
+        return (written, failed) if self._sink_healthy else None
+
+
+# ===== Global Writer (audit_log table) =====
+
+_writer: Optional[BatchedAuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _audit_log_sink(entries: List[Dict[str, Any]]):
+    """Insert a batch of AuditLog rows in one transaction."""
+    from src.database.connection import SessionLocal
+    from src.database import crud
+
+    db = SessionLocal()
+    try:
+        crud.create_audit_logs(db, entries)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_audit_writer() -> BatchedAuditWriter:
+    """
+    Get the process-wide audit writer, starting it on first use.
+
+    Configuration (environment):
+        AUDIT_SPILL_PATH: Spill file (default: ./.audit_spill.jsonl)
+        AUDIT_BATCH_SIZE: Entries per INSERT batch (default: 200)
+        AUDIT_FLUSH_INTERVAL: Max seconds before a flush (default: 0.5)
+        AUDIT_MAX_QUEUE: Queue bound (default: 10000)
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BatchedAuditWriter(
+                sink=_audit_log_sink,
+                spill_path=os.getenv("AUDIT_SPILL_PATH", ".audit_spill.jsonl"),
+                batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "200")),
+                flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5")),
+                max_queue=int(os.getenv("AUDIT_MAX_QUEUE", "10000")),
+                name="audit_log",
+            ).start()
+        return _writer
+
+
+def close_audit_writer(timeout: float = 10.0):
+    """Drain and stop the global audit writer (call on shutdown)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
@@ -14,7 +14,9 @@ Date: October 2025
 """
 
 import os
+import time
 import logging
+import threading
 from typing import Generator
 from contextlib import contextmanager
 
@@ -50,6 +52,88 @@ SessionLocal = sessionmaker(
 )
 
 
+class PoolMetrics:
+    """
+    Thread-safe counters for connection pool activity.
+
+    Notes:
+        - Updated from SQLAlchemy pool events
+        - Checkout wait is measured around the first connection a
+          request session acquires, so it reflects pool contention
+        - PHI-safe (no query data recorded)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters to zero."""
+        with self._lock:
+            self.connections_created = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidated = 0
+            self.waits = 0
+            self.checkout_wait_ms_total = 0.0
+            self.checkout_wait_ms_max = 0.0
+
+    def record_connect(self):
+        with self._lock:
+            self.connections_created += 1
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def record_checkout_wait(self, wait_ms: float):
+        with self._lock:
+            self.waits += 1
+            self.checkout_wait_ms_total += wait_ms
+            if wait_ms > self.checkout_wait_ms_max:
+                self.checkout_wait_ms_max = wait_ms
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def record_invalidate(self):
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self) -> dict:
+        """Return a consistent copy of the counters."""
+        with self._lock:
+            avg_wait = (
+                self.checkout_wait_ms_total / self.waits if self.waits else 0.0
+            )
+            return {
+                "connections_created": self.connections_created,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidated": self.invalidated,
+                "avg_checkout_wait_ms": round(avg_wait, 3),
+                "max_checkout_wait_ms": round(self.checkout_wait_ms_max, 3),
+            }
+
+
+# Checkout wait for SessionLocal sessions (same counters as the async pool)
+sync_pool_metrics = PoolMetrics()
+
+
+def _open_session() -> Session:
+    """Open a session and time its connection checkout."""
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        db.connection()
+    except Exception:
+        db.close()
+        raise
+    sync_pool_metrics.record_checkout_wait((time.perf_counter() - start) * 1000)
+    return db
+
+
 @event.listens_for(pool.Pool, "connect")
 def receive_connect(dbapi_conn, connection_record):
     """
@@ -86,7 +170,7 @@ def get_db() -> Generator[Session, None, None]:
         - Rolls back transaction on error
         - PHI-safe error logging
     """
-    db = SessionLocal()
+    db = _open_session()
     try:
         yield db
     except Exception as e:
@@ -110,7 +194,7 @@ def get_db_context():
     Yields:
         Session: SQLAlchemy database session
     """
-    db = SessionLocal()
+    db = _open_session()
     try:
         yield db
         db.commit()
@@ -15,11 +15,11 @@ Date: October 2025
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 from uuid import UUID
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, insert
 from sqlalchemy.exc import IntegrityError
 
 from src.database.models import (
@@ -143,6 +143,23 @@ def get_prediction(db: Session, prediction_id: UUID) -> Optional[Prediction]:
     return db.query(Prediction).filter(Prediction.prediction_id == prediction_id).first()
 
 
+def _member_predictions_query(
+    db: Session,
+    member_hash: str,
+    measure_code: Optional[str] = None,
+    measurement_year: Optional[int] = None
+):
+    """Build the filtered, newest-first member predictions query."""
+    query = db.query(Prediction).filter(Prediction.member_hash == member_hash)
+    
+    if measure_code:
+        query = query.filter(Prediction.measure_code == measure_code)
+    if measurement_year:
+        query = query.filter(Prediction.measurement_year == measurement_year)
+    
+    return query.order_by(desc(Prediction.prediction_date))
+
+
 def get_member_predictions(
     db: Session,
     member_hash: str,
@@ -161,14 +178,25 @@ def get_member_predictions(
     Returns:
         List[Prediction]: Member's predictions
     """
-    query = db.query(Prediction).filter(Prediction.member_hash == member_hash)
-    
-    if measure_code:
-        query = query.filter(Prediction.measure_code == measure_code)
-    if measurement_year:
-        query = query.filter(Prediction.measurement_year == measurement_year)
+    return _member_predictions_query(db, member_hash, measure_code, measurement_year).all()
+
+
+def iter_member_predictions(
+    db: Session,
+    member_hash: str,
+    measure_code: Optional[str] = None,
+    measurement_year: Optional[int] = None,
+    batch_size: int = 1000
+) -> Iterator[Prediction]:
+    """
+    Stream predictions for a member without loading them all into memory.
     
-    return query.order_by(desc(Prediction.prediction_date)).all()
+    Notes:
+        - Uses a server-side cursor (stream_results) fetched in batch_size pages
+        - Same filters and ordering as get_member_predictions
+    """
+    query = _member_predictions_query(db, member_hash, measure_code, measurement_year)
+    yield from query.yield_per(batch_size)
 
 
 def get_latest_prediction(
@@ -258,6 +286,25 @@ def create_gap(db: Session, gap_data: Dict[str, Any]) -> GapAnalysis:
     return gap
 
 
+def _gaps_query(
+    db: Session,
+    measure_code: Optional[str] = None,
+    status: Optional[str] = None,
+    min_priority: Optional[float] = None
+):
+    """Build the filtered, highest-priority-first gaps query."""
+    query = db.query(GapAnalysis)
+    
+    if measure_code:
+        query = query.filter(GapAnalysis.measure_code == measure_code)
+    if status:
+        query = query.filter(GapAnalysis.status == status)
+    if min_priority is not None:
+        query = query.filter(GapAnalysis.priority_score >= min_priority)
+    
+    return query.order_by(desc(GapAnalysis.priority_score))
+
+
 def get_gaps(
     db: Session,
     measure_code: Optional[str] = None,
@@ -278,16 +325,24 @@ def get_gaps(
     Returns:
         List[GapAnalysis]: Filtered gaps
     """
-    query = db.query(GapAnalysis)
-    
-    if measure_code:
-        query = query.filter(GapAnalysis.measure_code == measure_code)
-    if status:
-        query = query.filter(GapAnalysis.status == status)
-    if min_priority is not None:
-        query = query.filter(GapAnalysis.priority_score >= min_priority)
+    return _gaps_query(db, measure_code, status, min_priority).limit(limit).all()
+
+
+def iter_gaps(
+    db: Session,
+    measure_code: Optional[str] = None,
+    status: Optional[str] = None,
+    min_priority: Optional[float] = None,
+    batch_size: int = 1000
+) -> Iterator[GapAnalysis]:
+    """
+    Stream all matching gaps without loading them all into memory.
     
-    return query.order_by(desc(GapAnalysis.priority_score)).limit(limit).all()
+    Notes:
+        - Uses a server-side cursor (stream_results) fetched in batch_size pages
+        - Same filters and ordering as get_gaps, without the row limit
+    """
+    yield from _gaps_query(db, measure_code, status, min_priority).yield_per(batch_size)
 
 
 def get_member_gaps(db: Session, member_hash: str) -> List[GapAnalysis]:
@@ -577,6 +632,63 @@ def create_audit_log(
     return audit_log
 
 
+def create_audit_logs(db: Session, entries: List[Dict[str, Any]]) -> int:
+    """
+    Bulk-insert audit log entries in a single transaction.
+    
+    Args:
+        db: Database session
+        entries: Dicts with ``create_audit_log`` keyword arguments
+            (plus optional ``timestamp``)
+    
+    Returns:
+        int: Number of rows written
+    """
+    if not entries:
+        return 0
+    rows = [
+        {**entry, "user_id": entry.get("user_id") or "system"}
+        for entry in entries
+    ]
+    db.execute(insert(AuditLog), rows)
+    db.commit()
+    return len(rows)
+
+
+def queue_audit_log(
+    event_type: str,
+    entity_type: str,
+    entity_id: str,
+    action: str,
+    changes: Optional[Dict[str, Any]] = None,
+    user_id: Optional[str] = None,
+    ip_address: Optional[str] = None
+) -> None:
+    """
+    Queue an audit log entry for the background batched writer.
+    
+    Same arguments as create_audit_log, without a session. Returns
+    immediately; the entry is written within AUDIT_FLUSH_INTERVAL seconds
+    (or spilled to disk if the database is unavailable - never dropped).
+    
+    Notes:
+        - Timestamp is captured here, not at flush time
+        - Use create_audit_log when the caller needs the row back
+    """
+    from src.database.audit_writer import get_audit_writer
+    
+    get_audit_writer().submit({
+        "event_type": event_type,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": action,
+        "changes": changes,
+        "user_id": user_id or "system",
+        "ip_address": ip_address,
+        "timestamp": datetime.utcnow(),
+    })
+
+
 def get_audit_trail(
     db: Session,
     entity_type: str,
@@ -211,7 +211,6 @@ class Intervention(Base, TimestampMixin):
     # Indexes
     __table_args__ = (
         Index('ix_interventions_member_status', 'member_hash', 'status'),
-        Index('ix_interventions_scheduled_date', 'scheduled_date'),
     )
     
     def __repr__(self):
@@ -295,7 +294,7 @@ class APILog(Base):
     """
     __tablename__ = "api_logs"
     
-    log_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    log_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     request_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     endpoint = Column(String(200), nullable=False, index=True)
     method = Column(String(10), nullable=False)
@@ -307,7 +306,6 @@ class APILog(Base):
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     __table_args__ = (
-        Index('ix_api_logs_timestamp', 'timestamp'),
         Index('ix_api_logs_endpoint_timestamp', 'endpoint', 'timestamp'),
     )
     
@@ -327,7 +325,7 @@ class AuditLog(Base):
     """
     __tablename__ = "audit_log"
     
-    audit_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    audit_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     event_type = Column(String(50), nullable=False, index=True)  # prediction/gap/intervention/etc
     entity_type = Column(String(50), nullable=False, index=True)  # Member/Prediction/Gap/etc
     entity_id = Column(String(100), nullable=False)  # UUID or member_hash
@@ -338,8 +336,6 @@ class AuditLog(Base):
     ip_address = Column(String(45), nullable=True)  # IPv6 compatible
     
     __table_args__ = (
-        Index('ix_audit_log_timestamp', 'timestamp'),
-        Index('ix_audit_log_event_type', 'event_type'),
         Index('ix_audit_log_entity', 'entity_type', 'entity_id'),
     )
     
@@ -0,0 +1,140 @@
+"""
+Metrics Tests
+Tests for the in-process metrics registry, /metrics and /stats.
+"""
+
+import pytest
+
+from src.api import metrics
+from src.api.metrics import Counter, Histogram, MetricsRegistry
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start every test from an empty registry."""
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+class TestPrimitives:
+    """Tests for counters, histograms and text rendering."""
+
+    def test_counter_labels_and_render(self):
+        counter = Counter("jobs_total", "Jobs.", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind="b")
+
+        assert counter.value(kind="a") == 3
+        lines = counter.render()
+        assert "# TYPE jobs_total counter" in lines
+        assert 'jobs_total{kind="a"} 3' in lines
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram("lat_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            hist.observe(value, route="/x")
+
+        text = "\n".join(hist.render())
+        assert 'lat_seconds_bucket{route="/x",le="0.1"} 1' in text
+        assert 'lat_seconds_bucket{route="/x",le="1.0"} 3' in text
+        assert 'lat_seconds_bucket{route="/x",le="+Inf"} 4' in text
+        assert 'lat_seconds_count{route="/x"} 4' in text
+        assert hist.mean(route="/x") == pytest.approx(6.05 / 4)
+
+    def test_histogram_quantile_interpolates(self):
+        hist = Histogram("q_seconds", "Q.", buckets=(1.0, 2.0))
+        for _ in range(10):
+            hist.observe(1.5)
+        # All samples in (1, 2]: median interpolates to the bucket midpoint
+        assert hist.quantile(0.5) == pytest.approx(1.5)
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("esc_total", "Escaping.", ("v",))
+        counter.inc(v='a"b')
+        assert 'esc_total{v="a\\"b"} 1' in counter.render()
+
+    def test_duplicate_registration_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter("dup_total", "Dup.")
+        with pytest.raises(ValueError):
+            registry.counter("dup_total", "Dup.")
+
+
+class TestEndpoints:
+    """Tests for /metrics and /stats."""
+
+    def test_requests_recorded_by_route_template(self, test_client):
+        test_client.get("/health")
+        test_client.get("/health")
+        test_client.get("/does-not-exist")
+
+        stats = test_client.get("/stats").json()
+        assert stats["requests_by_endpoint"]["/health"] == 2
+        assert stats["requests_by_endpoint"]["unmatched"] == 1
+        assert stats["total_requests"] == 3
+        assert stats["error_rate"] == pytest.approx(33.33)
+
+    def test_measure_label_uses_path_param(self, test_client, api_headers, sample_prediction_request):
+        test_client.post("/api/v1/predict/xyz", json=sample_prediction_request, headers=api_headers)
+
+        assert metrics.REQUEST_LATENCY.count(measure="XYZ") == 1
+        text = test_client.get("/metrics").text
+        assert 'route="/api/v1/predict/{measure_code}"' in text
+        assert "/api/v1/predict/xyz" not in text
+
+    def test_metrics_exposition_format(self, test_client):
+        test_client.get("/health")
+        response = test_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE hedis_api_request_duration_seconds histogram" in response.text
+        assert 'hedis_api_requests_total{method="GET",route="/health",status="200"} 1' in response.text
+
+    def test_stats_include_inference_and_cache(self, test_client):
+        metrics.MODEL_INFERENCE_SECONDS.observe(0.002, measure="GSD")
+        metrics.SHAP_SECONDS.observe(0.02, measure="GSD")
+        metrics.record_cache("model", True)
+        metrics.record_cache("model", True)
+        metrics.record_cache("model", False)
+
+        stats = test_client.get("/stats").json()
+        assert stats["model_inference_ms"]["count"] == 1
+        assert stats["shap_ms"]["avg"] == pytest.approx(20.0)
+        assert stats["cache_hit_ratio"]["model"] == pytest.approx(0.6667)
+
+
+class TestPoolGauges:
+    """Tests for the DB pool gauges."""
+
+    def test_overflow_is_clamped_at_zero(self, monkeypatch):
+        from src.database import connection
+
+        monkeypatch.setattr(connection.engine.pool, "overflow", lambda: -5)
+        text = metrics.registry.render()
+        assert 'hedis_db_pool_connections{state="overflow"} 0' in text
+
+    def test_sync_checkout_wait_recorded(self, monkeypatch):
+        from src.database import connection
+
+        class FakeSession:
+            def connection(self):
+                pass
+
+            def commit(self):
+                pass
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(connection, "SessionLocal", FakeSession)
+        connection.sync_pool_metrics.reset()
+        with connection.get_db_context():
+            pass
+
+        assert connection.sync_pool_metrics.waits == 1
+        text = metrics.registry.render()
+        assert 'hedis_db_pool_checkout_wait_seconds{pool="sync",stat="max"}' in text
+        assert 'hedis_db_pool_checkout_wait_seconds{pool="async",stat="avg"}' in text
@@ -0,0 +1,209 @@
+"""
+Rate Limiting Tests
+Tests for the sliding-window-counter algorithm, storage backends and policy rules.
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.rate_limit import (
+    InMemoryBackend,
+    RateLimitRules,
+    SharedFileBackend,
+    FCNTL_AVAILABLE,
+    create_backend,
+    sliding_window_hit,
+)
+from src.api.auth import RateLimiter, add_rate_limit_headers
+
+
+class FakeClock:
+    """Controllable clock for deterministic window tests."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSlidingWindowAlgorithm:
+    """Tests for the pure sliding-window-counter function."""
+
+    def test_allows_up_to_limit_then_denies(self):
+        state = None
+        for i in range(5):
+            state, result = sliding_window_hit(state, 600.0, limit=5, window_seconds=60)
+            assert result.allowed
+            assert result.remaining == 4 - i
+
+        state, result = sliding_window_hit(state, 600.0, limit=5, window_seconds=60)
+        assert not result.allowed
+        assert result.remaining == 0
+        assert result.retry_after >= 1
+
+    def test_previous_window_decays(self):
+        # Fill window [600, 660), then move halfway through the next window
+        state = None
+        for _ in range(10):
+            state, _ = sliding_window_hit(state, 600.0, limit=10, window_seconds=60)
+
+        # At 690 half the previous window overlaps: estimate = 10 * 0.5 = 5
+        state, result = sliding_window_hit(state, 690.0, limit=10, window_seconds=60)
+        assert result.allowed
+        assert result.remaining == 4
+
+    def test_state_is_constant_size(self):
+        state = None
+        for t in range(1000):
+            state, _ = sliding_window_hit(state, 600.0 + t * 0.01, limit=10_000, window_seconds=60)
+        assert len(state) == 3
+
+    def test_retry_after_is_accurate(self):
+        state = None
+        for _ in range(10):
+            state, _ = sliding_window_hit(state, 600.0, limit=10, window_seconds=60)
+        state, denied = sliding_window_hit(state, 600.0, limit=10, window_seconds=60)
+        assert not denied.allowed
+
+        _, retried = sliding_window_hit(state, 600.0 + denied.retry_after, limit=10, window_seconds=60)
+        assert retried.allowed
+
+    def test_headers_include_standard_and_legacy(self):
+        _, result = sliding_window_hit(None, 600.0, limit=3, window_seconds=60)
+        headers = result.headers()
+        assert headers["RateLimit-Limit"] == "3"
+        assert headers["RateLimit-Remaining"] == "2"
+        assert headers["X-RateLimit-Limit"] == "3"
+        assert "Retry-After" not in headers
+
+
+class TestBackends:
+    """Tests for storage backends."""
+
+    def test_in_memory_backend_isolates_keys(self):
+        backend = InMemoryBackend(clock=FakeClock())
+        assert backend.hit("a", 1, 60).allowed
+        assert not backend.hit("a", 1, 60).allowed
+        assert backend.hit("b", 1, 60).allowed
+
+    def test_in_memory_backend_evicts_idle_keys(self):
+        clock = FakeClock()
+        backend = InMemoryBackend(clock=clock, sweep_interval=60)
+        for i in range(100):
+            backend.hit(f"k{i}", 1, 60)
+
+        # Two windows later every key is idle and the next hit sweeps them
+        clock.now += 180
+        assert backend.hit("new-key", 1, 60).allowed
+        assert list(backend._states) == ["new-key"]
+
+    @pytest.mark.skipif(not FCNTL_AVAILABLE, reason="shared backend requires fcntl")
+    def test_shared_backend_is_shared_between_instances(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "ratelimit.mmap")
+        worker_a = SharedFileBackend(path, slots=64, clock=clock)
+        worker_b = SharedFileBackend(path, slots=64, clock=clock)
+
+        assert worker_a.hit("key", 2, 60).allowed
+        assert worker_b.hit("key", 2, 60).allowed
+        assert not worker_a.hit("key", 2, 60).allowed
+
+        worker_b.reset("key")
+        assert worker_a.hit("key", 2, 60).allowed
+        worker_a.close()
+        worker_b.close()
+
+    @pytest.mark.skipif(not FCNTL_AVAILABLE, reason="shared backend requires fcntl")
+    def test_shared_backend_reclaims_stale_slots(self, tmp_path):
+        clock = FakeClock()
+        backend = SharedFileBackend(str(tmp_path / "rl.mmap"), slots=4, probe=4, clock=clock)
+        for i in range(4):
+            assert backend.hit(f"k{i}", 1, 60).allowed
+
+        # Two windows later every slot is stale and can be reused
+        clock.now += 180
+        assert backend.hit("new-key", 1, 60).allowed
+        backend.close()
+
+    def test_unknown_backend_falls_back_to_memory(self):
+        assert isinstance(create_backend("does-not-exist"), InMemoryBackend)
+
+
+class TestRules:
+    """Tests for per-key and per-route policy resolution."""
+
+    def test_key_override_replaces_global_budget(self):
+        rules = RateLimitRules(100, 60, key_limits={"vip": 1000}, route_limits={"/api": 5})
+        assert rules.resolve(key_id="vip", path="/health").limit == 1000
+
+    def test_key_override_never_loosens_route_limit(self):
+        rules = RateLimitRules(100, 60, key_limits={"vip": 1000, "slow": 2}, route_limits={"/api": 5})
+        assert rules.resolve(key_id="vip", path="/api/v1/predict").limit == 5
+        policy = rules.resolve(key_id="slow", path="/api/v1/predict")
+        assert policy.limit == 2
+        assert policy.scope == "route:/api"
+
+    def test_longest_route_prefix_wins(self):
+        rules = RateLimitRules(100, 60, route_limits={"/api/v1": 50, "/api/v1/predict/batch": 5})
+        policy = rules.resolve(path="/api/v1/predict/batch/GSD")
+        assert policy.limit == 5
+        assert policy.scope == "route:/api/v1/predict/batch"
+
+    def test_default_policy(self):
+        rules = RateLimitRules(100, 60, route_limits={"/admin": 1})
+        assert rules.resolve(key_id="x", path="/health").limit == 100
+
+    def test_route_budget_is_separate_from_global(self):
+        limiter = RateLimiter(
+            backend=InMemoryBackend(clock=FakeClock()),
+            rules=RateLimitRules(2, 60, route_limits={"/batch": 1}),
+        )
+        assert limiter.check("k", path="/batch").allowed
+        assert not limiter.check("k", path="/batch").allowed
+        assert limiter.check("k", path="/other").allowed
+        assert limiter.get_retry_after("k") == 0
+
+    def test_denied_results_are_bounded(self):
+        limiter = RateLimiter(
+            backend=InMemoryBackend(clock=FakeClock()),
+            rules=RateLimitRules(0, 60),
+            max_tracked_keys=2,
+        )
+        for key in ("a", "b", "c"):
+            assert not limiter.check(key).allowed
+
+        assert list(limiter._last_results) == ["b", "c"]
+        assert limiter.get_retry_after("c") > 0
+        assert limiter.get_retry_after("a") == 0
+
+
+class TestRateLimitHeadersMiddleware:
+    """Tests for header propagation to responses."""
+
+    def test_headers_added_and_429_returned(self):
+        limiter = RateLimiter(backend=InMemoryBackend(clock=FakeClock()), rules=RateLimitRules(1, 60))
+        app = FastAPI()
+        app.middleware("http")(add_rate_limit_headers)
+
+        from fastapi import HTTPException, Request
+
+        async def limited(request: Request):
+            result = limiter.check("k", path=request.url.path)
+            request.state.rate_limit = result
+            if not result.allowed:
+                raise HTTPException(status_code=429, headers=result.headers())
+
+        @app.get("/ping", dependencies=[Depends(limited)])
+        async def ping():
+            return {"ok": True}
+
+        client = TestClient(app)
+        first = client.get("/ping")
+        assert first.status_code == 200
+        assert first.headers["RateLimit-Remaining"] == "0"
+
+        second = client.get("/ping")
+        assert second.status_code == 429
+        assert int(second.headers["Retry-After"]) >= 1
@@ -0,0 +1,183 @@
+"""
+Streaming Export Tests
+Tests for NDJSON/CSV encoders and the /exports endpoints.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.api.main import app
+from src.api.routers import exports
+from src.api.streaming import iter_csv, iter_ndjson
+from src.database.models import Base, Member, Prediction, GapAnalysis
+
+# Registers the JSONB/ARRAY -> JSON shims for SQLite
+import tests.database.conftest  # noqa: F401
+
+
+MEMBER_HASH = "a" * 64
+
+
+@pytest.fixture
+def audit_entries(monkeypatch):
+    """Audit entries queued by the export endpoints (no background writer)."""
+    entries = []
+    monkeypatch.setattr(exports.crud, "queue_audit_log", lambda **entry: entries.append(entry))
+    return entries
+
+
+@pytest.fixture
+def export_session_factory(audit_entries):
+    """In-memory SQLite session factory seeded with gaps and predictions."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    session = factory()
+    session.add(Member(member_hash=MEMBER_HASH, first_seen=datetime.utcnow(), total_predictions=3, active=True))
+    for i in range(25):
+        session.add(GapAnalysis(
+            member_hash=MEMBER_HASH,
+            measure_code="GSD" if i % 2 else "KED",
+            measurement_year=2025,
+            gap_probability=0.5,
+            priority_score=float(i),
+            status="identified",
+        ))
+    for i in range(3):
+        session.add(Prediction(
+            member_hash=MEMBER_HASH,
+            measure_code="GSD",
+            measurement_year=2025,
+            gap_probability=0.1 * (i + 1),
+            risk_tier="low",
+            risk_score=0.1 * (i + 1),
+            top_features=[{"name": "age", "impact": 0.2}],
+            model_version=f"1.0.{i}",
+        ))
+    session.commit()
+    session.close()
+
+    app.dependency_overrides[exports.get_session_factory] = lambda: factory
+    try:
+        yield factory
+    finally:
+        app.dependency_overrides.pop(exports.get_session_factory, None)
+        Base.metadata.drop_all(bind=engine)
+
+
+class TestEncoders:
+    """Tests for the chunked NDJSON/CSV encoders."""
+
+    def test_ndjson_chunks_and_trailer(self):
+        rows = [{"n": i} for i in range(5)]
+        chunks = list(iter_ndjson(rows, to_dict=dict, chunk_rows=2))
+
+        # 2 + 2 full chunks, then the last row plus trailer
+        assert len(chunks) == 3
+        lines = b"".join(chunks).decode().splitlines()
+        assert [json.loads(line)["n"] for line in lines[:-1]] == list(range(5))
+        assert json.loads(lines[-1]) == {"_meta": {"row_count": 5, "complete": True}}
+
+    def test_ndjson_is_lazy(self):
+        consumed = []
+
+        def rows():
+            for i in range(10):
+                consumed.append(i)
+                yield {"n": i}
+
+        stream = iter_ndjson(rows(), to_dict=dict, chunk_rows=3)
+        next(stream)
+        assert len(consumed) == 3
+
+    def test_ndjson_serializes_datetimes(self):
+        when = datetime(2025, 1, 2, 3, 4, 5)
+        body = b"".join(iter_ndjson([{"at": when}], to_dict=dict, trailer=False))
+        assert json.loads(body) == {"at": when.isoformat()}
+
+    def test_csv_header_rows_and_trailer(self):
+        rows = [{"a": i, "b": [i]} for i in range(3)]
+        body = b"".join(iter_csv(rows, ["a", "b"], to_dict=dict, chunk_rows=2)).decode()
+        lines = body.splitlines()
+
+        assert lines[0] == "a,b"
+        assert lines[-1] == "# row_count=3"
+        parsed = list(csv.DictReader(io.StringIO("\n".join(lines[:-1]))))
+        assert [json.loads(row["b"]) for row in parsed] == [[0], [1], [2]]
+
+    def test_empty_stream_still_has_trailer(self):
+        lines = b"".join(iter_ndjson([], to_dict=dict)).decode().splitlines()
+        assert json.loads(lines[0])["_meta"]["row_count"] == 0
+
+
+class TestExportEndpoints:
+    """Tests for /api/v1/exports."""
+
+    def test_export_gaps_ndjson(self, test_client, api_headers, export_session_factory):
+        response = test_client.get("/api/v1/exports/gaps", headers=api_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        rows, trailer = lines[:-1], lines[-1]
+        assert trailer["_meta"]["row_count"] == 25
+        assert [row["priority_score"] for row in rows] == sorted(
+            (row["priority_score"] for row in rows), reverse=True
+        )
+
+    def test_export_gaps_csv_with_filter(self, test_client, api_headers, export_session_factory):
+        response = test_client.get(
+            "/api/v1/exports/gaps",
+            params={"format": "csv", "measure_code": "gsd", "batch_size": 100},
+            headers=api_headers,
+        )
+        assert response.status_code == 200
+        assert 'filename="gaps.csv"' in response.headers["content-disposition"]
+
+        lines = response.text.splitlines()
+        assert lines[-1] == "# row_count=12"
+        parsed = list(csv.DictReader(io.StringIO("\n".join(lines[:-1]))))
+        assert {row["measure_code"] for row in parsed} == {"GSD"}
+
+    def test_export_member_predictions(self, test_client, api_headers, export_session_factory):
+        response = test_client.get(
+            f"/api/v1/exports/members/{MEMBER_HASH}/predictions", headers=api_headers
+        )
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[-1]["_meta"]["row_count"] == 3
+        assert lines[0]["top_features"] == [{"name": "age", "impact": 0.2}]
+
+    def test_export_is_audited(self, test_client, api_headers, export_session_factory, audit_entries):
+        test_client.get(f"/api/v1/exports/members/{MEMBER_HASH}/predictions", headers=api_headers)
+
+        assert len(audit_entries) == 1
+        entry = audit_entries[0]
+        assert (entry["event_type"], entry["entity_type"], entry["entity_id"]) == (
+            "data_export", "Prediction", MEMBER_HASH
+        )
+        assert entry["changes"]["format"] == "ndjson"
+
+    def test_export_rejects_unhashed_member_id(self, test_client, api_headers, export_session_factory):
+        response = test_client.get("/api/v1/exports/members/M123/predictions", headers=api_headers)
+        assert response.status_code == 422
+
+    def test_export_rejects_unknown_format(self, test_client, api_headers, export_session_factory):
+        response = test_client.get("/api/v1/exports/gaps", params={"format": "xml"}, headers=api_headers)
+        assert response.status_code == 422
+
+    def test_export_requires_api_key(self, test_client):
+        response = test_client.get("/api/v1/exports/gaps")
+        assert response.status_code in (401, 403)
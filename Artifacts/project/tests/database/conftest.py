@@ -9,14 +9,30 @@ Date: October 2025
 
 import pytest
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+from sqlalchemy import ARRAY, create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 
 from src.database.models import Base, Member, Prediction, GapAnalysis, Intervention
 from src.database.connection import get_db
 
 
+# ===== SQLite Type Shims =====
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    """Render PostgreSQL JSONB as SQLite JSON for local tests."""
+    return "JSON"
+
+
+@compiles(ARRAY, "sqlite")
+def _compile_array_sqlite(type_, compiler, **kw):
+    """Render ARRAY as SQLite JSON for local tests."""
+    return "JSON"
+
+
 # ===== Test Database Setup =====
 
 @pytest.fixture(scope="function")
@@ -279,8 +295,6 @@ def create_test_prediction(test_db, sample_member_hash):
     Factory fixture to create test predictions.
     """
     def _create_prediction(member_hash=None, measure_code="GSD", **kwargs):
-        from src.database.models import Prediction
-        
         prediction = Prediction(
             member_hash=member_hash or sample_member_hash,
             measure_code=measure_code,
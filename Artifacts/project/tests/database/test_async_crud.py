@@ -0,0 +1,189 @@
+"""
+Async CRUD Operations Tests
+
+Tests for the async engine/session path and async CRUD functions,
+run against in-memory SQLite through aiosqlite.
+
+Author: Robert Reichert
+Date: October 2025
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from src.database.models import Base, Member, Prediction, APILog, AuditLog
+
+pytest.importorskip("aiosqlite")
+
+from src.database import async_connection, async_crud  # noqa: E402
+
+
+ASYNC_TABLES = [t.__table__ for t in (Member, Prediction, APILog, AuditLog)]
+
+
+def run(coro):
+    """Run a coroutine to completion."""
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def async_db():
+    """
+    Configure the global async engine on in-memory SQLite.
+
+    Yields an async session factory; tables are created per test.
+    """
+    engine = async_connection.configure_async_engine("sqlite:///:memory:")
+
+    async def _setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=ASYNC_TABLES)
+
+    run(_setup())
+    yield async_connection.get_async_session_factory()
+    run(async_connection.close_async_database_connections())
+
+
+# ===== URL / Engine Tests =====
+
+def test_to_async_url_postgres():
+    """PostgreSQL URLs map to asyncpg and keep credentials."""
+    url = async_connection.to_async_url("postgresql://user:pw@localhost:5432/db")
+    assert url == "postgresql+asyncpg://user:pw@localhost:5432/db"
+
+
+def test_to_async_url_sqlite():
+    """SQLite URLs map to aiosqlite."""
+    assert async_connection.to_async_url("sqlite:///test.db") == "sqlite+aiosqlite:///test.db"
+
+
+def test_to_async_url_already_async():
+    """Async URLs pass through unchanged."""
+    url = "postgresql+asyncpg://u:p@h/db"
+    assert async_connection.to_async_url(url) == url
+
+
+def test_async_health_check(async_db):
+    """Health check reports healthy with pool metrics."""
+    health = run(async_connection.check_async_database_health())
+
+    assert health["status"] == "healthy"
+    assert health["latency_ms"] >= 0
+    assert health["pool_info"]["pool_class"] == "StaticPool"
+
+
+# ===== Prediction Tests =====
+
+def test_async_create_prediction(async_db, sample_prediction_data, sample_member_hash):
+    """Create prediction also creates member and bumps activity."""
+    async def _run():
+        async with async_connection.get_async_db_context() as db:
+            prediction = await async_crud.create_prediction(db, sample_prediction_data)
+            member = await async_crud.get_member(db, sample_member_hash)
+            await db.refresh(member)
+            return prediction, member
+
+    prediction, member = run(_run())
+
+    assert prediction.prediction_id is not None
+    assert prediction.member_hash == sample_member_hash
+    assert member.total_predictions == 1
+
+
+def test_async_get_member_predictions_filters(async_db, sample_prediction_data, sample_member_hash):
+    """Member predictions respect measure and year filters."""
+    async def _run():
+        async with async_connection.get_async_db_context() as db:
+            await async_crud.create_prediction(db, sample_prediction_data)
+            await async_crud.create_prediction(
+                db, {**sample_prediction_data, "measure_code": "KED"}
+            )
+            everything = await async_crud.get_member_predictions(db, sample_member_hash)
+            ked_only = await async_crud.get_member_predictions(
+                db, sample_member_hash, measure_code="KED"
+            )
+            other_year = await async_crud.get_member_predictions(
+                db, sample_member_hash, measurement_year=2020
+            )
+            return everything, ked_only, other_year
+
+    everything, ked_only, other_year = run(_run())
+
+    assert len(everything) == 2
+    assert [p.measure_code for p in ked_only] == ["KED"]
+    assert other_year == []
+
+
+def test_async_get_db_dependency_records_checkout_wait(async_db):
+    """The FastAPI dependency yields a session and records checkout wait."""
+    async def _run():
+        gen = async_connection.get_async_db()
+        db = await gen.__anext__()
+        member = await async_crud.get_member(db, "0" * 64)
+        await gen.aclose()
+        return member
+
+    assert run(_run()) is None
+    metrics = async_connection.pool_metrics.snapshot()
+    assert metrics["checkouts"] >= 1
+    assert metrics["max_checkout_wait_ms"] >= 0
+
+
+# ===== API Stats Tests =====
+
+def test_async_get_api_stats_empty(async_db):
+    """No logs returns zeroed stats."""
+    async def _run():
+        async with async_connection.get_async_db_context() as db:
+            return await async_crud.get_api_stats(db)
+
+    assert run(_run()) == {"total_requests": 0, "avg_response_time": 0, "error_rate": 0}
+
+
+def test_async_get_api_stats_matches_sync_shape(async_db):
+    """Stats are aggregated in SQL with the same keys as the sync version."""
+    import uuid
+
+    async def _run():
+        async with async_connection.get_async_db_context() as db:
+            db.add_all([
+                APILog(request_id=uuid.uuid4(), endpoint="/predict", method="POST",
+                       status_code=200, response_time_ms=10, timestamp=datetime.utcnow()),
+                APILog(request_id=uuid.uuid4(), endpoint="/predict", method="POST",
+                       status_code=500, response_time_ms=30, timestamp=datetime.utcnow()),
+                APILog(request_id=uuid.uuid4(), endpoint="/health", method="GET",
+                       status_code=200, response_time_ms=2, timestamp=datetime.utcnow()),
+            ])
+            await db.flush()
+            return await async_crud.get_api_stats(db)
+
+    stats = run(_run())
+
+    assert stats["total_requests"] == 3
+    assert stats["avg_response_time"] == 14.0
+    assert stats["error_rate"] == 33.33
+    assert stats["requests_by_endpoint"] == {"/predict": 2, "/health": 1}
+
+
+# ===== Audit Log Tests =====
+
+def test_async_create_audit_log(async_db):
+    """Audit entries default user_id to system."""
+    async def _run():
+        async with async_connection.get_async_db_context() as db:
+            entry = await async_crud.create_audit_log(
+                db, "prediction", "Prediction", "abc", "create", changes={"risk": "high"}
+            )
+            written = await async_crud.create_audit_logs(db, [
+                {"event_type": "gap", "entity_type": "Gap", "entity_id": "g1", "action": "update"},
+                {"event_type": "gap", "entity_type": "Gap", "entity_id": "g2", "action": "update",
+                 "user_id": "analyst"},
+            ])
+            return entry, written
+
+    entry, written = run(_run())
+
+    assert entry.audit_id is not None
+    assert entry.user_id == "system"
+    assert written == 2
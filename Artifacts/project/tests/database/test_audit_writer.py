@@ -0,0 +1,220 @@
+"""
+Batched Audit Writer Tests
+
+Tests for the background audit pipeline: batching, spill-on-failure,
+replay and drain on shutdown.
+
+Author: Robert Reichert
+Date: October 2025
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+import pytest
+
+from src.database import crud
+from src.database.audit_writer import BatchedAuditWriter
+from src.database.models import AuditLog
+
+
+class RecordingSink:
+    """Sink that records batches and can be switched to fail."""
+
+    def __init__(self):
+        self.batches = []
+        self.failing = False
+        self.lock = threading.Lock()
+
+    def __call__(self, entries):
+        if self.failing:
+            raise ConnectionError("database unavailable")
+        with self.lock:
+            self.batches.append(list(entries))
+
+    @property
+    def entries(self):
+        return [entry for batch in self.batches for entry in batch]
+
+
+@pytest.fixture
+def sink():
+    return RecordingSink()
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "audit_spill.jsonl")
+
+
+def test_entries_are_batched(sink, spill_path):
+    writer = BatchedAuditWriter(sink, spill_path, batch_size=50, flush_interval=0.2).start()
+    for i in range(120):
+        writer.submit({"n": i})
+    writer.close()
+
+    assert [entry["n"] for entry in sink.entries] == list(range(120))
+    assert max(len(batch) for batch in sink.batches) == 50
+    assert len(sink.batches) < 120
+
+
+def test_flush_makes_entries_visible(sink, spill_path):
+    writer = BatchedAuditWriter(sink, spill_path, flush_interval=0.05).start()
+    writer.submit({"n": 1})
+
+    assert writer.flush(timeout=2)
+    assert sink.entries == [{"n": 1}]
+    writer.close()
+
+
+def test_sink_failure_spills_then_replays(sink, spill_path):
+    when = datetime(2025, 10, 1, 12, 0, 0)
+    writer = BatchedAuditWriter(sink, spill_path, flush_interval=0.01, retry_interval=0.01).start()
+
+    sink.failing = True
+    writer.submit({"n": 1, "timestamp": when})
+    writer.flush(timeout=2)
+    assert writer.stats["spilled"] == 1
+    assert sink.entries == []
+
+    sink.failing = False
+    writer.close()
+
+    # Replayed with its original (deserialized) timestamp
+    assert sink.entries == [{"n": 1, "timestamp": when}]
+    assert writer.stats["replayed"] == 1
+
+
+def test_full_queue_spills_instead_of_dropping(sink, spill_path):
+    # Writer not started: the queue fills up and overflow goes to disk
+    writer = BatchedAuditWriter(sink, spill_path, max_queue=2)
+    for i in range(5):
+        writer.submit({"n": i})
+    assert writer.stats["spilled"] == 3
+
+    writer.close()
+    assert sorted(entry["n"] for entry in sink.entries) == list(range(5))
+
+
+def test_unwritten_entries_survive_close(sink, spill_path):
+    sink.failing = True
+    writer = BatchedAuditWriter(sink, spill_path, flush_interval=0.01).start()
+    writer.submit({"n": 1})
+    writer.close()
+
+    # A later writer (next process start) picks the spill up
+    sink.failing = False
+    BatchedAuditWriter(sink, spill_path).close()
+    assert sink.entries == [{"n": 1}]
+
+
+def test_start_registers_close_at_exit(sink, spill_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr("src.database.audit_writer.atexit.register", registered.append)
+    monkeypatch.setattr("src.database.audit_writer.atexit.unregister", registered.remove)
+
+    writer = BatchedAuditWriter(sink, spill_path).start()
+    assert registered == [writer.close]
+
+    writer.close()
+    assert registered == []
+
+
+def test_writers_sharing_a_spill_path_replay_once(sink, spill_path):
+    sink.failing = True
+    first = BatchedAuditWriter(sink, spill_path)
+    second = BatchedAuditWriter(sink, spill_path)
+    assert first._spill_lock is second._spill_lock
+
+    for i in range(3):
+        first.submit({"n": i})
+        second.submit({"n": 10 + i})
+    first.close()
+
+    sink.failing = False
+    second.close()
+    first._replay_spill(force=True)
+    assert sorted(entry["n"] for entry in sink.entries) == [0, 1, 2, 10, 11, 12]
+
+
+def test_torn_spill_line_is_quarantined(sink, spill_path):
+    with open(spill_path, "w", encoding="utf-8") as f:
+        f.write('{"a": 1}\n{"b": 2')
+
+    writer = BatchedAuditWriter(sink, spill_path, flush_interval=0.01, retry_interval=0.01).start()
+    writer.submit({"c": 3})
+    assert writer.flush(timeout=2)
+    writer.close()
+
+    assert {"a": 1} in sink.entries and {"c": 3} in sink.entries
+    assert writer.stats["corrupt_lines"] == 1
+    with open(spill_path + ".corrupt", encoding="utf-8") as f:
+        assert f.read() == '{"b": 2\n'
+
+
+def test_writer_thread_survives_errors(sink, spill_path, monkeypatch):
+    writer = BatchedAuditWriter(sink, spill_path, flush_interval=0.01, retry_interval=0.01)
+    monkeypatch.setattr(writer, "_replay_spill", lambda force=False: 1 / 0)
+    writer.start()
+    writer.submit({"n": 1})
+    assert writer.flush(timeout=2)
+    writer.submit({"n": 2})
+    assert writer.flush(timeout=2)
+
+    assert writer._thread.is_alive()
+    assert sink.entries == [{"n": 1}, {"n": 2}]
+    assert writer.stats["writer_errors"] >= 1
+    monkeypatch.undo()
+    writer.close()
+
+
+def test_poison_entry_is_dead_lettered(spill_path):
+    written = []
+
+    def picky_sink(entries):
+        if any(entry.get("poison") for entry in entries):
+            raise ValueError("constraint violation")
+        written.extend(entries)
+
+    writer = BatchedAuditWriter(picky_sink, spill_path, max_replay_attempts=2)
+    writer._spill([{"poison": True}, {"n": 1}, {"n": 2}])
+
+    writer._replay_spill(force=True)
+    assert written == [{"n": 1}, {"n": 2}]
+    assert writer.stats["dead_lettered"] == 0
+
+    writer._spill([{"n": 3}])
+    writer._replay_spill(force=True)
+    assert written[-1] == {"n": 3}
+    assert writer.stats["dead_lettered"] == 1
+    assert not os.path.exists(spill_path + ".replay")
+    with open(spill_path + ".dead", encoding="utf-8") as f:
+        assert json.loads(f.read()) == {"poison": True}
+
+
+def test_outage_does_not_dead_letter(sink, spill_path):
+    sink.failing = True
+    writer = BatchedAuditWriter(sink, spill_path, max_replay_attempts=1)
+    writer._spill([{"n": i} for i in range(5)])
+    for _ in range(3):
+        writer._replay_spill(force=True)
+
+    assert writer.stats["dead_lettered"] == 0
+    sink.failing = False
+    writer._replay_spill(force=True)
+    assert [entry["n"] for entry in sink.entries] == list(range(5))
+
+
+def test_create_audit_logs_bulk(test_db):
+    written = crud.create_audit_logs(test_db, [
+        {"event_type": "prediction", "entity_type": "Prediction", "entity_id": str(i),
+         "action": "create", "timestamp": datetime.utcnow()}
+        for i in range(3)
+    ])
+
+    assert written == 3
+    rows = test_db.query(AuditLog).all()
+    assert len(rows) == 3
+    assert {row.user_id for row in rows} == {"system"}
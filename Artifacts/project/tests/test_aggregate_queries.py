@@ -0,0 +1,150 @@
+"""
+Unit tests for prepared, cached aggregate queries.
+"""
+
+import sqlite3
+
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.aggregate_queries import (
+    AGGREGATE_QUERIES,
+    SQLITE,
+    AggregateQuery,
+    AggregateQueryError,
+    AggregateQueryExecutor,
+    validate_query,
+)
+from services.query_cache import DataVersionRegistry
+
+
+def connect_factory(calls):
+    def connect():
+        calls.append(1)
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.executescript("""
+            CREATE TABLE member_gaps (
+                member_id TEXT, measure_id TEXT, plan_id TEXT,
+                predicted_success_rate REAL, risk_score REAL, is_compliant INTEGER
+            );
+            INSERT INTO member_gaps VALUES
+                ('M1', 'GSD', 'P1', 0.5, 0.9, 1),
+                ('M2', 'GSD', 'P1', 0.7, 0.2, 0),
+                ('M3', 'GSD', 'P2', 0.9, 0.8, 1),
+                ('M4', 'CBP', 'P1', 0.4, 0.1, 0);
+        """)
+        return conn
+    return connect
+
+
+@pytest.fixture
+def executor():
+    calls = []
+    executor = AggregateQueryExecutor(connect_factory(calls), dialect=SQLITE, versions=DataVersionRegistry())
+    executor.connect_calls = calls
+    yield executor
+    executor.close()
+
+
+def test_registry_queries_are_valid():
+    assert {"gaps", "performance", "intervention_costs", "revenue_impact"} <= set(AGGREGATE_QUERIES)
+    for query in AGGREGATE_QUERIES.values():
+        validate_query(query)
+
+
+def test_member_level_output_rejected():
+    query = AggregateQuery(
+        name="leak", select="SELECT member_id, COUNT(*) as n FROM member_gaps WHERE measure_id = :measure_id",
+        group_by="member_id", tables=("member_gaps",), required=("measure_id",),
+    )
+    with pytest.raises(AggregateQueryError):
+        validate_query(query)
+
+
+def test_undeclared_parameter_rejected():
+    query = AggregateQuery(
+        name="bad", select="SELECT measure_id, COUNT(*) as n FROM member_gaps WHERE plan_id = :plan_id",
+        group_by="measure_id", tables=("member_gaps",),
+    )
+    with pytest.raises(AggregateQueryError):
+        validate_query(query)
+
+
+def test_gaps_with_and_without_plan_filter(executor):
+    overall = executor.run("gaps", {"measure_id": "GSD"})
+    plan = executor.run("gaps", {"measure_id": "GSD", "plan_id": "P1"})
+
+    assert overall.loc[0, "gap_count"] == 3
+    assert overall.loc[0, "high_risk_count"] == 2
+    assert plan.loc[0, "gap_count"] == 2
+
+    performance = executor.run("performance", {"measure_id": "GSD"})
+    assert performance.loc[0, "compliant_members"] == 2
+
+
+def test_repeated_queries_served_from_cache_on_one_connection(executor):
+    first = executor.run("gaps", {"measure_id": "GSD", "plan_id": None})
+    first.loc[0, "gap_count"] = -1  # callers get copies
+    second = executor.run("gaps", {"measure_id": "GSD"})
+
+    assert second.loc[0, "gap_count"] == 3
+    stats = executor.get_stats()
+    assert (stats["hits"], stats["misses"], stats["executions"]) == (1, 1, 1)
+    assert len(executor.connect_calls) == 1
+
+
+def test_table_version_bump_invalidates(executor):
+    executor.run("gaps", {"measure_id": "GSD"})
+    executor._conn.execute("INSERT INTO member_gaps VALUES ('M5', 'GSD', 'P1', 0.1, 0.1, 0)")
+
+    assert executor.run("gaps", {"measure_id": "GSD"}).loc[0, "gap_count"] == 3  # cached
+    executor.versions.bump("member_gaps")
+    assert executor.run("gaps", {"measure_id": "GSD"}).loc[0, "gap_count"] == 4
+
+
+def test_unknown_query_and_missing_params(executor):
+    with pytest.raises(AggregateQueryError):
+        executor.run("member_list", {"measure_id": "GSD"})
+    with pytest.raises(AggregateQueryError):
+        executor.run("gaps", {})
+
+
+def test_postgres_statements_use_positional_parameters():
+    executor = AggregateQueryExecutor(lambda: None, versions=DataVersionRegistry())
+    statement = executor._statement(AGGREGATE_QUERIES["gaps"], ("plan_id",))
+
+    assert "$1" in statement.sql and "$2" in statement.sql and ":" not in statement.sql
+    assert statement.params == ("measure_id", "plan_id")
+    assert statement.name == "agg_gaps_plan_id"
+
+
+def test_postgres_executor_probes_for_external_writes():
+    writes = {"count": 0}
+
+    class Cursor:
+        def execute(self, sql, params):
+            self.params = params
+
+        def fetchall(self):
+            return [(table, writes["count"]) for table in self.params["tables"]]
+
+        def close(self):
+            pass
+
+    class Connection:
+        autocommit = False
+
+        def cursor(self):
+            return Cursor()
+
+    versions = DataVersionRegistry(probe_interval=0)
+    AggregateQueryExecutor(Connection, versions=versions)
+
+    before = versions.token(("member_gaps",))
+    assert versions.token(("member_gaps",)) == before
+    writes["count"] += 1
+    assert versions.token(("member_gaps",)) != before
@@ -0,0 +1,133 @@
+"""
+Unit tests for token-accurate, budget-aware context packing.
+"""
+
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.context_packer import (
+    ContextChunk,
+    ContextPacker,
+    _knapsack,
+    count_structure_tokens,
+    count_tokens,
+)
+from services.context_engine import HierarchicalContextBuilder, compress_context, estimate_tokens
+
+
+class StubRetriever:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def retrieve(self, query, top_k=5):
+        return self.docs[:top_k]
+
+
+def long_doc(i, score, words=400):
+    return {"content": f"Document {i}. " + "measure guidance text " * words, "score": score, "metadata": {"i": i}}
+
+
+def test_count_tokens_is_cached_and_reasonable():
+    text = "HEDIS measures healthcare quality across multiple domains."
+
+    assert 6 <= count_tokens(text) <= 15
+    assert count_tokens(text) == count_tokens(text)
+    assert count_tokens("") == 0
+    assert count_tokens.cache_info().hits >= 1
+
+
+def test_structure_tokens_count_leaves_without_full_serialization():
+    context = {"a": "one two three", "b": ["four", "five"], "c": {"d": 6}}
+
+    assert count_structure_tokens(context) > count_tokens("one two three")
+    assert estimate_tokens(context) == count_structure_tokens(context)
+
+
+def test_knapsack_maximizes_value_within_capacity():
+    # Greedy by value would take the 60-token item; the two small ones are better
+    chosen = _knapsack([[(60, 1.0)], [(50, 0.7)], [(50, 0.7)]], capacity=100)
+
+    assert chosen == [-1, 0, 0]
+
+
+def test_knapsack_picks_summary_variant_when_full_does_not_fit():
+    chosen = _knapsack([[(500, 1.0), (40, 0.6)], [(50, 0.5)]], capacity=100)
+
+    assert chosen == [1, 0]
+
+
+def test_packer_required_first_and_layer_breakdown():
+    chunks = [
+        ContextChunk("layer_1_domain", "compliance", "HIPAA de-identification " * 5, required=True),
+        ContextChunk("layer_3_query", 0, "high relevance " * 20, score=1.0),
+        ContextChunk("layer_3_query", 1, "low relevance " * 20, score=0.1),
+    ]
+
+    packed = ContextPacker().pack(chunks, max_tokens=100)
+
+    assert [c.key for c in packed.selected] == ["compliance", 0]
+    assert packed.total_tokens <= 100
+    layer_3 = packed.layers["layer_3_query"]
+    assert (layer_3.candidates, layer_3.selected, layer_3.dropped) == (2, 1, 1)
+    assert packed.to_dict()["layers"]["layer_1_domain"]["used"] > 0
+
+
+def test_build_context_fits_budget_and_prefers_relevant_docs():
+    docs = [long_doc(0, 0.9), long_doc(1, 0.2), long_doc(2, 0.8)]
+    builder = HierarchicalContextBuilder(rag_retriever=StubRetriever(docs))
+
+    context = builder.build_context("What's the ROI for HbA1c testing?", max_tokens=1500)
+
+    budget = context["_token_budget"]
+    assert budget["total_tokens"] <= 1500
+    assert budget["candidate_tokens"] > 1500
+    assert set(budget["layers"]) == {"layer_1_domain", "layer_2_measure", "layer_3_query"}
+    kept = [doc["metadata"]["i"] for doc in context["layer_3_query"]["retrieved_docs"]]
+    assert 1 not in kept or {0, 2} <= set(kept)
+    assert context["layer_3_query"]["relevance_scores"] == [
+        doc["score"] for doc in context["layer_3_query"]["retrieved_docs"]
+    ]
+    assert "hedis_overview" in context["layer_1_domain"]
+    assert "compliance" in context["layer_1_domain"]
+
+
+def test_build_context_keeps_everything_under_budget():
+    builder = HierarchicalContextBuilder(rag_retriever=StubRetriever([long_doc(0, 0.9, words=5)]))
+
+    context = builder.build_context("GSD performance", max_tokens=4000)
+
+    assert len(context["layer_3_query"]["retrieved_docs"]) == 1
+    assert context["_token_budget"]["layers"]["layer_3_query"]["dropped"] == 0
+    assert set(context["layer_1_domain"]) == {"hedis_overview", "star_ratings", "terminology", "temporal", "compliance"}
+
+
+def test_assembled_context_is_phi_checked():
+    leaked = {"content": "Outreach list: MBR1234567, DOB 04/12/1961", "score": 0.9, "metadata": {}}
+    builder = HierarchicalContextBuilder(rag_retriever=StubRetriever([leaked]))
+
+    with pytest.raises(ValueError, match="assembled context"):
+        builder.build_context("GSD outreach", max_tokens=4000)
+
+
+def test_measure_names_pass_context_phi_check():
+    doc = {"content": "Glycemic Status Assessment for Patients with Diabetes", "score": 0.9, "metadata": {}}
+    builder = HierarchicalContextBuilder(rag_retriever=StubRetriever([doc]))
+
+    context = builder.build_context("GSD KED EED CBP performance", max_tokens=4000)
+    assert context["layer_3_query"]["retrieved_docs"]
+
+
+def test_compress_context_truncates_to_target():
+    context = {
+        "layer_1_domain": {"hedis_overview": "overview text " * 500, "star_ratings": "stars " * 10},
+        "layer_2_measure": {},
+        "layer_3_query": {"retrieved_docs": [], "relevance_scores": []},
+    }
+
+    compressed = compress_context(context, target_tokens=300)
+
+    assert compressed["_compression_metrics"]["final_tokens"] <= 320
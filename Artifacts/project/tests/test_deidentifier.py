@@ -0,0 +1,136 @@
+"""
+Unit tests for vectorized de-identification of tool results.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.security.deidentifier import (
+    AGE_BUCKET,
+    HASH,
+    YEAR,
+    DeidentificationReport,
+    Deidentifier,
+)
+
+
+def member_frame():
+    return pd.DataFrame({
+        "member_id": ["M1", "M2", "M3"],
+        "subscriber_id": ["S1", "S1", None],
+        "dob": ["1950-04-02", "1988-12-31", "not a date"],
+        "age": [95, 40, 17],
+        "measure_id": ["GSD", "GSD", "CBP"],
+    })
+
+
+def test_column_policies_applied_and_reported():
+    deidentifier = Deidentifier(hash_key="k" * 16)
+
+    result, report = deidentifier.deidentify(member_frame())
+
+    assert list(result.columns) == ["subscriber_id", "dob", "age", "measure_id"]
+    assert result["dob"].tolist()[:2] == [1950, 1988]
+    assert pd.isna(result["dob"].iloc[2])
+    assert result["age"].astype(str).tolist() == ["90+", "18-44", "0-17"]
+    assert report.dropped == ["member_id"]
+    assert report.hashed == ["subscriber_id"]
+    assert report.generalized == {"dob": YEAR, "age": AGE_BUCKET}
+    assert (report.rows, report.cells) == (3, 15)
+
+
+def test_hash_is_keyed_stable_and_keeps_missing():
+    values = pd.Series(["S1", "S1", None, "S2"])
+
+    first = Deidentifier(hash_key="a" * 16).hash_values(values)
+    again = Deidentifier(hash_key="a" * 16).hash_values(values)
+    other_key = Deidentifier(hash_key="b" * 16).hash_values(values)
+
+    assert first.tolist() == again.tolist()
+    assert first[0] == first[1] != first[3]
+    assert pd.isna(first[2])
+    assert len(first[0]) == 16 and all(c in "0123456789abcdef" for c in first[0])
+    assert first[0] != other_key[0]
+
+
+def test_small_cells_suppressed_in_count_columns_only():
+    frame = pd.DataFrame({
+        "measure_id": ["GSD", "CBP", "KED"],
+        "gap_count": [250, 4, 0],
+        "eligible_members": [10, 11, 500],
+        "avg_cost": [3.0, 5.0, 7.0],
+    })
+
+    result, report = Deidentifier(min_cell_size=11).deidentify(frame)
+
+    assert result["gap_count"].tolist()[0] == 250
+    assert np.isnan(result["gap_count"].iloc[1])
+    assert result["gap_count"].iloc[2] == 0  # zero counts are kept
+    assert np.isnan(result["eligible_members"].iloc[0])
+    assert result["avg_cost"].tolist() == [3.0, 5.0, 7.0]
+    assert report.suppressed == {"gap_count": 1, "eligible_members": 1}
+    # Input frame is not modified
+    assert frame["gap_count"].tolist() == [250, 4, 0]
+
+
+def test_operational_counts_are_not_suppressed():
+    roi = {"intervention_count": 5, "high_risk_count": 5, "numerator": 5, "count": 5}
+
+    cleaned, report = Deidentifier(min_cell_size=11).deidentify(roi)
+
+    assert cleaned["intervention_count"] == 5
+    assert cleaned["high_risk_count"] is None
+    assert set(report.suppressed) == {"high_risk_count", "numerator", "count"}
+
+
+def test_nested_dicts_and_records():
+    result = {
+        "member_name": "Jane Roe",
+        "summary": {"gap_count": 3, "measure": "GSD"},
+        "records": [{"member_id": "M1", "age": 70}, {"member_id": "M2", "age": 12}],
+        "frame": member_frame(),
+    }
+
+    cleaned, report = Deidentifier(policies={"measure": HASH}, hash_key="k" * 16).deidentify(result)
+
+    assert "member_name" not in cleaned
+    assert cleaned["summary"]["gap_count"] is None
+    assert cleaned["summary"]["measure"] != "GSD"
+    assert cleaned["records"] == [{"age": "65-74"}, {"age": "0-17"}]
+    assert "member_id" not in cleaned["frame"].columns
+    assert report.dropped == ["member_name", "records.member_id", "frame.member_id"]
+    assert report.suppressed == {"summary.gap_count": 1}
+
+
+def test_unknown_action_rejected():
+    with pytest.raises(ValueError):
+        Deidentifier(policies={"zip": "truncate"})
+
+
+def test_sanitize_for_logging_redacts_and_summarizes_frames():
+    deidentifier = Deidentifier()
+
+    sanitized = deidentifier.sanitize_for_logging({
+        "api_key": "abc",
+        "member_id": "M1",
+        "measure_id": "GSD",
+        "rows": [member_frame()],
+    })
+
+    assert sanitized["api_key"] == "***REDACTED***"
+    assert sanitized["member_id"] == "***REDACTED***"
+    assert sanitized["measure_id"] == "GSD"
+    assert sanitized["rows"][0]["dataframe"]["rows"] == 3
+
+
+def test_report_to_dict_has_no_values():
+    _, report = Deidentifier().deidentify(member_frame())
+
+    assert isinstance(report, DeidentificationReport)
+    assert "M1" not in str(report.to_dict())
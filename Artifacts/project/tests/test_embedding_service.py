@@ -0,0 +1,109 @@
+"""
+Unit tests for the batched, cached embedding service.
+"""
+
+import numpy as np
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.embedding_service import EmbeddingService
+
+
+class CountingModel:
+    """Stand-in for SentenceTransformer that records encode calls."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array([[float(len(text))] * self.dim for text in texts])
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+DOCS = [f"HEDIS measure document {i}" for i in range(10)]
+
+
+def test_documents_are_encoded_in_batches():
+    model = CountingModel()
+    service = EmbeddingService(model=model, batch_size=4)
+
+    vectors = service.embed_documents(DOCS)
+
+    assert vectors.shape == (10, 8)
+    assert vectors.dtype == np.float32
+    assert [len(call) for call in model.calls] == [4, 4, 2]
+
+
+def test_unchanged_documents_are_not_re_embedded(tmp_path):
+    model = CountingModel()
+    EmbeddingService(model=model, model_name="m", cache_dir=str(tmp_path)).embed_documents(DOCS)
+    model.calls.clear()
+
+    # New process: vectors come from the on-disk cache; only the new text is encoded
+    restarted = EmbeddingService(model=model, model_name="m", cache_dir=str(tmp_path))
+    vectors = restarted.embed_documents(DOCS + ["new document"])
+
+    assert model.calls == [["new document"]]
+    assert vectors.shape == (11, 8)
+    assert restarted.stats["document_cache_hits"] == 10
+
+
+def test_model_name_namespaces_the_cache(tmp_path):
+    model = CountingModel()
+    EmbeddingService(model=model, model_name="a", cache_dir=str(tmp_path)).embed_documents(DOCS)
+    model.calls.clear()
+
+    EmbeddingService(model=model, model_name="b", cache_dir=str(tmp_path)).embed_documents(DOCS)
+
+    assert sum(len(call) for call in model.calls) == 10
+
+
+def test_query_lru():
+    model = CountingModel()
+    service = EmbeddingService(model=model, query_cache_size=2)
+
+    service.embed_query("roi of gsd")
+    service.embed_query("roi of gsd")
+    service.embed_query("gaps for cbp")
+    service.embed_query("eye exam rate")  # evicts "roi of gsd"
+    service.embed_query("roi of gsd")
+
+    assert len(model.calls) == 4
+    assert service.stats["query_cache_hits"] == 1
+
+
+def test_embed_queries_batches_misses():
+    model = CountingModel()
+    service = EmbeddingService(model=model)
+    service.embed_query("a")
+    model.calls.clear()
+
+    vectors = service.embed_queries(["a", "bb", "ccc", "bb"])
+
+    assert model.calls == [["bb", "ccc"]]
+    assert vectors[:, 0].tolist() == [1.0, 2.0, 3.0, 2.0]
+
+
+def test_hashing_fallback_is_deterministic():
+    first = EmbeddingService(hashing_dim=64)
+    second = EmbeddingService(hashing_dim=64)
+
+    a = first.embed_query("blood pressure control")
+    assert a.shape == (64,)
+    assert np.array_equal(a, second.embed_query("blood pressure control"))
+    assert not first.uses_model
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    service = EmbeddingService(model=CountingModel(), model_name="m", cache_dir=str(tmp_path))
+    with open(service.cache_path, "wb") as f:
+        f.write(b"not a numpy file")
+
+    assert service.embed_documents(DOCS[:2]).shape == (2, 8)
@@ -0,0 +1,122 @@
+"""
+Unit tests for hybrid BM25 + vector retrieval with reciprocal rank fusion.
+"""
+
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.embedding_service import EmbeddingService
+from services.hybrid_retriever import (
+    BM25Index,
+    HybridRetriever,
+    get_hedis_spec_retriever,
+    hedis_spec_chunks,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from services.context_engine import HierarchicalContextBuilder
+
+
+DOCS = [
+    {"id": "cbp", "content": "CBP Controlling High Blood Pressure: BP below 140/90", "metadata": {"measure": "CBP"}},
+    {"id": "gsd", "content": "GSD glycemic status HbA1c control, CPT II 3044F for HbA1c < 7", "metadata": {"measure": "GSD"}},
+    {"id": "rasa", "content": "PDC-RASA adherence to RAS antagonists", "metadata": {"measure": "PDC-RASA"}},
+    {"id": "bcs", "content": "BCS breast cancer screening mammography", "metadata": {"measure": "BCS"}},
+]
+
+
+def test_tokenize_keeps_codes_whole_and_split():
+    terms = tokenize("CPT 3044F and PDC-RASA, ICD-10 E11.9.")
+
+    assert "3044f" in terms
+    assert {"pdc-rasa", "pdc", "rasa"} <= set(terms)
+    assert {"e11.9", "e11"} <= set(terms)
+    assert "and" not in terms
+
+
+def test_bm25_exact_code_ranks_first():
+    index = BM25Index()
+    index.add_many((d["id"], d["content"], d["metadata"]) for d in DOCS)
+
+    assert index.search("CPT 3044F")[0][0] == "gsd"
+    assert index.search("pdc-rasa")[0][0] == "rasa"
+    assert index.search("unrelated words") == []
+
+
+def test_bm25_incremental_add_replace_and_remove():
+    index = BM25Index()
+    index.add("a", "blood pressure control")
+    index.add("b", "eye exam")
+    index.add("a", "kidney health evaluation")  # replaces "a"
+
+    assert len(index) == 2
+    assert index.search("blood pressure") == []
+    assert index.search("kidney")[0][0] == "a"
+
+    index.remove("b")
+    assert index.search("eye exam") == []
+
+
+def test_bm25_metadata_filter():
+    index = BM25Index()
+    index.add_many((d["id"], d["content"], d["metadata"]) for d in DOCS)
+
+    hits = index.search("screening control", where={"measure": "BCS"})
+
+    assert [doc_id for doc_id, _ in hits] == ["bcs"]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a", "d"], ["b"]])
+
+    assert fused[0][0] == "b"
+    assert [doc_id for doc_id, _ in fused][:2] == ["b", "a"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61 + 1 / 61)
+
+
+def test_hybrid_retrieve_fuses_both_rankings():
+    retriever = HybridRetriever(embedding_service=EmbeddingService())
+    assert retriever.add_documents(DOCS) == 4
+    assert retriever.add_documents(DOCS) == 0  # unchanged documents are skipped
+
+    results = retriever.retrieve("3044F HbA1c", top_k=2)
+
+    assert results[0]["id"] == "gsd"
+    assert results[0]["metadata"]["measure"] == "GSD"
+    assert results[0]["retrieval"]["bm25_rank"] == 1
+    assert results[0]["retrieval"]["vector_rank"] is not None
+    assert 0 < results[0]["score"] <= 1.0
+
+
+def test_bm25_only_retriever():
+    retriever = HybridRetriever()
+    retriever.add_documents(DOCS)
+
+    results = retriever.retrieve("mammography", top_k=3)
+
+    assert [r["id"] for r in results] == ["bcs"]
+    assert results[0]["retrieval"]["vector_rank"] is None
+
+
+def test_hedis_spec_chunks_cover_value_sets():
+    chunks = {chunk["id"]: chunk for chunk in hedis_spec_chunks()}
+
+    assert "spec_GSD_overview" in chunks
+    assert "77067" in chunks["value_set_mammography_cpt_codes"]["content"]
+
+    retriever = get_hedis_spec_retriever()
+    assert retriever.retrieve("CPT 77067", top_k=1)[0]["metadata"]["measure"] == "BCS"
+    assert retriever.retrieve("LOINC 4548-4", top_k=1)[0]["metadata"]["measure"] == "GSD"
+
+
+def test_context_builder_layer_3_uses_spec_retriever():
+    builder = HierarchicalContextBuilder()
+
+    layer_3 = builder._get_query_specific_context("Kidney health evaluation eGFR")
+
+    assert layer_3["retrieved_docs"]
+    assert layer_3["retrieved_docs"][0]["metadata"]["measure"] == "KED"
@@ -0,0 +1,116 @@
+"""
+Unit tests for the single-pass PHI scanner.
+"""
+
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.security.phi_scanner import (
+    DEFAULT_PATTERNS,
+    QUERY_PATTERNS,
+    PHIScanner,
+    get_phi_scanner,
+)
+from services.security.phi_validator import PHIValidator
+
+
+def test_scan_text_returns_typed_findings_with_offsets():
+    text = "Member MBR1234567, SSN 123-45-6789, born 1/5/1990"
+    findings = PHIScanner().scan_text(text)
+
+    assert [f.type for f in findings] == ["MEMBER_ID", "SSN", "DOB"]
+    assert [text[f.start:f.end] for f in findings] == ["MBR1234567", "123-45-6789", "1/5/1990"]
+
+
+def test_pattern_scoped_ignore_case():
+    scanner = PHIScanner()
+
+    assert [f.type for f in scanner.scan_text("mbr1234567")] == ["MEMBER_ID"]
+    # NAME stays case-sensitive
+    assert scanner.scan_text("john doe") == []
+
+
+def test_nested_structures_report_paths_not_text():
+    content = {
+        "summary": "No PHI here",
+        "query_results": [{"measure": "GSD", "ssn": "123-45-6789"}],
+        "ids": (12345678901,),
+    }
+
+    findings = get_phi_scanner(QUERY_PATTERNS).scan(content)
+
+    assert {(f.type, f.path) for f in findings} == {
+        ("SSN", ("query_results", 0, "ssn")),
+        ("MEMBER_ID", ("ids", 0)),
+    }
+
+
+def test_dataframe_columns_scanned_with_row_positions():
+    frame = pd.DataFrame({
+        "measure": ["GSD", "CBP", "KED"],
+        "note": ["ok", "call 123-45-6789", None],
+        "count": [10, 123456789, 3],
+    })
+
+    findings = PHIScanner().scan_dataframe(frame)
+
+    assert sorted((f.type, f.path) for f in findings) == [
+        ("SSN", ("count", 1)),
+        ("SSN", ("note", 1)),
+    ]
+    note = [f for f in findings if f.path == ("note", 1)][0]
+    assert "call 123-45-6789"[note.start:note.end] == "123-45-6789"
+
+
+def test_dataframe_cells_never_match_across_rows():
+    frame = pd.DataFrame({"first": ["John"], "last": ["Doe"]})
+    stacked = pd.DataFrame({"word": ["Smith", "Jones"]})
+
+    assert PHIScanner(QUERY_PATTERNS).scan(frame) == []
+    assert PHIScanner(QUERY_PATTERNS).scan(stacked) == []
+
+
+def test_false_positive_hook_drops_matches():
+    scanner = PHIScanner(DEFAULT_PATTERNS, false_positive=lambda p, m: m == "Total Cost")
+
+    assert scanner.scan_text("Total Cost") == []
+    assert len(scanner.scan_text("Jane Smith")) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 50])
+def test_stream_scanner_matches_whole_text_scan(chunk_size):
+    text = "Outreach for MBR1234567 then 123-45-6789; patient Jane Roe seen 10/02/2024. " * 3
+    scanner = PHIScanner()
+    stream = scanner.stream(holdback=32)
+
+    streamed = []
+    for start in range(0, len(text), chunk_size):
+        streamed.extend(stream.feed(text[start:start + chunk_size]))
+    streamed.extend(stream.close())
+
+    expected = scanner.scan_text(text)
+    assert [(f.type, f.start, f.end) for f in streamed] == [(f.type, f.start, f.end) for f in expected]
+    assert stream.has_phi
+
+
+def test_stream_scanner_holds_back_possible_prefix():
+    stream = PHIScanner().stream(holdback=16)
+
+    # Could still grow into a longer token; held until 16 more chars arrive
+    assert stream.feed("SSN is 123-45-6789") == []
+    assert [f.type for f in stream.feed(" and more text after it")] == ["SSN"]
+    assert stream.feed(", ends with 1/5/1990") == []
+    assert [f.type for f in stream.close()] == ["DOB"]
+
+
+def test_validator_reports_findings_and_keeps_error_format():
+    result = PHIValidator().validate_no_phi({"notes": ["SSN: 123-45-6789"]}, log_violations=False)
+
+    assert not result.is_valid
+    assert result.errors == ["Social Security Number pattern detected (SSN)"]
+    assert result.findings[0].path == ("notes", 0)
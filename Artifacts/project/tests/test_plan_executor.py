@@ -0,0 +1,164 @@
+"""
+Unit tests for the DAG plan executor.
+"""
+
+import threading
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.plan_executor import (
+    PlanExecutor,
+    PlanStepTimeout,
+    build_dependency_graph,
+    step_signature
+)
+
+
+def make_plan():
+    """Rule-based plan shape: every step declares the previous one as a dependency."""
+    return [
+        {"id": "step_1", "type": "retrieve", "params": {"measure_id": "GSD"}, "depends_on": []},
+        {"id": "step_2", "type": "query_db", "params": {"query_type": "gaps"}, "depends_on": ["step_1"]},
+        {"id": "step_3", "type": "calculate", "params": {"operation": "roi", "intervention_count": "from_step_data"}, "depends_on": ["step_2"]},
+        {"id": "step_4", "type": "validate", "params": {"measure_id": "GSD", "data": "from_step_data"}, "depends_on": ["step_3"]},
+        {"id": "step_5", "type": "synthesize", "params": {"context": "all_results"}, "depends_on": ["step_1", "step_2", "step_3", "step_4"]},
+    ]
+
+
+class TestDependencyGraph:
+    """Test dependency derivation from step inputs/outputs."""
+
+    def test_independent_steps_have_no_dependencies(self):
+        graph = build_dependency_graph(make_plan()[:4])
+
+        assert graph["step_1"] == []
+        assert graph["step_2"] == []  # declared depends_on is ignored
+        assert graph["step_3"] == ["step_2"]
+        assert graph["step_4"] == ["step_2", "step_3"]
+
+    def test_explicit_inputs_override_defaults(self):
+        steps = [
+            {"id": "a", "type": "retrieve", "params": {}},
+            {"id": "b", "type": "calculate", "params": {}, "inputs": ["docs"]},
+        ]
+        assert build_dependency_graph(steps)["b"] == ["a"]
+
+
+class TestPlanExecutor:
+    """Test concurrent execution, timeouts and retries."""
+
+    def test_independent_steps_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def run_step(step):
+            if step["type"] in ("retrieve", "query_db"):
+                # Both must be running at once to pass the barrier
+                barrier.wait()
+            return {"step": step["id"]}
+
+        execution = PlanExecutor(max_workers=4).execute(make_plan(), run_step)
+
+        assert [o.step_id for o in execution.outcomes] == ["step_1", "step_2", "step_3", "step_4"]
+        assert all(o.succeeded for o in execution.outcomes)
+
+    def test_dependencies_finish_before_dependents(self):
+        finished = []
+
+        def run_step(step):
+            time.sleep(0.02 if step["type"] == "query_db" else 0)
+            finished.append(step["id"])
+            return step["id"]
+
+        PlanExecutor(max_workers=4).execute(make_plan(), run_step)
+
+        assert finished.index("step_2") < finished.index("step_3") < finished.index("step_4")
+
+    def test_critical_path_is_longest_chain(self):
+        delays = {"step_1": 0.08, "step_2": 0.02, "step_3": 0.02, "step_4": 0.02}
+
+        def run_step(step):
+            time.sleep(delays[step["id"]])
+
+        execution = PlanExecutor(max_workers=4).execute(make_plan(), run_step)
+
+        # retrieve (80ms) alone outweighs query_db -> calculate -> validate (60ms)
+        assert execution.critical_path == ["step_1"]
+        assert execution.wall_time < execution.serial_time
+        summary = execution.summary()
+        assert summary["critical_path_ms"] >= 80
+
+    def test_failed_step_is_retried_alone(self):
+        calls = {}
+
+        def run_step(step):
+            calls[step["id"]] = calls.get(step["id"], 0) + 1
+            if step["id"] == "step_3" and calls["step_3"] == 1:
+                raise RuntimeError("transient")
+            return step["id"]
+
+        execution = PlanExecutor(max_step_retries=1).execute(make_plan(), run_step)
+
+        assert all(o.succeeded for o in execution.outcomes)
+        assert calls == {"step_1": 1, "step_2": 1, "step_3": 2, "step_4": 1}
+
+    def test_retry_on_filters_exceptions(self):
+        def run_step(step):
+            raise KeyError("not retryable")
+
+        executor = PlanExecutor(max_step_retries=2, retry_on=(RuntimeError,))
+        execution = executor.execute(make_plan()[:1], run_step)
+
+        assert execution.outcomes[0].status == "failed"
+        assert execution.outcomes[0].attempts == 1
+
+    def test_step_timeout(self):
+        release = threading.Event()
+
+        def run_step(step):
+            if step["id"] == "step_1":
+                release.wait(2)
+            return step["id"]
+
+        start = time.perf_counter()
+        execution = PlanExecutor(step_timeout=0.1, max_step_retries=0).execute(make_plan(), run_step)
+        release.set()
+
+        outcome = execution.outcomes[0]
+        assert outcome.status == "timed_out"
+        assert isinstance(outcome.error, PlanStepTimeout)
+        assert time.perf_counter() - start < 1.0
+        assert all(o.succeeded for o in execution.outcomes[1:])
+
+    def test_timed_out_step_is_not_retried(self):
+        release = threading.Event()
+        calls = []
+
+        def run_step(step):
+            calls.append(step["id"])
+            release.wait(2)
+            return step["id"]
+
+        executor = PlanExecutor(step_timeout=0.1, max_step_retries=2)
+        execution = executor.execute(make_plan()[:1], run_step)
+        release.set()
+
+        assert execution.outcomes[0].status == "timed_out"
+        assert execution.outcomes[0].attempts == 1
+        assert calls == ["step_1"]
+
+    def test_completed_steps_are_not_rerun(self):
+        calls = []
+        plan = make_plan()
+        completed = {step_signature(plan[0]): "cached docs"}
+
+        execution = PlanExecutor().execute(plan, lambda step: calls.append(step["id"]), completed=completed)
+
+        assert "step_1" not in calls
+        assert execution.outcomes[0].status == "cached"
+        assert execution.outcomes[0].result == "cached docs"
+        # New successes are recorded for the next attempt
+        assert step_signature(plan[1]) in completed
@@ -0,0 +1,177 @@
+"""
+Unit tests for the two-tier query result cache.
+"""
+
+import time
+
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.query_cache import (
+    DataVersionRegistry,
+    QueryResultCache,
+    hashed_embedding,
+    is_degraded_result,
+    normalize_query,
+    query_entities,
+    register_change_probe
+)
+
+
+@pytest.fixture
+def versions():
+    return DataVersionRegistry(probe_interval=0)
+
+
+@pytest.fixture
+def cache(versions):
+    return QueryResultCache(versions=versions, similarity_threshold=0.9)
+
+
+class TestKeys:
+    """Test query normalization, entities and the local embedding."""
+
+    def test_normalize_query(self):
+        assert normalize_query("  What is the ROI of GSD outreach?? ") == "what is the roi of gsd outreach"
+
+    def test_entities_are_case_insensitive(self):
+        assert query_entities("roi of gsd in 2025") == query_entities("ROI of GSD in 2025") == ("2025", "GSD")
+
+    def test_rephrasings_are_similar(self):
+        a = hashed_embedding("what is the ROI of GSD outreach?")
+        b = hashed_embedding("What's the ROI for GSD outreach")
+        c = hashed_embedding("how many gaps are open for GSD")
+        assert float(a @ b) > 0.9
+        assert float(a @ c) < 0.5
+
+
+class TestQueryResultCache:
+    """Test exact/semantic tiers, TTL and invalidation."""
+
+    def test_exact_hit(self, cache):
+        cache.put("What is the ROI of GSD outreach?", {"answer": 1})
+
+        result, info = cache.get("what is the roi of gsd outreach")
+        assert result == {"answer": 1}
+        assert info["tier"] == "exact"
+
+    def test_semantic_hit(self, cache):
+        cache.put("What is the ROI of GSD outreach?", {"answer": 1})
+
+        result, info = cache.get("What's the ROI for GSD outreach")
+        assert result == {"answer": 1}
+        assert info["tier"] == "semantic"
+        assert info["similarity"] >= 0.9
+
+    def test_different_measure_never_matches(self, cache):
+        cache.put("What is the ROI of GSD outreach?", {"answer": 1})
+
+        assert cache.get("What is the ROI of CBP outreach?") is None
+
+    def test_scope_is_part_of_key(self, cache):
+        cache.put("ROI of GSD outreach", {"answer": 1}, scope="basic")
+
+        assert cache.get("ROI of GSD outreach", scope="agentic") is None
+
+    def test_results_are_copied(self, cache):
+        cache.put("ROI of GSD outreach", {"answer": [1]})
+        result, _ = cache.get("ROI of GSD outreach")
+        result["answer"].append(2)
+
+        assert cache.get("ROI of GSD outreach")[0] == {"answer": [1]}
+
+    def test_ttl_expiry(self, versions):
+        cache = QueryResultCache(versions=versions, ttl=0.01)
+        cache.put("ROI of GSD outreach", {"answer": 1})
+        time.sleep(0.02)
+
+        assert cache.get("ROI of GSD outreach") is None
+        assert cache.stats["expirations"] == 1
+
+    def test_table_change_invalidates(self, cache, versions):
+        cache.put("ROI of GSD outreach", {"answer": 1})
+        versions.bump("member_gaps")
+
+        assert cache.get("ROI of GSD outreach") is None
+        assert cache.stats["invalidations"] == 1
+
+    def test_unrelated_table_change_keeps_entries(self, cache, versions):
+        cache.put("ROI of GSD outreach", {"answer": 1})
+        versions.bump("audit_log")
+
+        assert cache.get("ROI of GSD outreach") is not None
+
+    def test_probe_change_invalidates(self, cache, versions):
+        writes = {"member_gaps": 10}
+        versions.add_probe(lambda: dict(writes))
+        cache.put("ROI of GSD outreach", {"answer": 1})
+        writes["member_gaps"] += 1
+
+        assert cache.get("ROI of GSD outreach") is None
+
+    def test_change_probe_registration_is_idempotent(self, cache, versions):
+        calls = []
+        writes = {"writes": 5}
+
+        def run_query(sql, params):
+            calls.append(params["tables"])
+            return [dict(writes)]
+
+        register_change_probe(run_query, registry=versions)
+        register_change_probe(run_query, registry=versions)
+        cache.put("ROI of GSD outreach", {"answer": 1})
+        assert len(calls) == 1
+        writes["writes"] += 1
+
+        assert cache.get("ROI of GSD outreach") is None
+        assert calls[-1] == ["member_gaps", "measure_performance"]
+
+    def test_failing_probe_backs_off(self):
+        versions = DataVersionRegistry(probe_interval=60)
+        calls = []
+
+        def probe():
+            calls.append(1)
+            raise ConnectionError("db down")
+
+        versions.add_probe(probe)
+        versions.token()
+        versions.token()
+        assert len(calls) == 1
+
+    def test_degraded_results_are_detected(self):
+        assert not is_degraded_result({"response": "ok", "step_failures": [], "metadata": {"validation_warning": None}})
+        assert is_degraded_result({"response": "ok", "error": "boom"})
+        assert is_degraded_result({"metadata": {"validation_warning": "low confidence"}})
+        assert is_degraded_result({"step_failures": [{"step_id": 1}]})
+        assert is_degraded_result({"fallback_from": "agentic_rag"})
+
+    def test_lru_bound(self, versions):
+        cache = QueryResultCache(versions=versions, max_entries=2)
+        for measure in ("GSD", "CBP", "KED"):
+            cache.put(f"ROI of {measure} outreach", measure)
+
+        assert cache.get("ROI of GSD outreach") is None
+        assert cache.stats["evictions"] == 1
+
+    def test_get_or_compute_and_stats(self, cache):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"answer": 1}
+
+        cache.get_or_compute("ROI of GSD outreach", compute)
+        cache.get_or_compute("ROI of GSD outreach", compute)
+        cache.get_or_compute("What's the ROI for GSD outreach?", compute)
+
+        assert len(calls) == 1
+        stats = cache.get_stats()
+        assert stats["exact_hits"] == 1
+        assert stats["semantic_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.667, abs=0.001)
@@ -0,0 +1,137 @@
+"""
+Unit tests for the local vector index (flat and IVF-flat backends).
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.vector_index import (
+    FlatIndex,
+    IVFFlatIndex,
+    VectorIndex,
+    create_index,
+    load_or_create_index,
+)
+
+
+def clustered(n=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    labels = rng.integers(0, 20, n)
+    vectors = centers[labels] + 0.1 * rng.normal(size=(n, dim))
+    return [f"doc_{i}" for i in range(n)], vectors.astype(np.float32), labels
+
+
+def test_flat_search_returns_exact_nearest_first():
+    index = FlatIndex()
+    index.add(["a", "b", "c"], np.array([[1, 0], [0, 1], [1, 1]], dtype=np.float32))
+
+    hits = index.search(np.array([1.0, 0.1]), k=2)
+
+    assert [hit.id for hit in hits] == ["a", "c"]
+    assert hits[0].score == pytest.approx(0.995, abs=1e-3)
+
+
+def test_batch_inserts_accumulate_and_readd_overwrites():
+    index = FlatIndex()
+    index.add(["a", "b"], np.eye(2))
+    index.add(["c"], np.array([[1.0, 1.0]]), metadatas=[{"measure": "CBP"}])
+    index.add(["a"], np.array([[0.0, 1.0]]), metadatas=[{"measure": "GSD"}])
+
+    assert len(index) == 3
+    hits = index.search(np.array([0.0, 1.0]), k=3)
+    assert {hit.id for hit in hits[:2]} == {"a", "b"}
+    assert index.search(np.array([0.0, 1.0]), k=1, where={"measure": "GSD"})[0].id == "a"
+
+
+def test_metadata_filter_dict_list_and_predicate():
+    index = FlatIndex()
+    index.add(
+        ["x", "y", "z"],
+        np.array([[1, 0], [0.9, 0.1], [0.8, 0.2]]),
+        metadatas=[{"measure": "GSD"}, {"measure": "CBP"}, {"measure": "KED"}],
+    )
+    query = np.array([1.0, 0.0])
+
+    assert [h.id for h in index.search(query, k=3, where={"measure": "CBP"})] == ["y"]
+    assert [h.id for h in index.search(query, k=3, where={"measure": ["CBP", "KED"]})] == ["y", "z"]
+    assert [h.id for h in index.search(query, k=3, where=lambda m: m["measure"] != "GSD")] == ["y", "z"]
+    assert index.search(query, k=3, where={"measure": "BCS"}) == []
+
+
+def test_dimension_mismatch_raises():
+    index = FlatIndex(dim=4)
+    with pytest.raises(ValueError):
+        index.add(["a"], np.ones((1, 3)))
+
+
+def test_ivf_trains_and_keeps_high_recall():
+    ids, vectors, _ = clustered()
+    flat = FlatIndex()
+    flat.add(ids, vectors)
+    ivf = IVFFlatIndex(nlist=20, nprobe=4, train_size=1000)
+    ivf.add(ids[:500], vectors[:500])
+    assert not ivf.is_trained
+    ivf.add(ids[500:], vectors[500:])
+    assert ivf.is_trained
+
+    queries = vectors[::97]
+    exact = flat.search_batch(queries, k=5)
+    approx = ivf.search_batch(queries, k=5)
+    recall = np.mean([
+        len({h.id for h in e} & {h.id for h in a}) / 5 for e, a in zip(exact, approx)
+    ])
+    assert recall >= 0.9
+
+
+def test_ivf_assigns_inserts_after_training():
+    ids, vectors, _ = clustered(n=1200)
+    ivf = IVFFlatIndex(nlist=20, nprobe=2, train_size=1000)
+    ivf.add(ids[:1000], vectors[:1000])
+    ivf.add(ids[1000:], vectors[1000:])
+
+    assert sum(len(rows) for rows in ivf._lists) == 1200
+    assert ivf.search(vectors[1100], k=1)[0].id == "doc_1100"
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf_flat"])
+def test_save_and_load_round_trip(tmp_path, kind):
+    ids, vectors, labels = clustered(n=1500)
+    index = create_index(kind) if kind == "flat" else create_index(kind, train_size=1000)
+    index.add(ids, vectors, metadatas=[{"cluster": int(label)} for label in labels], documents=ids)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    loaded = VectorIndex.load(path)
+
+    assert type(loaded) is type(index)
+    assert len(loaded) == 1500
+    before = index.search(vectors[7], k=3, where={"cluster": int(labels[7])})
+    after = loaded.search(vectors[7], k=3, where={"cluster": int(labels[7])})
+    assert [h.id for h in after] == [h.id for h in before]
+    assert after[0].document == "doc_7"
+
+
+def test_load_or_create_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "index.npz"
+    path.write_bytes(b"not an index")
+
+    index = load_or_create_index(str(path), kind="flat")
+
+    assert isinstance(index, FlatIndex)
+    assert len(index) == 0
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        create_index("hnsw")
+
+
+def test_base_index_is_abstract():
+    with pytest.raises(TypeError):
+        VectorIndex()